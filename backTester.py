@@ -1,66 +1,180 @@
-import csv
+import argparse
+import dataclasses
 import datetime
 import decimal
+import functools
 import logging
 import queue
+import time
+from base import money
+from base import optionChain
 from dataHandler import csvData
+from dataHandler import dataHandler
+from dataHandler import prefetchData
 from events import event as event_class
+from events import eventBus
 from riskManager import putVerticalRiskManagement
 from strategyManager import putVerticalStrat
+from portfolioManager import monitoringRecorder
 from portfolioManager import portfolio
-from collections import defaultdict
+from pricing import blackScholes
+from utils import instrumentation as instrumentationModule
+from utils import sessionLogging
+from typing import Callable, Optional, Sequence, Text, Union
 
 """
 This file runs the end-to-end backtesting session.
 """
 
 
+@dataclasses.dataclass
+class BackTestParameters(object):
+    """Parameters of a backtesting session; the defaults are the parameters of the sample SPX backtest.
+
+    Attributes:
+      filename:  path to the CSV used in backtesting, or a glob pattern / list of paths of CSVs merged by date (see
+                 CsvData; the chain cache used by sweeps needs a single CSV).
+      dataProviderPath:  path to data provider JSON file.
+      dataProvider:  historical data provider (e.g, provider of CSV).
+      startDateTime:  date to start the backtest (mm/dd/YYYY).
+      maxCapitalToUse:  percent (as a decimal) of net liq which can be used in trades.
+      maxCapitalToUsePerTrade:  percent (as a decimal) of net liq which can be used per trade / strategy.
+      startingCapital:  capital when starting the backtest.
+      strategyName:  strategy to backtest (only PUT_VERTICAL_STRAT is supported).
+      riskManagement:  name of the PutVerticalManagementStrategyTypes used to manage the trades.
+      closeDuration:  number of days from expiration to close the trade (<= 0 to disable).
+      optPutToBuyDelta, maxPutToBuyDelta, minPutToBuyDelta:  optimal, maximum and minimum delta of the put to buy.
+      optPutToSellDelta, maxPutToSellDelta, minPutToSellDelta:  optimal, maximum and minimum delta of the put to sell.
+      underlyingTicker:  which underlying to use for the strategy.
+      orderQuantity:  number of verticals to sell.
+      contractMultiplier:  scaling factor for number of "shares" represented by an option.
+      optimalDTE, minimumDTE, maximumDTE:  optimal, minimum and maximum days to expiration to put on the strategy.
+      maxBidAsk:  maximum price to allow between bid and ask prices of option.
+      minCreditDebit:  minimum credit / debit to receive upon trade entry.
+      pricingSource:  brokerage used for commissions / fees.
+      pricingSourceConfigFile:  file path to the JSON config file for commission / fees.
+      logFile:  file used for logging the session; None to leave logging unconfigured.
+      loggingMode:  how the log records are written: TEXT, JSON_LINES (formatted and written on a background thread) or
+                    SILENT (logging disabled, e.g., for sweeps).
+      maxLogRecordsPerSecond:  maximum number of log records of each category (logger, level and message) written per
+                               second; None for no limit.
+      monitoringFile:  CSV file (or Parquet directory) the position monitoring is written to while the session runs; None
+                       to only keep it in memory.
+      monitoringFormat:  format of the monitoringFile (see monitoringRecorder.MonitoringFormats).
+      keepMonitoringHistory:  keep the position monitoring in memory (session.positionMonitoring) after writing it; None
+                              to keep it only if there is no monitoringFile, so that the memory used does not grow with
+                              the run when the monitoring is written.
+      aggregationMode:  how the portfolio totals are computed on each tick (see portfolio.AggregationModes).
+      verifyAggregation:  check that the INCREMENTAL or POSITION_BOOK portfolio totals match a full recompute on each
+                          tick.
+      moneyType:  type of the prices and amounts of money: DECIMAL (decimal.Decimal) or FIXED_POINT (money.Money).
+      greeksMode:  greeks of the options: read from the CSV (CSV), computed where the CSV has none (FILL_MISSING), or
+                   computed for all options (OVERRIDE); see pricing.blackScholes.
+      riskFreeRate:  continuously compounded risk-free rate used to compute the greeks.
+      dividendYield:  continuous dividend yield used to compute the greeks of options on a spot underlying.
+      fillImpliedVol:  solve the missing or zero implied volatilities of the options from their prices (see
+                       pricing.impliedVolatility).
+      eventQueueType:  queue of the events: EVENT_BUS (single-threaded dispatch, no locking) or THREAD_SAFE_QUEUE
+                       (queue.Queue, for events placed from other threads).
+    """
+    filename: Union[Text, Sequence[Text]] = './sampleData/spx_sample_ivolatility.csv'
+    dataProviderPath: Text = './dataHandler/dataProviders.json'
+    dataProvider: Text = 'iVolatility'
+    startDateTime: Text = '01/01/1990'
+    maxCapitalToUse: decimal.Decimal = decimal.Decimal(0.75)  # Up to 75% of net liq can be used in trades.
+    maxCapitalToUsePerTrade: decimal.Decimal = decimal.Decimal(0.40)  # 40% max capital to use per trade / strategy.
+    startingCapital: int = 1000000
+    strategyName: Text = 'PUT_VERTICAL_STRAT'
+    riskManagement: Text = 'HOLD_TO_EXPIRATION'
+    closeDuration: int = 0  # Number of days from expiration to close the trade.
+    optPutToBuyDelta: float = -0.01
+    maxPutToBuyDelta: float = -0.1
+    minPutToBuyDelta: float = -0.005
+    optPutToSellDelta: float = -0.25
+    maxPutToSellDelta: float = -0.30
+    minPutToSellDelta: float = -0.11
+    underlyingTicker: Text = 'SPX'
+    orderQuantity: int = 1
+    contractMultiplier: int = 100
+    optimalDTE: int = 25
+    minimumDTE: int = 20
+    maximumDTE: int = 55
+    maxBidAsk: decimal.Decimal = decimal.Decimal(15)  # Set to a large value to effectively disable.
+    minCreditDebit: decimal.Decimal = decimal.Decimal(1.00)
+    pricingSource: Text = 'tastyworks'
+    pricingSourceConfigFile: Text = './dataHandler/pricingConfig.json'
+    logFile: Optional[Text] = 'log.log'
+    loggingMode: sessionLogging.LoggingModes = sessionLogging.LoggingModes.TEXT
+    maxLogRecordsPerSecond: Optional[int] = None
+    monitoringFile: Optional[Text] = None
+    monitoringFormat: monitoringRecorder.MonitoringFormats = monitoringRecorder.MonitoringFormats.CSV
+    keepMonitoringHistory: Optional[bool] = None
+    aggregationMode: portfolio.AggregationModes = portfolio.AggregationModes.FULL_RECOMPUTE
+    verifyAggregation: bool = False
+    moneyType: money.MoneyTypes = money.MoneyTypes.DECIMAL
+    greeksMode: blackScholes.GreeksModes = blackScholes.GreeksModes.CSV
+    riskFreeRate: float = 0.0
+    dividendYield: float = 0.0
+    fillImpliedVol: bool = False
+    eventQueueType: eventBus.EventQueueTypes = eventBus.EventQueueTypes.EVENT_BUS
+
+
 class BackTestSession(object):
     """Class for holding all parameters of backtesting session."""
 
-    def __init__(self):
+    def __init__(self, parameters: Optional[BackTestParameters] = None,
+                 createDataHandler: Optional[Callable[[eventBus.EventQueue], dataHandler.DataHandler]] = None):
+        """Sets up the data handler, portfolio and strategy of the session.
 
-        # Create queue to hold events (ticks, signals, etc.).
-        self.eventQueue = queue.Queue()
+        Attributes:
+          parameters:  parameters of the session; defaults to BackTestParameters().
+          createDataHandler:  function which creates the data handler given the event queue; defaults to reading
+                              parameters.filename with CsvData.
+        """
+        if parameters is None:
+            parameters = BackTestParameters()
+        self.parameters = parameters
 
-        # Create CsvData class object.
-        dataProviderPath = './dataHandler/dataProviders.json'
-        dataProvider = 'iVolatility'
-        filename ='./sampleData/spx_sample_ivolatility.csv'
-        self.dataHandler = csvData.CsvData(csvPath=filename, dataProviderPath=dataProviderPath,
-                                           dataProvider=dataProvider, eventQueue=self.eventQueue)
+        # Create queue to hold events (ticks, signals, etc.).
+        self.eventQueue = eventBus.createEventQueue(parameters.eventQueueType)
 
         # Parameters for strategy.
-        startDateTime = '01/01/1990'
-        startDateTimeFormatted = datetime.datetime.strptime(startDateTime, '%m/%d/%Y')
+        startDateTimeFormatted = datetime.datetime.strptime(parameters.startDateTime, '%m/%d/%Y')
+
+        # Create CsvData class object. Option chains before the startDateTime are skipped by the data handler.
+        if createDataHandler is None:
+            # The next option chains are read on a worker thread while the current one is processed.
+            self.dataHandler = prefetchData.PrefetchData(
+                lambda handlerQueue: csvData.CsvData(csvPath=parameters.filename,
+                                                     dataProviderPath=parameters.dataProviderPath,
+                                                     dataProvider=parameters.dataProvider, eventQueue=handlerQueue,
+                                                     loaderType=csvData.LoaderTypes.COLUMNAR,
+                                                     startDateTime=startDateTimeFormatted, slottedOptions=True,
+                                                     moneyType=parameters.moneyType,
+                                                     greeksMode=parameters.greeksMode,
+                                                     riskFreeRate=parameters.riskFreeRate,
+                                                     dividendYield=parameters.dividendYield,
+                                                     fillImpliedVol=parameters.fillImpliedVol),
+                self.eventQueue)
+        else:
+            self.dataHandler = createDataHandler(self.eventQueue)
         # Save maxCapitalToUse in the session since the run function requires it.
-        self.maxCapitalToUse = decimal.Decimal(0.75)  # Up to 75% of net liq can be used in trades.
-        maxCapitalToUsePerTrade = decimal.Decimal(0.40)  # 40% max capital to use per trade / strategy.
-        startingCapital = 1000000
-        strategyName = 'PUT_VERTICAL_STRAT'
-        riskManagement = 'HOLD_TO_EXPIRATION'
-        closeDuration = 0  # Number of days from expiration to close the trade.
-        optPutToBuyDelta = -0.01
-        maxPutToBuyDelta = -0.1
-        minPutToBuyDelta = -0.005
-        optPutToSellDelta = -0.25
-        maxPutToSellDelta = -0.30
-        minPutToSellDelta = -0.11
-        underlyingTicker = 'SPX'
-        orderQuantity = 1
-        contractMultiplier = 100
-        optimalDTE = 25
-        minimumDTE = 20
-        maximumDTE = 55
-        maxBidAsk = decimal.Decimal(15)  # Set to a large value to effectively disable.
-        minCreditDebit = decimal.Decimal(1.00)
+        self.maxCapitalToUse = parameters.maxCapitalToUse
+        maxCapitalToUsePerTrade = parameters.maxCapitalToUsePerTrade
+        startingCapital = parameters.startingCapital
+        strategyName = parameters.strategyName
+        riskManagement = parameters.riskManagement
+        closeDuration = parameters.closeDuration
 
         # Set up portfolio and position monitoring.
-        self.positionMonitoring = defaultdict(list)
-        pricingSource = 'tastyworks'
-        pricingSourceConfigFile = './dataHandler/pricingConfig.json'
-        self.portfolioManager = portfolio.Portfolio(decimal.Decimal(startingCapital), self.maxCapitalToUse,
-                                                    maxCapitalToUsePerTrade, positionMonitoring=self.positionMonitoring)
+        self.positionMonitoring = monitoringRecorder.MonitoringRecorder(
+            parameters.monitoringFile, parameters.monitoringFormat, keepHistory=parameters.keepMonitoringHistory,
+            moneyType=parameters.moneyType)
+        self.portfolioManager = portfolio.Portfolio(money.createMoney(startingCapital, parameters.moneyType),
+                                                    self.maxCapitalToUse, maxCapitalToUsePerTrade,
+                                                    positionMonitoring=self.positionMonitoring,
+                                                    aggregationMode=parameters.aggregationMode,
+                                                    verifyAggregation=parameters.verifyAggregation)
 
         if strategyName != 'PUT_VERTICAL_STRAT':
             raise ValueError('Strategy not supported.')
@@ -83,60 +197,132 @@ class BackTestSession(object):
                 closeDuration = None
             riskManagementStrategy = putVerticalRiskManagement.PutVerticalRiskManagement(riskManagement, closeDuration)
             self.strategyManager = putVerticalStrat.PutVerticalStrat(
-                self.eventQueue, optPutToBuyDelta, maxPutToBuyDelta, minPutToBuyDelta, optPutToSellDelta,
-                maxPutToSellDelta, minPutToSellDelta, underlyingTicker, orderQuantity, contractMultiplier,
-                riskManagementStrategy, pricingSource, pricingSourceConfigFile, startDateTimeFormatted, optimalDTE,
-                minimumDTE, maximumDTE, maxBidAsk=maxBidAsk, maxCapitalToUsePerTrade=maxCapitalToUsePerTrade,
-                minCreditDebit=minCreditDebit)
+                self.eventQueue, parameters.optPutToBuyDelta, parameters.maxPutToBuyDelta,
+                parameters.minPutToBuyDelta, parameters.optPutToSellDelta, parameters.maxPutToSellDelta,
+                parameters.minPutToSellDelta, parameters.underlyingTicker, parameters.orderQuantity,
+                parameters.contractMultiplier, riskManagementStrategy, parameters.pricingSource,
+                parameters.pricingSourceConfigFile, startDateTimeFormatted, parameters.optimalDTE,
+                parameters.minimumDTE, parameters.maximumDTE, maxBidAsk=parameters.maxBidAsk,
+                maxCapitalToUsePerTrade=maxCapitalToUsePerTrade, minCreditDebit=parameters.minCreditDebit)
 
             # Write params to log file to be able to track experiments.
             # Set up logging for the session.
-            logging.basicConfig(filename='log.log', level=logging.DEBUG)
+            sessionLogging.configureLogging(parameters.loggingMode, parameters.logFile,
+                                            parameters.maxLogRecordsPerSecond)
             logging.info(
-                'optPutToSellDelta: {} maxPutToSellDelta: {} minPutToSellDelta: {} optPutToBuyDelta: {}'
-                ' maxPutToBuyDelta: {} minPutToBuyDelta: {} underlyingTicker: {} orderQuantity: {}'
-                ' optimalDTE: {} minimumDTE: {} maximumDTE: {} maxBidAsk: {} minCredit: {} riskManagement: {}'
-                ' startingCapital: {} self.maxCapitalToUse: {} maxCapitalToUsePerTrade: {}'
-                ' pricingSource: {}'.format(
-                    optPutToSellDelta, maxPutToSellDelta, minPutToSellDelta, optPutToBuyDelta, maxPutToBuyDelta,
-                    minPutToBuyDelta, underlyingTicker, orderQuantity, optimalDTE, minimumDTE, maximumDTE, maxBidAsk,
-                    minCreditDebit, riskManagementStrategy.getRiskManagementType(), startingCapital,
-                    self.maxCapitalToUse, maxCapitalToUsePerTrade, pricingSource))
-
-
-def run(currentSession):
-    while 1:  # Infinite loop to keep processing items in queue.
-        try:
-            event = currentSession.eventQueue.get(False)
-        except queue.Empty:
-            # Get data for tick event.
-            if not currentSession.dataHandler.getNextTick():
-                # Get out of infinite while loop; no more data available.
-                break
+                'optPutToSellDelta: %s maxPutToSellDelta: %s minPutToSellDelta: %s optPutToBuyDelta: %s'
+                ' maxPutToBuyDelta: %s minPutToBuyDelta: %s underlyingTicker: %s orderQuantity: %s'
+                ' optimalDTE: %s minimumDTE: %s maximumDTE: %s maxBidAsk: %s minCredit: %s riskManagement: %s'
+                ' startingCapital: %s self.maxCapitalToUse: %s maxCapitalToUsePerTrade: %s'
+                ' pricingSource: %s',
+                parameters.optPutToSellDelta, parameters.maxPutToSellDelta, parameters.minPutToSellDelta,
+                parameters.optPutToBuyDelta, parameters.maxPutToBuyDelta, parameters.minPutToBuyDelta,
+                parameters.underlyingTicker, parameters.orderQuantity, parameters.optimalDTE,
+                parameters.minimumDTE, parameters.maximumDTE, parameters.maxBidAsk, parameters.minCreditDebit,
+                riskManagementStrategy.getRiskManagementType(), startingCapital, self.maxCapitalToUse,
+                maxCapitalToUsePerTrade, parameters.pricingSource)
+
+    def close(self) -> None:
+        """Writes the rest of the position monitoring and stops the worker thread of the data handler, also if the
+        session stopped early; the session cannot be run afterwards."""
+        self.positionMonitoring.close()
+        if isinstance(self.dataHandler, prefetchData.PrefetchData):
+            self.dataHandler.close()
+
+    def __enter__(self) -> 'BackTestSession':
+        return self
+
+    def __exit__(self, *exceptionInfo) -> None:
+        self.close()
+
+
+def run(currentSession, instrumentation: Optional[instrumentationModule.Instrumentation] = None):
+    """Process the events of a session until the data handler has no more data.
+
+    :param currentSession: session to run.
+    :param instrumentation: records the time spent in the data handler, strategy, portfolio, option creation and
+                            logging calls; nothing is recorded (and there is no cost) if None.
+    """
+    # The call sites are looked up once; with instrumentation, they are replaced by wrappers which record each call.
+    getNextTick = currentSession.dataHandler.getNextTick
+    updatePortfolio = currentSession.portfolioManager.updatePortfolio
+    checkForSignal = currentSession.strategyManager.checkForSignal
+    onSignal = currentSession.portfolioManager.onSignal
+    if instrumentation is not None:
+        Stages = instrumentationModule.Stages
+        getNextTick = instrumentation.wrap(Stages.GET_NEXT_TICK, getNextTick)
+        updatePortfolio = instrumentation.wrap(Stages.UPDATE_PORTFOLIO, updatePortfolio)
+        checkForSignal = instrumentation.wrap(Stages.CHECK_FOR_SIGNAL, checkForSignal)
+        onSignal = instrumentation.wrap(Stages.ON_SIGNAL, onSignal)
+        if isinstance(currentSession.dataHandler, prefetchData.PrefetchData):
+            # getNextTick only waits for the worker thread, so the reads of the wrapped data handler are also recorded,
+            # and the worker thread is part of the session.
+            currentSession.dataHandler.wrapReadTick(functools.partial(instrumentation.wrapThread, Stages.READ_TICK))
+        # Option creation and logging are recorded for the calls made on the threads of this session only.
+        instrumentation.addThread()
+        instrumentation.patchMethod(optionChain._ChainStore, 'getOption', Stages.OPTIONS)
+        instrumentation.patchMethod(optionChain._ChainStore, 'materialize', Stages.OPTIONS)
+        instrumentation.patchMethod(logging.Logger, 'handle', Stages.LOGGING)
+        runStartTime = time.perf_counter()
+
+    def onTick(event):
+        updatePortfolio(event)
+        # We pass the net liquidity and available buying power to the strategy.
+        availableBuyingPower = decimal.Decimal(currentSession.maxCapitalToUse) * (
+            currentSession.portfolioManager.netLiquidity) - (currentSession.portfolioManager.totalBuyingPower)
+        checkForSignal(event, currentSession.portfolioManager.netLiquidity, availableBuyingPower)
+
+    eventQueue = currentSession.eventQueue
+    try:
+        if isinstance(eventQueue, eventBus.EventBus):
+            eventQueue.register(event_class.EventTypes.TICK, onTick)
+            eventQueue.register(event_class.EventTypes.SIGNAL, onSignal)
+            # Dispatch the pending events; get the next tick once they are all handled, until there is no more data.
+            while eventQueue.dispatch() or getNextTick():
+                pass
         else:
-            if event is not None:
-                if event.type == event_class.EventTypes.TICK:
-                    currentSession.portfolioManager.updatePortfolio(event)
-                    # We pass the net liquidity and available buying power to the strategy.
-                    availableBuyingPower = decimal.Decimal(currentSession.maxCapitalToUse) * (
-                        currentSession.portfolioManager.netLiquidity) - currentSession.portfolioManager.totalBuyingPower
-                    currentSession.strategyManager.checkForSignal(event, currentSession.portfolioManager.netLiquidity,
-                                                                  availableBuyingPower)
-                elif event.type == event_class.EventTypes.SIGNAL:
-                    currentSession.portfolioManager.onSignal(event)
+            while 1:  # Infinite loop to keep processing items in queue.
+                try:
+                    event = eventQueue.get(False)
+                except queue.Empty:
+                    # Get data for tick event.
+                    if not getNextTick():
+                        # Get out of infinite while loop; no more data available.
+                        break
                 else:
-                    raise NotImplemented("Unsupported event.type '%s'." % event.type)
+                    if event is not None:
+                        if event.type == event_class.EventTypes.TICK:
+                            onTick(event)
+                        elif event.type == event_class.EventTypes.SIGNAL:
+                            onSignal(event)
+                        else:
+                            raise NotImplemented("Unsupported event.type '%s'." % event.type)
+    finally:
+        if instrumentation is not None:
+            instrumentation.record(instrumentationModule.Stages.RUN, runStartTime, time.perf_counter())
+            instrumentation.restore()
 
 
 if __name__ == "__main__":
-    # Create a session and configure the session.
-    session = BackTestSession()
+    parser = argparse.ArgumentParser(description='Run the backtesting session.')
+    parser.add_argument('--profile', action='store_true', help='print the time spent in each stage of the session.')
+    parser.add_argument('--profileSummary', default=None, help='write the stage statistics as JSON to this path.')
+    parser.add_argument('--trace', default=None, help='write a Chrome trace of the stage calls to this path.')
+    args = parser.parse_args()
+
+    sessionInstrumentation = None
+    if args.profile or args.profileSummary or args.trace:
+        sessionInstrumentation = instrumentationModule.Instrumentation(recordTrace=args.trace is not None)
 
-    # Run the session.
-    run(session)
+    # Create a session and configure the session; the position monitoring is written to monitoring.csv while the
+    # session runs.
+    with BackTestSession(BackTestParameters(monitoringFile='monitoring.csv')) as session:
+        # Run the session.
+        run(session, sessionInstrumentation)
 
-    # Write position monitoring to CSV file.
-    with open('monitoring.csv', 'w') as outfile:
-        writer = csv.writer(outfile)
-        writer.writerow(session.positionMonitoring.keys())
-        writer.writerows(zip(*session.positionMonitoring.values()))
+    if sessionInstrumentation is not None:
+        print(sessionInstrumentation.formatSummary())
+        if args.profileSummary:
+            sessionInstrumentation.writeSummary(args.profileSummary)
+        if args.trace:
+            sessionInstrumentation.writeTrace(args.trace)
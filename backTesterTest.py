@@ -0,0 +1,29 @@
+import threading
+import unittest
+import backTester
+from utils import sessionLogging
+
+
+class TestBackTestSession(unittest.TestCase):
+
+    def tearDown(self):
+        sessionLogging.closeLogging()
+
+    def getNumPrefetchThreads(self):
+        return sum(thread.name == 'PrefetchData' and thread.is_alive() for thread in threading.enumerate())
+
+    def testCloseStopsReadingAhead(self):
+        """Tests that leaving the session stops the worker thread of the data handler, also if the session stopped
+        early."""
+        numThreads = self.getNumPrefetchThreads()
+        with self.assertRaisesRegex(RuntimeError, 'Stopped early.'):
+            with backTester.BackTestSession(backTester.BackTestParameters(logFile=None)) as session:
+                self.assertTrue(session.dataHandler.getNextTick())
+                self.assertEqual(self.getNumPrefetchThreads(), numThreads + 1)
+                raise RuntimeError('Stopped early.')
+        self.assertEqual(self.getNumPrefetchThreads(), numThreads)
+        self.assertFalse(session.dataHandler.getNextTick())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,266 @@
+import decimal
+import enum
+import math
+import numpy as np
+import sys
+from typing import Any, Optional, Text, Tuple, Union
+
+"""
+This file defines a fixed-point money type which holds an integer number of ten-thousandths (of a dollar).
+"""
+
+DECIMAL_PLACES = 4
+SCALE = 10 ** DECIMAL_PLACES
+
+# Hash of 1 / SCALE in Python's numeric hash, so that a money value hashes like the equal int, decimal or float.
+_HASH_MODULUS = sys.hash_info.modulus
+_HASH_INVERSE_SCALE = pow(SCALE, _HASH_MODULUS - 2, _HASH_MODULUS)
+
+
+class MoneyTypes(enum.Enum):
+    """Types used for prices and amounts of money.
+
+    DECIMAL:  decimal.Decimal values.
+    FIXED_POINT:  Money values (integer ten-thousandths).
+    """
+    DECIMAL = 0
+    FIXED_POINT = 1
+
+
+def _roundDivide(numerator: int, denominator: int) -> int:
+    """Divide two integers, rounding half to even.
+
+    :param numerator: integer numerator.
+    :param denominator: non-zero integer denominator.
+    :return: rounded quotient.
+    """
+    if denominator < 0:
+        numerator, denominator = -numerator, -denominator
+    quotient, remainder = divmod(numerator, denominator)
+    twiceRemainder = 2 * remainder
+    if twiceRemainder > denominator or (twiceRemainder == denominator and quotient % 2):
+        quotient += 1
+    return quotient
+
+
+def _toRatio(value: Union[int, float, decimal.Decimal]) -> Tuple[int, int]:
+    """Get the exact value of an int, float or decimal as a numerator and a positive denominator.
+
+    :raises TypeError: Value is not a number.
+    """
+    if isinstance(value, int):
+        return value, 1
+    if isinstance(value, (float, decimal.Decimal)):
+        return value.as_integer_ratio()
+    raise TypeError('Value %r of type %s cannot be used as money.' % (value, type(value).__name__))
+
+
+class Money(object):
+    """This class holds an amount of money as an integer number of ten-thousandths, so that adding, subtracting and
+    multiplying by a number of contracts are exact integer operations whose results do not depend on a decimal context.
+
+    Ints, floats and decimals combined with a money value are converted to money, rounding half to even to the nearest
+    ten-thousandth: a sum or difference with a number is money, a product with (or quotient by) a number is money, and
+    the quotient of two money values is a float.  Money values compare and hash like the numbers they are equal to.
+
+    Attributes:
+      units:  number of ten-thousandths.
+    """
+    __slots__ = ('units', '_hash')
+
+    def __init__(self, units: int) -> None:
+        self.units = units
+        self._hash = None
+
+    @classmethod
+    def fromValue(cls, value: Union['Money', int, float, decimal.Decimal, Text]) -> 'Money':
+        """Create a money value from a number or the text of a number, rounding half to even to a ten-thousandth.
+
+        :param value: money value, int, float, decimal, or text such as '12.35'.
+        :raises TypeError: Value is not a number.
+        :raises ValueError: Value is not finite.
+        :return: money value.
+        """
+        if isinstance(value, Money):
+            return value
+        if isinstance(value, str):
+            # Plain texts with at most DECIMAL_PLACES decimals are parsed without creating a decimal.
+            whole, _, fraction = value.partition('.')
+            if len(fraction) <= DECIMAL_PLACES and whole.lstrip('-').isdigit() and (fraction.isdigit() or not fraction):
+                return cls(int(whole + fraction.ljust(DECIMAL_PLACES, '0')))
+            value = decimal.Decimal(value)
+        numerator, denominator = _toRatio(value)
+        return cls(_roundDivide(numerator * SCALE, denominator))
+
+    @classmethod
+    def fromParts(cls, coefficient: int, exponent: int) -> 'Money':
+        """Create a money value from a decimal given as coefficient * 10 ** exponent, rounding half to even to a
+        ten-thousandth."""
+        shift = exponent + DECIMAL_PLACES
+        if shift >= 0:
+            return cls(coefficient * 10 ** shift)
+        return cls(_roundDivide(coefficient, 10 ** -shift))
+
+    def toDecimal(self) -> decimal.Decimal:
+        """Get the money value as a decimal with DECIMAL_PLACES decimal places."""
+        return decimal.Decimal(self.units).scaleb(-DECIMAL_PLACES)
+
+    def __otherUnits(self, other: Any) -> Optional[int]:
+        """Get the number of ten-thousandths of the other operand of a sum, difference or comparison (None if it is not
+        a number)."""
+        if isinstance(other, Money):
+            return other.units
+        if isinstance(other, (int, float, decimal.Decimal)):
+            numerator, denominator = _toRatio(other)
+            return _roundDivide(numerator * SCALE, denominator)
+        return None
+
+    def __add__(self, other: Any) -> 'Money':
+        otherUnits = self.__otherUnits(other)
+        if otherUnits is None:
+            return NotImplemented
+        return Money(self.units + otherUnits)
+
+    __radd__ = __add__
+
+    def __sub__(self, other: Any) -> 'Money':
+        otherUnits = self.__otherUnits(other)
+        if otherUnits is None:
+            return NotImplemented
+        return Money(self.units - otherUnits)
+
+    def __rsub__(self, other: Any) -> 'Money':
+        otherUnits = self.__otherUnits(other)
+        if otherUnits is None:
+            return NotImplemented
+        return Money(otherUnits - self.units)
+
+    def __mul__(self, other: Any) -> 'Money':
+        if isinstance(other, int):
+            return Money(self.units * other)
+        if isinstance(other, (float, decimal.Decimal)):
+            numerator, denominator = other.as_integer_ratio()
+            return Money(_roundDivide(self.units * numerator, denominator))
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other: Any) -> Union['Money', float]:
+        if isinstance(other, Money):
+            return self.units / other.units
+        if isinstance(other, (int, float, decimal.Decimal)):
+            numerator, denominator = _toRatio(other)
+            if not numerator:
+                raise ZeroDivisionError('Money cannot be divided by zero.')
+            return Money(_roundDivide(self.units * denominator, numerator))
+        return NotImplemented
+
+    def __neg__(self) -> 'Money':
+        return Money(-self.units)
+
+    def __pos__(self) -> 'Money':
+        return self
+
+    def __abs__(self) -> 'Money':
+        return Money(abs(self.units))
+
+    def __bool__(self) -> bool:
+        return self.units != 0
+
+    def __float__(self) -> float:
+        return self.units / SCALE
+
+    def __compare(self, other: Any) -> Optional[Union[int, float]]:
+        """Compare with another money value or number: a negative, zero or positive number (NaN if other is NaN), or
+        None if other is not a number."""
+        if isinstance(other, Money):
+            return self.units - other.units
+        if isinstance(other, int):
+            return self.units - other * SCALE
+        if isinstance(other, (float, decimal.Decimal)):
+            if not math.isfinite(other):
+                return float(self) - float(other)
+            numerator, denominator = other.as_integer_ratio()
+            return self.units * denominator - numerator * SCALE
+        return None
+
+    def __eq__(self, other: Any) -> bool:
+        comparison = self.__compare(other)
+        return NotImplemented if comparison is None else comparison == 0
+
+    def __lt__(self, other: Any) -> bool:
+        comparison = self.__compare(other)
+        return NotImplemented if comparison is None else comparison < 0
+
+    def __le__(self, other: Any) -> bool:
+        comparison = self.__compare(other)
+        return NotImplemented if comparison is None else comparison <= 0
+
+    def __gt__(self, other: Any) -> bool:
+        comparison = self.__compare(other)
+        return NotImplemented if comparison is None else comparison > 0
+
+    def __ge__(self, other: Any) -> bool:
+        comparison = self.__compare(other)
+        return NotImplemented if comparison is None else comparison >= 0
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            # Python's numeric hash of units / SCALE.
+            hashValue = abs(self.units) * _HASH_INVERSE_SCALE % _HASH_MODULUS
+            if self.units < 0:
+                hashValue = -hashValue
+            self._hash = -2 if hashValue == -1 else hashValue
+        return self._hash
+
+    def __str__(self) -> Text:
+        sign = '-' if self.units < 0 else ''
+        wholeUnits, fractionUnits = divmod(abs(self.units), SCALE)
+        return '{}{}.{:0{}d}'.format(sign, wholeUnits, fractionUnits, DECIMAL_PLACES)
+
+    def __repr__(self) -> Text:
+        return "Money('%s')" % self
+
+
+def createMoney(value: Union[Money, int, float, decimal.Decimal, Text], moneyType: MoneyTypes) -> Union[
+        Money, decimal.Decimal]:
+    """Create a price or amount of money of a money type.
+
+    :param value: number or text of a number.
+    :param moneyType: DECIMAL or FIXED_POINT.
+    :return: decimal or money value.
+    """
+    if moneyType == MoneyTypes.FIXED_POINT:
+        return Money.fromValue(value)
+    return value.toDecimal() if isinstance(value, Money) else decimal.Decimal(value)
+
+
+def toUnits(values: np.ndarray) -> np.ndarray:
+    """Get the ten-thousandths of a column of money values, for vectorized arithmetic.
+
+    :param values: object array of money values.
+    :return: int64 array.
+    """
+    return np.fromiter((value.units for value in values), dtype=np.int64, count=len(values))
+
+
+def fromUnits(units: np.ndarray) -> np.ndarray:
+    """Create a column of money values from ten-thousandths, creating one money object per distinct value.
+
+    :param units: int64 array.
+    :return: object array of money values.
+    """
+    uniqueUnits, codes = np.unique(units, return_inverse=True)
+    values = np.empty(len(uniqueUnits), dtype=object)
+    values[:] = [Money(unit) for unit in uniqueUnits.tolist()]
+    return values[codes]
+
+
+def halveUnits(units: np.ndarray) -> np.ndarray:
+    """Divide ten-thousandths by two, rounding half to even (e.g., the mid price of a bid and an ask).
+
+    :param units: int64 array.
+    :return: int64 array.
+    """
+    halves = units // 2
+    return halves + ((units % 2 == 1) & (halves % 2 == 1))
@@ -0,0 +1,77 @@
+import decimal
+import pickle
+import unittest
+import numpy as np
+from base import money
+
+
+class TestMoney(unittest.TestCase):
+
+    def testFromValue(self):
+        """Tests that texts, ints, floats and decimals are rounded half to even to a ten-thousandth."""
+        self.assertEqual(money.Money.fromValue('12.35').units, 123500)
+        self.assertEqual(money.Money.fromValue('-0.5').units, -5000)
+        self.assertEqual(money.Money.fromValue('1e2').units, 1000000)
+        self.assertEqual(money.Money.fromValue('1.23455').units, 12346)
+        self.assertEqual(money.Money.fromValue('1.23445').units, 12344)
+        self.assertEqual(money.Money.fromValue(7).units, 70000)
+        self.assertEqual(money.Money.fromValue(decimal.Decimal('2.00005')).units, 20000)
+        self.assertEqual(money.Money.fromValue(0.1).units, 1000)
+        self.assertEqual(money.Money.fromParts(125, -3).units, 1250)
+        self.assertEqual(money.Money.fromParts(-12345, -5).units, -1234)
+        with self.assertRaisesRegex(TypeError, 'cannot be used as money'):
+            money.Money.fromValue(None)
+
+    def testArithmetic(self):
+        """Tests that sums and products by numbers are money, and that the quotient of money values is a float."""
+        price = money.Money.fromValue('12.35')
+        self.assertEqual(str(price + money.Money.fromValue('0.125')), '12.4750')
+        self.assertEqual(str(price - decimal.Decimal('0.35')), '12.0000')
+        self.assertEqual(str(decimal.Decimal(1) - price), '-11.3500')
+        self.assertEqual(str(price * 3 * 100), '3705.0000')
+        self.assertEqual(str(decimal.Decimal(0.2) * price), '2.4700')
+        self.assertEqual(str(price / 4), '3.0875')
+        self.assertEqual(str(money.Money.fromValue('0.0005') / 2), '0.0002')
+        self.assertEqual(price / money.Money.fromValue('6.175'), 2.0)
+        self.assertEqual(str(abs(-price)), '12.3500')
+        self.assertFalse(money.Money(0))
+        self.assertEqual(float(price), 12.35)
+        self.assertEqual(price.toDecimal(), decimal.Decimal('12.35'))
+        with self.assertRaises(TypeError):
+            price * price
+        with self.assertRaises(ZeroDivisionError):
+            price / 0
+
+    def testComparisonAndHash(self):
+        """Tests that money values compare and hash like the numbers they are equal to."""
+        price = money.Money.fromValue('12.35')
+        self.assertEqual(price, decimal.Decimal('12.350'))
+        self.assertEqual(money.Money.fromValue(3), 3)
+        self.assertNotEqual(price, 12)
+        self.assertNotEqual(price, 'text')
+        self.assertTrue(price > 12 and price < decimal.Decimal('12.36') and price <= 12.36 and price >= price)
+        self.assertTrue(price > 12.35)
+        self.assertTrue(price < float('inf'))
+        self.assertFalse(price == float('nan'))
+        self.assertEqual(hash(price), hash(decimal.Decimal('12.35')))
+        self.assertEqual(hash(-price), hash(decimal.Decimal('-12.35')))
+        self.assertEqual({decimal.Decimal('12.35'): 1}[price], 1)
+        self.assertEqual(pickle.loads(pickle.dumps(price)), price)
+
+    def testCreateMoney(self):
+        """Tests that prices are created with the money type."""
+        self.assertIsInstance(money.createMoney('1.25', money.MoneyTypes.FIXED_POINT), money.Money)
+        self.assertEqual(str(money.createMoney('1.25', money.MoneyTypes.DECIMAL)), '1.25')
+        self.assertEqual(str(money.createMoney(money.Money(12500), money.MoneyTypes.DECIMAL)), '1.2500')
+
+    def testUnits(self):
+        """Tests the vectorized conversions between money columns and ten-thousandths."""
+        units = np.array([5, 7, -5, -7, 6, 6])
+        values = money.fromUnits(units)
+        self.assertEqual(money.toUnits(values).tolist(), units.tolist())
+        self.assertIs(values[4], values[5])
+        self.assertEqual(money.halveUnits(units).tolist(), [(value / 2).units for value in values])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,11 @@ import datetime
 import decimal
 import enum
 import logging
-from typing import Optional, Text
+from typing import Optional, Sequence, Text
+
+# Fields of an option which are updated with the values of the latest tick (see Option.updateOption).
+UPDATED_FIELDS = ('underlyingPrice', 'bidPrice', 'askPrice', 'settlementPrice', 'openInterest', 'volume', 'dateTime',
+                  'delta', 'theta', 'gamma', 'rho', 'vega', 'impliedVol')
 
 
 class OptionTypes(enum.Enum):
@@ -84,27 +88,28 @@ class Option(abc.ABC):
            :param updatedOption: new option from the latest tick.
            :raises ValueError: option cannot be updated.
         """
+        self.updateFields(updatedOption.underlyingTicker, updatedOption.strikePrice, updatedOption.expirationDateTime,
+                          [getattr(updatedOption, fieldName) for fieldName in UPDATED_FIELDS])
+
+    def updateFields(self, underlyingTicker: Text, strikePrice: decimal.Decimal,
+                     expirationDateTime: datetime.datetime, values: Sequence) -> None:
+        """Update the relevant values of the original option with the values of the new option from the latest tick,
+           given field by field (e.g., read from the columns of an option chain).
+
+           :param underlyingTicker: ticker symbol of the new option.
+           :param strikePrice: strike price of the new option.
+           :param expirationDateTime: date/time at which the new option expires.
+           :param values: values of the UPDATED_FIELDS of the new option, in order.
+           :raises ValueError: option cannot be updated.
+        """
         # Check that we are dealing with the same option.
-        if self.underlyingTicker in updatedOption.underlyingTicker and (
-               self.strikePrice == updatedOption.strikePrice) and (
-               self.expirationDateTime == updatedOption.expirationDateTime):
-            self.underlyingPrice = updatedOption.underlyingPrice
-            self.bidPrice = updatedOption.bidPrice
-            self.askPrice = updatedOption.askPrice
-            self.settlementPrice = updatedOption.settlementPrice
-            self.openInterest = updatedOption.openInterest
-            self.volume = updatedOption.volume
-            self.dateTime = updatedOption.dateTime
-            self.delta = updatedOption.delta
-            self.theta = updatedOption.theta
-            self.gamma = updatedOption.gamma
-            self.rho = updatedOption.rho
-            self.vega = updatedOption.vega
-            self.impliedVol = updatedOption.impliedVol
+        if self.underlyingTicker in underlyingTicker and self.strikePrice == strikePrice and (
+               self.expirationDateTime == expirationDateTime):
+            for fieldName, value in zip(UPDATED_FIELDS, values):
+                setattr(self, fieldName, value)
         else:
             logging.info(
                 'originalTicker: {} tickerToUpdate: {} originalStrike: {} strikeToUpdate: {} originalExp: {}'
-                ' expToUpdate: {} '.format(self.underlyingTicker, updatedOption.underlyingTicker,
-                                           self.strikePrice, updatedOption.strikePrice, self.expirationDateTime,
-                                           updatedOption.expirationDateTime))
+                ' expToUpdate: {} '.format(self.underlyingTicker, underlyingTicker, self.strikePrice, strikePrice,
+                                           self.expirationDateTime, expirationDateTime))
             raise ValueError('Cannot update option; this option appears to be from a different option chain.')
@@ -0,0 +1,474 @@
+import collections.abc
+import dataclasses
+import datetime
+import decimal
+import numpy as np
+import pandas as pd
+from base import call
+from base import option
+from base import put
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Mapping, Optional, Text, Tuple, Type, Union
+
+# Option fields which are stored as float64 arrays (NaN for missing values); all other fields are stored as object
+# arrays (None for missing values) so that decimals, dates and text keep their exact values.
+FLOAT_FIELDS = ('delta', 'theta', 'gamma', 'rho', 'vega', 'impliedVol')
+
+# Option fields held by the chain, in the order of the option.Option dataclass fields.
+OPTION_FIELDS = tuple(field.name for field in dataclasses.fields(put.Put) if field.name != 'optionType')
+
+# Column holding True for calls and False for puts.
+IS_CALL_COLUMN = 'isCall'
+
+
+class _ChainStore(object):
+    """Columns of an option chain shared by the chain and all of its filtered views, together with the option objects
+    which have been materialized so far."""
+
+    def __init__(self, columns: Mapping[Text, np.ndarray], putType: Type[option.Option],
+                 callType: Type[option.Option]) -> None:
+        self.columns = columns
+        self.putType = putType
+        self.callType = callType
+        self.numRows = len(columns[IS_CALL_COLUMN])
+        self.options = [None] * self.numRows
+        self.derivedColumns = {}
+
+    def getOption(self, row: int) -> option.Option:
+        """Get the option object for a row, creating it the first time it is requested."""
+        optionObject = self.options[row]
+        if optionObject is None:
+            values = {}
+            for fieldName in OPTION_FIELDS:
+                value = self.columns[fieldName][row]
+                if fieldName in FLOAT_FIELDS:
+                    value = None if np.isnan(value) else float(value)
+                values[fieldName] = value
+            optionType = self.callType if self.columns[IS_CALL_COLUMN][row] else self.putType
+            optionObject = self.options[row] = optionType(**values)
+        return optionObject
+
+    def materialize(self, rows: Optional[Iterable[int]] = None) -> None:
+        """Create the option objects for the rows (all rows if None) which have not been materialized yet."""
+        options = self.options
+        if rows is None:
+            rows = range(self.numRows)
+        missingRows = [row for row in rows if options[row] is None]
+        if not missingRows:
+            return
+        rows = np.asarray(missingRows)
+        fieldValues = []
+        for fieldName in OPTION_FIELDS:
+            column = self.columns[fieldName][rows]
+            if fieldName in FLOAT_FIELDS:
+                column = np.where(np.isnan(column), None, column)
+            fieldValues.append(column.tolist())
+        for row, isCall, values in zip(missingRows, self.columns[IS_CALL_COLUMN][rows].tolist(), zip(*fieldValues)):
+            optionType = self.callType if isCall else self.putType
+            self.options[row] = optionType(**dict(zip(OPTION_FIELDS, values)))
+
+
+class OptionChain(collections.abc.Sequence):
+    """This class holds the option chain of one tick as NumPy arrays, one array per option field (struct of arrays).
+
+    The chain can be used as a sequence of option objects (puts and calls); the option objects are only created when
+    they are requested, e.g., when a strategy picks a leg. Vectorized masks and filtered views (which share the arrays
+    and option objects of the chain) are used to select options without creating option objects.
+    """
+
+    def __init__(self, columns: Mapping[Text, np.ndarray], putType: Type[option.Option] = put.Put,
+                 callType: Type[option.Option] = call.Call) -> None:
+        """Initializes the option chain from typed columns.
+
+        Attributes:
+          columns: dictionary of option field name to column array, plus the IS_CALL_COLUMN array. Float fields are
+                   float64 arrays (NaN for missing values); all other fields are object arrays (None for missing
+                   values). The tradeDateTime defaults to the dateTime when it is not provided.
+          putType: class used to create puts (e.g., put.Put or slottedOption.SlottedPut).
+          callType: class used to create calls (e.g., call.Call or slottedOption.SlottedCall).
+        """
+        columns = dict(columns)
+        if 'tradeDateTime' not in columns:
+            columns['tradeDateTime'] = columns['dateTime']
+        missingColumns = [name for name in OPTION_FIELDS + (IS_CALL_COLUMN,) if name not in columns]
+        if missingColumns:
+            raise ValueError('Option chain columns missing: %s.' % ', '.join(missingColumns))
+        self.__store = _ChainStore(columns, putType, callType)
+        # Rows of the store which are part of this chain; None for all rows.
+        self.__rows = None
+        self.__optionIndex = None
+        self.__expirationDeltaIndexes = {}
+        self.__derivedValues = {}
+
+    @classmethod
+    def fromOptions(cls, options: Iterable[option.Option]) -> 'OptionChain':
+        """Create an option chain from option objects; the chain holds the same objects.
+
+        :param options: puts and calls of the option chain.
+        :return: option chain.
+        """
+        options = list(options)
+        columns = {}
+        for fieldName in OPTION_FIELDS:
+            values = [getattr(optionObject, fieldName) for optionObject in options]
+            if fieldName in FLOAT_FIELDS:
+                columns[fieldName] = np.array(values, dtype=np.float64)
+            else:
+                column = np.empty(len(values), dtype=object)
+                column[:] = values
+                columns[fieldName] = column
+        columns[IS_CALL_COLUMN] = np.array(
+            [optionObject.optionType == option.OptionTypes.CALL for optionObject in options], dtype=bool)
+        chain = cls(columns)
+        chain.__store.options = options
+        return chain
+
+    @classmethod
+    def concat(cls, chains: Iterable['OptionChain']) -> 'OptionChain':
+        """Create an option chain holding the options of several chains, in order (e.g., the chains of several
+        underlyings at the same date / time). The option objects are created again when they are requested.
+
+        :param chains: option chains; the put and call types of the first chain are used.
+        :raises ValueError: No option chain was given.
+        :return: option chain.
+        """
+        chains = list(chains)
+        if not chains:
+            raise ValueError('At least one option chain must be given.')
+        columns = {name: np.concatenate([chain.getColumn(name) for chain in chains]) for name in
+                   OPTION_FIELDS + (IS_CALL_COLUMN,)}
+        return cls(columns, chains[0].__store.putType, chains[0].__store.callType)
+
+    def __view(self, rows: np.ndarray) -> 'OptionChain':
+        """Create a chain for some rows of the store of this chain."""
+        chain = OptionChain.__new__(OptionChain)
+        chain.__store = self.__store
+        chain.__rows = rows
+        chain.__optionIndex = None
+        chain.__expirationDeltaIndexes = {}
+        chain.__derivedValues = {}
+        return chain
+
+    def __len__(self) -> int:
+        return self.__store.numRows if self.__rows is None else len(self.__rows)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[option.Option, List[option.Option]]:
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Option chain index out of range.')
+        return self.__store.getOption(index if self.__rows is None else int(self.__rows[index]))
+
+    def __iter__(self) -> Iterator[option.Option]:
+        rows = None if self.__rows is None else self.__rows.tolist()
+        self.__store.materialize(rows)
+        options = self.__store.options
+        if rows is None:
+            return iter(options)
+        return (options[row] for row in rows)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, collections.abc.Sequence):
+            return NotImplemented
+        return list(self) == list(other)
+
+    __hash__ = None
+
+    def __repr__(self) -> Text:
+        return 'OptionChain(%r)' % list(self)
+
+    def getColumn(self, fieldName: Text) -> np.ndarray:
+        """Get the values of an option field for the options in the chain.
+
+        :param fieldName: option field name (e.g., strikePrice, delta) or IS_CALL_COLUMN.
+        :return: column array; must not be modified.
+        """
+        column = self.__store.columns[fieldName]
+        return column if self.__rows is None else column[self.__rows]
+
+    def __getDerivedColumn(self, name: Text, createColumn) -> np.ndarray:
+        """Get a column computed from the columns of the store; the column is computed once for all rows."""
+        column = self.__store.derivedColumns.get(name)
+        if column is None:
+            column = self.__store.derivedColumns[name] = createColumn(self.__store.columns)
+        return column if self.__rows is None else column[self.__rows]
+
+    def getExpirationDateTimes(self) -> np.ndarray:
+        """Get the expiration date / times of the options in the chain.
+
+        :return: datetime64[us] array (NaT for missing values).
+        """
+        return self.__getDerivedColumn('expirationDateTime64', lambda columns: columns['expirationDateTime'].astype(
+            'datetime64[us]'))
+
+    def getDaysToExpiration(self) -> np.ndarray:
+        """Get the number of days between the dateTime and the expirationDateTime of the options in the chain; the
+        number of days is rounded down as for datetime.timedelta.days.
+
+        :return: int64 array.
+        """
+        def createColumn(columns: Mapping[Text, np.ndarray]) -> np.ndarray:
+            timeToExpiration = columns['expirationDateTime'].astype('datetime64[us]') - columns['dateTime'].astype(
+                'datetime64[us]')
+            # Missing date / times (NaT) are counted as zero days.
+            with np.errstate(invalid='ignore'):
+                return timeToExpiration // np.timedelta64(1, 'D')
+        return self.__getDerivedColumn('daysToExpiration', createColumn)
+
+    def getOptionTypeMask(self, optionType: option.OptionTypes) -> np.ndarray:
+        """Get a mask of the options in the chain which have the option type (PUT or CALL).
+
+        :param optionType: option type.
+        :return: boolean array.
+        """
+        isCall = self.getColumn(IS_CALL_COLUMN)
+        return isCall if optionType == option.OptionTypes.CALL else ~isCall
+
+    def getTickerMask(self, underlyingTicker: Text) -> np.ndarray:
+        """Get a mask of the options whose underlyingTicker contains the ticker; e.g., SPXPM matches SPX.
+
+        :param underlyingTicker: ticker symbol to match.
+        :return: boolean array.
+        """
+        codes, uniques = pd.factorize(self.getColumn('underlyingTicker'))
+        matchesTicker = np.array([underlyingTicker in ticker for ticker in uniques], dtype=bool)
+        return np.where(codes >= 0, matchesTicker[codes] if len(uniques) else False, False)
+
+    def getHasValueMask(self, fieldName: Text) -> np.ndarray:
+        """Get a mask of the options which have a value for the option field.
+
+        :param fieldName: option field name.
+        :return: boolean array which is False for missing (None or NaN) values.
+        """
+        column = self.getColumn(fieldName)
+        if column.dtype == np.float64:
+            return ~np.isnan(column)
+        return np.not_equal(column, None)
+
+    def __getOptionIndex(self) -> Dict[Tuple[datetime.datetime, decimal.Decimal, bool], List[int]]:
+        """Get the index of the chain, which is built the first time it is needed and then shared by all lookups.
+
+        :return: dictionary of (expirationDateTime, strikePrice, isCall) to the positions of the matching options in
+                 the chain, in chain order.
+        """
+        if self.__optionIndex is None:
+            optionIndex = {}
+            for position, key in enumerate(zip(self.getColumn('expirationDateTime').tolist(),
+                                               self.getColumn('strikePrice').tolist(),
+                                               self.getColumn(IS_CALL_COLUMN).tolist())):
+                optionIndex.setdefault(key, []).append(position)
+            self.__optionIndex = optionIndex
+        return self.__optionIndex
+
+    def findOption(self, strikePrice: decimal.Decimal, expirationDateTime: datetime.datetime,
+                   optionType: option.OptionTypes, underlyingTicker: Optional[Text] = None) -> Optional[option.Option]:
+        """Find the first option in the chain with the strike price, expiration and option type. The lookup uses an
+        index keyed by (expiration, strike, option type) which is built once per chain, so that all positions updated
+        with the same tick share it.
+
+        :param strikePrice: strike price of the option.
+        :param expirationDateTime: expiration date / time of the option.
+        :param optionType: option type (PUT or CALL).
+        :param underlyingTicker: if not None, the underlyingTicker of the option must contain this ticker.
+        :return: matching option, or None if there is no matching option in the chain.
+        """
+        position = self.__findPosition(self.__getOptionIndex(), strikePrice, expirationDateTime,
+                                       optionType == option.OptionTypes.CALL, underlyingTicker)
+        return None if position < 0 else self[position]
+
+    def findPositions(self, strikePrices: Iterable[decimal.Decimal], expirationDateTimes: Iterable[datetime.datetime],
+                      isCall: Iterable[bool], underlyingTickers: Iterable[Optional[Text]]) -> np.ndarray:
+        """Find the positions of the options which findOption would return for many options at once, without creating
+        the option objects.
+
+        :param strikePrices: strike prices of the options.
+        :param expirationDateTimes: expiration date / times of the options.
+        :param isCall: True for the calls and False for the puts.
+        :param underlyingTickers: None, or a ticker which the underlyingTicker of the option must contain, per option.
+        :return: int64 array of the positions of the matching options in the chain (-1 if there is no matching option).
+        """
+        optionIndex = self.__getOptionIndex()
+        return np.array([self.__findPosition(optionIndex, strikePrice, expirationDateTime, optionIsCall,
+                                             underlyingTicker)
+                         for strikePrice, expirationDateTime, optionIsCall, underlyingTicker in
+                         zip(strikePrices, expirationDateTimes, isCall, underlyingTickers)], dtype=np.int64)
+
+    def __findPosition(self, optionIndex: Dict[Tuple[datetime.datetime, decimal.Decimal, bool], List[int]],
+                       strikePrice: decimal.Decimal, expirationDateTime: datetime.datetime, isCall: bool,
+                       underlyingTicker: Optional[Text]) -> int:
+        """Find the position of the first option of the index with the strike price, expiration and option type (and
+        whose underlyingTicker contains underlyingTicker, if it is not None); -1 if there is no such option."""
+        for position in optionIndex.get((expirationDateTime, strikePrice, bool(isCall)), ()):
+            if underlyingTicker is None or underlyingTicker in self.getValue(position, 'underlyingTicker'):
+                return position
+        return -1
+
+    def getValue(self, position: Union[int, np.ndarray], fieldName: Text) -> Any:
+        """Get the value of an option field without creating the option object.
+
+        :param position: position of the option in the chain, or an integer array of positions.
+        :param fieldName: option field name.
+        :return: value of the field (NaN for missing float values), or an array of the values of the positions.
+        """
+        return self.__store.columns[fieldName][position if self.__rows is None else self.__rows[position]]
+
+    def getExpirationDeltaIndex(self, optionType: option.OptionTypes) -> 'ExpirationDeltaIndex':
+        """Get the index of the puts or calls of the chain grouped by expiration and sorted by delta. The index is
+        built the first time it is needed and then shared by all strategies and legs selected from the chain.
+
+        :param optionType: option type (PUT or CALL).
+        :return: expiration / delta index.
+        """
+        expirationDeltaIndex = self.__expirationDeltaIndexes.get(optionType)
+        if expirationDeltaIndex is None:
+            expirationDeltaIndex = self.__expirationDeltaIndexes[optionType] = ExpirationDeltaIndex(self, optionType)
+        return expirationDeltaIndex
+
+    def getDerivedValue(self, key: Hashable, createValue: Callable[['OptionChain'], Any]) -> Any:
+        """Get a value derived from the options of the chain (e.g., a pricing.volatilitySurface.VolatilitySurface). The
+        value is created the first time it is requested with the key and then shared by all strategies and positions
+        which use the chain.
+
+        :param key: key of the value, including the parameters it is created with.
+        :param createValue: function of the chain which creates the value.
+        :return: derived value.
+        """
+        if key not in self.__derivedValues:
+            self.__derivedValues[key] = createValue(self)
+        return self.__derivedValues[key]
+
+    def filter(self, mask: np.ndarray) -> 'OptionChain':
+        """Get the options in the chain selected by a mask; the returned chain shares the option objects of this chain.
+
+        :param mask: boolean array with one value per option in the chain.
+        :return: option chain with the selected options, in the same order.
+        """
+        positions = np.flatnonzero(mask)
+        return self.__view(positions if self.__rows is None else self.__rows[positions])
+
+
+class ExpirationDeltaIndex(object):
+    """This class indexes the puts or calls of an option chain by days to expiration and delta, so that a strategy can
+    select the option closest to the requested expiration and delta with binary searches instead of going through
+    the whole chain. Options without a delta are not part of the index.
+
+    Attributes:
+      lastPosition: position in the chain of the last option of the option type (with or without a delta); None if
+                    the chain has no options of the option type.
+    """
+
+    def __init__(self, options: OptionChain, optionType: option.OptionTypes) -> None:
+        """Builds the index.
+
+        Attributes:
+          options: option chain to index.
+          optionType: option type (PUT or CALL) to index.
+        """
+        typeMask = options.getOptionTypeMask(optionType)
+        typePositions = np.flatnonzero(typeMask)
+        self.lastPosition = int(typePositions[-1]) if len(typePositions) else None
+        deltas = options.getColumn('delta')
+        positions = np.flatnonzero(typeMask & ~np.isnan(deltas))
+        daysToExpiration = options.getDaysToExpiration()[positions]
+        deltas = deltas[positions]
+        # Sort by days to expiration, then delta, then position in the chain.
+        order = np.lexsort((positions, deltas, daysToExpiration))
+        self.__positions = positions[order]
+        self.__deltas = deltas[order]
+        self.__daysToExpiration, groupStarts = np.unique(daysToExpiration[order], return_index=True)
+        self.__groupBounds = np.append(groupStarts, len(order))
+
+    def __getDeltaRange(self, group: int, lowerDelta: float, upperDelta: float) -> Tuple[int, int]:
+        """Get the [start, stop) range of sorted entries of an expiration group with lowerDelta <= delta <= upperDelta."""
+        groupStart, groupStop = self.__groupBounds[group], self.__groupBounds[group + 1]
+        groupDeltas = self.__deltas[groupStart:groupStop]
+        return (groupStart + int(np.searchsorted(groupDeltas, lowerDelta, side='left')),
+                groupStart + int(np.searchsorted(groupDeltas, upperDelta, side='right')))
+
+    def __findFirstPosition(self, group: int, lowerDelta: float, upperDelta: float,
+                            isCandidate: Callable[[int], bool]) -> Optional[int]:
+        """Find the first position in the chain of the candidates of an expiration group."""
+        start, stop = self.__getDeltaRange(group, lowerDelta, upperDelta)
+        candidatePositions = [position for position in self.__positions[start:stop].tolist() if isCandidate(position)]
+        return min(candidatePositions) if candidatePositions else None
+
+    def __findClosestDelta(self, group: int, lowerDelta: float, optimalDelta: float, upperDelta: float,
+                           isCandidate: Callable[[int], bool]) -> Optional[int]:
+        """Find the candidate of an expiration group with the delta closest to optimalDelta (the first one in the
+        chain if several candidates are equally close)."""
+        start, stop = self.__getDeltaRange(group, lowerDelta, upperDelta)
+        if start >= stop:
+            return None
+        middle = start + int(np.searchsorted(self.__deltas[start:stop], optimalDelta, side='left'))
+        bestDistance, bestPosition = None, None
+        # Search down from the optimal delta, then up; the distance to the optimal delta grows in both directions.
+        for entries in (range(middle - 1, start - 1, -1), range(middle, stop)):
+            for entry in entries:
+                distance = abs(self.__deltas[entry] - optimalDelta)
+                if bestDistance is not None and distance > bestDistance:
+                    break
+                position = int(self.__positions[entry])
+                if not isCandidate(position):
+                    continue
+                if bestDistance is None or distance < bestDistance or position < bestPosition:
+                    bestDistance, bestPosition = distance, position
+        return bestPosition
+
+    def findOptimalPosition(self, minimumDTE: Optional[int], maximumDTE: Optional[int], optimalDTE: Optional[int],
+                            lowerDelta: float, optimalDelta: float, upperDelta: float,
+                            isCandidate: Callable[[int], bool]) -> Optional[int]:
+        """Find the option closest to the requested expiration and delta. The result is the same as going through the
+        candidates in chain order and only replacing the current optimal option with an option which is strictly
+        closer: the expiration is the one of the first candidate closest to optimalDTE, and the option is the first
+        candidate of that expiration closest to optimalDelta.
+
+        :param minimumDTE: minimum days to expiration; None for no minimum.
+        :param maximumDTE: maximum days to expiration; None for no maximum.
+        :param optimalDTE: requested days to expiration; None to use the expiration of the first candidate.
+        :param lowerDelta: lowest delta allowed.
+        :param optimalDelta: requested delta.
+        :param upperDelta: highest delta allowed.
+        :param isCandidate: function of a position in the chain which checks the remaining strategy criteria.
+        :return: position of the optimal option in the chain, or None if there is no candidate.
+        """
+        firstGroup = 0 if minimumDTE is None else int(np.searchsorted(self.__daysToExpiration, minimumDTE, side='left'))
+        stopGroup = len(self.__daysToExpiration) if maximumDTE is None else int(
+            np.searchsorted(self.__daysToExpiration, maximumDTE, side='right'))
+        groups = np.arange(firstGroup, stopGroup)
+        if optimalDTE is None:
+            distances = np.zeros(len(groups), dtype=np.int64)
+        else:
+            distances = np.abs(self.__daysToExpiration[groups] - optimalDTE)
+        order = np.argsort(distances, kind='stable')
+        levelStart = 0
+        while levelStart < len(order):
+            # Expiration groups which are equally close to the optimalDTE.
+            levelStop = levelStart + 1
+            while levelStop < len(order) and distances[order[levelStop]] == distances[order[levelStart]]:
+                levelStop += 1
+            levelGroups = groups[order[levelStart:levelStop]].tolist()
+            levelStart = levelStop
+            if len(levelGroups) > 1:
+                # The expiration of the first candidate in the chain is used.
+                firstPositions = [(self.__findFirstPosition(group, lowerDelta, upperDelta, isCandidate), group)
+                                  for group in levelGroups]
+                firstPositions = [(position, group) for position, group in firstPositions if position is not None]
+                if not firstPositions:
+                    continue
+                levelGroups = [min(firstPositions)[1]]
+            position = self.__findClosestDelta(levelGroups[0], lowerDelta, optimalDelta, upperDelta, isCandidate)
+            if position is not None:
+                return position
+        return None
+
+
+def toOptionChain(optionData: Optional[Iterable[option.Option]]) -> Optional[OptionChain]:
+    """Get the tick data as an option chain.
+
+    :param optionData: tick data; an OptionChain or any other sequence of options.
+    :return: the option chain itself, a new option chain holding the options, or None if there is no tick data.
+    """
+    if optionData is None or isinstance(optionData, OptionChain):
+        return optionData
+    return OptionChain.fromOptions(optionData)
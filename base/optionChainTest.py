@@ -0,0 +1,130 @@
+import datetime
+import decimal
+import unittest
+import numpy as np
+from base import call
+from base import option
+from base import optionChain
+from base import put
+
+
+class TestOptionChain(unittest.TestCase):
+
+    def setUp(self):
+        dateTime = datetime.datetime(2021, 1, 1)
+        self._options = [
+            put.Put(underlyingTicker='SPX', strikePrice=decimal.Decimal(3000), delta=-0.2, dateTime=dateTime,
+                    expirationDateTime=datetime.datetime(2021, 1, 29), settlementPrice=decimal.Decimal('1.5')),
+            call.Call(underlyingTicker='SPXPM', strikePrice=decimal.Decimal(3000), delta=0.3, dateTime=dateTime,
+                      expirationDateTime=datetime.datetime(2021, 1, 29)),
+            put.Put(underlyingTicker='SPY', strikePrice=decimal.Decimal(300), delta=None, dateTime=dateTime,
+                    expirationDateTime=datetime.datetime(2021, 2, 19, 16)),
+            put.Put(underlyingTicker='SPXPM', strikePrice=decimal.Decimal('3000.0'), delta=-0.25, dateTime=dateTime,
+                    expirationDateTime=datetime.datetime(2021, 1, 29)),
+        ]
+        self._optionChain = optionChain.OptionChain.fromOptions(self._options)
+
+    def testSequenceOfOptions(self):
+        """Tests that the chain can be used as a sequence of the options it was created from."""
+        self.assertEqual(len(self._optionChain), 4)
+        self.assertIs(self._optionChain[1], self._options[1])
+        self.assertIs(self._optionChain[-1], self._options[3])
+        self.assertEqual(list(self._optionChain), self._options)
+        self.assertEqual(self._optionChain[1:3], self._options[1:3])
+        self.assertEqual(self._optionChain, self._options)
+
+    def testLazyMaterialization(self):
+        """Tests that option objects are only created when they are requested, and only once."""
+        createdOptions = []
+
+        def createPut(**kwargs) -> put.Put:
+            createdOptions.append(kwargs)
+            return put.Put(**kwargs)
+
+        columns = {fieldName: self._optionChain.getColumn(fieldName) for fieldName in optionChain.OPTION_FIELDS}
+        columns[optionChain.IS_CALL_COLUMN] = self._optionChain.getColumn(optionChain.IS_CALL_COLUMN)
+        lazyChain = optionChain.OptionChain(columns, putType=createPut)
+        puts = lazyChain.filter(lazyChain.getOptionTypeMask(option.OptionTypes.PUT))
+        self.assertEqual(len(puts), 3)
+        self.assertEqual(createdOptions, [])
+        self.assertIs(puts[2], lazyChain[3])
+        self.assertEqual(len(createdOptions), 1)
+        self.assertIsNone(puts[1].delta)
+        self.assertEqual(list(puts), [self._options[0], self._options[2], self._options[3]])
+        self.assertEqual(len(createdOptions), 3)
+
+    def testMasks(self):
+        """Tests the vectorized masks and columns of the chain."""
+        self.assertEqual(self._optionChain.getTickerMask('SPX').tolist(), [True, True, False, True])
+        self.assertEqual(self._optionChain.getHasValueMask('delta').tolist(), [True, True, False, True])
+        self.assertEqual(self._optionChain.getHasValueMask('settlementPrice').tolist(), [True, False, False, False])
+        self.assertEqual(self._optionChain.getOptionTypeMask(option.OptionTypes.CALL).tolist(),
+                         [False, True, False, False])
+        self.assertEqual(self._optionChain.getDaysToExpiration().tolist(), [28, 28, 49, 28])
+        self.assertTrue(np.isnan(self._optionChain.getColumn('delta')[2]))
+
+    def testFindOption(self):
+        """Tests that the first option with the strike price, expiration, option type and ticker is found."""
+        expiration = datetime.datetime(2021, 1, 29)
+        self.assertIs(self._optionChain.findOption(decimal.Decimal(3000), expiration, option.OptionTypes.PUT),
+                      self._options[0])
+        self.assertIs(self._optionChain.findOption(decimal.Decimal(3000), expiration, option.OptionTypes.PUT,
+                                                   underlyingTicker='SPXPM'), self._options[3])
+        self.assertIsNone(self._optionChain.findOption(decimal.Decimal(3000), expiration, option.OptionTypes.PUT,
+                                                       underlyingTicker='RUT'))
+        self.assertIsNone(self._optionChain.findOption(decimal.Decimal(300), expiration, option.OptionTypes.PUT))
+
+    def testFindOptionInFilteredChain(self):
+        """Tests that the lookup of a filtered chain only finds options of the filtered chain."""
+        expiration = datetime.datetime(2021, 1, 29)
+        spxPuts = self._optionChain.filter(self._optionChain.getTickerMask('SPXPM'))
+        self.assertIs(spxPuts.findOption(decimal.Decimal(3000), expiration, option.OptionTypes.PUT), self._options[3])
+        self.assertIs(spxPuts.findOption(3000, expiration, option.OptionTypes.CALL), self._options[1])
+        self.assertEqual(spxPuts.getValue(1, 'underlyingTicker'), 'SPXPM')
+
+    def testExpirationDeltaIndexTieBreaking(self):
+        """Tests that the optimal option is the same one that would be found going through the chain in order."""
+        dateTime = datetime.datetime(2021, 1, 1)
+        puts = [put.Put(underlyingTicker='SPX', strikePrice=decimal.Decimal(strike), delta=delta, dateTime=dateTime,
+                        expirationDateTime=dateTime + datetime.timedelta(days=days))
+                for strike, delta, days in ((100, -0.3, 25), (110, -0.2, 35), (120, -0.2, 25), (130, -0.3, 35),
+                                            (140, -0.25, 60), (150, None, 30))]
+        chain = optionChain.OptionChain.fromOptions(puts)
+        index = chain.getExpirationDeltaIndex(option.OptionTypes.PUT)
+        self.assertEqual(index.lastPosition, 5)
+
+        def findOptimalPosition(minimumDTE=None, maximumDTE=None, isCandidate=lambda position: True):
+            return index.findOptimalPosition(minimumDTE, maximumDTE, 30, -0.3, -0.25, -0.2, isCandidate)
+
+        # 25 and 35 days are equally close to 30 days; the expiration of the first option in the chain is used, and
+        # -0.3 and -0.2 are equally close to -0.25, so the first option of that expiration is used.
+        self.assertEqual(findOptimalPosition(), 0)
+        self.assertEqual(findOptimalPosition(isCandidate=lambda position: position != 0), 1)
+        self.assertEqual(findOptimalPosition(minimumDTE=26), 1)
+        self.assertEqual(findOptimalPosition(minimumDTE=36), 4)
+        self.assertIsNone(findOptimalPosition(minimumDTE=36, maximumDTE=59))
+        self.assertIsNone(chain.getExpirationDeltaIndex(option.OptionTypes.CALL).lastPosition)
+
+    def testDerivedValue(self):
+        """Tests that a derived value is created once per key and chain."""
+        createdValues = []
+
+        def createValue(chain):
+            createdValues.append(chain)
+            return len(chain)
+
+        self.assertEqual(self._optionChain.getDerivedValue('numOptions', createValue), 4)
+        self.assertEqual(self._optionChain.getDerivedValue('numOptions', createValue), 4)
+        self.assertEqual(createdValues, [self._optionChain])
+        puts = self._optionChain.filter(self._optionChain.getOptionTypeMask(option.OptionTypes.PUT))
+        self.assertEqual(puts.getDerivedValue('numOptions', createValue), 3)
+        self.assertEqual(len(createdValues), 2)
+
+    def testMissingColumns(self):
+        """Tests that an exception is raised if the chain is created without all option fields."""
+        with self.assertRaisesRegex(ValueError, 'Option chain columns missing: '):
+            optionChain.OptionChain({optionChain.IS_CALL_COLUMN: np.array([True]), 'dateTime': np.array([None])})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import dataclasses
+import datetime
+import decimal
+from base import call
+from base import option
+from base import put
+from typing import Optional, Text
+
+
+@dataclasses.dataclass(slots=True)
+class SlottedOption(object):
+    """Compact version of option.Option used on the tick path. The fields and methods are the same as option.Option,
+    but the values are stored in slots instead of a per-instance dictionary, which makes each option smaller and faster
+    to create. SlottedPut and SlottedCall are registered as (virtual) subclasses of option.Option.
+
+    See option.Option for the description of the attributes.
+    """
+    underlyingTicker: Text
+    strikePrice: decimal.Decimal
+    expirationDateTime: datetime.datetime
+    underlyingPrice: Optional[decimal.Decimal] = None
+    optionSymbol: Optional[Text] = None
+    bidPrice: Optional[decimal.Decimal] = None
+    askPrice: Optional[decimal.Decimal] = None
+    tradePrice: decimal.Decimal = None
+    settlementPrice: decimal.Decimal = None
+    openInterest: Optional[int] = None
+    volume: Optional[int] = None
+    dateTime: Optional[datetime.datetime] = None
+    tradeDateTime: Optional[datetime.datetime] = None
+    delta: Optional[float] = None
+    theta: Optional[float] = None
+    gamma: Optional[float] = None
+    rho: Optional[float] = None
+    vega: Optional[float] = None
+    impliedVol: Optional[float] = None
+    exchangeCode: Optional[Text] = None
+
+    def __post_init__(self):
+        if self.__class__ == SlottedOption:
+            raise TypeError('Cannot instantiate abstract class.')
+
+    # The methods only use the option fields, so the option.Option implementations are shared.
+    calcOptionPriceDiff = option.Option.calcOptionPriceDiff
+    getNumDaysLeft = option.Option.getNumDaysLeft
+    updateOption = option.Option.updateOption
+    updateFields = option.Option.updateFields
+
+
+@dataclasses.dataclass(slots=True)
+class SlottedPut(SlottedOption):
+    """This class defines a compact PUT option, which can be used in place of put.Put."""
+    optionType: option.OptionTypes = option.OptionTypes.PUT
+
+
+@dataclasses.dataclass(slots=True)
+class SlottedCall(SlottedOption):
+    """This class defines a compact CALL option, which can be used in place of call.Call."""
+    optionType: option.OptionTypes = option.OptionTypes.CALL
+
+
+option.Option.register(SlottedPut)
+option.Option.register(SlottedCall)
+
+
+def toSlottedOption(optionToConvert: option.Option) -> SlottedOption:
+    """Convert a put.Put or call.Call to the equivalent SlottedPut or SlottedCall.
+
+    :param optionToConvert: option to convert.
+    :return: compact option with the same field values.
+    """
+    values = {field.name: getattr(optionToConvert, field.name) for field in dataclasses.fields(SlottedOption)}
+    if optionToConvert.optionType == option.OptionTypes.CALL:
+        return SlottedCall(**values)
+    return SlottedPut(**values)
+
+
+def toDataclassOption(optionToConvert: SlottedOption) -> option.Option:
+    """Convert a SlottedPut or SlottedCall to the equivalent put.Put or call.Call.
+
+    :param optionToConvert: option to convert.
+    :return: option with the same field values.
+    """
+    values = {field.name: getattr(optionToConvert, field.name) for field in dataclasses.fields(SlottedOption)}
+    if optionToConvert.optionType == option.OptionTypes.CALL:
+        return call.Call(**values)
+    return put.Put(**values)
@@ -0,0 +1,58 @@
+import datetime
+import decimal
+import unittest
+from base import option
+from base import put
+from base import slottedOption
+
+
+class TestSlottedOption(unittest.TestCase):
+    def setUp(self):
+        self._putOptionToTest = slottedOption.SlottedPut(
+            underlyingTicker='SPY', strikePrice=decimal.Decimal(250),
+            dateTime=datetime.datetime.strptime('01/01/2021', "%m/%d/%Y"),
+            expirationDateTime=datetime.datetime.strptime('01/01/2050', "%m/%d/%Y"),
+            tradePrice=decimal.Decimal(3.00), settlementPrice=decimal.Decimal(1.25))
+
+    def testSlottedOptionClassCreation(self):
+        """Tests than an exception is raised when the base class is instantiated."""
+        with self.assertRaisesRegex(TypeError, "Cannot instantiate abstract class."):
+            slottedOption.SlottedOption(underlyingTicker='SPY', strikePrice=250,
+                                        expirationDateTime=datetime.datetime.now())
+
+    def testInterchangeableWithOption(self):
+        """Tests that slotted options have no instance dictionary and are treated as options."""
+        self.assertFalse(hasattr(self._putOptionToTest, '__dict__'))
+        self.assertIsInstance(self._putOptionToTest, option.Option)
+        self.assertEqual(self._putOptionToTest.optionType, option.OptionTypes.PUT)
+        self.assertEqual(self._putOptionToTest.calcOptionPriceDiff(), decimal.Decimal(3.00) - decimal.Decimal(1.25))
+        self.assertEqual(self._putOptionToTest.getNumDaysLeft(), 10592)
+
+    def testUpdateOptionSuccess(self):
+        """Tests that a slotted option can be updated with a dataclass option and vice versa."""
+        updatedPut = put.Put(underlyingTicker='SPY', strikePrice=250, delta=0.3,
+                             expirationDateTime=datetime.datetime.strptime('01/01/2050', "%m/%d/%Y"),
+                             bidPrice=decimal.Decimal(0.50), askPrice=decimal.Decimal(0.75))
+        self._putOptionToTest.updateOption(updatedPut)
+        self.assertEqual(self._putOptionToTest.bidPrice, decimal.Decimal(0.50))
+        self.assertEqual(self._putOptionToTest.delta, 0.3)
+        updatedPut.updateOption(self._putOptionToTest)
+        self.assertEqual(updatedPut.dateTime, self._putOptionToTest.dateTime)
+
+    def testUpdateOptionInvalidOptionStrikePrice(self):
+        """Tests that error is raised if we update an option with different parameters (wrong strike price)."""
+        updatedPut = slottedOption.SlottedPut(underlyingTicker='SPY', strikePrice=255,
+                                              expirationDateTime=datetime.datetime.strptime('01/01/2050', "%m/%d/%Y"))
+        with self.assertRaisesRegex(ValueError,
+                                    ('Cannot update option; this option appears to be from a different option chain.')):
+            self._putOptionToTest.updateOption(updatedPut)
+
+    def testConversionRoundTrip(self):
+        """Tests that converting to a dataclass option and back keeps all field values."""
+        dataclassOption = slottedOption.toDataclassOption(self._putOptionToTest)
+        self.assertIsInstance(dataclassOption, put.Put)
+        self.assertEqual(slottedOption.toSlottedOption(dataclassOption), self._putOptionToTest)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,314 @@
+import argparse
+import dataclasses
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import backTester
+from benchmarks import syntheticChains
+from dataHandler import csvData
+from events import eventBus
+from pricing import blackScholes
+from pricing import impliedVolatility
+from typing import Any, Callable, Dict, List, Mapping, Optional, Text
+
+try:
+    import resource
+except ImportError:  # resource is not available on Windows.
+    resource = None
+
+"""
+This file benchmarks the stages of the end-to-end backtest hot path.
+"""
+
+# Stages of the hot path, in the order they are timed.
+STAGE_PARSE = 'parse'  # CsvData.getNextTick: reading and converting the option chains.
+STAGE_BUILD_OPTIONS = 'buildOptions'  # Creating the put / call objects of the option chains.
+STAGE_IMPLIED_VOL = 'impliedVol'  # Solving the implied volatility of every option, one option chain per call.
+STAGE_UPDATE_PORTFOLIO = 'updatePortfolio'  # Portfolio.updatePortfolio during a backtest.
+STAGE_CHECK_FOR_SIGNAL = 'checkForSignal'  # PutVerticalStrat.checkForSignal during a backtest.
+STAGE_RUN = 'run'  # The full backTester.run loop with the data handler used by backTester.py.
+STAGES = (STAGE_PARSE, STAGE_BUILD_OPTIONS, STAGE_IMPLIED_VOL, STAGE_UPDATE_PORTFOLIO, STAGE_CHECK_FOR_SIGNAL,
+          STAGE_RUN)
+
+# Sample files which can be benchmarked, and the underlying ticker of each.
+SAMPLE_DATASETS = {
+    'spx_sample': ('sampleData/spx_sample_ivolatility.csv', 'SPX'),
+    'aapl_sample': ('sampleData/aapl_sample_ivolatility.csv', 'AAPL'),
+}
+
+
+@dataclasses.dataclass
+class StageResult(object):
+    """Timing of one stage of the hot path.
+
+    Attributes:
+      seconds:  fastest time of the stage over the repetitions.
+      numTicks:  number of option chains processed by the stage.
+      numRows:  number of option rows processed by the stage.
+    """
+    seconds: float
+    numTicks: int
+    numRows: int
+
+    @property
+    def ticksPerSecond(self) -> float:
+        return self.numTicks / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def rowsPerSecond(self) -> float:
+        return self.numRows / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclasses.dataclass
+class BenchmarkResult(object):
+    """Timings of all stages for one dataset.
+
+    Attributes:
+      dataset:  description of the benchmarked dataset.
+      stages:  dictionary from stage name to the timing of the stage.
+      peakRssBytes:  peak resident set size of the benchmark process over all stages (the stages run in the same
+                     process, so their memory is not measured separately); None if it is not available.
+      environment:  Python version and platform the benchmark ran on.
+    """
+    dataset: Text
+    stages: Dict[Text, StageResult]
+    peakRssBytes: Optional[int] = None
+    environment: Dict[Text, Text] = dataclasses.field(default_factory=lambda: {
+        'python': platform.python_version(), 'platform': platform.platform()})
+
+    def toDict(self) -> Dict[Text, Any]:
+        return {'dataset': self.dataset, 'environment': dict(self.environment), 'peakRssBytes': self.peakRssBytes,
+                'stages': {name: dataclasses.asdict(stage) for name, stage in self.stages.items()}}
+
+    @classmethod
+    def fromDict(cls, values: Mapping[Text, Any]) -> 'BenchmarkResult':
+        return cls(dataset=values['dataset'], environment=dict(values['environment']),
+                   peakRssBytes=values.get('peakRssBytes'),
+                   stages={name: StageResult(**stage) for name, stage in values['stages'].items()})
+
+
+class _CallTimer(object):
+    """Accumulates the time spent in calls of a wrapped function."""
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+
+    def wrap(self, function: Callable) -> Callable:
+        def timedFunction(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.seconds += time.perf_counter() - start
+        return timedFunction
+
+
+def getPeakRssBytes() -> Optional[int]:
+    """Get the peak resident set size of the current process since it started (a high-water mark, which cannot be reset
+    between stages).
+
+    :return: peak resident set size in bytes; None if it is not available on this platform.
+    """
+    if resource is None:
+        return None
+    peakRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux.
+    return peakRss if sys.platform == 'darwin' else peakRss * 1024
+
+
+def _createCsvData(csvPath: Text, eventQueue: eventBus.EventQueue) -> csvData.CsvData:
+    """Create the CSV data handler configured as in backTester.py, without reading ahead on a worker thread."""
+    parameters = backTester.BackTestParameters()
+    return csvData.CsvData(csvPath=csvPath, dataProviderPath=parameters.dataProviderPath,
+                           dataProvider=parameters.dataProvider, eventQueue=eventQueue,
+                           loaderType=csvData.LoaderTypes.COLUMNAR, slottedOptions=True)
+
+
+def _readOptionChains(csvPath: Text) -> List[Any]:
+    """Read all option chains of a CSV, returning the option chain of each tick."""
+    eventQueue = eventBus.EventBus()
+    dataHandler = _createCsvData(csvPath, eventQueue)
+    optionChains = []
+    while dataHandler.getNextTick():
+        optionChains.append(eventQueue.get(False).getData())
+    return optionChains
+
+
+def runBenchmark(csvPath: Text, underlyingTicker: Text = 'SPX', repeat: int = 3,
+                 dataset: Optional[Text] = None) -> BenchmarkResult:
+    """Time every stage of the backtest hot path on an iVolatility CSV.
+
+    :param csvPath: path to the CSV to benchmark.
+    :param underlyingTicker: underlying used by the strategy.
+    :param repeat: number of times each stage is run; the fastest time is kept.
+    :param dataset: description of the dataset; defaults to the CSV path.
+    :raises ValueError: Repeat must be a positive number.
+    :return: timings of all stages.
+    """
+    if repeat < 1:
+        raise ValueError('Repeat must be a positive (> 0) number.')
+    parameters = backTester.BackTestParameters(filename=csvPath, underlyingTicker=underlyingTicker, logFile=None)
+    stageSeconds = {stage: [] for stage in STAGES}
+    stageTicks = {}
+    stageRows = {}
+
+    for _ in range(repeat):
+        # Parse: read the option chains without creating the option objects.
+        start = time.perf_counter()
+        optionChains = _readOptionChains(csvPath)
+        stageSeconds[STAGE_PARSE].append(time.perf_counter() - start)
+        numTicks = len(optionChains)
+        numRows = sum(len(optionChain) for optionChain in optionChains)
+        stageTicks[STAGE_PARSE], stageRows[STAGE_PARSE] = numTicks, numRows
+
+        # Build options: create the put / call object of every row of the option chains.
+        start = time.perf_counter()
+        for optionChain in optionChains:
+            list(optionChain)
+        stageSeconds[STAGE_BUILD_OPTIONS].append(time.perf_counter() - start)
+        stageTicks[STAGE_BUILD_OPTIONS], stageRows[STAGE_BUILD_OPTIONS] = numTicks, numRows
+
+        # Implied volatility: solve the implied volatility of every row from its price (rows/sec is options solved per
+        # second).
+        chainColumns = [{name: optionChain.getColumn(name) for name in impliedVolatility.INPUT_FIELDS}
+                        for optionChain in optionChains]
+        del optionChains
+        start = time.perf_counter()
+        for columns in chainColumns:
+            impliedVolatility.solveChainImpliedVolatility(columns, blackScholes.PricingModels.BLACK_SCHOLES)
+        stageSeconds[STAGE_IMPLIED_VOL].append(time.perf_counter() - start)
+        stageTicks[STAGE_IMPLIED_VOL], stageRows[STAGE_IMPLIED_VOL] = numTicks, numRows
+        del chainColumns
+
+        # Portfolio and strategy: time the calls made during a backtest which reads the data on the same thread.
+        portfolioTimer = _CallTimer()
+        strategyTimer = _CallTimer()
+        with backTester.BackTestSession(
+                parameters, createDataHandler=lambda eventQueue: _createCsvData(csvPath, eventQueue)) as session:
+            session.portfolioManager.updatePortfolio = portfolioTimer.wrap(session.portfolioManager.updatePortfolio)
+            session.strategyManager.checkForSignal = strategyTimer.wrap(session.strategyManager.checkForSignal)
+            backTester.run(session)
+        stageSeconds[STAGE_UPDATE_PORTFOLIO].append(portfolioTimer.seconds)
+        stageSeconds[STAGE_CHECK_FOR_SIGNAL].append(strategyTimer.seconds)
+        for stage in (STAGE_UPDATE_PORTFOLIO, STAGE_CHECK_FOR_SIGNAL):
+            stageTicks[stage], stageRows[stage] = numTicks, numRows
+
+        # Run: the full loop with the data handler used by backTester.py.
+        with backTester.BackTestSession(parameters) as session:
+            start = time.perf_counter()
+            backTester.run(session)
+            stageSeconds[STAGE_RUN].append(time.perf_counter() - start)
+        stageTicks[STAGE_RUN], stageRows[STAGE_RUN] = numTicks, numRows
+
+    return BenchmarkResult(dataset=dataset or csvPath, stages={
+        stage: StageResult(seconds=min(stageSeconds[stage]), numTicks=stageTicks[stage], numRows=stageRows[stage])
+        for stage in STAGES}, peakRssBytes=getPeakRssBytes())
+
+
+def runSyntheticBenchmark(numDays: int, numStrikes: int, numExpirations: int, repeat: int = 3,
+                          seed: int = 0) -> BenchmarkResult:
+    """Time every stage of the backtest hot path on synthetic option chains.
+
+    :param numDays: number of trade days (option chains).
+    :param numStrikes: number of strikes per expiration.
+    :param numExpirations: number of weekly expirations per trade day.
+    :param repeat: number of times each stage is run; the fastest time is kept.
+    :param seed: seed of the synthetic data.
+    :return: timings of all stages.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        csvPath = os.path.join(directory, 'synthetic_ivolatility.csv')
+        syntheticChains.writeSyntheticChains(csvPath, numDays, numStrikes, numExpirations, seed=seed)
+        return runBenchmark(csvPath, repeat=repeat, dataset='synthetic(days={}, strikes={}, expirations={}, '
+                                                            'seed={})'.format(numDays, numStrikes, numExpirations,
+                                                                              seed))
+
+
+def saveBaseline(result: BenchmarkResult, baselinePath: Text) -> None:
+    """Save benchmark timings as a JSON baseline."""
+    with open(baselinePath, 'w') as baselineFile:
+        json.dump(result.toDict(), baselineFile, indent=2)
+
+
+def loadBaseline(baselinePath: Text) -> BenchmarkResult:
+    """Load benchmark timings saved by saveBaseline()."""
+    with open(baselinePath) as baselineFile:
+        return BenchmarkResult.fromDict(json.load(baselineFile))
+
+
+def compareToBaseline(result: BenchmarkResult, baseline: BenchmarkResult, tolerance: float = 0.1) -> List[Text]:
+    """Compare benchmark timings against a baseline.
+
+    :param result: timings of the current run.
+    :param baseline: timings of the baseline run.
+    :param tolerance: slowdown (as a decimal) allowed before a stage counts as a regression.
+    :raises ValueError: Tolerance must be non-negative.
+    :return: description of every stage which is slower than the baseline by more than the tolerance.
+    """
+    if tolerance < 0:
+        raise ValueError('Tolerance must be a non-negative (>= 0) number.')
+    regressions = []
+    for stage, stageResult in result.stages.items():
+        baselineStage = baseline.stages.get(stage)
+        if baselineStage is None or baselineStage.seconds <= 0:
+            continue
+        change = stageResult.seconds / baselineStage.seconds - 1
+        if change > tolerance:
+            regressions.append('{}: {:.4f}s vs {:.4f}s baseline ({:+.1%})'.format(
+                stage, stageResult.seconds, baselineStage.seconds, change))
+    return regressions
+
+
+def formatResult(result: BenchmarkResult, baseline: Optional[BenchmarkResult] = None) -> Text:
+    """Format benchmark timings as a table, with the change against the baseline if one is given."""
+    lines = ['dataset: {}'.format(result.dataset),
+             '{:<16}{:>10}{:>12}{:>14}{:>10}'.format('stage', 'seconds', 'ticks/sec', 'rows/sec', 'change')]
+    for stage, stageResult in result.stages.items():
+        change = ''
+        if baseline is not None and stage in baseline.stages and baseline.stages[stage].seconds > 0:
+            change = '{:+.1%}'.format(stageResult.seconds / baseline.stages[stage].seconds - 1)
+        lines.append('{:<16}{:>10.4f}{:>12.1f}{:>14.1f}{:>10}'.format(
+            stage, stageResult.seconds, stageResult.ticksPerSecond, stageResult.rowsPerSecond, change))
+    if result.peakRssBytes is not None:
+        lines.append('peak RSS of the process: {:.1f} MB'.format(result.peakRssBytes / 2 ** 20))
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the stages of the backtest hot path.')
+    parser.add_argument('--dataset', default='synthetic', choices=['synthetic'] + list(SAMPLE_DATASETS),
+                        help='data to benchmark.')
+    parser.add_argument('--csvPath', default=None, help='benchmark this iVolatility CSV instead of a dataset.')
+    parser.add_argument('--underlyingTicker', default='SPX', help='underlying of the CSV given by --csvPath.')
+    parser.add_argument('--days', type=int, default=60, help='number of trade days of the synthetic data.')
+    parser.add_argument('--strikes', type=int, default=100, help='number of strikes of the synthetic data.')
+    parser.add_argument('--expirations', type=int, default=10, help='number of expirations of the synthetic data.')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic data.')
+    parser.add_argument('--repeat', type=int, default=3, help='number of repetitions; the fastest time is kept.')
+    parser.add_argument('--saveBaseline', default=None, help='save the timings as a JSON baseline at this path.')
+    parser.add_argument('--compare', default=None, help='compare the timings against the JSON baseline at this path.')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='slowdown (as a decimal) allowed before a stage counts as a regression.')
+    args = parser.parse_args()
+
+    if args.csvPath is not None:
+        benchmarkResult = runBenchmark(args.csvPath, args.underlyingTicker, repeat=args.repeat)
+    elif args.dataset == 'synthetic':
+        benchmarkResult = runSyntheticBenchmark(args.days, args.strikes, args.expirations, repeat=args.repeat,
+                                                seed=args.seed)
+    else:
+        samplePath, sampleTicker = SAMPLE_DATASETS[args.dataset]
+        benchmarkResult = runBenchmark(samplePath, sampleTicker, repeat=args.repeat, dataset=args.dataset)
+
+    baselineResult = loadBaseline(args.compare) if args.compare is not None else None
+    print(formatResult(benchmarkResult, baselineResult))
+    if args.saveBaseline is not None:
+        saveBaseline(benchmarkResult, args.saveBaseline)
+    if baselineResult is not None:
+        stageRegressions = compareToBaseline(benchmarkResult, baselineResult, args.tolerance)
+        for regression in stageRegressions:
+            print('REGRESSION ' + regression)
+        sys.exit(1 if stageRegressions else 0)
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from benchmarks import backtestBenchmark
+
+
+class TestBacktestBenchmark(unittest.TestCase):
+
+    def testRunSyntheticBenchmark(self):
+        """Tests that every stage is timed on synthetic data."""
+        result = backtestBenchmark.runSyntheticBenchmark(numDays=3, numStrikes=20, numExpirations=2, repeat=1)
+        self.assertEqual(tuple(result.stages.keys()), backtestBenchmark.STAGES)
+        for stageResult in result.stages.values():
+            self.assertEqual(stageResult.numTicks, 3)
+            self.assertEqual(stageResult.numRows, 3 * 20 * 2 * 2)
+            self.assertGreaterEqual(stageResult.seconds, 0)
+        self.assertGreater(result.stages[backtestBenchmark.STAGE_RUN].ticksPerSecond, 0)
+        if backtestBenchmark.resource is not None:
+            self.assertGreater(result.peakRssBytes, 0)
+            self.assertIn('peak RSS of the process', backtestBenchmark.formatResult(result))
+
+    def testInvalidRepeat(self):
+        """Tests that an exception is raised if the stages are not run at least once."""
+        with self.assertRaisesRegex(ValueError, 'Repeat must be a positive'):
+            backtestBenchmark.runBenchmark('sampleData/spx_sample_ivolatility.csv', repeat=0)
+
+    def testBaselineRoundTrip(self):
+        """Tests that a saved baseline is loaded with the same timings."""
+        result = backtestBenchmark.BenchmarkResult(dataset='test', stages={
+            backtestBenchmark.STAGE_PARSE: backtestBenchmark.StageResult(seconds=2.0, numTicks=4, numRows=100)},
+            peakRssBytes=1024)
+        with tempfile.TemporaryDirectory() as directory:
+            baselinePath = os.path.join(directory, 'baseline.json')
+            backtestBenchmark.saveBaseline(result, baselinePath)
+            self.assertEqual(backtestBenchmark.loadBaseline(baselinePath), result)
+        self.assertEqual(result.stages[backtestBenchmark.STAGE_PARSE].ticksPerSecond, 2.0)
+        self.assertEqual(result.stages[backtestBenchmark.STAGE_PARSE].rowsPerSecond, 50.0)
+
+    def testCompareToBaseline(self):
+        """Tests that only the stages slower than the baseline by more than the tolerance are reported."""
+        baseline = backtestBenchmark.BenchmarkResult(dataset='test', stages={
+            'parse': backtestBenchmark.StageResult(seconds=1.0, numTicks=1, numRows=1),
+            'run': backtestBenchmark.StageResult(seconds=1.0, numTicks=1, numRows=1)})
+        result = backtestBenchmark.BenchmarkResult(dataset='test', stages={
+            'parse': backtestBenchmark.StageResult(seconds=1.05, numTicks=1, numRows=1),
+            'run': backtestBenchmark.StageResult(seconds=1.5, numTicks=1, numRows=1)})
+        regressions = backtestBenchmark.compareToBaseline(result, baseline, tolerance=0.1)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith('run:'))
+        with self.assertRaisesRegex(ValueError, 'Tolerance must be a non-negative'):
+            backtestBenchmark.compareToBaseline(result, baseline, tolerance=-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
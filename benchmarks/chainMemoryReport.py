@@ -0,0 +1,80 @@
+import argparse
+import dataclasses
+import queue
+import sys
+from base import option
+from base import slottedOption
+from dataHandler import csvData
+from typing import Iterable
+
+"""
+This file reports the memory saved per option chain by the slotted options of base/slottedOption.py.
+"""
+
+
+@dataclasses.dataclass
+class ChainMemoryReport(object):
+    """Memory used by the option objects of one option chain (the field values, which are shared, are not included).
+
+    Attributes:
+      numOptions:  number of options in the chain.
+      dataclassBytes:  bytes used by the chain as put.Put / call.Call objects.
+      slottedBytes:  bytes used by the chain as SlottedPut / SlottedCall objects.
+    """
+    numOptions: int
+    dataclassBytes: int
+    slottedBytes: int
+
+    @property
+    def savedBytes(self) -> int:
+        return self.dataclassBytes - self.slottedBytes
+
+    @property
+    def savedBytesPerOption(self) -> float:
+        return self.savedBytes / self.numOptions if self.numOptions else 0.0
+
+
+def _getObjectSize(optionObject: object) -> int:
+    """Size of an option object including its instance dictionary, if it has one."""
+    size = sys.getsizeof(optionObject)
+    instanceDict = getattr(optionObject, '__dict__', None)
+    if instanceDict is not None:
+        size += sys.getsizeof(instanceDict)
+    return size
+
+
+def getChainMemoryReport(optionChain: Iterable[option.Option]) -> ChainMemoryReport:
+    """Compare the memory used by an option chain when it is held as dataclass options and as slotted options.
+
+    :param optionChain: options of one tick, either dataclass or slotted options.
+    :return: memory report for the chain.
+    """
+    numOptions = dataclassBytes = slottedBytes = 0
+    for chainOption in optionChain:
+        if not hasattr(chainOption, '__dict__'):
+            slottedChainOption, dataclassChainOption = chainOption, slottedOption.toDataclassOption(chainOption)
+        else:
+            slottedChainOption, dataclassChainOption = slottedOption.toSlottedOption(chainOption), chainOption
+        numOptions += 1
+        dataclassBytes += _getObjectSize(dataclassChainOption)
+        slottedBytes += _getObjectSize(slottedChainOption)
+    return ChainMemoryReport(numOptions=numOptions, dataclassBytes=dataclassBytes, slottedBytes=slottedBytes)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Report the memory saved per option chain by slotted options.')
+    parser.add_argument('csvPath', help='path to the option chain CSV.')
+    parser.add_argument('dataProviderPath', help='path to the data provider JSON file.')
+    parser.add_argument('dataProvider', help='data provider in the JSON file (e.g., iVolatility).')
+    args = parser.parse_args()
+
+    eventQueue = queue.Queue()
+    dataHandler = csvData.CsvData(csvPath=args.csvPath, dataProviderPath=args.dataProviderPath,
+                                  dataProvider=args.dataProvider, eventQueue=eventQueue,
+                                  loaderType=csvData.LoaderTypes.COLUMNAR, slottedOptions=True)
+    print('dateTime,numOptions,dataclassBytes,slottedBytes,savedBytes,savedBytesPerOption')
+    while dataHandler.getNextTick():
+        optionChain = eventQueue.get().getData()
+        report = getChainMemoryReport(optionChain)
+        print('{},{},{},{},{},{:.1f}'.format(optionChain[0].dateTime, report.numOptions, report.dataclassBytes,
+                                             report.slottedBytes, report.savedBytes, report.savedBytesPerOption))
@@ -0,0 +1,24 @@
+import datetime
+import decimal
+import unittest
+from base import slottedOption
+from benchmarks import chainMemoryReport
+
+
+class TestChainMemoryReport(unittest.TestCase):
+
+    def testChainMemoryReport(self):
+        """Tests that the memory report shows that slotted options use less memory."""
+        putOption = slottedOption.SlottedPut(
+            underlyingTicker='SPY', strikePrice=decimal.Decimal(250),
+            dateTime=datetime.datetime.strptime('01/01/2021', "%m/%d/%Y"),
+            expirationDateTime=datetime.datetime.strptime('01/01/2050', "%m/%d/%Y"),
+            tradePrice=decimal.Decimal(3.00), settlementPrice=decimal.Decimal(1.25))
+        report = chainMemoryReport.getChainMemoryReport([putOption, slottedOption.toDataclassOption(putOption)])
+        self.assertEqual(report.numOptions, 2)
+        self.assertGreater(report.savedBytes, 0)
+        self.assertEqual(report.savedBytesPerOption, report.savedBytes / 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
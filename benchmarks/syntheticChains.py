@@ -0,0 +1,157 @@
+import argparse
+import datetime
+import math
+import numpy as np
+import pandas as pd
+from typing import List, Text
+
+"""
+This file generates synthetic option chains in the iVolatility CSV format for benchmarking.
+"""
+
+# Columns of the iVolatility CSV format (see the iVolatility entry of dataHandler/dataProviders.json).
+CSV_COLUMNS = ['symbol', 'exchange', 'company_name', 'date', 'stock_price_close', 'option_symbol', 'option_expiration',
+               'strike', 'call/put', 'style', 'ask', 'bid', 'mean_price', 'settlement', 'iv', 'volume',
+               'open_interest', 'stock_price_for_iv', 'forward_price', 'isinterpolated', 'delta', 'vega', 'gamma',
+               'theta', 'rho']
+DATE_TIME_FORMAT = '%m/%d/%Y'
+DAYS_PER_YEAR = 365.0
+
+_erf = np.frompyfunc(math.erf, 1, 1)
+
+
+def _normalCdf(values: np.ndarray) -> np.ndarray:
+    return 0.5 * (1.0 + _erf(values / math.sqrt(2.0)).astype(np.float64))
+
+
+def _normalPdf(values: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * values * values) / math.sqrt(2.0 * math.pi)
+
+
+def getTradingDays(startDate: datetime.datetime, numDays: int) -> List[datetime.datetime]:
+    """Get the first numDays weekdays on or after the start date.
+
+    :param startDate: first date to consider.
+    :param numDays: number of trading days.
+    :return: list of trading days.
+    """
+    tradingDays = []
+    currentDate = startDate
+    while len(tradingDays) < numDays:
+        if currentDate.weekday() < 5:
+            tradingDays.append(currentDate)
+        currentDate += datetime.timedelta(days=1)
+    return tradingDays
+
+
+def getExpirations(tradeDate: datetime.datetime, numExpirations: int) -> List[datetime.datetime]:
+    """Get the weekly (Friday) expirations listed on a trade date, starting with the Friday on or after the date.
+
+    :param tradeDate: trade date of the option chain.
+    :param numExpirations: number of expirations.
+    :return: list of expiration dates.
+    """
+    firstExpiration = tradeDate + datetime.timedelta(days=(4 - tradeDate.weekday()) % 7)
+    return [firstExpiration + datetime.timedelta(weeks=week) for week in range(numExpirations)]
+
+
+def writeSyntheticChains(csvPath: Text, numDays: int, numStrikes: int, numExpirations: int,
+                         startDate: datetime.datetime = datetime.datetime(2011, 1, 3), underlyingTicker: Text = 'SPX',
+                         underlyingPrice: float = 1270.0, strikeSpacing: float = 5.0, seed: int = 0) -> int:
+    """Write a CSV of synthetic option chains in the iVolatility format.
+
+    Every trade day lists a put and a call for each strike and expiration.  The underlying follows a seeded random
+    walk, and the prices and greeks come from the Black-Scholes model with a volatility skew, so the same arguments
+    always produce the same file.
+
+    :param csvPath: path of the CSV to write.
+    :param numDays: number of trade days (option chains).
+    :param numStrikes: number of strikes per expiration, centered on the starting underlying price.
+    :param numExpirations: number of weekly expirations per trade day.
+    :param startDate: first trade date (weekends are skipped).
+    :param underlyingTicker: ticker of the underlying.
+    :param underlyingPrice: starting price of the underlying.
+    :param strikeSpacing: distance between consecutive strikes.
+    :param seed: seed of the random walk of the underlying, the volumes and the open interests.
+    :raises ValueError: Number of days, strikes and expirations must be positive numbers.
+    :raises ValueError: Strikes must be positive.
+    :return: number of option rows written.
+    """
+    if numDays < 1:
+        raise ValueError('Number of days must be a positive (> 0) number.')
+    if numStrikes < 1:
+        raise ValueError('Number of strikes must be a positive (> 0) number.')
+    if numExpirations < 1:
+        raise ValueError('Number of expirations must be a positive (> 0) number.')
+    strikes = (round(underlyingPrice / strikeSpacing) + np.arange(numStrikes) - numStrikes // 2) * strikeSpacing
+    if strikes[0] <= 0:
+        raise ValueError('Strikes must be positive; use fewer strikes or a smaller strike spacing.')
+
+    randomGenerator = np.random.default_rng(seed)
+    companyName = 'S&P 500 Index (SPX)' if underlyingTicker == 'SPX' else underlyingTicker
+    numRows = 0
+    with open(csvPath, 'w', newline='') as csvFile:
+        csvFile.write(','.join(CSV_COLUMNS) + '\n')
+        for tradeDate in getTradingDays(startDate, numDays):
+            if numRows:
+                underlyingPrice *= math.exp(randomGenerator.normal(0.0, 0.15 / math.sqrt(252.0)))
+            price = round(underlyingPrice, 2)
+            expirations = getExpirations(tradeDate, numExpirations)
+
+            # Rows are ordered by expiration, then strike, then call before put.
+            rowExpirations = np.repeat(np.arange(numExpirations), 2 * numStrikes)
+            rowStrikes = np.tile(np.repeat(strikes, 2), numExpirations)
+            isCall = np.tile([True, False], numExpirations * numStrikes)
+            # Options on their expiration date are priced with half a day left.
+            yearsLeft = np.maximum([(expiration - tradeDate).days for expiration in expirations],
+                                   0.5)[rowExpirations] / DAYS_PER_YEAR
+            impliedVols = np.clip(0.18 - 0.4 * (rowStrikes / price - 1.0), 0.05, 1.0)
+            volSqrtTime = impliedVols * np.sqrt(yearsLeft)
+            d1 = (np.log(price / rowStrikes) + 0.5 * impliedVols ** 2 * yearsLeft) / volSqrtTime
+            callDeltas, callD2s = _normalCdf(d1), _normalCdf(d1 - volSqrtTime)
+            callPrices = price * callDeltas - rowStrikes * callD2s
+            prices = np.maximum(np.where(isCall, callPrices, callPrices - price + rowStrikes), 0.0)
+            halfSpreads = np.maximum(0.025, 0.01 * prices)
+            bids = np.round(np.maximum(prices - halfSpreads, 0.0), 2)
+            asks = np.round(prices + halfSpreads, 2)
+            expirationTexts = np.array([expiration.strftime(DATE_TIME_FORMAT) for expiration in expirations])
+            symbolPrefixes = np.array(['{}W  {}'.format(underlyingTicker, expiration.strftime('%y%m%d'))
+                                       for expiration in expirations])
+            optionTypes = np.where(isCall, 'C', 'P')
+            numDayRows = len(rowStrikes)
+
+            # Adding 0.0 turns the -0.0 values created by rounding into 0.0.
+            chain = pd.DataFrame({
+                'symbol': underlyingTicker, 'exchange': 'CBOE', 'company_name': companyName,
+                'date': tradeDate.strftime(DATE_TIME_FORMAT), 'stock_price_close': price,
+                'option_symbol': np.char.add(np.char.add(symbolPrefixes[rowExpirations], optionTypes),
+                                             np.char.zfill(np.round(rowStrikes * 1000).astype(np.int64).astype(str),
+                                                           8)),
+                'option_expiration': expirationTexts[rowExpirations], 'strike': rowStrikes, 'call/put': optionTypes,
+                'style': 'E', 'ask': asks, 'bid': bids, 'mean_price': np.round((bids + asks) / 2, 3),
+                'settlement': 0.0, 'iv': np.round(impliedVols, 6),
+                'volume': randomGenerator.integers(0, 5000, size=numDayRows),
+                'open_interest': randomGenerator.integers(0, 50000, size=numDayRows),
+                'stock_price_for_iv': price, 'forward_price': price, 'isinterpolated': '*',
+                'delta': np.round(np.where(isCall, callDeltas, callDeltas - 1.0), 6) + 0.0,
+                'vega': np.round(price * _normalPdf(d1) * np.sqrt(yearsLeft) / 100.0, 6) + 0.0,
+                'gamma': np.round(_normalPdf(d1) / (price * volSqrtTime), 6) + 0.0,
+                'theta': np.round(-price * _normalPdf(d1) * impliedVols / (2.0 * np.sqrt(yearsLeft)) / DAYS_PER_YEAR,
+                                  6) + 0.0,
+                'rho': np.round(np.where(isCall, rowStrikes * yearsLeft * callD2s,
+                                         -rowStrikes * yearsLeft * (1.0 - callD2s)) / 100.0, 6) + 0.0,
+            }, columns=CSV_COLUMNS)
+            chain.to_csv(csvFile, header=False, index=False, lineterminator='\n')
+            numRows += numDayRows
+    return numRows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write synthetic option chains in the iVolatility CSV format.')
+    parser.add_argument('csvPath', help='path of the CSV to write.')
+    parser.add_argument('--days', type=int, default=250, help='number of trade days.')
+    parser.add_argument('--strikes', type=int, default=100, help='number of strikes per expiration.')
+    parser.add_argument('--expirations', type=int, default=10, help='number of weekly expirations per trade day.')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random walk of the underlying.')
+    args = parser.parse_args()
+    print(writeSyntheticChains(args.csvPath, args.days, args.strikes, args.expirations, seed=args.seed))
@@ -0,0 +1,74 @@
+import datetime
+import filecmp
+import os
+import queue
+import shutil
+import tempfile
+import unittest
+from base import option
+from benchmarks import syntheticChains
+from dataHandler import csvData
+
+
+class TestSyntheticChains(unittest.TestCase):
+
+    def setUp(self):
+        self._tempDirectory = tempfile.mkdtemp()
+        self._csvPath = os.path.join(self._tempDirectory, 'synthetic.csv')
+
+    def tearDown(self):
+        shutil.rmtree(self._tempDirectory)
+
+    def testChainsLoadWithCsvData(self):
+        """Tests that the synthetic CSV is read by CsvData with one option chain per trade day."""
+        numRows = syntheticChains.writeSyntheticChains(self._csvPath, numDays=3, numStrikes=4, numExpirations=2)
+        self.assertEqual(numRows, 3 * 4 * 2 * 2)
+        eventQueue = queue.Queue()
+        dataObj = csvData.CsvData(csvPath=self._csvPath, dataProviderPath='dataHandler/dataProviders.json',
+                                  dataProvider='iVolatility', eventQueue=eventQueue,
+                                  loaderType=csvData.LoaderTypes.COLUMNAR)
+        dateTimes = []
+        while dataObj.getNextTick():
+            chain = eventQueue.get().getData()
+            self.assertEqual(len(chain), 16)
+            dateTimes.append(chain[0].dateTime)
+            for chainOption in chain:
+                self.assertGreaterEqual(chainOption.expirationDateTime, chainOption.dateTime)
+                self.assertLessEqual(chainOption.bidPrice, chainOption.askPrice)
+                if chainOption.optionType == option.OptionTypes.PUT:
+                    self.assertTrue(-1 <= chainOption.delta <= 0)
+                else:
+                    self.assertTrue(0 <= chainOption.delta <= 1)
+        # 01/03/2011 is a Monday; the weekend is skipped.
+        self.assertEqual(dateTimes, [datetime.datetime(2011, 1, 3), datetime.datetime(2011, 1, 4),
+                                     datetime.datetime(2011, 1, 5)])
+
+    def testSameSeedSameFile(self):
+        """Tests that the same arguments always write the same file."""
+        otherPath = os.path.join(self._tempDirectory, 'other.csv')
+        syntheticChains.writeSyntheticChains(self._csvPath, numDays=2, numStrikes=3, numExpirations=2, seed=7)
+        syntheticChains.writeSyntheticChains(otherPath, numDays=2, numStrikes=3, numExpirations=2, seed=7)
+        self.assertTrue(filecmp.cmp(self._csvPath, otherPath, shallow=False))
+
+    def testGetTradingDays(self):
+        """Tests that weekends are skipped."""
+        tradingDays = syntheticChains.getTradingDays(datetime.datetime(2011, 1, 7), 2)
+        self.assertEqual(tradingDays, [datetime.datetime(2011, 1, 7), datetime.datetime(2011, 1, 10)])
+
+    def testGetExpirations(self):
+        """Tests that the expirations are the Fridays on or after the trade date."""
+        self.assertEqual(syntheticChains.getExpirations(datetime.datetime(2011, 1, 5), 2),
+                         [datetime.datetime(2011, 1, 7), datetime.datetime(2011, 1, 14)])
+        self.assertEqual(syntheticChains.getExpirations(datetime.datetime(2011, 1, 7), 1),
+                         [datetime.datetime(2011, 1, 7)])
+
+    def testInvalidSizes(self):
+        """Tests that an exception is raised for sizes which are not positive."""
+        with self.assertRaisesRegex(ValueError, 'Number of days must be a positive'):
+            syntheticChains.writeSyntheticChains(self._csvPath, numDays=0, numStrikes=1, numExpirations=1)
+        with self.assertRaisesRegex(ValueError, 'Strikes must be positive'):
+            syntheticChains.writeSyntheticChains(self._csvPath, numDays=1, numStrikes=1000, numExpirations=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,518 @@
+import argparse
+import csv
+import datetime
+import decimal
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from base import call
+from base import money
+from base import optionChain
+from base import put
+from base import slottedOption
+from dataHandler import chainColumns
+from dataHandler import csvSource
+from dataHandler import dataHandler
+from events import eventBus
+from events import tickEvent
+from pricing import blackScholes
+from pricing import impliedVolatility
+from typing import Any, BinaryIO, Dict, Mapping, Optional, Text, Tuple, Union
+
+# File layout: magic, little-endian uint64 header length, JSON header, then column blocks aligned to BLOCK_ALIGNMENT
+# bytes. The header describes the offset, dtype and length of every column block.
+MAGIC = b'OSCHAIN1'
+FORMAT_VERSION = 1
+BLOCK_ALIGNMENT = 64
+CACHE_FILE_SUFFIX = '.chaincache'
+
+# Sentinels for missing values in integer blocks.
+MISSING_INT = np.iinfo(np.int64).min
+MISSING_EXPONENT = np.iinfo(np.int8).min
+MISSING_CODE = -1
+
+# Date index blocks.
+INDEX_DATES = 'index.dates'
+INDEX_OFFSETS = 'index.offsets'
+
+
+def getCachePath(csvPath: Text) -> Text:
+    """Get the default location of the cache file for a CSV.
+
+    :param csvPath: path to the source CSV.
+    :return: path to the cache file.
+    """
+    return csvPath + CACHE_FILE_SUFFIX
+
+
+def loadProviderConfig(dataProviderPath: Text, dataProvider: Text) -> Mapping[Text, Any]:
+    """Load the data provider entry from the dataProviders.json file.
+
+    :param dataProviderPath: path to data provider JSON file.
+    :param dataProvider: historical data provider (e.g, provider of CSV).
+    :raises ValueError: Cannot load data as a JSON file.
+    :raises ValueError: Requested data provider not found in JSON file.
+    :return: data provider entry.
+    """
+    try:
+        with open(dataProviderPath) as dataProviderFile:
+            dataConfig = json.load(dataProviderFile)
+    except (FileNotFoundError, json.decoder.JSONDecodeError) as e:
+        raise ValueError('Failure when trying to open / load data from JSON file: %s.' % dataProviderPath) from e
+    if dataProvider not in dataConfig:
+        raise ValueError('The requested data provider: %s was not found in dataProviders.json' % dataProvider)
+    return dataConfig[dataProvider]
+
+
+def getSourceFingerprint(csvPath: Text, providerConfig: Mapping[Text, Any]) -> Dict[Text, Any]:
+    """Describe the inputs of a cache file. The cache is stale if any of these values change.
+
+    :param csvPath: path to the source CSV.
+    :param providerConfig: data provider entry from the dataProviders.json file.
+    :return: dictionary with the source size, modification time and a hash of the provider config.
+    """
+    sourceStat = os.stat(csvPath)
+    configHash = hashlib.sha256(json.dumps(providerConfig, sort_keys=True).encode('utf-8')).hexdigest()
+    return {'formatVersion': FORMAT_VERSION, 'sourceSize': sourceStat.st_size,
+            'sourceMtimeNs': sourceStat.st_mtime_ns, 'providerConfigHash': configHash}
+
+
+def readHeader(cachePath: Text) -> Dict[Text, Any]:
+    """Read the JSON header of a cache file.
+
+    :param cachePath: path to the cache file.
+    :raises ValueError: File is not a chain cache file.
+    :return: header dictionary; 'dataOffset' is added with the position of the first column block.
+    """
+    with open(cachePath, 'rb') as cacheFile:
+        if cacheFile.read(len(MAGIC)) != MAGIC:
+            raise ValueError('%s is not an option chain cache file.' % cachePath)
+        headerLength = int.from_bytes(cacheFile.read(8), 'little')
+        header = json.loads(cacheFile.read(headerLength).decode('utf-8'))
+    header['dataOffset'] = _align(len(MAGIC) + 8 + headerLength)
+    return header
+
+
+def parseHeader(data: np.ndarray, source: Text) -> Dict[Text, Any]:
+    """Parse the JSON header of a cache file which is already in memory.
+
+    :param data: bytes of the cache file as a uint8 array (e.g., a memory map or a shared memory buffer).
+    :param source: name of the cache used in error messages.
+    :raises ValueError: Data is not a chain cache file.
+    :return: header dictionary; 'dataOffset' is added with the position of the first column block.
+    """
+    if len(data) < len(MAGIC) + 8 or data[:len(MAGIC)].tobytes() != MAGIC:
+        raise ValueError('%s is not an option chain cache file.' % source)
+    headerLength = int.from_bytes(data[len(MAGIC):len(MAGIC) + 8].tobytes(), 'little')
+    header = json.loads(data[len(MAGIC) + 8:len(MAGIC) + 8 + headerLength].tobytes().decode('utf-8'))
+    header['dataOffset'] = _align(len(MAGIC) + 8 + headerLength)
+    return header
+
+
+def isCacheValid(cachePath: Text, csvPath: Text, providerConfig: Mapping[Text, Any]) -> bool:
+    """Check that a cache file exists and was compiled from the current CSV and provider config.
+
+    :param cachePath: path to the cache file.
+    :param csvPath: path to the source CSV.
+    :param providerConfig: data provider entry from the dataProviders.json file.
+    :return: True if the cache can be used, False if it has to be compiled.
+    """
+    if not os.path.exists(cachePath):
+        return False
+    try:
+        header = readHeader(cachePath)
+    except ValueError:
+        return False
+    return header['fingerprint'] == getSourceFingerprint(csvPath, providerConfig)
+
+
+def _align(offset: int) -> int:
+    """Round offset up to the next multiple of BLOCK_ALIGNMENT."""
+    return -(-offset // BLOCK_ALIGNMENT) * BLOCK_ALIGNMENT
+
+
+def _decimalToParts(value: Optional[decimal.Decimal]) -> Tuple[int, int]:
+    """Split a decimal into an integer coefficient and a base 10 exponent.
+
+    :param value: decimal to split.
+    :raises ValueError: Decimal cannot be stored in the cache.
+    :return: tuple of (coefficient, exponent); (0, MISSING_EXPONENT) for None.
+    """
+    if value is None:
+        return 0, MISSING_EXPONENT
+    sign, digits, exponent = value.as_tuple()
+    coefficient = int(''.join(map(str, digits)))
+    if not isinstance(exponent, int) or not MISSING_EXPONENT < exponent <= np.iinfo(np.int8).max or (
+          coefficient > np.iinfo(np.int64).max):
+        raise ValueError('Decimal value %s cannot be stored in the option chain cache.' % value)
+    return -coefficient if sign else coefficient, exponent
+
+
+class _ColumnWriter(object):
+    """Appends the blocks of one cache column to a temporary file."""
+
+    def __init__(self, directory: Text, name: Text, dtype: np.dtype) -> None:
+        self.name = name
+        self.dtype = np.dtype(dtype)
+        self.length = 0
+        self.path = os.path.join(directory, name)
+        self.__file = open(self.path, 'wb')
+
+    def append(self, values: np.ndarray) -> None:
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        self.__file.write(values.tobytes())
+        self.length += len(values)
+
+    def close(self) -> None:
+        self.__file.close()
+
+
+class _ChainCacheWriter(object):
+    """Encodes typed option chain columns into the binary cache format one block at a time."""
+
+    def __init__(self, directory: Text) -> None:
+        self.__directory = directory
+        self.__writers = {}
+        self.__vocabularies = {fieldName: {} for fieldName, fieldType in chainColumns.OPTION_FIELD_TYPES.items()
+                               if fieldType == chainColumns.FieldTypes.TEXT}
+        self.__numRows = 0
+        self.__lastDateTime = None
+        self.__dates = []
+        self.__dateOffsets = []
+
+    def __append(self, name: Text, dtype: np.dtype, values: np.ndarray) -> None:
+        if name not in self.__writers:
+            self.__writers[name] = _ColumnWriter(self.__directory, name, dtype)
+        self.__writers[name].append(values)
+
+    def appendColumns(self, columns: Mapping[Text, np.ndarray]) -> None:
+        """Encode and append one block of typed columns created by chainColumns.buildColumns().
+
+        :param columns: typed columns.
+        """
+        for fieldName, fieldType in chainColumns.OPTION_FIELD_TYPES.items():
+            column = columns[fieldName]
+            if fieldType == chainColumns.FieldTypes.FLOAT:
+                self.__append(fieldName, np.float64, column)
+            elif fieldType == chainColumns.FieldTypes.TEXT:
+                vocabulary = self.__vocabularies[fieldName]
+                codes = [MISSING_CODE if value is None else vocabulary.setdefault(value, len(vocabulary))
+                         for value in column.tolist()]
+                self.__append(fieldName, np.int32, codes)
+            elif fieldType == chainColumns.FieldTypes.DECIMAL:
+                # The loader shares one decimal object per distinct CSV string, so we factorize by identity; equal
+                # decimals with different exponents (e.g., 1050 and 1050.0) must not be merged.
+                codes, _ = pd.factorize(np.fromiter(map(id, column), dtype=np.int64, count=len(column)))
+                uniques = column[np.unique(codes, return_index=True)[1]]
+                parts = np.array([_decimalToParts(value) for value in uniques], dtype=np.int64).reshape(-1, 2)
+                self.__append(fieldName + '.coefficient', np.int64, parts[codes, 0])
+                self.__append(fieldName + '.exponent', np.int8, parts[codes, 1])
+            elif fieldType == chainColumns.FieldTypes.INT:
+                self.__append(fieldName, np.int64, [MISSING_INT if value is None else value for value in
+                                                    column.tolist()])
+            elif fieldType == chainColumns.FieldTypes.DATE_TIME:
+                self.__append(fieldName, 'datetime64[us]', column.tolist())
+        self.__append(chainColumns.IS_CALL_COLUMN, np.bool_, columns[chainColumns.IS_CALL_COLUMN])
+
+        # Record the first row of every date / time for the date index.
+        boundaries = chainColumns.getDateBoundaries(columns)
+        for start in boundaries[:-1].tolist():
+            dateTime = columns['dateTime'][start]
+            if dateTime != self.__lastDateTime:
+                self.__dates.append(dateTime)
+                self.__dateOffsets.append(self.__numRows + start)
+                self.__lastDateTime = dateTime
+        self.__numRows += len(columns['dateTime'])
+
+    def write(self, outFile: BinaryIO, fingerprint: Mapping[Text, Any]) -> None:
+        """Write the header and all column blocks to the cache file.
+
+        :param outFile: binary file opened for writing.
+        :param fingerprint: source fingerprint created by getSourceFingerprint().
+        """
+        for fieldName, vocabulary in self.__vocabularies.items():
+            encoded = [value.encode('utf-8') for value in vocabulary]
+            self.__append(fieldName + '.vocabulary', 'S%d' % max([1] + [len(value) for value in encoded]), encoded)
+        self.__append(INDEX_DATES, 'datetime64[us]', self.__dates)
+        self.__append(INDEX_OFFSETS, np.int64, self.__dateOffsets + [self.__numRows])
+        for writer in self.__writers.values():
+            writer.close()
+
+        # The header size depends on the offsets, so we lay out the blocks relative to the data section.
+        blocks = {}
+        offset = 0
+        for name, writer in self.__writers.items():
+            blocks[name] = {'dtype': writer.dtype.str, 'offset': offset, 'length': writer.length}
+            offset = _align(offset + writer.length * writer.dtype.itemsize)
+        header = json.dumps({'fingerprint': dict(fingerprint), 'numRows': self.__numRows,
+                             'blocks': blocks}).encode('utf-8')
+        outFile.write(MAGIC)
+        outFile.write(len(header).to_bytes(8, 'little'))
+        outFile.write(header)
+        dataOffset = _align(len(MAGIC) + 8 + len(header))
+        for name, writer in self.__writers.items():
+            outFile.write(b'\0' * (dataOffset + blocks[name]['offset'] - outFile.tell()))
+            with open(writer.path, 'rb') as blockFile:
+                shutil.copyfileobj(blockFile, outFile)
+
+
+def compileChainCache(csvPath: Text, dataProviderPath: Text, dataProvider: Text, cachePath: Optional[Text] = None,
+                      chunkSize: int = 100000) -> Text:
+    """Compile a CSV into a typed, columnar cache file with a date / time index.
+
+    :param csvPath: path to CSV file used in backtesting.
+    :param dataProviderPath: path to data provider JSON file.
+    :param dataProvider: historical data provider (e.g, provider of CSV).
+    :param cachePath: path of the cache file to write; defaults to getCachePath(csvPath).
+    :param chunkSize: number of CSV rows converted at a time.
+    :raises ValueError: Number of CSV columns not provided in JSON file.
+    :raises ValueError: Number of columns read from CSV does not match number of columns in JSON file.
+    :raises TypeError: Only option data sources can be cached.
+    :return: path to the cache file.
+    """
+    cachePath = cachePath or getCachePath(csvPath)
+    providerConfig = loadProviderConfig(dataProviderPath, dataProvider)
+    if providerConfig.get('data_source_type') != 'options':
+        raise TypeError('data_source_type not supported.')
+    fingerprint = getSourceFingerprint(csvPath, providerConfig)
+
+    with csvSource.openCsvSource(csvPath, providerConfig['column_names'].get('dateTime'),
+                                 providerConfig.get('date_time_format')) as csvFile:
+        csvColumnNames = next(csv.reader(csvFile))
+        if 'number_columns' not in providerConfig:
+            raise ValueError('number_columns was not provided in dataProviders.json file.')
+        if not len(csvColumnNames) == providerConfig['number_columns']:
+            raise ValueError('Number of columns in CSV and dataProviders.json do not match.')
+        if providerConfig['column_names']['dateTime'] not in csvColumnNames:
+            raise TypeError('The dateColumnName was not found in the CSV.')
+
+        # Blocks are staged in a temporary directory next to the cache so the final file is written in one pass
+        # and only replaces an existing cache once it is complete.
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(cachePath))) as stagingDirectory:
+            writer = _ChainCacheWriter(stagingDirectory)
+            for block in pd.read_csv(csvFile, header=None, names=csvColumnNames, chunksize=chunkSize,
+                                     **chainColumns.getReadOptions(providerConfig, csvColumnNames)):
+                writer.appendColumns(chainColumns.buildColumns(block, providerConfig))
+            stagingPath = os.path.join(stagingDirectory, os.path.basename(cachePath))
+            with open(stagingPath, 'wb') as outFile:
+                writer.write(outFile, fingerprint)
+            os.replace(stagingPath, cachePath)
+    return cachePath
+
+
+def ensureChainCache(csvPath: Text, dataProviderPath: Text, dataProvider: Text, cachePath: Optional[Text] = None,
+                     chunkSize: int = 100000) -> Text:
+    """Compile the cache for a CSV if it does not exist or is stale.
+
+    :param csvPath: path to CSV file used in backtesting.
+    :param dataProviderPath: path to data provider JSON file.
+    :param dataProvider: historical data provider (e.g, provider of CSV).
+    :param cachePath: path of the cache file; defaults to getCachePath(csvPath).
+    :param chunkSize: number of CSV rows converted at a time.
+    :return: path to the cache file.
+    """
+    cachePath = cachePath or getCachePath(csvPath)
+    if not isCacheValid(cachePath, csvPath, loadProviderConfig(dataProviderPath, dataProvider)):
+        compileChainCache(csvPath, dataProviderPath, dataProvider, cachePath, chunkSize)
+    return cachePath
+
+
+class ChainCache(object):
+    """Read-only, memory-mapped view of a cache file."""
+
+    def __init__(self, cachePath: Text, buffer: Optional[memoryview] = None) -> None:
+        """Memory-maps the cache file.
+
+        Attributes:
+          cachePath: path to the cache file.
+          buffer:  contents of the cache file which are already in memory (e.g., a shared memory block); the column
+                   blocks are views of the buffer and cachePath is only used in error messages.
+        """
+        if buffer is None:
+            self.__memoryMap = np.memmap(cachePath, dtype=np.uint8, mode='r')
+        else:
+            self.__memoryMap = np.frombuffer(buffer, dtype=np.uint8)
+        header = parseHeader(self.__memoryMap, cachePath)
+        self.numRows = header['numRows']
+        self.fingerprint = header['fingerprint']
+        self.__blocks = {}
+        for name, block in header['blocks'].items():
+            dtype = np.dtype(block['dtype'])
+            start = header['dataOffset'] + block['offset']
+            self.__blocks[name] = self.__memoryMap[start:start + block['length'] * dtype.itemsize].view(dtype)
+        self.dates = self.__blocks[INDEX_DATES]
+        self.dateOffsets = self.__blocks[INDEX_OFFSETS]
+
+    def getBlock(self, name: Text) -> np.ndarray:
+        """Get a memory-mapped column block by name."""
+        return self.__blocks[name]
+
+    def getColumns(self, start: int, stop: int, moneyType: money.MoneyTypes = money.MoneyTypes.DECIMAL) -> Dict[
+            Text, np.ndarray]:
+        """Decode rows [start, stop) into the typed columns used by chainColumns.buildOptions().
+
+        :param start: first row.
+        :param stop: row after the last row.
+        :param moneyType: type used for the prices: decimal.Decimal or money.Money.
+        :return: dictionary of option field name to column array.
+        """
+        columns = {}
+        for fieldName, fieldType in chainColumns.OPTION_FIELD_TYPES.items():
+            if fieldType == chainColumns.FieldTypes.FLOAT:
+                columns[fieldName] = np.array(self.__blocks[fieldName][start:stop])
+            elif fieldType == chainColumns.FieldTypes.TEXT:
+                codes = self.__blocks[fieldName][start:stop]
+                vocabulary = self.__blocks[fieldName + '.vocabulary']
+                column = np.full(len(codes), None, dtype=object)
+                present = codes != MISSING_CODE
+                column[present] = np.char.decode(vocabulary[codes[present]], 'utf-8')
+                columns[fieldName] = column
+            elif fieldType == chainColumns.FieldTypes.DECIMAL:
+                columns[fieldName] = _partsToDecimals(self.__blocks[fieldName + '.coefficient'][start:stop],
+                                                      self.__blocks[fieldName + '.exponent'][start:stop], moneyType)
+            elif fieldType == chainColumns.FieldTypes.INT:
+                values = self.__blocks[fieldName][start:stop]
+                column = values.astype(object)
+                column[values == MISSING_INT] = None
+                columns[fieldName] = column
+            elif fieldType == chainColumns.FieldTypes.DATE_TIME:
+                columns[fieldName] = _toDateTimes(self.__blocks[fieldName][start:stop])
+        columns[chainColumns.IS_CALL_COLUMN] = np.array(self.__blocks[chainColumns.IS_CALL_COLUMN][start:stop])
+        return columns
+
+
+def _partsToDecimals(coefficients: np.ndarray, exponents: np.ndarray,
+                     moneyType: money.MoneyTypes = money.MoneyTypes.DECIMAL) -> np.ndarray:
+    """Rebuild decimals (or money values) from coefficients and exponents, creating each distinct value only once."""
+    createValue = money.Money.fromParts if moneyType == money.MoneyTypes.FIXED_POINT else lambda coefficient, \
+        exponent: decimal.Decimal(coefficient).scaleb(exponent)
+    coefficientCodes, uniqueCoefficients = pd.factorize(coefficients)
+    exponentCodes, uniqueExponents = pd.factorize(exponents)
+    codes, uniqueKeys = pd.factorize(coefficientCodes * len(uniqueExponents) + exponentCodes)
+    uniqueCoefficients = uniqueCoefficients[uniqueKeys // len(uniqueExponents)].tolist()
+    uniqueExponents = uniqueExponents[uniqueKeys % len(uniqueExponents)].tolist()
+    decimals = np.empty(len(uniqueKeys), dtype=object)
+    decimals[:] = [None if exponent == MISSING_EXPONENT else createValue(coefficient, exponent)
+                   for coefficient, exponent in zip(uniqueCoefficients, uniqueExponents)]
+    return decimals[codes]
+
+
+def _toDateTimes(values: np.ndarray) -> np.ndarray:
+    """Convert datetime64 values to an object array of datetime.datetime (None for NaT)."""
+    uniques, codes = np.unique(values, return_inverse=True)
+    return uniques.astype(object)[codes]
+
+
+class ChainCacheData(dataHandler.DataHandler):
+    """This class serves option chains from a cache file compiled by compileChainCache(); no text parsing is needed
+    when the backtest runs."""
+
+    def __init__(self, cachePath: Union[Text, ChainCache], eventQueue: eventBus.EventQueue,
+                 startDateTime: Optional[datetime.datetime] = None, endDateTime: Optional[datetime.datetime] = None,
+                 slottedOptions: bool = False, moneyType: money.MoneyTypes = money.MoneyTypes.DECIMAL,
+                 greeksMode: blackScholes.GreeksModes = blackScholes.GreeksModes.CSV, riskFreeRate: float = 0.0,
+                 dividendYield: float = 0.0, fillImpliedVol: bool = False,
+                 pricingModel: blackScholes.PricingModels = blackScholes.PricingModels.BLACK_SCHOLES) -> None:
+        """Memory-maps the cache file.
+
+        Attributes:
+          cachePath: path to the cache file, or a ChainCache which is already open.
+          eventQueue:  location to place new data tick event.
+          startDateTime:  option chains before this date / time are skipped using the date index.
+          endDateTime:  option chains after this date / time are not served.
+          slottedOptions:  create compact slottedOption.SlottedPut / SlottedCall objects instead of put.Put /
+                           call.Call objects for the option chains.
+          moneyType:  type of the prices of the options: DECIMAL (decimal.Decimal) or FIXED_POINT (money.Money).
+          greeksMode:  CSV uses the greeks of the cache; FILL_MISSING computes the missing greeks and OVERRIDE computes
+                       all greeks from the implied volatility when each option chain is served.
+          riskFreeRate:  continuously compounded risk-free rate used to compute the greeks.
+          dividendYield:  continuous dividend yield used to compute the greeks with BLACK_SCHOLES.
+          fillImpliedVol:  solve the missing or zero implied volatilities from the mid price (bid / ask), or the
+                           settlementPrice for futures options, before the greeks are computed.
+          pricingModel:  model used to compute the greeks and the implied volatilities; the pricing_model of the data
+                         provider (see blackScholes.getPricingModel).
+        """
+        if startDateTime is not None and endDateTime is not None and startDateTime > endDateTime:
+            raise ValueError('The startDateTime must not be after the endDateTime.')
+        self.__chainCache = cachePath if isinstance(cachePath, ChainCache) else ChainCache(cachePath)
+        self.__eventQueue = eventQueue
+        dates = self.__chainCache.dates
+        self.__dateIndex = 0 if startDateTime is None else int(
+            np.searchsorted(dates, np.datetime64(startDateTime, 'us'), side='left'))
+        self.__endDateIndex = len(dates) if endDateTime is None else int(
+            np.searchsorted(dates, np.datetime64(endDateTime, 'us'), side='right'))
+        self.__putType = slottedOption.SlottedPut if slottedOptions else put.Put
+        self.__callType = slottedOption.SlottedCall if slottedOptions else call.Call
+        self.__moneyType = moneyType
+        self.__greeksMode = greeksMode
+        self.__riskFreeRate = riskFreeRate
+        self.__dividendYield = dividendYield
+        self.__fillImpliedVol = fillImpliedVol
+        self.__pricingModel = pricingModel
+
+    @classmethod
+    def fromCsv(cls, csvPath: Text, dataProviderPath: Text, dataProvider: Text, eventQueue: eventBus.EventQueue,
+                cachePath: Optional[Text] = None, startDateTime: Optional[datetime.datetime] = None,
+                endDateTime: Optional[datetime.datetime] = None, slottedOptions: bool = False,
+                moneyType: money.MoneyTypes = money.MoneyTypes.DECIMAL,
+                greeksMode: blackScholes.GreeksModes = blackScholes.GreeksModes.CSV, riskFreeRate: float = 0.0,
+                dividendYield: float = 0.0, fillImpliedVol: bool = False) -> 'ChainCacheData':
+        """Create the data handler for a CSV, compiling the cache first if it does not exist or is stale.
+
+        :param csvPath: path to CSV file used in backtesting.
+        :param dataProviderPath: path to data provider JSON file.
+        :param dataProvider: historical data provider (e.g, provider of CSV).
+        :param eventQueue: location to place new data tick event.
+        :param cachePath: path of the cache file; defaults to getCachePath(csvPath).
+        :param startDateTime: option chains before this date / time are skipped.
+        :param endDateTime: option chains after this date / time are not served.
+        :param slottedOptions: create compact slotted options for the option chains.
+        :param moneyType: type of the prices of the options.
+        :param greeksMode: greeks of the options; computed with the pricing_model of the data provider.
+        :param riskFreeRate: continuously compounded risk-free rate used to compute the greeks.
+        :param dividendYield: continuous dividend yield used to compute the greeks with BLACK_SCHOLES.
+        :param fillImpliedVol: solve the missing or zero implied volatilities before the greeks are computed.
+        :return: data handler for the cache file.
+        """
+        return cls(ensureChainCache(csvPath, dataProviderPath, dataProvider, cachePath), eventQueue,
+                   startDateTime=startDateTime, endDateTime=endDateTime, slottedOptions=slottedOptions,
+                   moneyType=moneyType, greeksMode=greeksMode, riskFreeRate=riskFreeRate, dividendYield=dividendYield,
+                   fillImpliedVol=fillImpliedVol, pricingModel=blackScholes.getPricingModel(loadProviderConfig(dataProviderPath, dataProvider)))
+
+    def getNextTick(self) -> bool:
+        """Used to get the option chain for the next date / time in the cache.
+
+          :return True / False indicating if there is data available.
+        """
+        if self.__dateIndex >= self.__endDateIndex:
+            return False
+        start, stop = self.__chainCache.dateOffsets[self.__dateIndex:self.__dateIndex + 2].tolist()
+        self.__dateIndex += 1
+        columns = self.__chainCache.getColumns(start, stop, self.__moneyType)
+        if self.__fillImpliedVol:
+            impliedVolatility.fillImpliedVolatility(columns, self.__pricingModel, self.__riskFreeRate,
+                                                    self.__dividendYield)
+        blackScholes.applyGreeks(columns, self.__greeksMode, self.__pricingModel, self.__riskFreeRate,
+                                 self.__dividendYield)
+        event = tickEvent.TickEvent()
+        event.createEvent(optionChain.OptionChain(columns, self.__putType, self.__callType))
+        self.__eventQueue.put(event)
+        return True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compile an option chain CSV into a binary chain cache.')
+    parser.add_argument('csvPath', help='path to CSV file used in backtesting.')
+    parser.add_argument('dataProviderPath', help='path to data provider JSON file.')
+    parser.add_argument('dataProvider', help='historical data provider (e.g, iVolatility).')
+    parser.add_argument('--cachePath', default=None, help='path of the cache file to write.')
+    parser.add_argument('--force', action='store_true', help='compile even if the cache is up to date.')
+    args = parser.parse_args()
+    if args.force:
+        print(compileChainCache(args.csvPath, args.dataProviderPath, args.dataProvider, args.cachePath))
+    else:
+        print(ensureChainCache(args.csvPath, args.dataProviderPath, args.dataProvider, args.cachePath))
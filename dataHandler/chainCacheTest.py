@@ -0,0 +1,190 @@
+import copy
+import datetime
+import decimal
+import json
+import math
+import os
+import queue
+import shutil
+import tempfile
+import unittest
+from base import option
+from dataHandler import chainCache
+from dataHandler import csvData
+from events import signalEvent
+from optionPrimitives import optionPrimitive
+from optionPrimitives import putVertical
+from portfolioManager import portfolio
+from pricing import blackScholes
+from riskManager import putVerticalRiskManagement
+
+
+class TestChainCache(unittest.TestCase):
+
+    def setUp(self):
+        self._dataProvider = 'iVolatility'
+        self._dataProviderPath = 'dataHandler/dataProviders.json'
+        self._tempDirectory = tempfile.mkdtemp()
+        # Copy the CSV so that the test can change its modification time.
+        self._csvPath = os.path.join(self._tempDirectory, 'aapl_sample_ivolatility.csv')
+        shutil.copyfile('sampleData/aapl_sample_ivolatility.csv', self._csvPath)
+        self._cachePath = chainCache.getCachePath(self._csvPath)
+
+    def tearDown(self):
+        shutil.rmtree(self._tempDirectory)
+
+    def testCacheMatchesCsv(self):
+        """Tests that the option chains served from the cache are the same as the ones read from the CSV."""
+        csvQueue = queue.Queue()
+        csvObj = csvData.CsvData(csvPath=self._csvPath, dataProviderPath=self._dataProviderPath,
+                                 dataProvider=self._dataProvider, eventQueue=csvQueue)
+        cacheQueue = queue.Queue()
+        cacheObj = chainCache.ChainCacheData.fromCsv(csvPath=self._csvPath, dataProviderPath=self._dataProviderPath,
+                                                     dataProvider=self._dataProvider, eventQueue=cacheQueue)
+        for _ in range(2):
+            self.assertTrue(csvObj.getNextTick())
+            self.assertTrue(cacheObj.getNextTick())
+            # Compare the string representations so that decimal exponents (e.g., 55 vs 55.0) are also checked.
+            self.assertEqual(repr(cacheQueue.get().getData()), repr(csvQueue.get().getData()))
+        self.assertFalse(cacheObj.getNextTick())
+
+    def testDateIndex(self):
+        """Tests that the date index holds the first row of every option chain."""
+        chainCache.compileChainCache(self._csvPath, self._dataProviderPath, self._dataProvider, chunkSize=1000)
+        cache = chainCache.ChainCache(self._cachePath)
+        self.assertEqual(len(cache.dates), 2)
+        self.assertEqual(cache.dateOffsets.tolist(), [0, 1822, 3644])
+
+    def testStartAndEndDateTime(self):
+        """Tests that the date index is used to serve only the option chains between the start and end date / time."""
+        eventQueue = queue.Queue()
+        cacheObj = chainCache.ChainCacheData.fromCsv(csvPath=self._csvPath, dataProviderPath=self._dataProviderPath,
+                                                     dataProvider=self._dataProvider, eventQueue=eventQueue,
+                                                     startDateTime=datetime.datetime(2014, 8, 8),
+                                                     endDateTime=datetime.datetime(2014, 8, 9))
+        self.assertTrue(cacheObj.getNextTick())
+        self.assertEqual(eventQueue.get().getData()[0].dateTime, datetime.datetime(2014, 8, 8))
+        self.assertFalse(cacheObj.getNextTick())
+
+    def testCacheIsValid(self):
+        """Tests that a freshly compiled cache is valid and is not compiled again."""
+        chainCache.compileChainCache(self._csvPath, self._dataProviderPath, self._dataProvider)
+        providerConfig = chainCache.loadProviderConfig(self._dataProviderPath, self._dataProvider)
+        self.assertTrue(chainCache.isCacheValid(self._cachePath, self._csvPath, providerConfig))
+        modificationTime = os.stat(self._cachePath).st_mtime_ns
+        chainCache.ensureChainCache(self._csvPath, self._dataProviderPath, self._dataProvider)
+        self.assertEqual(os.stat(self._cachePath).st_mtime_ns, modificationTime)
+
+    def testCacheInvalidatedBySourceChange(self):
+        """Tests that the cache is stale when the modification time of the CSV changes."""
+        chainCache.compileChainCache(self._csvPath, self._dataProviderPath, self._dataProvider)
+        sourceStat = os.stat(self._csvPath)
+        os.utime(self._csvPath, ns=(sourceStat.st_atime_ns, sourceStat.st_mtime_ns + 1000000000))
+        providerConfig = chainCache.loadProviderConfig(self._dataProviderPath, self._dataProvider)
+        self.assertFalse(chainCache.isCacheValid(self._cachePath, self._csvPath, providerConfig))
+
+    def testCacheInvalidatedByProviderConfigChange(self):
+        """Tests that the cache is stale when the data provider config changes."""
+        chainCache.compileChainCache(self._csvPath, self._dataProviderPath, self._dataProvider)
+        providerConfig = chainCache.loadProviderConfig(self._dataProviderPath, self._dataProvider)
+        providerConfig['column_names']['settlementPrice'] = ''
+        self.assertFalse(chainCache.isCacheValid(self._cachePath, self._csvPath, providerConfig))
+
+    def testComputedGreeks(self):
+        """Tests that the greeks served from the cache are computed as the COLUMNAR loader computes them."""
+        csvPath = os.path.join(self._tempDirectory, 'spx_sample_ivolatility.csv')
+        shutil.copyfile('sampleData/spx_sample_ivolatility.csv', csvPath)
+        for greeksMode in blackScholes.GreeksModes:
+            csvQueue = queue.Queue()
+            csvObj = csvData.CsvData(csvPath=csvPath, dataProviderPath=self._dataProviderPath,
+                                     dataProvider=self._dataProvider, eventQueue=csvQueue,
+                                     loaderType=csvData.LoaderTypes.COLUMNAR, greeksMode=greeksMode, riskFreeRate=0.02,
+                                     dividendYield=0.01)
+            cacheQueue = queue.Queue()
+            cacheObj = chainCache.ChainCacheData.fromCsv(csvPath=csvPath, dataProviderPath=self._dataProviderPath,
+                                                         dataProvider=self._dataProvider, eventQueue=cacheQueue,
+                                                         greeksMode=greeksMode, riskFreeRate=0.02, dividendYield=0.01)
+            while csvObj.getNextTick():
+                self.assertTrue(cacheObj.getNextTick())
+                self.assertEqual(repr(cacheQueue.get().getData()), repr(csvQueue.get().getData()))
+            self.assertFalse(cacheObj.getNextTick())
+
+    def testFillImpliedVol(self):
+        """Tests that the implied volatilities solved for the chains served from the cache are the same as those solved
+        by the COLUMNAR loader."""
+        csvPath = os.path.join(self._tempDirectory, 'spx_sample_ivolatility.csv')
+        shutil.copyfile('sampleData/spx_sample_ivolatility.csv', csvPath)
+        csvQueue = queue.Queue()
+        csvObj = csvData.CsvData(csvPath=csvPath, dataProviderPath=self._dataProviderPath,
+                                 dataProvider=self._dataProvider, eventQueue=csvQueue,
+                                 loaderType=csvData.LoaderTypes.COLUMNAR, fillImpliedVol=True,
+                                 greeksMode=blackScholes.GreeksModes.FILL_MISSING)
+        cacheQueue = queue.Queue()
+        cacheObj = chainCache.ChainCacheData.fromCsv(csvPath=csvPath, dataProviderPath=self._dataProviderPath,
+                                                     dataProvider=self._dataProvider, eventQueue=cacheQueue,
+                                                     fillImpliedVol=True,
+                                                     greeksMode=blackScholes.GreeksModes.FILL_MISSING)
+        unfilledQueue = queue.Queue()
+        unfilledObj = chainCache.ChainCacheData(chainCache.getCachePath(csvPath), unfilledQueue)
+        self.assertTrue(unfilledObj.getNextTick())
+        self.assertTrue(csvObj.getNextTick())
+        self.assertTrue(cacheObj.getNextTick())
+        optionChain = cacheQueue.get().getData()
+        self.assertEqual(repr(optionChain), repr(csvQueue.get().getData()))
+        self.assertGreater((optionChain.getColumn('impliedVol') > 0).sum(),
+                           (unfilledQueue.get().getData().getColumn('impliedVol') > 0).sum())
+
+    def testComputedGreeksWithoutImpliedVolatility(self):
+        """Tests that the portfolio totals of a position whose options have no implied volatility, and so no computed
+        greeks, are updated."""
+        csvPath = os.path.join(self._tempDirectory, 'spx_sample_ivolatility.csv')
+        shutil.copyfile('sampleData/spx_sample_ivolatility.csv', csvPath)
+        for aggregationMode in portfolio.AggregationModes:
+            eventQueue = queue.Queue()
+            cacheObj = chainCache.ChainCacheData.fromCsv(csvPath=csvPath, dataProviderPath=self._dataProviderPath,
+                                                         dataProvider=self._dataProvider, eventQueue=eventQueue,
+                                                         greeksMode=blackScholes.GreeksModes.OVERRIDE)
+            self.assertTrue(cacheObj.getNextTick())
+            optionChain = eventQueue.get().getData()
+            expiration = datetime.datetime(2011, 3, 31)
+            putToBuy = optionChain.findOption(decimal.Decimal(875), expiration, option.OptionTypes.PUT)
+            putToSell = optionChain.findOption(decimal.Decimal(900), expiration, option.OptionTypes.PUT)
+            self.assertIsNone(putToSell.delta)
+            position = putVertical.PutVertical(orderQuantity=1, contractMultiplier=100,
+                                               putToBuy=copy.deepcopy(putToBuy), putToSell=copy.deepcopy(putToSell),
+                                               buyOrSell=optionPrimitive.TransactionType.SELL)
+            position.setOpeningFees(decimal.Decimal('2.50'))
+            position.setClosingFees(decimal.Decimal('2.50'))
+            portfolioObj = portfolio.Portfolio(decimal.Decimal(1000000), decimal.Decimal(0.5), decimal.Decimal(0.5),
+                                               aggregationMode=aggregationMode, verifyAggregation=True)
+            event = signalEvent.SignalEvent()
+            event.createEvent([position, putVerticalRiskManagement.PutVerticalRiskManagement(
+                putVerticalRiskManagement.PutVerticalManagementStrategyTypes.HOLD_TO_EXPIRATION, None)])
+            portfolioObj.onSignal(event)
+
+            self.assertTrue(cacheObj.getNextTick())
+            portfolioObj.updatePortfolio(eventQueue.get())
+            self.assertEqual(len(portfolioObj.activePositions), 1)
+            self.assertTrue(math.isnan(portfolioObj.totalDelta))
+            self.assertTrue(math.isnan(portfolioObj.totalVega))
+            self.assertEqual(portfolioObj.netLiquidity, portfolioObj.realizedCapital + position.calcProfitLoss())
+
+    def testNotACacheFile(self):
+        """Tests that an exception is raised when opening a file which is not a cache file."""
+        with self.assertRaisesRegex(ValueError, 'is not an option chain cache file.'):
+            chainCache.ChainCacheData(self._csvPath, queue.Queue())
+
+    def testUnsupportedDataSource(self):
+        """Tests that only option data sources can be compiled."""
+        dataProviderPath = os.path.join(self._tempDirectory, 'dataProviders.json')
+        with open(self._dataProviderPath) as dataProviderFile:
+            dataConfig = json.load(dataProviderFile)
+        dataConfig[self._dataProvider]['data_source_type'] = 'stocks'
+        with open(dataProviderPath, 'w') as dataProviderFile:
+            json.dump(dataConfig, dataProviderFile)
+        with self.assertRaisesRegex(TypeError, 'data_source_type not supported.'):
+            chainCache.compileChainCache(self._csvPath, dataProviderPath, self._dataProvider)
+
+
+if __name__ == '__main__':
+    unittest.main()
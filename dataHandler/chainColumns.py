@@ -0,0 +1,230 @@
+import decimal
+import enum
+import numpy as np
+import pandas as pd
+from base import call
+from base import money
+from base import option
+from base import optionChain
+from base import put
+from dataHandler import dateTimeParser
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Text, Type
+
+
+class FieldTypes(enum.Enum):
+    TEXT = 0
+    DECIMAL = 1
+    FLOAT = 2
+    INT = 3
+    DATE_TIME = 4
+
+
+# Maps the option fields that are read from the data provider columns to the type used to store them. The order of the
+# dictionary is the order used when materializing option objects.
+OPTION_FIELD_TYPES = {
+    'underlyingTicker': FieldTypes.TEXT,
+    'strikePrice': FieldTypes.DECIMAL,
+    'delta': FieldTypes.FLOAT,
+    'expirationDateTime': FieldTypes.DATE_TIME,
+    'underlyingPrice': FieldTypes.DECIMAL,
+    'optionSymbol': FieldTypes.TEXT,
+    'bidPrice': FieldTypes.DECIMAL,
+    'askPrice': FieldTypes.DECIMAL,
+    'settlementPrice': FieldTypes.DECIMAL,
+    'tradePrice': FieldTypes.DECIMAL,
+    'openInterest': FieldTypes.INT,
+    'volume': FieldTypes.INT,
+    'dateTime': FieldTypes.DATE_TIME,
+    'theta': FieldTypes.FLOAT,
+    'gamma': FieldTypes.FLOAT,
+    'rho': FieldTypes.FLOAT,
+    'vega': FieldTypes.FLOAT,
+    'impliedVol': FieldTypes.FLOAT,
+    'exchangeCode': FieldTypes.TEXT,
+}
+
+# Column holding True for calls and False for puts.
+IS_CALL_COLUMN = optionChain.IS_CALL_COLUMN
+OPTION_TYPE_FIELD = 'optionType'
+
+
+def getMappedColumns(providerConfig: Mapping[Text, Any]) -> Dict[Text, Text]:
+    """Get the option fields which are mapped to a CSV column for the data provider.
+
+    :param providerConfig: data provider entry from the dataProviders.json file.
+    :return: dictionary of option field name to CSV column name (fields with blank column names are dropped).
+    """
+    return {fieldName: columnName for fieldName, columnName in providerConfig['column_names'].items() if columnName}
+
+
+def getReadOptions(providerConfig: Mapping[Text, Any], csvColumnNames: Iterable[Text]) -> Dict[Text, Any]:
+    """Get the pandas.read_csv keyword arguments used to parse a block of the CSV.
+
+    Every column is read as text except for the float fields, which are parsed by the C parser with the same rounding
+    as float().
+
+    :param providerConfig: data provider entry from the dataProviders.json file.
+    :param csvColumnNames: names of the columns in the CSV header.
+    :return: keyword arguments for pandas.read_csv.
+    """
+    floatColumns = {columnName for fieldName, columnName in getMappedColumns(providerConfig).items() if (
+        OPTION_FIELD_TYPES.get(fieldName) == FieldTypes.FLOAT)}
+    dtypes = {columnName: float if columnName in floatColumns else str for columnName in csvColumnNames}
+    return {'dtype': dtypes, 'keep_default_na': False, 'na_values': {name: [''] for name in floatColumns},
+            'float_precision': 'round_trip'}
+
+
+def _convertUniqueValues(values: np.ndarray, converter: Callable[[Text], Any]) -> np.ndarray:
+    """Convert a column of strings by converting each distinct string only once.
+
+    :param values: column of strings.
+    :param converter: function used to convert a non-empty string.
+    :return: object array of converted values; empty strings are converted to None.
+    """
+    codes, uniques = pd.factorize(values)
+    convertedUniques = np.empty(len(uniques), dtype=object)
+    convertedUniques[:] = [converter(value) if value else None for value in uniques]
+    return convertedUniques[codes]
+
+
+def convertColumn(values: np.ndarray, fieldType: FieldTypes, dateTimeFormat: Text,
+                  moneyType: money.MoneyTypes = money.MoneyTypes.DECIMAL) -> np.ndarray:
+    """Convert a raw CSV column to the storage type used for the field.
+
+    :param values: raw column values (strings, or floats for float fields).
+    :param fieldType: type of the field.
+    :param dateTimeFormat: format used for date / time columns.
+    :param moneyType: type used for DECIMAL fields (prices): decimal.Decimal or money.Money.
+    :return: float64 array (NaN for missing values) for float fields; object array (None for missing values) for
+             all other fields.
+    """
+    if fieldType == FieldTypes.FLOAT:
+        return np.asarray(values, dtype=np.float64)
+    values = np.asarray(values, dtype=object)
+    if fieldType == FieldTypes.TEXT:
+        return np.where(values == '', None, values)
+    if fieldType == FieldTypes.DECIMAL:
+        return _convertUniqueValues(values, money.Money.fromValue if moneyType == money.MoneyTypes.FIXED_POINT else
+                                    decimal.Decimal)
+    if fieldType == FieldTypes.INT:
+        return _convertUniqueValues(values, int)
+    if fieldType == FieldTypes.DATE_TIME:
+        return _convertUniqueValues(values, dateTimeParser.getParser(dateTimeFormat).parse)
+    raise TypeError('Field type %s is not supported.' % fieldType)
+
+
+def buildColumns(block: pd.DataFrame, providerConfig: Mapping[Text, Any],
+                 moneyType: money.MoneyTypes = money.MoneyTypes.DECIMAL) -> Dict[Text, np.ndarray]:
+    """Convert a block of CSV rows into typed columns, one array per option field.
+
+    :param block: Pandas dataframe read with the options returned by getReadOptions().
+    :param providerConfig: data provider entry from the dataProviders.json file.
+    :param moneyType: type used for the prices: decimal.Decimal or money.Money.
+    :raises ValueError: dataProvider.json column name not found in CSV.
+    :raises ValueError: dataProviders.json must have an entry for optionType.
+    :raises ValueError: Symbol for put/call in JSON not found in dataframe column.
+    :return: dictionary of option field name to column array.
+    """
+    mappedColumns = getMappedColumns(providerConfig)
+    for columnName in mappedColumns.values():
+        if columnName not in block.columns:
+            raise ValueError('Column name %s in dataProvider.json not found in CSV.' % columnName)
+    if OPTION_TYPE_FIELD not in mappedColumns:
+        raise ValueError('dataProviders.json must have an entry for optionType')
+
+    dateTimeFormat = providerConfig['date_time_format']
+    numRows = len(block.index)
+    columns = {}
+    for fieldName, fieldType in OPTION_FIELD_TYPES.items():
+        columnName = mappedColumns.get(fieldName)
+        if columnName is None:
+            columns[fieldName] = np.full(numRows, np.nan) if fieldType == FieldTypes.FLOAT else np.full(
+                numRows, None, dtype=object)
+        else:
+            columns[fieldName] = convertColumn(block[columnName].to_numpy(), fieldType, dateTimeFormat, moneyType)
+
+    # Convert any lowercase symbols to uppercase before checking the put / call symbols.
+    optionTypes = np.char.upper(block[mappedColumns[OPTION_TYPE_FIELD]].to_numpy().astype(str))
+    isCall = optionTypes == providerConfig['call_symbol_abbreviation']
+    isPut = optionTypes == providerConfig['put_symbol_abbreviation']
+    if not np.all(isCall | isPut):
+        raise ValueError('Symbol for put / call in dataProviders.json not found in optionChain dataframe.')
+    columns[IS_CALL_COLUMN] = isCall
+
+    # For futures options, we rely on settlementPrice, and for index options, we rely on tradePrice. We use one
+    # variable settlementPrice for both, so the settlementPrice is the mid price when it is missing (index options).
+    settlementPrice = columns['settlementPrice']
+    noSettlementPrice = np.equal(settlementPrice, None)
+    tradePrice = settlementPrice.copy()
+    if noSettlementPrice.any():
+        bidPrice, askPrice = columns['bidPrice'][noSettlementPrice], columns['askPrice'][noSettlementPrice]
+        if moneyType == money.MoneyTypes.FIXED_POINT:
+            tradePrice[noSettlementPrice] = money.fromUnits(money.halveUnits(money.toUnits(bidPrice) +
+                                                                             money.toUnits(askPrice)))
+        else:
+            tradePrice[noSettlementPrice] = (bidPrice + askPrice) / decimal.Decimal(2.0)
+    columns['tradePrice'] = tradePrice
+    columns['settlementPrice'] = tradePrice.copy()
+    return columns
+
+
+def concatColumns(first: Mapping[Text, np.ndarray], second: Mapping[Text, np.ndarray]) -> Dict[Text, np.ndarray]:
+    """Concatenate two sets of typed columns.
+
+    :param first: columns whose rows come first.
+    :param second: columns whose rows come second.
+    :return: dictionary of concatenated column arrays.
+    """
+    return {name: np.concatenate((first[name], second[name])) for name in first}
+
+
+def sliceColumns(columns: Mapping[Text, np.ndarray], start: int, stop: int) -> Dict[Text, np.ndarray]:
+    """Get the rows [start, stop) of a set of typed columns (views, not copies).
+
+    :param columns: typed columns.
+    :param start: first row.
+    :param stop: row after the last row.
+    :return: dictionary of column array views.
+    """
+    return {name: column[start:stop] for name, column in columns.items()}
+
+
+def getDateBoundaries(columns: Mapping[Text, np.ndarray]) -> np.ndarray:
+    """Find the rows at which the date / time changes.
+
+    :param columns: typed columns.
+    :return: array of row indexes starting a new date / time; always starts with 0 and ends with the number of rows.
+    """
+    dateTimes = columns['dateTime']
+    changes = np.flatnonzero(dateTimes[1:] != dateTimes[:-1]) + 1
+    return np.concatenate(([0], changes, [len(dateTimes)]))
+
+
+def _toObjectList(column: np.ndarray) -> List[Any]:
+    """Convert a column to a list of Python objects, replacing NaN with None for float columns."""
+    if column.dtype == np.float64:
+        return np.where(np.isnan(column), None, column).tolist()
+    return column.tolist()
+
+
+def buildOptions(columns: Mapping[Text, np.ndarray], putType: Type[option.Option] = put.Put,
+                 callType: Type[option.Option] = call.Call) -> List[option.Option]:
+    """Create base option types (calls or puts) from typed columns.
+
+    :param columns: typed columns created by buildColumns().
+    :param putType: class used for puts (e.g., put.Put or slottedOption.SlottedPut).
+    :param callType: class used for calls (e.g., call.Call or slottedOption.SlottedCall).
+    :return: list of Option base type objects (puts or calls).
+    """
+    fieldNames = list(OPTION_FIELD_TYPES)
+    fieldValues = [_toObjectList(columns[fieldName]) for fieldName in fieldNames]
+    dateTimes = fieldValues[fieldNames.index('dateTime')]
+    optionObjects = []
+    for isCall, tradeDateTime, values in zip(columns[IS_CALL_COLUMN].tolist(), dateTimes, zip(*fieldValues)):
+        argsDict = dict(zip(fieldNames, values))
+        argsDict['tradeDateTime'] = tradeDateTime
+        if isCall:
+            optionObjects.append(callType(**argsDict))
+        else:
+            optionObjects.append(putType(**argsDict))
+    return optionObjects
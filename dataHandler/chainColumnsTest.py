@@ -0,0 +1,76 @@
+import datetime
+import decimal
+import unittest
+import numpy as np
+import pandas as pd
+from base import money
+from dataHandler import chainColumns
+
+
+class TestChainColumns(unittest.TestCase):
+
+    def setUp(self):
+        self._providerConfig = {
+            'column_names': {'dateTime': 'date', 'underlyingTicker': 'symbol', 'optionType': 'call/put',
+                             'strikePrice': 'strike', 'bidPrice': 'bid', 'askPrice': 'ask', 'delta': 'delta',
+                             'settlementPrice': '', 'tradePrice': ''},
+            'call_symbol_abbreviation': 'C',
+            'put_symbol_abbreviation': 'P',
+            'date_time_format': '%m/%d/%Y',
+        }
+        self._block = pd.DataFrame({'date': ['01/03/2011', '01/03/2011', '01/04/2011'],
+                                    'symbol': ['SPX', 'SPX', 'SPX'],
+                                    'call/put': ['C', 'p', 'P'],
+                                    'strike': ['1050.0', '1050.0', '1100'],
+                                    'bid': ['1.0', '2.0', '3.5'],
+                                    'ask': ['1.5', '2.5', '4.0'],
+                                    'delta': [0.5, np.nan, -0.25]})
+
+    def testConvertDecimalColumn(self):
+        """Tests that decimal columns are converted exactly and empty strings become None."""
+        column = chainColumns.convertColumn(np.array(['1.10', '', '1.10']), chainColumns.FieldTypes.DECIMAL,
+                                            '%m/%d/%Y')
+        self.assertEqual(str(column[0]), '1.10')
+        self.assertIsNone(column[1])
+
+    def testConvertDateTimeColumn(self):
+        """Tests that date / time columns are converted with the provider date / time format."""
+        column = chainColumns.convertColumn(np.array(['01/03/2011']), chainColumns.FieldTypes.DATE_TIME,
+                                            '%m/%d/%Y')
+        self.assertEqual(column[0], datetime.datetime(2011, 1, 3))
+
+    def testBuildColumnsMidPrice(self):
+        """Tests that the settlement and trade prices are the mid price of each row when there is no settlement."""
+        columns = chainColumns.buildColumns(self._block, self._providerConfig)
+        self.assertEqual(columns['settlementPrice'].tolist(),
+                         [decimal.Decimal('1.25'), decimal.Decimal('2.25'), decimal.Decimal('3.75')])
+        self.assertEqual(columns['tradePrice'].tolist(), columns['settlementPrice'].tolist())
+        self.assertEqual(columns[chainColumns.IS_CALL_COLUMN].tolist(), [True, False, False])
+
+    def testBuildColumnsFixedPoint(self):
+        """Tests that the prices are money values when the FIXED_POINT money type is used."""
+        self._block['bid'] = ['1.05', '2.0', '3.5']
+        columns = chainColumns.buildColumns(self._block, self._providerConfig, money.MoneyTypes.FIXED_POINT)
+        self.assertIsInstance(columns['strikePrice'][0], money.Money)
+        self.assertEqual([str(price) for price in columns['settlementPrice']], ['1.2750', '2.2500', '3.7500'])
+
+    def testBuildColumnsUnknownOptionType(self):
+        """Tests that an exception is raised if the put / call symbol is not in the data provider config."""
+        self._block['call/put'] = ['C', 'X', 'P']
+        with self.assertRaisesRegex(ValueError, 'Symbol for put / call in dataProviders.json not found'):
+            chainColumns.buildColumns(self._block, self._providerConfig)
+
+    def testBuildOptionsByDate(self):
+        """Tests that typed columns are split by date and converted to puts and calls."""
+        columns = chainColumns.buildColumns(self._block, self._providerConfig)
+        boundaries = chainColumns.getDateBoundaries(columns)
+        self.assertEqual(boundaries.tolist(), [0, 2, 3])
+        options = chainColumns.buildOptions(chainColumns.sliceColumns(columns, 0, 2))
+        self.assertEqual(len(options), 2)
+        self.assertEqual(options[0].delta, 0.5)
+        self.assertIsNone(options[1].delta)
+        self.assertEqual(options[1].tradeDateTime, datetime.datetime(2011, 1, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,32 +1,83 @@
+import collections
 import copy
 import csv
 import datetime
 import decimal
+import enum
 import json
 import logging
+import numpy as np
 import pandas as pd
-import queue
+from dataHandler import chainColumns
+from dataHandler import csvSource
 from dataHandler import dataHandler
+from dataHandler import dateTimeParser
 from base import call
+from base import money
 from base import put
 from base import option
+from base import optionChain as optionChainModule
+from base import slottedOption
+from events import eventBus
 from events import tickEvent
-from typing import Iterable, Mapping, Text
+from pricing import blackScholes
+from pricing import impliedVolatility
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Text, Union
+
+
+class LoaderTypes(enum.Enum):
+    ROW = 0
+    COLUMNAR = 1
 
 
 class CsvData(dataHandler.DataHandler):
     """This class handles data from CSV files which will be used for backtesting sessions."""
 
-    def __init__(self, csvPath: Text, dataProviderPath: Text, dataProvider: Text, eventQueue: queue.Queue) -> None:
+    def __init__(self, csvPath: Union[Text, Sequence[Text]], dataProviderPath: Text, dataProvider: Text,
+                 eventQueue: eventBus.EventQueue, loaderType: LoaderTypes = LoaderTypes.ROW, chunkSize: int = 100000,
+                 startDateTime: Optional[datetime.datetime] = None,
+                 endDateTime: Optional[datetime.datetime] = None, slottedOptions: bool = False,
+                 moneyType: money.MoneyTypes = money.MoneyTypes.DECIMAL,
+                 greeksMode: blackScholes.GreeksModes = blackScholes.GreeksModes.CSV, riskFreeRate: float = 0.0,
+                 dividendYield: float = 0.0, fillImpliedVol: bool = False) -> None:
         """Initializes CSV data parameters for file reading.
 
         Attributes:
-          csvPath: path to CSV file used in backtesting.
+          csvPath: path to CSV file used in backtesting; a gzip of a CSV (.gz) or a zip archive of CSVs (.zip) is
+                   decompressed as it is read. A glob pattern or a list of paths / patterns reads several CSVs, which
+                   may overlap and order their columns differently, as one CSV merged by date / time.
           dataProviderPath: path to data provider JSON file.
           dataProvider:  historical data provider (e.g, provider of CSV).
           eventQueue:  location to place new data tick event.
+          loaderType:  ROW reads the CSV one row at a time; COLUMNAR reads blocks of rows and converts them one column
+                       at a time before splitting the block into option chains.
+          chunkSize:  number of CSV rows per block for the COLUMNAR loader.
+          startDateTime:  option chains before this date / time are skipped. The CSV must be sorted by date / time;
+                          the reader seeks directly to the first matching row with a binary search over the file
+                          (rows of zip and gzip archives are skipped as they are read instead).
+          endDateTime:  no option chains after this date / time are read.
+          slottedOptions:  create compact slottedOption.SlottedPut / SlottedCall objects instead of put.Put /
+                           call.Call objects for the option chains.
+          moneyType:  type of the prices of the options: DECIMAL (decimal.Decimal) or FIXED_POINT (money.Money).
+          greeksMode:  CSV uses the greeks of the CSV; FILL_MISSING computes the missing greeks and OVERRIDE computes
+                       all greeks from the implied volatility, with the pricing_model of the data provider
+                       (BLACK_SCHOLES by default, BLACK_76 for futures options). Only supported by the COLUMNAR loader.
+          riskFreeRate:  continuously compounded risk-free rate used to compute the greeks.
+          dividendYield:  continuous dividend yield used to compute the greeks with BLACK_SCHOLES.
+          fillImpliedVol:  solve the missing or zero implied volatilities from the mid price (bid / ask), or the
+                           settlementPrice for futures options, before the greeks are computed. Only supported by the
+                           COLUMNAR loader.
         """
+        if chunkSize < 1:
+            raise ValueError('Chunk size must be a positive (> 0) number.')
+        if startDateTime is not None and endDateTime is not None and startDateTime > endDateTime:
+            raise ValueError('The startDateTime must not be after the endDateTime.')
+        if greeksMode != blackScholes.GreeksModes.CSV and loaderType != LoaderTypes.COLUMNAR:
+            raise ValueError('Greeks can only be computed with the COLUMNAR loader.')
+        if fillImpliedVol and loaderType != LoaderTypes.COLUMNAR:
+            raise ValueError('Implied volatilities can only be solved with the COLUMNAR loader.')
         self.__csvPath = csvPath
+        self.__csvPaths = None
         self.__dataProviderPath = dataProviderPath
         self.__curTimeDate = None
         self.__dataConfig = None
@@ -36,26 +87,40 @@ class CsvData(dataHandler.DataHandler):
         self.__nextTimeDateRow = None
         self.__dataProvider = dataProvider
         self.__eventQueue = eventQueue
+        self.__loaderType = loaderType
+        self.__chunkSize = chunkSize
+        self.__fileHandle = None
+        self.__blockReader = None
+        self.__pendingColumns = None
+        self.__readyChains = collections.deque()
+        self.__startDateTime = startDateTime
+        self.__endDateTime = endDateTime
+        self.__seekPending = startDateTime is not None
+        self.__endReached = False
+        self.__putType = slottedOption.SlottedPut if slottedOptions else put.Put
+        self.__callType = slottedOption.SlottedCall if slottedOptions else call.Call
+        self.__moneyType = moneyType
+        self.__greeksMode = greeksMode
+        self.__riskFreeRate = riskFreeRate
+        self.__dividendYield = dividendYield
+        self.__fillImpliedVol = fillImpliedVol
 
         # Open data source. Raises exception if failure.
         self.__dataConfig = self.__openDataSource()
+        self.__dateTimeParser = dateTimeParser.getParser(self.__dataConfig[self.__dataProvider]['date_time_format'])
+        self.__pricingModel = blackScholes.getPricingModel(self.__dataConfig[self.__dataProvider])
 
     def __openDataSource(self) -> Mapping[Text, Mapping[Text, Mapping[Text, Text]]]:
         """Used to connect to the data source for the first time. In the case of a CSV, this means opening the file.
           The directory used is determined during initialization.
 
           :return dictionary from dataProviders.json file.
-          :raises OSError: Cannot find a CSV at specified location.
           :raises ValueError: Cannot load data as a JSON file.
+          :raises OSError: Cannot find a CSV at specified location.
           :raises ValueError: Requested data provider not found in JSON file.
           :raises ValueError: Number of CSV columns not provided in JSON file.
           :raises ValueError: Number of columns read from CSV does not match number of columns in JSON file.
         """
-        try:
-            fileHandle = open(self.__csvPath, 'r')
-        except OSError as e:
-            raise OSError('Unable to open CSV at location: %s.' % self.__csvPath) from e
-
         # Load data provider information from dataProviders.json file.
         try:
             with open(self.__dataProviderPath) as dataProvider:
@@ -69,7 +134,24 @@ class CsvData(dataHandler.DataHandler):
             raise ValueError(
                 'The requested data provider: %s was not found in dataProviders.json' % self.__dataProvider)
 
+        # Zip and gzip archives are decompressed as they are read; the CSVs in a zip archive and multiple CSVs are read
+        # in date order.
+        providerConfig = dataConfig[self.__dataProvider]
+        dateColumnName = providerConfig['column_names'].get('dateTime')
+        try:
+            self.__csvPaths = csvSource.expandCsvPaths(self.__csvPath)
+            if len(self.__csvPaths) == 1:
+                fileHandle = csvSource.openCsvSource(self.__csvPaths[0], dateColumnName,
+                                                     providerConfig.get('date_time_format'))
+            else:
+                fileHandle = csvSource.openMergedCsvSources(self.__csvPaths, dateColumnName,
+                                                            providerConfig.get('date_time_format'),
+                                                            self.__startDateTime)
+        except OSError as e:
+            raise OSError('Unable to open CSV at location: %s.' % (self.__csvPath,)) from e
+
         # Check that the number of columns in the CSV matches the number specified by the config file.
+        self.__fileHandle = fileHandle
         self.__csvReader = csv.DictReader(fileHandle)
         self.__csvColumnNames = self.__csvReader.fieldnames
         numberCsvColumns = len(self.__csvColumnNames)
@@ -87,9 +169,7 @@ class CsvData(dataHandler.DataHandler):
         """
         rowList = []
         for row in self.__csvReader:
-            if datetime.datetime.strptime(row[self.__dateColumnName],
-                                          self.__dataConfig[self.__dataProvider][
-                                              'date_time_format']) == self.__curTimeDate:
+            if self.__dateTimeParser.parse(row[self.__dateColumnName]) == self.__curTimeDate:
                 rowList.append(row)
             else:
                 # Save the last row that doesn't match the curTimeDate, so we can use it for the next option chain.
@@ -112,10 +192,11 @@ class CsvData(dataHandler.DataHandler):
             # Find the index of the date column in the header row of the CSV.
             rowList = []
             # Get the next row of the CSV and convert the date column to a datetime object.
-            row = next(self.__csvReader)
+            row = next(self.__csvReader, None)
+            if row is None:
+                return pd.DataFrame()
             rowList.append(row)
-            self.__curTimeDate = datetime.datetime.strptime(row[self.__dateColumnName],
-                                                            self.__dataConfig[self.__dataProvider]['date_time_format'])
+            self.__curTimeDate = self.__dateTimeParser.parse(row[self.__dateColumnName])
             # Get the rest of the rows that match the curTimeDate.
             rowList.extend(self.__getMatchingRows())
 
@@ -127,8 +208,7 @@ class CsvData(dataHandler.DataHandler):
                 logging.warning('None was returned for the nextTimeDateRow in the CSV reader.')
                 return pd.DataFrame()
             # Get the date / time from the previously stored row.
-            self.__curTimeDate = datetime.datetime.strptime(self.__nextTimeDateRow[self.__dateColumnName],
-                                                            self.__dataConfig[self.__dataProvider]['date_time_format'])
+            self.__curTimeDate = self.__dateTimeParser.parse(self.__nextTimeDateRow[self.__dateColumnName])
 
             # Get all the CSV rows for the curTimeDate.
             rowList = []
@@ -157,6 +237,8 @@ class CsvData(dataHandler.DataHandler):
         """
         optionObjects = []
         optionTypeField = 'optionType'
+        moneyType = self.__moneyType
+        parseDateTime = self.__dateTimeParser.parse
         dataProviderConfig = self.__dataConfig[self.__dataProvider]
         # Create a dictionary for the fields that we will read from each row of the dataframe. The fields should
         # also be specified in the dataProviders.json file.
@@ -201,8 +283,8 @@ class CsvData(dataHandler.DataHandler):
             if optionDict['settlementPrice'] is None or not optionDict[
                   'settlementPrice']:  # For index options
                 if optionDict['bidPrice'] is not None and optionDict['askPrice'] is not None:
-                    optionDict['tradePrice'] = (decimal.Decimal(optionDict['bidPrice']) + decimal.Decimal(
-                        optionDict['askPrice'])) / decimal.Decimal(2.0)
+                    optionDict['tradePrice'] = (money.createMoney(optionDict['bidPrice'], moneyType) + money.createMoney(
+                        optionDict['askPrice'], moneyType)) / decimal.Decimal(2.0)
                 optionDict['settlementPrice'] = optionDict['tradePrice']
             else:  # For future options.
                 optionDict['tradePrice'] = optionDict['settlementPrice']
@@ -210,31 +292,28 @@ class CsvData(dataHandler.DataHandler):
             # Do some formatting of the entries.
             argsDict = {'underlyingTicker': optionDict['underlyingTicker'] if optionDict[
               'underlyingTicker'] else None,
-                'strikePrice': decimal.Decimal(optionDict['strikePrice']) if optionDict[
+                'strikePrice': money.createMoney(optionDict['strikePrice'], moneyType) if optionDict[
                     'strikePrice'] else None,
                 'delta': float(optionDict['delta']) if optionDict['delta'] else None,
-                'expirationDateTime': datetime.datetime.strptime(
-                    optionDict['expirationDateTime'], dataProviderConfig['date_time_format']) if optionDict[
+                'expirationDateTime': parseDateTime(optionDict['expirationDateTime']) if optionDict[
                   'expirationDateTime'] else None,
-                'underlyingPrice': decimal.Decimal(optionDict['underlyingPrice'] if optionDict[
-                    'underlyingPrice'] else None),
+                'underlyingPrice': money.createMoney(optionDict['underlyingPrice'] if optionDict[
+                    'underlyingPrice'] else None, moneyType),
                 'optionSymbol': optionDict['optionSymbol'] if optionDict['optionSymbol'] else None,
-                'bidPrice': decimal.Decimal(optionDict['bidPrice']) if optionDict[
+                'bidPrice': money.createMoney(optionDict['bidPrice'], moneyType) if optionDict[
                     'bidPrice'] else None,
-                'askPrice': decimal.Decimal(optionDict['askPrice']) if optionDict[
+                'askPrice': money.createMoney(optionDict['askPrice'], moneyType) if optionDict[
                     'askPrice'] else None,
-                'settlementPrice': decimal.Decimal(optionDict['settlementPrice']) if optionDict[
+                'settlementPrice': money.createMoney(optionDict['settlementPrice'], moneyType) if optionDict[
                     'settlementPrice'] else None,
-                'tradePrice': decimal.Decimal(optionDict['tradePrice']) if optionDict[
+                'tradePrice': money.createMoney(optionDict['tradePrice'], moneyType) if optionDict[
                     'tradePrice'] else None,
                 'openInterest': int(optionDict['openInterest']) if optionDict[
                     'openInterest'] else None,
                 'volume': int(optionDict['volume']) if optionDict['volume'] else None,
-                'dateTime': datetime.datetime.strptime(optionDict['dateTime'],
-                                                       dataProviderConfig['date_time_format']) if optionDict[
+                'dateTime': parseDateTime(optionDict['dateTime']) if optionDict[
                   'dateTime'] else None,
-                'tradeDateTime': datetime.datetime.strptime(
-                    optionDict['dateTime'], dataProviderConfig['date_time_format']) if optionDict[
+                'tradeDateTime': parseDateTime(optionDict['dateTime']) if optionDict[
                     'dateTime'] else None,
                 'theta': float(optionDict['theta']) if optionDict['theta'] else None,
                 'gamma': float(optionDict['gamma']) if optionDict['gamma'] else None,
@@ -244,11 +323,87 @@ class CsvData(dataHandler.DataHandler):
                 'exchangeCode': optionDict['exchangeCode'] if optionDict['exchangeCode'] else None,
                 }
             if not putOrCall:
-                optionObjects.append(call.Call(**argsDict))
+                optionObjects.append(self.__callType(**argsDict))
             else:
-                optionObjects.append(put.Put(**argsDict))
+                optionObjects.append(self.__putType(**argsDict))
         return optionObjects
 
+    def __readColumnBlock(self) -> bool:
+        """Reads the next block of rows from the CSV, converts it to typed columns, and splits the columns into one
+          set of columns per date / time. The rows for the last date / time in the block are held back since they may
+          continue in the next block.
+
+          :return True if a block was read, False if there is no more data in the CSV.
+        """
+        dataProviderConfig = self.__dataConfig[self.__dataProvider]
+        if self.__blockReader is None:
+            # The header row was already read when opening the data source, so we continue from the same file handle.
+            try:
+                self.__blockReader = pd.read_csv(
+                    self.__fileHandle, header=None, names=self.__csvColumnNames, chunksize=self.__chunkSize,
+                    **chainColumns.getReadOptions(dataProviderConfig, self.__csvColumnNames))
+            except pd.errors.EmptyDataError:
+                self.__blockReader = iter(())
+        block = next(self.__blockReader, None)
+        if block is None or len(block.index) == 0:
+            # Flush the rows held back from the previous block.
+            if self.__pendingColumns is not None and len(self.__pendingColumns['dateTime']) > 0:
+                self.__readyChains.append(self.__pendingColumns)
+            self.__pendingColumns = None
+            return False
+
+        columns = chainColumns.buildColumns(block, dataProviderConfig, self.__moneyType)
+        # The implied volatilities and the greeks of the whole block are computed at once.
+        if self.__fillImpliedVol:
+            impliedVolatility.fillImpliedVolatility(columns, self.__pricingModel, self.__riskFreeRate,
+                                                    self.__dividendYield)
+        blackScholes.applyGreeks(columns, self.__greeksMode, self.__pricingModel, self.__riskFreeRate,
+                                 self.__dividendYield)
+        if self.__pendingColumns is not None:
+            columns = chainColumns.concatColumns(self.__pendingColumns, columns)
+        boundaries = chainColumns.getDateBoundaries(columns)
+        for start, stop in zip(boundaries[:-2], boundaries[1:-1]):
+            self.__readyChains.append(chainColumns.sliceColumns(columns, start, stop))
+        self.__pendingColumns = chainColumns.sliceColumns(columns, boundaries[-2], boundaries[-1])
+        return True
+
+    def __getColumnarOptionChain(self) -> Optional[Dict[Text, np.ndarray]]:
+        """Used to get the option chain for the next date / time with the COLUMNAR loader.
+
+          :return typed columns of the option chain; None if there is no more data.
+        """
+        self.__dateColumnName = self.__dataConfig[self.__dataProvider]['column_names']['dateTime']
+        if not self.__dateColumnName in self.__csvColumnNames:
+            raise TypeError('The dateColumnName was not found in the CSV.')
+
+        while not self.__readyChains:
+            if not self.__readColumnBlock() and not self.__readyChains:
+                return None
+        columns = self.__readyChains.popleft()
+        self.__curTimeDate = columns['dateTime'][0]
+        return columns
+
+    def __findStartOffset(self) -> Optional[int]:
+        """Binary search over the byte offsets of the CSV for the first row on or after the startDateTime.
+
+          :return byte offset of the first row on or after the startDateTime; None if the file cannot be searched.
+        """
+        dateColumnName = self.__dataConfig[self.__dataProvider]['column_names']['dateTime']
+        if dateColumnName not in self.__csvColumnNames or len(self.__csvPaths) > 1 or csvSource.isCompressed(
+                self.__csvPaths[0]):
+            return None
+        return csvSource.findStartOffset(self.__csvPaths[0], self.__csvColumnNames.index(dateColumnName),
+                                         self.__startDateTime, self.__dateTimeParser)
+
+    def __seekToStartDate(self) -> None:
+        """Move the CSV reader to the first row on or after the startDateTime. If the file cannot be searched, the
+          option chains before the startDateTime are skipped as they are read instead.
+        """
+        startOffset = self.__findStartOffset()
+        if startOffset is not None:
+            # The DictReader keeps the field names from the header, so it continues from the new position.
+            self.__fileHandle.seek(startOffset)
+
     def getNextTick(self) -> bool:
         """Used to get the next available piece of data from the data source. For the CSV example, this would likely be
           the next row for a stock or group of rows for an option chain.
@@ -256,13 +411,34 @@ class CsvData(dataHandler.DataHandler):
           :return True / False indicating if there is data available.
         """
         if self.__dataConfig[self.__dataProvider]['data_source_type'] == 'options':
-            # Get optionChain as a dataframe.
-            optionChain = self.__getOptionChain()
-            if len(optionChain.index) == 0:
-                # No more data available.
+            if self.__endReached:
                 return False
-            # Convert optionChain from a dataframe to Option class objects.
-            optionChainObjs = self.__createBaseType(optionChain)
+            if self.__seekPending:
+                self.__seekPending = False
+                self.__seekToStartDate()
+
+            # Option chains before the startDateTime are only read here if the file could not be searched.
+            while True:
+                if self.__loaderType == LoaderTypes.COLUMNAR:
+                    optionChain = self.__getColumnarOptionChain()
+                    hasData = optionChain is not None
+                else:
+                    # Get optionChain as a dataframe.
+                    optionChain = self.__getOptionChain()
+                    hasData = len(optionChain.index) > 0
+                if not hasData or (self.__endDateTime is not None and self.__curTimeDate > self.__endDateTime):
+                    # No more data available.
+                    self.__endReached = True
+                    return False
+                if self.__startDateTime is None or self.__curTimeDate >= self.__startDateTime:
+                    break
+
+            # Convert optionChain to an OptionChain; the columnar loader only creates the Option class objects when
+            # they are requested.
+            if self.__loaderType == LoaderTypes.COLUMNAR:
+                optionChainObjs = optionChainModule.OptionChain(optionChain, self.__putType, self.__callType)
+            else:
+                optionChainObjs = optionChainModule.OptionChain.fromOptions(self.__createBaseType(optionChain))
             # Create tick event with option chain objects.
             event = tickEvent.TickEvent()
             event.createEvent(optionChainObjs)
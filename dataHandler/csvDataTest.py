@@ -1,6 +1,16 @@
 import unittest
+import datetime
 import decimal
+import os
+import shutil
+import tempfile
+import zipfile
+import numpy as np
+import pandas as pd
+from base import money
+from base import slottedOption
 from dataHandler import csvData
+from pricing import blackScholes
 import queue
 
 
@@ -160,6 +170,216 @@ class TestCSVHandler(unittest.TestCase):
         # which is what allows us to carry out the test below.
         self.assertEqual(option.tradePrice, option.settlementPrice)
 
+    def testColumnarLoaderMatchesRowLoader(self):
+        """Tests that the COLUMNAR loader creates the same option chains as the ROW loader."""
+        # Use a chunk size which is not a multiple of the option chain size so that chains span multiple blocks.
+        eventQueue = queue.Queue()
+        csvObj = csvData.CsvData(csvPath=self._csvPath, dataProviderPath=self._dataProviderPath,
+                                 dataProvider=self._dataProvider, eventQueue=eventQueue,
+                                 loaderType=csvData.LoaderTypes.COLUMNAR, chunkSize=500)
+        self.assertTrue(csvObj.getNextTick())
+        self.assertTrue(csvObj.getNextTick())
+        self.assertFalse(csvObj.getNextTick())
+        self.assertTrue(self._csvObj.getNextTick())
+        self.assertTrue(self._csvObj.getNextTick())
+        self.assertEqual(eventQueue.get().getData(), self._eventQueue.get().getData())
+        self.assertEqual(eventQueue.get().getData(), self._eventQueue.get().getData())
+
+    def testColumnarLoaderColumnNotInCSV(self):
+        """Tests that the COLUMNAR loader raises an exception if a column from dataProvider.json is not in the CSV."""
+        dataProviderPath = 'dataHandler/unitTestData/dataProvidersFakeColumnNotInCSV.json'
+        csvObj = csvData.CsvData(csvPath=self._csvPath, dataProviderPath=dataProviderPath,
+                                 dataProvider='test_provider', eventQueue=self._eventQueue,
+                                 loaderType=csvData.LoaderTypes.COLUMNAR)
+        with self.assertRaisesRegex(ValueError, 'Column name dummy_value in dataProvider.json not found in CSV.'):
+            csvObj.getNextTick()
+
+    def testColumnarLoaderBadChunkSize(self):
+        """Tests that an exception is raised if the chunk size is not positive."""
+        with self.assertRaisesRegex(ValueError, 'Chunk size must be a positive'):
+            csvData.CsvData(csvPath=self._csvPath, dataProviderPath=self._dataProviderPath,
+                            dataProvider=self._dataProvider, eventQueue=self._eventQueue,
+                            loaderType=csvData.LoaderTypes.COLUMNAR, chunkSize=0)
+
+    def testSlottedOptions(self):
+        """Tests that both loaders can create slotted options with the same values as the dataclass options."""
+        self.assertTrue(self._csvObj.getNextTick())
+        expectedChain = self._eventQueue.get().getData()
+        for loaderType in csvData.LoaderTypes:
+            eventQueue = queue.Queue()
+            csvObj = csvData.CsvData(csvPath=self._csvPath, dataProviderPath=self._dataProviderPath,
+                                     dataProvider=self._dataProvider, eventQueue=eventQueue, loaderType=loaderType,
+                                     slottedOptions=True)
+            self.assertTrue(csvObj.getNextTick())
+            optionChain = eventQueue.get().getData()
+            self.assertIsInstance(optionChain[0], slottedOption.SlottedOption)
+            self.assertEqual([slottedOption.toDataclassOption(chainOption) for chainOption in optionChain],
+                             expectedChain)
+
+    def testFixedPointMoney(self):
+        """Tests that both loaders create money prices which are equal to the decimal prices."""
+        self.assertTrue(self._csvObj.getNextTick())
+        expectedChain = self._eventQueue.get().getData()
+        for loaderType in csvData.LoaderTypes:
+            eventQueue = queue.Queue()
+            csvObj = csvData.CsvData(csvPath=self._csvPath, dataProviderPath=self._dataProviderPath,
+                                     dataProvider=self._dataProvider, eventQueue=eventQueue, loaderType=loaderType,
+                                     moneyType=money.MoneyTypes.FIXED_POINT)
+            self.assertTrue(csvObj.getNextTick())
+            optionChain = eventQueue.get().getData()
+            self.assertIsInstance(optionChain[0].tradePrice, money.Money)
+            self.assertEqual(list(optionChain), list(expectedChain))
+
+    def testComputedGreeks(self):
+        """Tests that the COLUMNAR loader fills or overrides the CSV greeks, and that the ROW loader does not support
+        it."""
+        greeks = {}
+        for greeksMode in blackScholes.GreeksModes:
+            eventQueue = queue.Queue()
+            csvObj = csvData.CsvData(csvPath=self._csvPath, dataProviderPath=self._dataProviderPath,
+                                     dataProvider=self._dataProvider, eventQueue=eventQueue,
+                                     loaderType=csvData.LoaderTypes.COLUMNAR, greeksMode=greeksMode)
+            self.assertTrue(csvObj.getNextTick())
+            optionChain = eventQueue.get().getData()
+            greeks[greeksMode] = optionChain.getColumn('delta')
+        # The sample CSV has all greeks, so only OVERRIDE changes them.
+        np.testing.assert_array_equal(greeks[blackScholes.GreeksModes.FILL_MISSING],
+                                      greeks[blackScholes.GreeksModes.CSV])
+        self.assertFalse(np.array_equal(greeks[blackScholes.GreeksModes.OVERRIDE],
+                                        greeks[blackScholes.GreeksModes.CSV]))
+        hasDelta = ~np.isnan(greeks[blackScholes.GreeksModes.OVERRIDE])
+        self.assertTrue(hasDelta.any())
+        np.testing.assert_allclose(greeks[blackScholes.GreeksModes.OVERRIDE][hasDelta],
+                                   greeks[blackScholes.GreeksModes.CSV][hasDelta], atol=0.1)
+        with self.assertRaisesRegex(ValueError, 'Greeks can only be computed with the COLUMNAR loader.'):
+            csvData.CsvData(csvPath=self._csvPath, dataProviderPath=self._dataProviderPath,
+                            dataProvider=self._dataProvider, eventQueue=self._eventQueue,
+                            greeksMode=blackScholes.GreeksModes.OVERRIDE)
+
+    def testFillImpliedVol(self):
+        """Tests that the COLUMNAR loader solves only the missing implied volatilities, and that the ROW loader does
+        not support it."""
+        impliedVols = {}
+        for fillImpliedVol in (False, True):
+            eventQueue = queue.Queue()
+            # Some options of the SPX sample have no implied volatility.
+            csvObj = csvData.CsvData(csvPath='sampleData/spx_sample_ivolatility.csv',
+                                     dataProviderPath=self._dataProviderPath, dataProvider=self._dataProvider,
+                                     eventQueue=eventQueue, loaderType=csvData.LoaderTypes.COLUMNAR,
+                                     fillImpliedVol=fillImpliedVol)
+            columns = []
+            while csvObj.getNextTick():
+                columns.append(eventQueue.get().getData().getColumn('impliedVol'))
+            impliedVols[fillImpliedVol] = np.concatenate(columns)
+        hasImpliedVol = impliedVols[False] > 0
+        self.assertFalse(hasImpliedVol.all())
+        np.testing.assert_array_equal(impliedVols[True][hasImpliedVol], impliedVols[False][hasImpliedVol])
+        filled = impliedVols[True][~hasImpliedVol]
+        self.assertTrue((filled > 0).any())
+        self.assertTrue((filled[~np.isnan(filled)] < 5.0).all())
+        with self.assertRaisesRegex(ValueError, 'Implied volatilities can only be solved with the COLUMNAR loader.'):
+            csvData.CsvData(csvPath=self._csvPath, dataProviderPath=self._dataProviderPath,
+                            dataProvider=self._dataProvider, eventQueue=self._eventQueue, fillImpliedVol=True)
+
+    def testStartAndEndDateTime(self):
+        """Tests that only the option chains between the start and end date / time are read."""
+        for loaderType in csvData.LoaderTypes:
+            eventQueue = queue.Queue()
+            csvObj = csvData.CsvData(csvPath='sampleData/spx_sample_ivolatility.csv',
+                                     dataProviderPath=self._dataProviderPath, dataProvider=self._dataProvider,
+                                     eventQueue=eventQueue, loaderType=loaderType,
+                                     startDateTime=datetime.datetime(2011, 1, 4),
+                                     endDateTime=datetime.datetime(2011, 1, 6))
+            dateTimes = []
+            while csvObj.getNextTick():
+                dateTimes.append(eventQueue.get().getData()[0].dateTime)
+            self.assertEqual(dateTimes, [datetime.datetime(2011, 1, 4), datetime.datetime(2011, 1, 5),
+                                         datetime.datetime(2011, 1, 6)])
+
+    def testStartDateTimeSkipsEarlierRows(self):
+        """Tests that the rows before the startDateTime are never parsed."""
+        # Corrupt the put / call symbol of the first option chain; reading the first chain would raise an exception.
+        with open(self._csvPath) as csvFile:
+            lines = csvFile.readlines()
+        lines[1:1823] = [line.replace(',C,', ',X,').replace(',P,', ',X,') for line in lines[1:1823]]
+        csvFileHandle, csvPath = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(csvFileHandle, 'w') as csvFile:
+            csvFile.writelines(lines)
+        try:
+            for loaderType in csvData.LoaderTypes:
+                eventQueue = queue.Queue()
+                csvObj = csvData.CsvData(csvPath=csvPath, dataProviderPath=self._dataProviderPath,
+                                         dataProvider=self._dataProvider, eventQueue=eventQueue,
+                                         loaderType=loaderType, startDateTime=datetime.datetime(2014, 8, 8))
+                self.assertTrue(csvObj.getNextTick())
+                self.assertEqual(eventQueue.get().getData()[0].dateTime, datetime.datetime(2014, 8, 8))
+                self.assertFalse(csvObj.getNextTick())
+        finally:
+            os.remove(csvPath)
+
+    def testZipArchive(self):
+        """Tests that the CSV members of a zip archive are read in date order without extracting them."""
+        csvPath = 'sampleData/spx_sample_ivolatility.csv'
+        with open(csvPath) as csvFile:
+            lines = csvFile.readlines()
+        splitIndex = next(index for index, line in enumerate(lines) if line.split(',')[3] == '01/06/2011')
+        zipFileHandle, zipPath = tempfile.mkstemp(suffix='.zip')
+        os.close(zipFileHandle)
+        with zipfile.ZipFile(zipPath, 'w', compression=zipfile.ZIP_DEFLATED) as zipFile:
+            # The member with the later dates is first in name order.
+            zipFile.writestr('a.csv', ''.join(lines[:1] + lines[splitIndex:]))
+            zipFile.writestr('b.csv', ''.join(lines[:splitIndex]))
+        try:
+            for loaderType in csvData.LoaderTypes:
+                for startDateTime in [None, datetime.datetime(2011, 1, 5)]:
+                    chains = []
+                    for path in [csvPath, zipPath]:
+                        eventQueue = queue.Queue()
+                        csvObj = csvData.CsvData(csvPath=path, dataProviderPath=self._dataProviderPath,
+                                                 dataProvider=self._dataProvider, eventQueue=eventQueue,
+                                                 loaderType=loaderType, startDateTime=startDateTime)
+                        pathChains = []
+                        while csvObj.getNextTick():
+                            pathChains.append(list(eventQueue.get().getData()))
+                        chains.append(pathChains)
+                    self.assertGreater(len(chains[0]), 1)
+                    self.assertEqual(chains[0], chains[1])
+        finally:
+            os.remove(zipPath)
+
+    def testMergeCsvs(self):
+        """Tests that several CSVs with different column orders are read as one CSV merged by date / time."""
+        csvPath = 'sampleData/spx_sample_ivolatility.csv'
+        chainRows = pd.read_csv(csvPath, dtype=str, keep_default_na=False)
+        isOddDay = chainRows['date'].str.slice(3, 5).astype(int) % 2 == 1
+        directory = tempfile.mkdtemp()
+        try:
+            chainRows[isOddDay].to_csv(os.path.join(directory, 'SPX_odd.csv'), index=False)
+            chainRows[~isOddDay][chainRows.columns[::-1]].to_csv(os.path.join(directory, 'SPX_even.csv'), index=False)
+            for loaderType in csvData.LoaderTypes:
+                for startDateTime in [None, datetime.datetime(2011, 1, 5)]:
+                    chains = []
+                    for path in [csvPath, os.path.join(directory, 'SPX_*.csv')]:
+                        eventQueue = queue.Queue()
+                        csvObj = csvData.CsvData(csvPath=path, dataProviderPath=self._dataProviderPath,
+                                                 dataProvider=self._dataProvider, eventQueue=eventQueue,
+                                                 loaderType=loaderType, startDateTime=startDateTime)
+                        pathChains = []
+                        while csvObj.getNextTick():
+                            pathChains.append(list(eventQueue.get().getData()))
+                        chains.append(pathChains)
+                    self.assertGreater(len(chains[0]), 1)
+                    self.assertEqual(chains[0], chains[1])
+        finally:
+            shutil.rmtree(directory)
+
+    def testStartDateTimeAfterEndDateTime(self):
+        """Tests that an exception is raised if the startDateTime is after the endDateTime."""
+        with self.assertRaisesRegex(ValueError, 'The startDateTime must not be after the endDateTime.'):
+            csvData.CsvData(csvPath=self._csvPath, dataProviderPath=self._dataProviderPath,
+                            dataProvider=self._dataProvider, eventQueue=self._eventQueue,
+                            startDateTime=datetime.datetime(2014, 8, 8), endDateTime=datetime.datetime(2014, 8, 7))
+
 
 if __name__ == '__main__':
     unittest.main()
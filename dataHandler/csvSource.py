@@ -0,0 +1,462 @@
+import csv
+import datetime
+import glob
+import gzip
+import heapq
+import io
+import itertools
+import os
+import zipfile
+from dataHandler import dateTimeParser
+from typing import Callable, Iterator, List, Optional, Sequence, Text, TextIO, Tuple, Union
+
+"""
+This file opens CSV files for the data handlers, streaming them directly from zip and gzip archives and merging
+multiple CSVs by date.
+"""
+
+ZIP_SUFFIX = '.zip'
+GZIP_SUFFIX = '.gz'
+# Size of the reads from the decompressors; large reads amortize the per-call overhead of inflating small pieces.
+DEFAULT_BUFFER_SIZE = 1 << 20
+# Encoding of compressed CSVs; a leading byte order mark is dropped.
+COMPRESSED_ENCODING = 'utf-8-sig'
+GLOB_CHARACTERS = '*?['
+
+
+def isCompressed(csvPath: Text) -> bool:
+    """Check if a CSV path is a zip or gzip archive (by its suffix).
+
+    :param csvPath: path to a CSV, zip or gzip file.
+    :return: True if the path is read through a decompressor.
+    """
+    return csvPath.lower().endswith((ZIP_SUFFIX, GZIP_SUFFIX))
+
+
+def expandCsvPaths(csvPaths: Union[Text, Sequence[Text]]) -> List[Text]:
+    """Expand a path, a glob pattern (e.g., 'SPX_*.csv'), or a list of paths and glob patterns into a list of paths.
+    The paths matching a glob pattern are sorted by name.
+
+    :param csvPaths: path, glob pattern, or list of paths and glob patterns.
+    :raises ValueError: No path was given.
+    :raises FileNotFoundError: A glob pattern does not match any file.
+    :return: list of paths.
+    """
+    patterns = [csvPaths] if isinstance(csvPaths, str) else list(csvPaths)
+    if not patterns:
+        raise ValueError('At least one CSV path must be given.')
+    paths = []
+    for pattern in patterns:
+        if not any(character in pattern for character in GLOB_CHARACTERS):
+            paths.append(pattern)
+            continue
+        matchingPaths = sorted(glob.glob(pattern))
+        if not matchingPaths:
+            raise FileNotFoundError('No file matches %s.' % pattern)
+        paths.extend(matchingPaths)
+    return paths
+
+
+def openCsvSource(csvPath: Text, dateColumnName: Optional[Text] = None, dateTimeFormat: Optional[Text] = None,
+                  bufferSize: int = DEFAULT_BUFFER_SIZE) -> TextIO:
+    """Open a CSV for reading as text.
+
+    Plain files are opened as they are. A gzip file is decompressed as it is read. The CSV members of a zip archive
+    are decompressed one after another as a single CSV: the header of the first member is kept and the headers of
+    the other members, which must match it, are skipped. If the date column and format are given, the members are read
+    in the order of the date of their first row (members are read in name order otherwise).
+
+    :param csvPath: path to a CSV, a gzip of a CSV (.gz) or a zip archive of CSVs (.zip).
+    :param dateColumnName: name of the date / time column, used to order the members of a zip archive.
+    :param dateTimeFormat: format of the date / time column, used to order the members of a zip archive.
+    :param bufferSize: size of the reads from the decompressors.
+    :raises OSError: The file cannot be opened, or is not a valid zip archive.
+    :raises ValueError: The zip archive does not contain a CSV.
+    :raises ValueError: The headers of the CSV members of a zip archive do not match.
+    :return: text file handle; closing it closes the archive.
+    """
+    lowerPath = csvPath.lower()
+    if lowerPath.endswith(GZIP_SUFFIX):
+        return _openText(gzip.GzipFile(csvPath, 'rb'), bufferSize)
+    if not lowerPath.endswith(ZIP_SUFFIX):
+        return open(csvPath, 'r')
+
+    try:
+        zipFile = zipfile.ZipFile(csvPath)
+    except zipfile.BadZipFile as e:
+        raise OSError('%s is not a valid zip archive.' % csvPath) from e
+    try:
+        memberNames = [info.filename for info in zipFile.infolist() if _isCsvMember(info)]
+        if not memberNames:
+            raise ValueError('The zip archive %s does not contain a CSV.' % csvPath)
+        openMember = lambda memberName: _openText(zipFile.open(memberName), bufferSize)
+        memberNames.sort()
+        if dateColumnName is not None and dateTimeFormat is not None and len(memberNames) > 1:
+            parser = dateTimeParser.getParser(dateTimeFormat)
+            memberNames.sort(key=lambda memberName: _getFirstDateKey(openMember(memberName), dateColumnName, parser))
+        return _MemberChainReader([(memberName, lambda memberName=memberName: openMember(memberName)) for memberName in
+                                   memberNames], zipFile)
+    except BaseException:
+        zipFile.close()
+        raise
+
+
+def openMergedCsvSources(csvPaths: Sequence[Text], dateColumnName: Text, dateTimeFormat: Text,
+                         startDateTime: Optional[datetime.datetime] = None,
+                         bufferSize: int = DEFAULT_BUFFER_SIZE) -> TextIO:
+    """Open several CSVs, each sorted by date / time, as a single CSV sorted by date / time.
+
+    The rows of the CSVs are merged by date / time (a k-way merge), so the CSVs may overlap; the rows of a date / time
+    which is in several CSVs are only read from the first of these CSVs, so that the chain of the date / time is not
+    repeated. The CSVs must have the same columns, but
+    not necessarily in the same order: the rows of each CSV are reordered to the columns of the first CSV. Each CSV
+    may be a zip or gzip archive, and each row must be on a single line.
+
+    :param csvPaths: paths of the CSVs.
+    :param dateColumnName: name of the date / time column.
+    :param dateTimeFormat: format of the date / time column.
+    :param startDateTime: if given, each plain CSV starts at its first row on or after this date / time (found with
+                          findStartOffset()); the rows before it in archives are still read.
+    :param bufferSize: size of the reads from the decompressors.
+    :raises OSError: A CSV cannot be opened.
+    :raises TypeError: The dateColumnName was not found in the CSV.
+    :raises ValueError: The columns of the CSVs do not match.
+    :return: text file handle; closing it closes the CSVs.
+    """
+    parser = dateTimeParser.getParser(dateTimeFormat)
+    sources = []
+    try:
+        for csvPath in csvPaths:
+            sources.append(openCsvSource(csvPath, dateColumnName, dateTimeFormat, bufferSize))
+        headers = [next(csv.reader([source.readline()]), []) for source in sources]
+        header = headers[0]
+        if dateColumnName not in header:
+            raise TypeError('The dateColumnName was not found in the CSV.')
+        columnOrders = []
+        for csvPath, sourceHeader in zip(csvPaths, headers):
+            if sorted(sourceHeader) != sorted(header):
+                raise ValueError('The columns of %s do not match the columns of %s.' % (csvPath, csvPaths[0]))
+            columnOrders.append(None if sourceHeader == header else [sourceHeader.index(name) for name in header])
+        dateColumnIndexes = [sourceHeader.index(dateColumnName) for sourceHeader in headers]
+
+        if startDateTime is not None:
+            for csvPath, source, dateColumnIndex in zip(csvPaths, sources, dateColumnIndexes):
+                startOffset = None if isCompressed(csvPath) else findStartOffset(csvPath, dateColumnIndex,
+                                                                                startDateTime, parser)
+                if startOffset is not None:
+                    source.seek(startOffset)
+        return _MergedCsvReader(sources, header, columnOrders, dateColumnIndexes, parser)
+    except BaseException:
+        for source in sources:
+            source.close()
+        raise
+
+
+def findStartOffset(csvPath: Text, dateColumnIndex: int, startDateTime: datetime.datetime,
+                    parser: dateTimeParser.DateTimeParser) -> Optional[int]:
+    """Binary search over the byte offsets of a plain CSV for the first row on or after a date / time. This requires
+    the CSV to be sorted by date / time and to use '\n' or '\r\n' line endings.
+
+    :param csvPath: path of the CSV.
+    :param dateColumnIndex: index of the date / time column.
+    :param startDateTime: date / time to search for.
+    :param parser: parser of the date / time column.
+    :return: byte offset of the first row on or after startDateTime; None if the file cannot be searched.
+    """
+    with open(csvPath, 'rb') as binaryHandle:
+        headerLine = binaryHandle.readline()
+        if not headerLine.endswith(b'\n') or b'\r' in headerLine[:-2]:
+            return None
+        dataStart = binaryHandle.tell()
+        fileSize = os.fstat(binaryHandle.fileno()).st_size
+
+        def getLineStart(offset: int) -> int:
+            """Get the offset of the first line which starts at or after offset."""
+            if offset <= dataStart:
+                return dataStart
+            binaryHandle.seek(offset - 1)
+            binaryHandle.readline()
+            return binaryHandle.tell()
+
+        def isOnOrAfterStart(offset: int) -> bool:
+            """Check if the first line starting at or after offset is on or after the startDateTime."""
+            lineStart = getLineStart(offset)
+            binaryHandle.seek(lineStart)
+            line = binaryHandle.readline()
+            if not line.strip():
+                return True
+            row = next(csv.reader([line.decode('utf-8')]))
+            return parser.parse(row[dateColumnIndex]) >= startDateTime
+
+        low = dataStart
+        high = fileSize
+        while low < high:
+            middle = (low + high) // 2
+            if isOnOrAfterStart(middle):
+                high = middle
+            else:
+                low = middle + 1
+        return getLineStart(low)
+
+
+def _openText(binaryFile: io.BufferedIOBase, bufferSize: int) -> TextIO:
+    """Wrap a decompressed binary stream as text, reading it in large blocks."""
+    return io.TextIOWrapper(io.BufferedReader(binaryFile, buffer_size=bufferSize), encoding=COMPRESSED_ENCODING)
+
+
+def _isCsvMember(info: zipfile.ZipInfo) -> bool:
+    """Check if a zip member is a CSV (skipping directories and the resource forks added by macOS)."""
+    baseName = os.path.basename(info.filename)
+    return (not info.is_dir() and baseName.lower().endswith('.csv') and not baseName.startswith('._') and
+            not info.filename.startswith('__MACOSX/'))
+
+
+def _getFirstDateKey(member: TextIO, dateColumnName: Text,
+                     parser: dateTimeParser.DateTimeParser) -> Tuple[bool, datetime.datetime]:
+    """Get the sort key of a zip member: the date / time of its first row (members without rows are last).
+
+    :raises TypeError: The dateColumnName was not found in the CSV.
+    """
+    with member:
+        rows = csv.reader(member)
+        header = next(rows, [])
+        if dateColumnName not in header:
+            raise TypeError('The dateColumnName was not found in the CSV.')
+        firstRow = next(rows, None)
+    if firstRow is None:
+        return True, datetime.datetime.max
+    return False, parser.parse(firstRow[header.index(dateColumnName)])
+
+
+class _MemberChainReader(io.TextIOBase):
+    """This class reads the CSV members of a zip archive, one after another, as one text stream with one header."""
+
+    def __init__(self, members: Sequence[Tuple[Text, Callable[[], TextIO]]], zipFile: zipfile.ZipFile) -> None:
+        """Initializes the reader and opens the first member.
+
+        Attributes:
+          members:  names of the members and functions which open them, in reading order.
+          zipFile:  archive of the members; closed with the reader.
+        """
+        super().__init__()
+        self.__members = list(members)
+        self.__zipFile = zipFile
+        self.__memberIndex = -1
+        self.__member = None
+        self.__header = None
+        # Text returned before the rest of the current member: the header of the first member, or the line ending
+        # missing at the end of the previous member.
+        self.__pending = ''
+        self.__endsWithNewline = True
+        self.__nextMember()
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: Optional[int] = -1) -> Text:
+        if size is None or size < 0:
+            return ''.join(iter(lambda: self.read(DEFAULT_BUFFER_SIZE), ''))
+        if size == 0:
+            return ''
+        return self.__readWith(lambda member: member.read(size), lambda pending: size)
+
+    def readline(self, size: Optional[int] = -1) -> Text:
+        if size is None or size < 0:
+            size = -1
+        elif size == 0:
+            return ''
+
+        def readMemberLine(member: TextIO) -> Text:
+            line = member.readline(size)
+            # The last line of a member may not end with a line ending; it must not be joined with the next member.
+            return line + '\n' if size < 0 and line and not line.endswith('\n') else line
+
+        return self.__readWith(readMemberLine, lambda pending: min(pending.find('\n') + 1 or len(pending),
+                                                                   len(pending) if size < 0 else size))
+
+    def close(self) -> None:
+        if not self.closed:
+            if self.__member is not None:
+                self.__member.close()
+                self.__member = None
+            self.__zipFile.close()
+        super().close()
+
+    def __readWith(self, readMember: Callable[[TextIO], Text], getPendingLength: Callable[[Text], int]) -> Text:
+        """Read from the pending text or the current member, moving to the next member at the end of each member.
+
+        :param readMember: reads text from a member.
+        :param getPendingLength: number of characters to take from the pending text.
+        :return: text read; empty at the end of the last member.
+        """
+        while True:
+            if self.__pending:
+                length = getPendingLength(self.__pending)
+                text, self.__pending = self.__pending[:length], self.__pending[length:]
+                return self.__track(text)
+            if self.__member is None:
+                return ''
+            text = readMember(self.__member)
+            if text:
+                return self.__track(text)
+            if not self.__endsWithNewline:
+                self.__pending = '\n'
+            self.__nextMember()
+
+    def __track(self, text: Text) -> Text:
+        """Remember if the text returned last ends a line."""
+        self.__endsWithNewline = text.endswith('\n')
+        return text
+
+    def __nextMember(self) -> None:
+        """Close the current member and open the next one, skipping its header.
+
+        :raises ValueError: The header of the member does not match the header of the first member.
+        """
+        if self.__member is not None:
+            self.__member.close()
+            self.__member = None
+        self.__memberIndex += 1
+        if self.__memberIndex >= len(self.__members):
+            return
+        memberName, openMember = self.__members[self.__memberIndex]
+        self.__member = openMember()
+        header = self.__member.readline()
+        if self.__header is None:
+            self.__header = header
+            self.__pending = header
+        elif header.rstrip('\r\n') != self.__header.rstrip('\r\n'):
+            raise ValueError('The header of %s does not match the header of %s.' % (memberName, self.__members[0][0]))
+
+
+def _formatRow(fields: Sequence[Text], quoted: bool) -> Text:
+    """Format the fields of a row as a CSV line; quoting is only needed if the fields came from a quoted line."""
+    if not quoted:
+        return ','.join(fields) + '\n'
+    lineBuffer = io.StringIO()
+    csv.writer(lineBuffer, lineterminator='\n').writerow(fields)
+    return lineBuffer.getvalue()
+
+
+class _MergedCsvReader(io.TextIOBase):
+    """This class merges the rows of several CSVs, each sorted by date / time, into one text stream with one header.
+
+    Each CSV is read as runs of consecutive rows with the same date / time, and the runs are merged by (date / time,
+    index of the CSV), so that the date / time of each row is only parsed when it changes. Only the first run of each
+    date / time is kept: the CSVs which overlap repeat the chain of the date / time.
+    """
+
+    def __init__(self, sources: Sequence[TextIO], header: Sequence[Text], columnOrders: Sequence[Optional[List[int]]],
+                 dateColumnIndexes: Sequence[int], parser: dateTimeParser.DateTimeParser) -> None:
+        """Initializes the reader.
+
+        Attributes:
+          sources:  text file handles of the CSVs, positioned after their headers (or at their first row to read).
+          header:  column names of the merged CSV.
+          columnOrders:  for each CSV, the index of each column of the merged CSV in its rows (None if the CSV has the
+                         columns in the same order).
+          dateColumnIndexes:  for each CSV, the index of the date / time column in its rows.
+          parser:  parser of the date / time column.
+        """
+        super().__init__()
+        self.__sources = list(sources)
+        self.__parser = parser
+        runs = heapq.merge(*[self.__readRuns(sourceIndex, source, columnOrder, dateColumnIndex) for
+                             sourceIndex, (source, columnOrder, dateColumnIndex) in
+                             enumerate(zip(sources, columnOrders, dateColumnIndexes))])
+        self.__lines = itertools.chain([_formatRow(header, True)],
+                                       itertools.chain.from_iterable(lines for _, _, lines in self.__dropRepeatedRuns(
+                                           runs)))
+        # Text of a line which was only partly returned by read() or readline().
+        self.__pending = ''
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: Optional[int] = -1) -> Text:
+        if size is None or size < 0:
+            text = self.__pending + ''.join(self.__lines)
+            self.__pending = ''
+            return text
+        pieces = [self.__pending]
+        length = len(self.__pending)
+        while length < size:
+            line = next(self.__lines, None)
+            if line is None:
+                break
+            pieces.append(line)
+            length += len(line)
+        text = ''.join(pieces)
+        self.__pending = text[size:]
+        return text[:size]
+
+    def readline(self, size: Optional[int] = -1) -> Text:
+        if self.__pending:
+            lineEnd = self.__pending.find('\n') + 1
+            if lineEnd:
+                line, self.__pending = self.__pending[:lineEnd], self.__pending[lineEnd:]
+            else:
+                line, self.__pending = self.__pending + next(self.__lines, ''), ''
+        else:
+            line = next(self.__lines, '')
+        if size is not None and 0 <= size < len(line):
+            line, self.__pending = line[:size], line[size:] + self.__pending
+        return line
+
+    def close(self) -> None:
+        if not self.closed:
+            for source in self.__sources:
+                source.close()
+        super().close()
+
+    @staticmethod
+    def __dropRepeatedRuns(runs: Iterator[Tuple[datetime.datetime, int, List[Text]]]) -> Iterator[
+            Tuple[datetime.datetime, int, List[Text]]]:
+        """Drop the runs of a date / time from other CSVs than the CSV of the first run of the date / time.
+
+        :param runs: runs merged by (date / time, index of the CSV).
+        :return: iterator of the runs which are kept.
+        """
+        lastDateTime = None
+        lastSourceIndex = None
+        for run in runs:
+            dateTime, sourceIndex, _ = run
+            if dateTime == lastDateTime and sourceIndex != lastSourceIndex:
+                continue
+            lastDateTime, lastSourceIndex = dateTime, sourceIndex
+            yield run
+
+    def __readRuns(self, sourceIndex: int, source: TextIO, columnOrder: Optional[List[int]],
+                   dateColumnIndex: int) -> Iterator[Tuple[datetime.datetime, int, List[Text]]]:
+        """Read the runs of consecutive rows with the same date / time from a CSV.
+
+        :return: iterator of (date / time, index of the CSV, lines of the rows in the merged column order).
+        """
+        parse = self.__parser.parse
+        dateText = None
+        dateTime = None
+        lines = []
+        for line in source:
+            if not line.strip():
+                continue
+            quoted = '"' in line
+            if quoted:
+                fields = next(csv.reader([line]))
+            elif columnOrder is not None:
+                fields = line.rstrip('\r\n').split(',')
+            else:
+                # Only the fields up to the date / time are split off.
+                fields = line.split(',', dateColumnIndex + 1)
+            if fields[dateColumnIndex] != dateText:
+                if lines:
+                    yield dateTime, sourceIndex, lines
+                    lines = []
+                dateText = fields[dateColumnIndex]
+                dateTime = parse(dateText.rstrip('\r\n'))
+            if columnOrder is not None:
+                line = _formatRow([fields[index] for index in columnOrder], quoted)
+            elif not line.endswith('\n'):
+                line += '\n'
+            lines.append(line)
+        if lines:
+            yield dateTime, sourceIndex, lines
@@ -0,0 +1,143 @@
+import datetime
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+import pandas as pd
+from dataHandler import csvSource
+from dataHandler import dateTimeParser
+
+
+class TestCsvSource(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._zipPath = os.path.join(self._directory, 'chains.zip')
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def writeZip(self, members):
+        with zipfile.ZipFile(self._zipPath, 'w', compression=zipfile.ZIP_DEFLATED) as zipFile:
+            for memberName, text in members:
+                zipFile.writestr(memberName, text)
+
+    def testPlainAndGzip(self):
+        """Tests that plain files are opened as they are and that gzip files are decompressed."""
+        csvPath = os.path.join(self._directory, 'chains.csv')
+        with open(csvPath, 'w') as csvFile:
+            csvFile.write('date,strike\n01/03/2011,100\n')
+        with open(csvPath, 'rb') as csvFile, gzip.open(csvPath + '.gz', 'wb') as gzipFile:
+            gzipFile.write(b'\xef\xbb\xbf' + csvFile.read())
+        for path in [csvPath, csvPath + '.gz']:
+            with csvSource.openCsvSource(path) as csvFile:
+                self.assertEqual(csvFile.read(), 'date,strike\n01/03/2011,100\n')
+        self.assertTrue(csvSource.isCompressed(csvPath + '.GZ'))
+        self.assertFalse(csvSource.isCompressed(csvPath))
+
+    def testZipMembersInDateOrder(self):
+        """Tests that the CSV members of a zip archive are read in date order with a single header."""
+        self.writeZip([('a.csv', 'date,strike\r01/05/2011,300\r'),
+                       ('b.csv', 'date,strike\n01/03/2011,100\n01/04/2011,200'),
+                       ('__MACOSX/._a.csv', 'resource fork'),
+                       ('notes.txt', 'not a CSV')])
+        with csvSource.openCsvSource(self._zipPath, 'date', '%m/%d/%Y') as csvFile:
+            self.assertEqual(list(csvFile), ['date,strike\n', '01/03/2011,100\n', '01/04/2011,200\n',
+                                             '01/05/2011,300\n'])
+        with csvSource.openCsvSource(self._zipPath) as csvFile:
+            self.assertEqual(csvFile.read(), 'date,strike\n01/05/2011,300\n01/03/2011,100\n01/04/2011,200\n')
+
+    def testZipMembersWithPandas(self):
+        """Tests that pandas reads the members of a zip archive in blocks."""
+        self.writeZip([('2012.csv', 'date,strike\n01/03/2012,300\n'),
+                       ('2011.csv', 'date,strike\n01/03/2011,100\n01/04/2011,200\n')])
+        with csvSource.openCsvSource(self._zipPath, 'date', '%m/%d/%Y', bufferSize=4) as csvFile:
+            blocks = list(pd.read_csv(csvFile, chunksize=2, dtype=str))
+        self.assertEqual([list(block['strike']) for block in blocks], [['100', '200'], ['300']])
+
+    def testZipErrors(self):
+        """Tests that exceptions are raised for headers which do not match, archives without CSVs and bad archives."""
+        self.writeZip([('a.csv', 'date,strike\n01/03/2011,100\n'), ('b.csv', 'date,bid\n01/04/2011,1.0\n')])
+        with self.assertRaisesRegex(ValueError, 'The header of b.csv does not match the header of a.csv.'):
+            with csvSource.openCsvSource(self._zipPath) as csvFile:
+                csvFile.read()
+        self.writeZip([('notes.txt', 'not a CSV')])
+        with self.assertRaisesRegex(ValueError, 'does not contain a CSV'):
+            csvSource.openCsvSource(self._zipPath)
+        with open(self._zipPath, 'w') as badFile:
+            badFile.write('not a zip archive')
+        with self.assertRaisesRegex(OSError, 'is not a valid zip archive'):
+            csvSource.openCsvSource(self._zipPath)
+
+    def writeCsv(self, fileName, text):
+        csvPath = os.path.join(self._directory, fileName)
+        with open(csvPath, 'w') as csvFile:
+            csvFile.write(text)
+        return csvPath
+
+    def testExpandCsvPaths(self):
+        """Tests that glob patterns are expanded in name order and that paths are kept as they are."""
+        secondPath = self.writeCsv('SPX_2012.csv', '')
+        firstPath = self.writeCsv('SPX_2011.csv', '')
+        self.assertEqual(csvSource.expandCsvPaths(os.path.join(self._directory, 'SPX_*.csv')), [firstPath, secondPath])
+        self.assertEqual(csvSource.expandCsvPaths([secondPath, 'missing.csv']), [secondPath, 'missing.csv'])
+        with self.assertRaisesRegex(FileNotFoundError, 'No file matches'):
+            csvSource.expandCsvPaths(os.path.join(self._directory, 'ES_*.csv'))
+        with self.assertRaisesRegex(ValueError, 'At least one CSV path must be given.'):
+            csvSource.expandCsvPaths([])
+
+    def testMergeOverlappingCsvs(self):
+        """Tests that overlapping CSVs are merged by date, reading the rows of a date from the first CSV which has the
+        date, and that the columns of each CSV are reordered to the columns of the first CSV."""
+        firstPath = self.writeCsv('first.csv', 'date,strike,bid\n01/03/2011,100,1.0\n01/03/2011,110,1.5\n'
+                                               '01/05/2011,100,2.0\n')
+        secondPath = self.writeCsv('second.csv', 'bid,date,strike\r\n0.5,01/03/2011,90\r\n"1,5",01/04/2011,95\r\n'
+                                                 '2.5,01/06/2011,100')
+        with csvSource.openMergedCsvSources([firstPath, secondPath], 'date', '%m/%d/%Y') as csvFile:
+            self.assertEqual(csvFile.readline(), 'date,strike,bid\n')
+            self.assertEqual(csvFile.read(), '01/03/2011,100,1.0\n01/03/2011,110,1.5\n01/04/2011,95,"1,5"\n'
+                                             '01/05/2011,100,2.0\n01/06/2011,100,2.5\n')
+        with csvSource.openMergedCsvSources([secondPath, firstPath], 'date', '%m/%d/%Y') as csvFile:
+            blocks = list(pd.read_csv(csvFile, chunksize=4, dtype=str))
+        self.assertEqual([list(block['bid']) for block in blocks], [['0.5', '1,5', '2.0', '2.5']])
+
+    def testMergeOverlappingRowCounts(self):
+        """Tests that the chain of each date is read once when CSVs share dates."""
+        def writeDates(fileName, days, strikes):
+            return self.writeCsv(fileName, 'date,strike\n' + ''.join(
+                '01/%02d/2011,%s\n' % (day, strike) for day in days for strike in strikes))
+
+        firstPath = writeDates('first.csv', range(1, 21), range(100, 164))
+        secondPath = writeDates('second.csv', range(11, 31), range(200, 264))
+        with csvSource.openMergedCsvSources([firstPath, secondPath], 'date', '%m/%d/%Y') as csvFile:
+            chains = pd.read_csv(csvFile, dtype=str)
+        self.assertEqual(len(chains), 30 * 64)
+        self.assertEqual(set(chains.groupby('date').size()), {64})
+        self.assertEqual(list(chains.loc[chains['date'] == '01/15/2011', 'strike']), [str(strike) for strike in
+                                                                                       range(100, 164)])
+
+    def testMergeStartDateTime(self):
+        """Tests that each CSV starts at its first row on or after the startDateTime."""
+        firstPath = self.writeCsv('first.csv', 'date,strike\n01/03/2011,100\n01/05/2011,100\n')
+        secondPath = self.writeCsv('second.csv', 'date,strike\n01/04/2011,100\n01/06/2011,100\n')
+        with csvSource.openMergedCsvSources([firstPath, secondPath], 'date', '%m/%d/%Y',
+                                            startDateTime=datetime.datetime(2011, 1, 5)) as csvFile:
+            self.assertEqual(list(csvFile), ['date,strike\n', '01/05/2011,100\n', '01/06/2011,100\n'])
+        self.assertIsNone(csvSource.findStartOffset(self.writeCsv('crlf.csv', 'date\r01/03/2011\r'), 0,
+                                                    datetime.datetime(2011, 1, 5),
+                                                    dateTimeParser.getParser('%m/%d/%Y')))
+
+    def testMergeErrors(self):
+        """Tests that exceptions are raised for CSVs with different columns or without the date / time column."""
+        firstPath = self.writeCsv('first.csv', 'date,strike\n01/03/2011,100\n')
+        secondPath = self.writeCsv('second.csv', 'date,bid\n01/04/2011,1.0\n')
+        with self.assertRaisesRegex(ValueError, 'The columns of .*second.csv do not match the columns of'):
+            csvSource.openMergedCsvSources([firstPath, secondPath], 'date', '%m/%d/%Y')
+        with self.assertRaisesRegex(TypeError, 'The dateColumnName was not found in the CSV.'):
+            csvSource.openMergedCsvSources([firstPath, firstPath], 'quote_date', '%m/%d/%Y')
+
+
+if __name__ == '__main__':
+    unittest.main()
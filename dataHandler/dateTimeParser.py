@@ -0,0 +1,96 @@
+import datetime
+import functools
+import threading
+from typing import Dict, Optional, Text, Tuple
+
+"""
+This file parses the date / time strings of the CSV files, parsing each distinct string only once.
+"""
+
+# Maximum number of distinct strings kept per format. A few decades of trading dates and expirations fit easily.
+DEFAULT_CACHE_SIZE = 65536
+
+# Date formats which are parsed by splitting the string instead of calling strptime: the separator, and the positions
+# of the year, month and day fields.
+_FAST_DATE_FORMATS = {
+    '%m/%d/%Y': ('/', (2, 0, 1)),
+    '%d/%m/%Y': ('/', (2, 1, 0)),
+    '%Y-%m-%d': ('-', (0, 1, 2)),
+    '%Y/%m/%d': ('/', (0, 1, 2)),
+}
+
+
+class DateTimeParser(object):
+    """This class parses date / time strings with a fixed format, keeping the parsed values of the most recently used
+    strings in a bounded LRU cache. Option chains repeat the same few dates (the quote date and a few hundred
+    expirations) on every row, so nearly every call is a cache hit.
+
+    Strings in one of the _FAST_DATE_FORMATS are parsed by splitting them into their fields; strings which are not in
+    the exact shape expected by the fast path (and all other formats) are parsed with datetime.datetime.strptime.
+    """
+
+    def __init__(self, dateTimeFormat: Text, cacheSize: int = DEFAULT_CACHE_SIZE) -> None:
+        """Initializes the parser.
+
+        Attributes:
+          dateTimeFormat:  strptime format of the strings.
+          cacheSize:  maximum number of distinct strings whose parsed values are kept.
+        """
+        if cacheSize < 1:
+            raise ValueError('Cache size must be a positive (> 0) number.')
+        self.__dateTimeFormat = dateTimeFormat
+        self.__fastFormat = _FAST_DATE_FORMATS.get(dateTimeFormat)
+        self.__cachedParse = functools.lru_cache(maxsize=cacheSize)(self.__parse)
+
+    def getDateTimeFormat(self) -> Text:
+        return self.__dateTimeFormat
+
+    def parse(self, text: Text) -> datetime.datetime:
+        """Parse a date / time string.
+
+        :param text: date / time string in the format of the parser.
+        :raises ValueError: text does not match the format.
+        :return: parsed date / time.
+        """
+        return self.__cachedParse(text)
+
+    def getCacheInfo(self) -> functools._CacheInfo:
+        """Get the hits, misses, maximum size and current size of the cache."""
+        return self.__cachedParse.cache_info()
+
+    def __parse(self, text: Text) -> datetime.datetime:
+        if self.__fastFormat is not None:
+            fields = self.__splitDate(text)
+            if fields is not None:
+                return datetime.datetime(*fields)
+        return datetime.datetime.strptime(text, self.__dateTimeFormat)
+
+    def __splitDate(self, text: Text) -> Optional[Tuple[int, int, int]]:
+        """Split a date with the fast format into year, month and day; None if the string does not have the exact
+        shape accepted by the fast path."""
+        separator, (yearIndex, monthIndex, dayIndex) = self.__fastFormat
+        fields = text.split(separator)
+        if len(fields) != 3 or not all(field.isascii() and field.isdigit() for field in fields):
+            return None
+        year, month, day = fields[yearIndex], fields[monthIndex], fields[dayIndex]
+        if len(year) != 4 or not 1 <= len(month) <= 2 or not 1 <= len(day) <= 2:
+            return None
+        return int(year), int(month), int(day)
+
+
+_parsers: Dict[Text, DateTimeParser] = {}
+_parsersLock = threading.Lock()
+
+
+def getParser(dateTimeFormat: Text) -> DateTimeParser:
+    """Get the parser shared by all readers of a date / time format, so that each distinct string is parsed once per
+    run.
+
+    :param dateTimeFormat: strptime format of the strings.
+    :return: parser for the format.
+    """
+    parser = _parsers.get(dateTimeFormat)
+    if parser is None:
+        with _parsersLock:
+            parser = _parsers.setdefault(dateTimeFormat, DateTimeParser(dateTimeFormat))
+    return parser
@@ -0,0 +1,42 @@
+import datetime
+import unittest
+from dataHandler import dateTimeParser
+
+
+class TestDateTimeParser(unittest.TestCase):
+
+    def testParseMatchesStrptime(self):
+        """Tests that the fast path and the strptime path give the same values as strptime."""
+        for dateTimeFormat, texts in [('%m/%d/%Y', ['01/03/2011', '1/3/2011', '12/31/1999']),
+                                      ('%Y-%m-%d', ['2011-01-03', '2011-1-3']),
+                                      ('%d/%m/%Y', ['03/01/2011']),
+                                      ('%Y-%m-%d %H:%M:%S', ['2011-01-03 15:45:00'])]:
+            parser = dateTimeParser.DateTimeParser(dateTimeFormat)
+            for text in texts:
+                self.assertEqual(parser.parse(text), datetime.datetime.strptime(text, dateTimeFormat))
+
+    def testInvalidDates(self):
+        """Tests that strings which do not match the format raise the same exception as strptime."""
+        parser = dateTimeParser.DateTimeParser('%m/%d/%Y')
+        for text in ['02/30/2011', '2011-01-03', '01/03/11', '01/03/2011/1', ' 1/3/2011', '']:
+            with self.assertRaises(ValueError):
+                parser.parse(text)
+
+    def testEachStringParsedOnce(self):
+        """Tests that repeated strings are served from the cache, and that the cache is bounded."""
+        parser = dateTimeParser.DateTimeParser('%m/%d/%Y', cacheSize=2)
+        for text in ['01/03/2011', '01/03/2011', '01/04/2011', '01/03/2011', '01/05/2011']:
+            parser.parse(text)
+        cacheInfo = parser.getCacheInfo()
+        self.assertEqual((cacheInfo.hits, cacheInfo.misses, cacheInfo.currsize), (2, 3, 2))
+        with self.assertRaisesRegex(ValueError, 'Cache size must be a positive'):
+            dateTimeParser.DateTimeParser('%m/%d/%Y', cacheSize=0)
+
+    def testSharedParser(self):
+        """Tests that readers of the same format share one parser."""
+        self.assertIs(dateTimeParser.getParser('%m/%d/%Y'), dateTimeParser.getParser('%m/%d/%Y'))
+        self.assertEqual(dateTimeParser.getParser('%Y%m%d').getDateTimeFormat(), '%Y%m%d')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import datetime
+from base import optionChain
+from dataHandler import dataHandler
+from events import eventBus
+from events import tickEvent
+from typing import Any, Callable, Iterable, Mapping, Text
+
+
+class MultiUnderlyingData(dataHandler.DataHandler):
+    """This class serves several underlyings, each read by its own data handler (e.g., one CSV per underlying), as one
+    stream of ticks in date / time order. The option chains of the underlyings are merged by date / time: each tick
+    event holds the option chains of all underlyings which have data at that date / time, as one partition per
+    underlying, so that each strategy and position only goes through the options of its own underlying."""
+
+    def __init__(self, createDataHandlers: Mapping[Text, Callable[[eventBus.EventQueue], dataHandler.DataHandler]],
+                 eventQueue: eventBus.EventQueue) -> None:
+        """Initializes the data handlers of the underlyings.
+
+        Attributes:
+          createDataHandlers: dictionary of partition key (e.g., the underlying ticker) to a function which creates the
+                              data handler of the underlying given the queue it should place its events on, e.g.,
+                              {'SPX': lambda handlerQueue: csvData.CsvData(..., eventQueue=handlerQueue)}.
+          eventQueue:  location to place new data tick event.
+        """
+        if not createDataHandlers:
+            raise ValueError('At least one data handler must be given.')
+        self.__eventQueue = eventQueue
+        self.__handlerQueues = {key: eventBus.EventBus() for key in createDataHandlers}
+        self.__dataHandlers = {key: createDataHandler(self.__handlerQueues[key]) for key, createDataHandler in
+                               createDataHandlers.items()}
+        # Next tick data (and its date / time) of each underlying which still has data.
+        self.__nextData = {}
+        self.__nextDateTimes = {}
+        self.__activeKeys = list(createDataHandlers)
+
+    def __readNextData(self, key: Text) -> None:
+        """Read the next tick of an underlying; the underlying is dropped once its data handler has no more data.
+
+        :raises TypeError: The data handler did not place a tick event on its queue.
+        """
+        handlerQueue = self.__handlerQueues[key]
+        while self.__dataHandlers[key].getNextTick():
+            events = []
+            while not handlerQueue.empty():
+                events.append(handlerQueue.get(False))
+            if len(events) != 1 or not isinstance(events[0], tickEvent.TickEvent):
+                raise TypeError('The data handler of %s must place one tick event per tick.' % key)
+            data = events[0].getData()
+            if data:
+                self.__nextData[key] = data
+                self.__nextDateTimes[key] = _getDateTime(data)
+                return
+        self.__activeKeys.remove(key)
+
+    def getNextTick(self) -> bool:
+        """Used to get the option chains of all underlyings at the next date / time.
+
+        :return True / False indicating if data is available.
+        """
+        for key in list(self.__activeKeys):
+            if key not in self.__nextData:
+                self.__readNextData(key)
+        if not self.__nextData:
+            return False
+
+        curDateTime = min(self.__nextDateTimes.values())
+        partitions = {}
+        for key in self.__activeKeys:
+            if key in self.__nextData and self.__nextDateTimes[key] == curDateTime:
+                partitions[key] = self.__nextData.pop(key)
+                del self.__nextDateTimes[key]
+        event = tickEvent.TickEvent()
+        event.createEvent(partitions=partitions)
+        self.__eventQueue.put(event)
+        return True
+
+
+def _getDateTime(data: Iterable[Any]) -> datetime.datetime:
+    """Get the date / time of the tick data of an underlying (the dateTime of its first option)."""
+    if isinstance(data, optionChain.OptionChain):
+        return data.getValue(0, 'dateTime')
+    return data[0].dateTime
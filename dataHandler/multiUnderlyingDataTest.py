@@ -0,0 +1,79 @@
+import datetime
+import decimal
+import queue
+import unittest
+from base import put
+from dataHandler import csvData
+from dataHandler import dataHandler
+from dataHandler import multiUnderlyingData
+from events import tickEvent
+
+
+class ListData(dataHandler.DataHandler):
+    """Data handler which creates one tick for each date in a list."""
+
+    def __init__(self, eventQueue: queue.Queue, underlyingTicker: str, dates: list) -> None:
+        self.__eventQueue = eventQueue
+        self.__underlyingTicker = underlyingTicker
+        self.__dates = list(dates)
+
+    def getNextTick(self) -> bool:
+        if not self.__dates:
+            return False
+        event = tickEvent.TickEvent()
+        event.createEvent([put.Put(underlyingTicker=self.__underlyingTicker, strikePrice=decimal.Decimal(100),
+                                   dateTime=self.__dates.pop(0), expirationDateTime=datetime.datetime(2021, 2, 19))])
+        self.__eventQueue.put(event)
+        return True
+
+
+class TestMultiUnderlyingData(unittest.TestCase):
+
+    def getPartitions(self, dataHandlerObj: dataHandler.DataHandler, eventQueue: queue.Queue) -> list:
+        partitions = []
+        while dataHandlerObj.getNextTick():
+            partitions.append(eventQueue.get(False).getPartitions())
+            self.assertTrue(eventQueue.empty())
+        return partitions
+
+    def testMergeByDateTime(self):
+        """Tests that the ticks of the underlyings are merged by date / time, one partition per underlying."""
+        days = [datetime.datetime(2021, 1, day) for day in range(4, 9)]
+        eventQueue = queue.Queue()
+        dataHandlerObj = multiUnderlyingData.MultiUnderlyingData({
+            'SPX': lambda handlerQueue: ListData(handlerQueue, 'SPX', [days[0], days[1], days[3]]),
+            'AAPL': lambda handlerQueue: ListData(handlerQueue, 'AAPL', [days[1], days[2], days[3], days[4]])},
+            eventQueue)
+        partitions = self.getPartitions(dataHandlerObj, eventQueue)
+        self.assertEqual([{key: data[0].dateTime for key, data in tickPartitions.items()} for tickPartitions in
+                          partitions],
+                         [{'SPX': days[0]}, {'SPX': days[1], 'AAPL': days[1]}, {'AAPL': days[2]},
+                          {'SPX': days[3], 'AAPL': days[3]}, {'AAPL': days[4]}])
+        self.assertEqual([data[0].underlyingTicker for data in partitions[1].values()], ['SPX', 'AAPL'])
+        self.assertFalse(dataHandlerObj.getNextTick())
+
+    def testCsvSources(self):
+        """Tests that the option chains of CSVs of two underlyings are served in date order."""
+        dataProviderPath = 'dataHandler/dataProviders.json'
+        createCsvData = lambda csvPath: lambda handlerQueue: csvData.CsvData(
+            csvPath=csvPath, dataProviderPath=dataProviderPath, dataProvider='iVolatility', eventQueue=handlerQueue,
+            loaderType=csvData.LoaderTypes.COLUMNAR)
+        eventQueue = queue.Queue()
+        dataHandlerObj = multiUnderlyingData.MultiUnderlyingData({
+            'AAPL': createCsvData('sampleData/aapl_sample_ivolatility.csv'),
+            'SPX': createCsvData('sampleData/spx_sample_ivolatility.csv')}, eventQueue)
+        partitions = self.getPartitions(dataHandlerObj, eventQueue)
+        self.assertEqual([list(tickPartitions) for tickPartitions in partitions], [['SPX']] * 5 + [['AAPL']] * 2)
+        dateTimes = [data.getValue(0, 'dateTime') for tickPartitions in partitions for data in
+                     tickPartitions.values()]
+        self.assertEqual(dateTimes, sorted(dateTimes))
+        self.assertEqual(set(partitions[0]['SPX'].getColumn('underlyingTicker')), {'SPX'})
+
+    def testNoDataHandlers(self):
+        """Tests that an exception is raised if no data handler is given."""
+        with self.assertRaisesRegex(ValueError, 'At least one data handler must be given.'):
+            multiUnderlyingData.MultiUnderlyingData({}, queue.Queue())
+
+
+if __name__ == '__main__':
+    unittest.main()
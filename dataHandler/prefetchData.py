@@ -0,0 +1,110 @@
+import queue
+import threading
+from dataHandler import dataHandler
+from events import eventBus
+from typing import Callable
+
+
+class _EndOfData(object):
+    """Marker placed in the look-ahead buffer once the wrapped data handler has no more data."""
+    pass
+
+
+class PrefetchData(dataHandler.DataHandler):
+    """This class wraps another data handler and reads ticks ahead of the backtest on a worker thread, so that reading
+    and parsing the next option chain overlaps with the strategy and portfolio work on the current one. Ticks are
+    placed on the event queue in the same order as the wrapped data handler creates them."""
+
+    def __init__(self, createDataHandler: Callable[[eventBus.EventQueue], dataHandler.DataHandler],
+                 eventQueue: eventBus.EventQueue, lookAhead: int = 2) -> None:
+        """Initializes the wrapped data handler and starts the worker thread.
+
+        Attributes:
+          createDataHandler: function which creates the wrapped data handler given the queue it should place its
+                             events on, e.g., lambda handlerQueue: csvData.CsvData(..., eventQueue=handlerQueue).
+          eventQueue:  location to place new data tick event.
+          lookAhead:  maximum number of ticks read ahead of the backtest.
+        """
+        if lookAhead < 1:
+            raise ValueError('Look ahead must be a positive (> 0) number.')
+        self.__eventQueue = eventQueue
+        # The wrapped data handler only places its events on this queue from the worker thread.
+        self.__handlerQueue = eventBus.EventBus()
+        # Create the wrapped data handler on this thread so that errors opening the data source are raised here.
+        self.__dataHandler = createDataHandler(self.__handlerQueue)
+        self.__readTick = self.__dataHandler.getNextTick
+        self.__buffer = queue.Queue(maxsize=lookAhead)
+        self.__stopRequested = threading.Event()
+        self.__endReached = False
+        # The worker thread is started by the first getNextTick(), so that every read goes through wrapReadTick().
+        self.__worker = threading.Thread(target=self.__prefetch, name='PrefetchData', daemon=True)
+
+    def wrapReadTick(self, wrap: Callable[[Callable[[], bool]], Callable[[], bool]]) -> None:
+        """Wrap the getNextTick() method of the wrapped data handler, which reads and parses the option chains on the
+        worker thread (e.g., to record the time it takes).
+
+        :param wrap: function which is given the getNextTick() method and returns the function to call instead.
+        :raises ValueError: The worker thread has already started reading.
+        """
+        if self.__worker.ident is not None:
+            raise ValueError('The read function cannot be wrapped once the worker thread has started.')
+        self.__readTick = wrap(self.__readTick)
+
+    def __putInBuffer(self, item: object) -> bool:
+        """Places an item in the look-ahead buffer, waiting while the buffer is full.
+
+        :param item: list of events for a tick, an exception raised by the wrapped data handler, or _EndOfData.
+        :return: True if the item was placed in the buffer; False if the prefetching was stopped.
+        """
+        while not self.__stopRequested.is_set():
+            try:
+                self.__buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def __prefetch(self) -> None:
+        """Reads ticks from the wrapped data handler until there is no more data or the prefetching is stopped."""
+        readTick = self.__readTick
+        try:
+            while readTick():
+                events = []
+                while not self.__handlerQueue.empty():
+                    events.append(self.__handlerQueue.get(False))
+                if not self.__putInBuffer(events):
+                    return
+        except BaseException as e:
+            # The exception (also, e.g., a KeyboardInterrupt or SystemExit) is raised again on the backtest thread by
+            # getNextTick(), which would otherwise wait for the next tick forever.
+            self.__putInBuffer(e)
+        else:
+            self.__putInBuffer(_EndOfData)
+
+    def getNextTick(self) -> bool:
+        """Used to get the next available tick read by the worker thread, waiting for it if it is not ready yet.
+
+        :return True / False indicating if data is available.
+        :raises BaseException: exception raised by the wrapped data handler while reading ahead.
+        """
+        if self.__endReached:
+            return False
+        if self.__worker.ident is None:
+            self.__worker.start()
+        item = self.__buffer.get()
+        if item is _EndOfData or isinstance(item, BaseException):
+            self.__endReached = True
+            self.__worker.join()
+            if item is _EndOfData:
+                return False
+            raise item
+        for event in item:
+            self.__eventQueue.put(event)
+        return True
+
+    def close(self) -> None:
+        """Stops the worker thread; ticks which were read ahead are dropped."""
+        self.__stopRequested.set()
+        self.__endReached = True
+        if self.__worker.ident is not None:
+            self.__worker.join()
@@ -0,0 +1,112 @@
+import queue
+import threading
+import unittest
+from dataHandler import csvData
+from dataHandler import dataHandler
+from dataHandler import prefetchData
+
+
+class FailingData(dataHandler.DataHandler):
+    """Data handler which creates one tick and then raises an exception."""
+
+    def __init__(self, eventQueue: queue.Queue, exceptionType: type = ValueError) -> None:
+        self.__eventQueue = eventQueue
+        self.__numTicks = 0
+        self.__exceptionType = exceptionType
+
+    def getNextTick(self) -> bool:
+        if self.__numTicks > 0:
+            raise self.__exceptionType('Bad data.')
+        self.__numTicks += 1
+        self.__eventQueue.put('tick')
+        return True
+
+
+class TestPrefetchData(unittest.TestCase):
+
+    def setUp(self):
+        self._dataProvider = 'iVolatility'
+        self._dataProviderPath = 'dataHandler/dataProviders.json'
+        self._csvPath = 'sampleData/spx_sample_ivolatility.csv'
+
+    def createCsvData(self, eventQueue: queue.Queue) -> csvData.CsvData:
+        return csvData.CsvData(csvPath=self._csvPath, dataProviderPath=self._dataProviderPath,
+                               dataProvider=self._dataProvider, eventQueue=eventQueue)
+
+    def testPrefetchMatchesWrappedDataHandler(self):
+        """Tests that the prefetched ticks are the same, and in the same order, as the ticks of the wrapped handler."""
+        csvQueue = queue.Queue()
+        csvObj = self.createCsvData(csvQueue)
+        prefetchQueue = queue.Queue()
+        prefetchObj = prefetchData.PrefetchData(self.createCsvData, prefetchQueue, lookAhead=1)
+        numTicks = 0
+        while csvObj.getNextTick():
+            self.assertTrue(prefetchObj.getNextTick())
+            self.assertEqual(prefetchQueue.qsize(), 1)
+            self.assertEqual(repr(prefetchQueue.get().getData()), repr(csvQueue.get().getData()))
+            numTicks += 1
+        self.assertEqual(numTicks, 5)
+        self.assertFalse(prefetchObj.getNextTick())
+        self.assertFalse(prefetchObj.getNextTick())
+
+    def testExceptionRaisedInOrder(self):
+        """Tests that an exception in the worker thread is raised after the ticks read before it."""
+        eventQueue = queue.Queue()
+        prefetchObj = prefetchData.PrefetchData(FailingData, eventQueue)
+        self.assertTrue(prefetchObj.getNextTick())
+        self.assertEqual(eventQueue.get(), 'tick')
+        with self.assertRaisesRegex(ValueError, 'Bad data.'):
+            prefetchObj.getNextTick()
+        self.assertFalse(prefetchObj.getNextTick())
+
+    def testBaseExceptionRaised(self):
+        """Tests that an exception which is not an Exception (e.g., KeyboardInterrupt) in the worker thread is raised by
+        getNextTick instead of leaving it waiting for the next tick."""
+        eventQueue = queue.Queue()
+        prefetchObj = prefetchData.PrefetchData(lambda handlerQueue: FailingData(handlerQueue, KeyboardInterrupt),
+                                                eventQueue)
+        self.assertTrue(prefetchObj.getNextTick())
+        with self.assertRaises(KeyboardInterrupt):
+            prefetchObj.getNextTick()
+        self.assertFalse(prefetchObj.getNextTick())
+
+    def testClose(self):
+        """Tests that closing the handler stops the worker thread while the look-ahead buffer is full."""
+        prefetchObj = prefetchData.PrefetchData(self.createCsvData, queue.Queue(), lookAhead=1)
+        self.assertTrue(prefetchObj.getNextTick())
+        prefetchObj.close()
+        self.assertFalse(prefetchObj.getNextTick())
+        # A handler which was never read from has no worker thread to stop.
+        prefetchObj = prefetchData.PrefetchData(self.createCsvData, queue.Queue())
+        prefetchObj.close()
+        self.assertFalse(prefetchObj.getNextTick())
+
+    def testWrapReadTick(self):
+        """Tests that the reads of the wrapped data handler go through the wrapper, on the worker thread."""
+        readThreads = []
+
+        def wrap(readTick):
+            def wrappedReadTick():
+                readThreads.append(threading.get_ident())
+                return readTick()
+            return wrappedReadTick
+
+        eventQueue = queue.Queue()
+        prefetchObj = prefetchData.PrefetchData(self.createCsvData, eventQueue)
+        prefetchObj.wrapReadTick(wrap)
+        numTicks = 0
+        while prefetchObj.getNextTick():
+            numTicks += 1
+        self.assertEqual(len(readThreads), numTicks + 1)
+        self.assertNotIn(threading.get_ident(), readThreads)
+        with self.assertRaisesRegex(ValueError, 'The read function cannot be wrapped once the worker thread'):
+            prefetchObj.wrapReadTick(wrap)
+
+    def testBadLookAhead(self):
+        """Tests that an exception is raised if the look ahead is not positive."""
+        with self.assertRaisesRegex(ValueError, 'Look ahead must be a positive'):
+            prefetchData.PrefetchData(self.createCsvData, queue.Queue(), lookAhead=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
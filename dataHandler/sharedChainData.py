@@ -0,0 +1,102 @@
+import datetime
+import sys
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+from base import money
+from dataHandler import chainCache
+from events import eventBus
+from pricing import blackScholes
+from typing import Optional, Text
+
+
+class _AttachedSharedMemory(shared_memory.SharedMemory):
+    """Shared memory block attached to by a SharedChainData.  The column blocks of the chain cache are NumPy views of
+    the block, so the block is unmapped when the last view is released rather than when this object is closed."""
+
+    def close(self) -> None:
+        try:
+            super().close()
+        except BufferError:
+            # Views of the block are still in use; the mapping is released together with them.
+            pass
+
+
+def _attachSharedMemory(name: Text) -> shared_memory.SharedMemory:
+    """Attach to an existing shared memory block without taking ownership of it.
+
+    Before Python 3.13, attaching registers the block with the resource tracker of the attaching process, which
+    unlinks the block when that process exits; the block belongs to the SharedChainCache which created it.
+    """
+    if sys.version_info >= (3, 13):
+        return _AttachedSharedMemory(name=name, track=False)
+    sharedMemory = _AttachedSharedMemory(name=name)
+    resource_tracker.unregister(sharedMemory._name, 'shared_memory')
+    return sharedMemory
+
+
+class SharedChainCache(object):
+    """Places the contents of a cache file compiled by chainCache.compileChainCache() in one shared memory block, so
+    that backtests in several processes read the same copy of the columnar option chains.  The block is removed by
+    close(); processes which are already attached keep their mapping until they exit."""
+
+    def __init__(self, cachePath: Text) -> None:
+        """Copies the cache file into a new shared memory block.
+
+        Attributes:
+          cachePath: path to the cache file.
+        """
+        # Parsing the header checks that the file is a chain cache before the block is created.
+        chainCache.readHeader(cachePath)
+        with open(cachePath, 'rb') as cacheFile:
+            contents = cacheFile.read()
+        self.__sharedMemory = shared_memory.SharedMemory(create=True, size=len(contents))
+        self.__sharedMemory.buf[:len(contents)] = contents
+        self.name = self.__sharedMemory.name
+        self.size = len(contents)
+
+    def close(self) -> None:
+        """Removes the shared memory block."""
+        if self.__sharedMemory is not None:
+            self.__sharedMemory.close()
+            self.__sharedMemory.unlink()
+            self.__sharedMemory = None
+
+    def __enter__(self) -> 'SharedChainCache':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class SharedChainData(chainCache.ChainCacheData):
+    """This class serves option chains from a SharedChainCache.  The column blocks are views of the shared memory
+    block, so attaching from another process does not copy or parse the market data."""
+
+    def __init__(self, sharedMemoryName: Text, eventQueue: eventBus.EventQueue,
+                 startDateTime: Optional[datetime.datetime] = None, endDateTime: Optional[datetime.datetime] = None,
+                 slottedOptions: bool = False, moneyType: money.MoneyTypes = money.MoneyTypes.DECIMAL,
+                 greeksMode: blackScholes.GreeksModes = blackScholes.GreeksModes.CSV, riskFreeRate: float = 0.0,
+                 dividendYield: float = 0.0, fillImpliedVol: bool = False,
+                 pricingModel: blackScholes.PricingModels = blackScholes.PricingModels.BLACK_SCHOLES) -> None:
+        """Attaches to the shared memory block.
+
+        Attributes:
+          sharedMemoryName: name of the shared memory block (SharedChainCache.name).
+          eventQueue:  location to place new data tick event.
+          startDateTime:  option chains before this date / time are skipped using the date index.
+          endDateTime:  option chains after this date / time are not served.
+          slottedOptions:  create compact slottedOption.SlottedPut / SlottedCall objects instead of put.Put /
+                           call.Call objects for the option chains.
+          moneyType:  type of the prices of the options: DECIMAL (decimal.Decimal) or FIXED_POINT (money.Money).
+          greeksMode:  greeks of the options (see chainCache.ChainCacheData).
+          riskFreeRate:  continuously compounded risk-free rate used to compute the greeks.
+          dividendYield:  continuous dividend yield used to compute the greeks with BLACK_SCHOLES.
+          fillImpliedVol:  solve the missing or zero implied volatilities before the greeks are computed.
+          pricingModel:  model used to compute the greeks and the implied volatilities.
+        """
+        # The attached block has to outlive the column views, so the data handler keeps a reference to it.
+        self.__sharedMemory = _attachSharedMemory(sharedMemoryName)
+        super().__init__(chainCache.ChainCache(sharedMemoryName, buffer=self.__sharedMemory.buf), eventQueue,
+                         startDateTime=startDateTime, endDateTime=endDateTime, slottedOptions=slottedOptions,
+                         moneyType=moneyType, greeksMode=greeksMode, riskFreeRate=riskFreeRate,
+                         dividendYield=dividendYield, fillImpliedVol=fillImpliedVol, pricingModel=pricingModel)
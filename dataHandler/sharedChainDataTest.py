@@ -0,0 +1,81 @@
+import concurrent.futures
+import datetime
+import os
+import queue
+import shutil
+import tempfile
+import unittest
+from dataHandler import chainCache
+from dataHandler import sharedChainData
+
+
+def getChainReprs(sharedMemoryName: str) -> list:
+    """Read every option chain from a shared memory block; runs in a worker process."""
+    eventQueue = queue.Queue()
+    dataObj = sharedChainData.SharedChainData(sharedMemoryName, eventQueue)
+    chainReprs = []
+    while dataObj.getNextTick():
+        chainReprs.append(repr(eventQueue.get().getData()))
+    return chainReprs
+
+
+class TestSharedChainData(unittest.TestCase):
+
+    def setUp(self):
+        self._tempDirectory = tempfile.mkdtemp()
+        self._csvPath = os.path.join(self._tempDirectory, 'aapl_sample_ivolatility.csv')
+        shutil.copyfile('sampleData/aapl_sample_ivolatility.csv', self._csvPath)
+        self._cachePath = chainCache.ensureChainCache(self._csvPath, 'dataHandler/dataProviders.json', 'iVolatility')
+
+    def tearDown(self):
+        shutil.rmtree(self._tempDirectory)
+
+    def getCacheReprs(self) -> list:
+        eventQueue = queue.Queue()
+        cacheObj = chainCache.ChainCacheData(self._cachePath, eventQueue)
+        chainReprs = []
+        while cacheObj.getNextTick():
+            chainReprs.append(repr(eventQueue.get().getData()))
+        return chainReprs
+
+    def testSharedChainsMatchCache(self):
+        """Tests that the option chains served from shared memory are the same as the ones served from the cache."""
+        with sharedChainData.SharedChainCache(self._cachePath) as sharedCache:
+            self.assertEqual(sharedCache.size, os.path.getsize(self._cachePath))
+            self.assertEqual(getChainReprs(sharedCache.name), self.getCacheReprs())
+
+    def testAttachFromWorkerProcess(self):
+        """Tests that worker processes attach to the shared memory block and that it outlives the workers."""
+        with sharedChainData.SharedChainCache(self._cachePath) as sharedCache:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+                results = list(executor.map(getChainReprs, [sharedCache.name] * 2))
+            self.assertEqual(results, [self.getCacheReprs()] * 2)
+            # The workers have exited; the block must still be available to the creating process.
+            self.assertEqual(len(getChainReprs(sharedCache.name)), 2)
+
+    def testStartAndEndDateTime(self):
+        """Tests that only the option chains between the start and end date / time are served."""
+        with sharedChainData.SharedChainCache(self._cachePath) as sharedCache:
+            eventQueue = queue.Queue()
+            dataObj = sharedChainData.SharedChainData(sharedCache.name, eventQueue,
+                                                      startDateTime=datetime.datetime(2014, 8, 8),
+                                                      endDateTime=datetime.datetime(2014, 8, 9))
+            self.assertTrue(dataObj.getNextTick())
+            self.assertEqual(eventQueue.get().getData()[0].dateTime, datetime.datetime(2014, 8, 8))
+            self.assertFalse(dataObj.getNextTick())
+
+    def testCloseRemovesBlock(self):
+        """Tests that the shared memory block cannot be attached after it is closed."""
+        sharedCache = sharedChainData.SharedChainCache(self._cachePath)
+        sharedCache.close()
+        with self.assertRaises(FileNotFoundError):
+            sharedChainData.SharedChainData(sharedCache.name, queue.Queue())
+
+    def testNotACacheFile(self):
+        """Tests that an exception is raised when sharing a file which is not a cache file."""
+        with self.assertRaisesRegex(ValueError, 'is not an option chain cache file.'):
+            sharedChainData.SharedChainCache(self._csvPath)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import collections
+import enum
+import queue
+from events import event
+from typing import Callable, Optional, Union
+
+
+class EventQueueTypes(enum.Enum):
+    """Types of queues used to pass events between the data handler, the strategy and the portfolio.
+
+    EVENT_BUS:  EventBus; events are put and dispatched on a single thread, without locking.
+    THREAD_SAFE_QUEUE:  queue.Queue; events can be put from other threads (e.g., by a live data feed).
+    """
+    EVENT_BUS = 0
+    THREAD_SAFE_QUEUE = 1
+
+
+class EventBus(object):
+    """This class is a first-in, first-out queue of events for a backtest which runs on a single thread. Events are held
+    in a deque, so putting and taking an event does not take a lock, and the pending events are dispatched to the
+    handler registered for their event type without raising an exception when the queue runs empty.
+
+    The put / get / empty / qsize methods have the same behavior as those of queue.Queue (get raises queue.Empty when
+    there is no event), so the bus can be used wherever the data handlers and strategies expect an event queue.
+    """
+
+    def __init__(self) -> None:
+        self.__events = collections.deque()
+        self.__handlers = {}
+
+    def put(self, eventObj: Optional[event.EventHandler], block: bool = True, timeout: Optional[float] = None) -> None:
+        """Add an event at the end of the queue; the bus is never full, so block and timeout are ignored."""
+        self.__events.append(eventObj)
+
+    def put_nowait(self, eventObj: Optional[event.EventHandler]) -> None:
+        self.__events.append(eventObj)
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Optional[event.EventHandler]:
+        """Take the first event of the queue.
+
+        :param block: ignored; no other thread can add an event while waiting.
+        :param timeout: ignored.
+        :raises queue.Empty: There is no event in the queue.
+        :return: first event.
+        """
+        if not self.__events:
+            raise queue.Empty
+        return self.__events.popleft()
+
+    def get_nowait(self) -> Optional[event.EventHandler]:
+        return self.get(False)
+
+    def empty(self) -> bool:
+        return not self.__events
+
+    def qsize(self) -> int:
+        return len(self.__events)
+
+    def register(self, eventType: event.EventTypes, handler: Callable[[event.EventHandler], None]) -> None:
+        """Register the function which handles the events of a type; it replaces the previous handler of the type.
+
+        :param eventType: type of the events.
+        :param handler: function called with each event of the type.
+        """
+        self.__handlers[eventType] = handler
+
+    def dispatch(self) -> bool:
+        """Dispatch the pending events, in order, to the handlers of their types, including the events which are put
+        by the handlers while dispatching.
+
+        :raises TypeError: No handler is registered for the type of an event.
+        :return: True if any event was taken from the queue; False if the queue was empty.
+        """
+        events = self.__events
+        if not events:
+            return False
+        handlers = self.__handlers
+        while events:
+            eventObj = events.popleft()
+            if eventObj is None:
+                continue
+            handler = handlers.get(eventObj.type)
+            if handler is None:
+                raise TypeError("Unsupported event.type '%s'." % eventObj.type)
+            handler(eventObj)
+        return True
+
+
+# Event queues accepted by the data handlers and strategies.
+EventQueue = Union[EventBus, queue.Queue]
+
+
+def createEventQueue(eventQueueType: EventQueueTypes) -> EventQueue:
+    """Create an event queue of a type.
+
+    :param eventQueueType: EVENT_BUS or THREAD_SAFE_QUEUE.
+    :return: new, empty event queue.
+    """
+    if eventQueueType == EventQueueTypes.THREAD_SAFE_QUEUE:
+        return queue.Queue()
+    return EventBus()
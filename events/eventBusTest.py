@@ -0,0 +1,62 @@
+import unittest
+import queue
+from events import event
+from events import eventBus
+from events import signalEvent
+from events import tickEvent
+
+
+class TestEventBus(unittest.TestCase):
+
+    def testQueueInterface(self):
+        """Tests that events are taken in the order they were put, and queue.Empty is raised when there is none."""
+        bus = eventBus.EventBus()
+        self.assertTrue(bus.empty())
+        tickObj = tickEvent.TickEvent()
+        signalObj = signalEvent.SignalEvent()
+        bus.put(tickObj)
+        bus.put_nowait(signalObj)
+        self.assertEqual(bus.qsize(), 2)
+        self.assertIs(bus.get(False), tickObj)
+        self.assertIs(bus.get_nowait(), signalObj)
+        self.assertTrue(bus.empty())
+        with self.assertRaises(queue.Empty):
+            bus.get(False)
+
+    def testDispatch(self):
+        """Tests that events are dispatched in order, including those put by the handlers while dispatching."""
+        bus = eventBus.EventBus()
+        handled = []
+        signalObj = signalEvent.SignalEvent()
+
+        def onTick(tickObj):
+            handled.append(tickObj)
+            bus.put(signalObj)
+
+        bus.register(event.EventTypes.TICK, onTick)
+        bus.register(event.EventTypes.SIGNAL, handled.append)
+        self.assertFalse(bus.dispatch())
+        firstTick = tickEvent.TickEvent()
+        secondTick = tickEvent.TickEvent()
+        bus.put(firstTick)
+        bus.put(None)
+        bus.put(secondTick)
+        self.assertTrue(bus.dispatch())
+        self.assertEqual(handled, [firstTick, secondTick, signalObj, signalObj])
+        self.assertTrue(bus.empty())
+
+    def testDispatchUnregisteredType(self):
+        """Tests that an event without a registered handler raises a TypeError."""
+        bus = eventBus.EventBus()
+        bus.put(signalEvent.SignalEvent())
+        with self.assertRaisesRegex(TypeError, 'Unsupported event.type'):
+            bus.dispatch()
+
+    def testCreateEventQueue(self):
+        """Tests that the event queue of each type is created."""
+        self.assertIsInstance(eventBus.createEventQueue(eventBus.EventQueueTypes.EVENT_BUS), eventBus.EventBus)
+        self.assertIsInstance(eventBus.createEventQueue(eventBus.EventQueueTypes.THREAD_SAFE_QUEUE), queue.Queue)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
+from base import optionChain
 from events import event
-from typing import Any, Iterable
+from typing import Any, Iterable, Mapping, Optional, Text
 
 
 class TickEvent(event.EventHandler):
@@ -7,15 +8,57 @@ class TickEvent(event.EventHandler):
 
     def __init__(self) -> None:
         self.__data = None
+        self.__partitions = None
         self.type = event.EventTypes.TICK
 
     def getData(self) -> Iterable[Any]:
+        """Get the data of the event. For an event with partitions, the partitions are combined into one option chain
+        the first time the data is requested."""
+        if self.__data is None and self.__partitions:
+            self.__data = optionChain.OptionChain.concat(
+                optionChain.toOptionChain(partition) for partition in self.__partitions.values())
         return self.__data
 
-    def createEvent(self, data: Iterable[Any]) -> None:
+    def getPartitions(self) -> Optional[Mapping[Text, Iterable[Any]]]:
+        """Get the data of the event per underlying; None if the event was not created with partitions."""
+        return self.__partitions
+
+    def getPartition(self, underlyingTicker: Optional[Text]) -> Optional[Iterable[Any]]:
+        """Get the data of the event for an underlying, so that a strategy or position only goes through the options of
+        its own underlying. Partition keys match the tickers which contain them, as strategies match tickers (e.g.,
+        the SPX partition holds the SPXW options); the longest matching key is used.
+
+        :param underlyingTicker: ticker symbol of the underlying.
+        :return: data of the partition; all the data of the event if it was not created with partitions; None if no
+                 partition matches the ticker (or the ticker is None).
+        """
+        if self.__partitions is None:
+            return self.getData()
+        if underlyingTicker is None:
+            return None
+        partition = self.__partitions.get(underlyingTicker)
+        if partition is not None:
+            return partition
+        matchingKeys = [key for key in self.__partitions if key in underlyingTicker]
+        return self.__partitions[max(matchingKeys, key=len)] if matchingKeys else None
+
+    def hasData(self) -> bool:
+        """Check if the event holds any data."""
+        if self.__partitions is not None:
+            return any(self.__partitions.values())
+        return bool(self.__data)
+
+    def createEvent(self, data: Optional[Iterable[Any]] = None,
+                    partitions: Optional[Mapping[Text, Iterable[Any]]] = None) -> None:
         """Creates a tick event.
 
           Attributes:
-            data: input data for the event. e.g., a row of CSV data.
+            data: input data for the event. e.g., an optionChain.OptionChain created by the data handler (any sequence
+                  of options is also accepted).
+            partitions: data of the event per underlying (e.g., one option chain per underlying ticker), given instead
+                        of data by data handlers which serve several underlyings.
         """
+        if data is not None and partitions is not None:
+            raise ValueError('Either data or partitions can be given, but not both.')
         self.__data = data
+        self.__partitions = None if partitions is None else dict(partitions)
@@ -1,16 +1,52 @@
 import unittest
+import datetime
+import decimal
+from base import optionChain
+from base import put
 from events import event
 from events import tickEvent
 
 
 class TestTickEvent(unittest.TestCase):
 
+    def createPut(self, underlyingTicker: str) -> put.Put:
+        return put.Put(underlyingTicker=underlyingTicker, underlyingPrice=decimal.Decimal('2786.24'),
+                       strikePrice=decimal.Decimal(2690), delta=-0.16, dateTime=datetime.datetime(2021, 1, 1),
+                       expirationDateTime=datetime.datetime(2021, 1, 20), settlementPrice=decimal.Decimal('7.475'))
+
     def testCreateTickEvent(self):
         """Tests that a signal event is successfully created."""
         tickObj = tickEvent.TickEvent()
         # Check that the data reference attribute is set to None since there has been no data passed.
         self.assertEqual(tickObj.getData(), None)
         self.assertEqual(tickObj.type, event.EventTypes.TICK)
+        self.assertFalse(tickObj.hasData())
+
+    def testEventWithoutPartitions(self):
+        """Tests that all the data of an event without partitions is used for every underlying."""
+        data = [self.createPut('SPX')]
+        tickObj = tickEvent.TickEvent()
+        tickObj.createEvent(data)
+        self.assertIs(tickObj.getPartition('AAPL'), data)
+        self.assertIsNone(tickObj.getPartitions())
+        self.assertTrue(tickObj.hasData())
+
+    def testEventWithPartitions(self):
+        """Tests that partitions are matched by ticker and combined into one option chain for getData()."""
+        spxPut = self.createPut('SPXW')
+        aaplPut = self.createPut('AAPL')
+        partitions = {'SPX': optionChain.OptionChain.fromOptions([spxPut]), 'AAPL': [aaplPut]}
+        tickObj = tickEvent.TickEvent()
+        tickObj.createEvent(partitions=partitions)
+        self.assertIs(tickObj.getPartition('AAPL'), partitions['AAPL'])
+        self.assertIs(tickObj.getPartition('SPXW'), partitions['SPX'])
+        self.assertIsNone(tickObj.getPartition('ES'))
+        self.assertIsNone(tickObj.getPartition(None))
+        self.assertEqual(list(tickObj.getData()), [spxPut, aaplPut])
+        self.assertIs(tickObj.getData(), tickObj.getData())
+        self.assertTrue(tickObj.hasData())
+        with self.assertRaisesRegex(ValueError, 'Either data or partitions can be given, but not both.'):
+            tickObj.createEvent([spxPut], partitions=partitions)
 
 
 if __name__ == '__main__':
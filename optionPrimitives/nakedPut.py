@@ -1,7 +1,8 @@
 from base import option
+from base import optionChain
 from base import put
 from optionPrimitives import optionPrimitive
-from typing import Any, Dict, Iterable, Optional, Text
+from typing import Any, Dict, Iterable, List, Optional, Text, Tuple
 import datetime
 import decimal
 import logging
@@ -88,6 +89,10 @@ class NakedPut(optionPrimitive.OptionPrimitive):
         """
         return self.__numContracts * self.__putToBuyOrSell.gamma
 
+    def getLegs(self) -> List[Tuple[option.Option, optionPrimitive.TransactionType]]:
+        """Get the put of the naked put and whether it is bought or sold."""
+        return [(self.__putToBuyOrSell, self.__buyOrSell)]
+
     def getNumContracts(self) -> int:
         """Returns the total number of naked puts."""
         return self.__numContracts
@@ -111,29 +116,77 @@ class NakedPut(optionPrimitive.OptionPrimitive):
 
           :return: Profit / loss (positive decimal for profit, negative decimal for loss).
         """
-        putProfitLoss = self.__putToBuyOrSell.calcOptionPriceDiff()
-        if self.__buyOrSell == optionPrimitive.TransactionType.BUY:
-            putProfitLoss = -putProfitLoss
-
-        # Multiple profit / loss of naked put by the number of contracts and contract multiplier.
-        totProfitLoss = putProfitLoss * self.__numContracts * self.__contractMultiplier
-        return totProfitLoss
+        return self.computeProfitLoss(self.__buyOrSell != optionPrimitive.TransactionType.BUY,
+                                      self.__putToBuyOrSell.tradePrice, self.__putToBuyOrSell.settlementPrice,
+                                      self.__numContracts, self.__contractMultiplier)
 
     def calcProfitLossPercentage(self) -> float:
         """Calculate the profit and loss for the naked put as a percentage of the initial trade price.
 
           :return: Profit / loss as a percentage of the initial trade price. Returns a negative percentage for a loss.
         """
-        totProfitLoss = self.calcProfitLoss()
+        return self.computeProfitLossPercentage(self.calcProfitLoss(), self.__putToBuyOrSell.tradePrice,
+                                                self.__numContracts, self.__contractMultiplier)
+
+    def getBuyingPower(self) -> decimal.Decimal:
+        """The formula for calculating buying power is based off of Tastyworks (see computeBuyingPower()).
+
+          :return: Amount of buying power required to put on the trade.
+        """
+        isSold = self.__buyOrSell != optionPrimitive.TransactionType.BUY
+        buyingPower = self.computeBuyingPower(isSold, self.__putToBuyOrSell.settlementPrice,
+                                              self.__putToBuyOrSell.strikePrice,
+                                              self.__putToBuyOrSell.underlyingPrice, self.__numContracts,
+                                              self.__contractMultiplier)
+        if buyingPower <= 0:
+            if isSold:
+                logging.warning('Buying power cannot be <= 0; check option data.')
+            else:
+                logging.warning('Buying power cannot be less <= 0; check option data.')
+        return buyingPower
 
-        # Calculate the initial credit or debit paid for selling or buying the naked put.
-        totCreditDebit = self.__putToBuyOrSell.tradePrice * self.__contractMultiplier * self.__numContracts
+    @staticmethod
+    def computeProfitLoss(isSold: bool, putTradePrice: optionPrimitive.Values, putPrice: optionPrimitive.Values,
+                          numContracts: optionPrimitive.Values,
+                          contractMultiplier: optionPrimitive.Values) -> optionPrimitive.Values:
+        """Calculate the profit and loss of naked puts from the trade price and current price of the put.
+
+          :param isSold: whether the puts are sold.
+          :param putTradePrice: price of the put when the trade was put on.
+          :param putPrice: current price of the put.
+          :param numContracts: number of naked puts.
+          :param contractMultiplier: contract multiplier.
+          :return: Profit / loss; each price parameter and the result is a value, or an array with one value per naked
+            put.
+        """
+        putProfitLoss = putTradePrice - putPrice
+        if not isSold:
+            putProfitLoss = -putProfitLoss
 
-        # Express totProfitLoss as a percentage.
-        percentProfitLoss = (totProfitLoss / totCreditDebit) * 100
-        return percentProfitLoss
+        # Multiple profit / loss of naked put by the number of contracts and contract multiplier.
+        return putProfitLoss * numContracts * contractMultiplier
+
+    @staticmethod
+    def computeProfitLossPercentage(profitLoss: optionPrimitive.Values, putTradePrice: optionPrimitive.Values,
+                                    numContracts: optionPrimitive.Values,
+                                    contractMultiplier: optionPrimitive.Values) -> optionPrimitive.Values:
+        """Express the profit and loss of naked puts as a percentage of the initial credit or debit paid for selling or
+          buying them, respectively.
+
+          :param profitLoss: profit / loss (see computeProfitLoss()).
+          :param putTradePrice: price of the put when the trade was put on.
+          :param numContracts: number of naked puts.
+          :param contractMultiplier: contract multiplier.
+          :return: Profit / loss percentage; each parameter and the result is a value, or an array with one value per
+            naked put.
+        """
+        totCreditDebit = putTradePrice * contractMultiplier * numContracts
+        return (profitLoss / totCreditDebit) * 100
 
-    def getBuyingPower(self) -> decimal.Decimal:
+    @staticmethod
+    def computeBuyingPower(isSold: bool, putPrice: optionPrimitive.Values, putStrikePrice: optionPrimitive.Values,
+                           underlyingPrice: optionPrimitive.Values, numContracts: optionPrimitive.Values,
+                           contractMultiplier: optionPrimitive.Values) -> optionPrimitive.Values:
         """The formula for calculating buying power is based off of Tastyworks. Note that this only applies to equity
           options (not futures options).
           buying power short put -- greatest of (1, 2) * number of contracts * 100:
@@ -141,23 +194,20 @@ class NakedPut(optionPrimitive.OptionPrimitive):
             (2) 10% of the strike price plus the option premium
           buying power long put = premium of the put * number of contracts
 
-          :return: Amount of buying power required to put on the trade.
+          :param isSold: whether the puts are sold.
+          :param putPrice: current price of the put.
+          :param putStrikePrice: strike price of the put.
+          :param underlyingPrice: current price of the underlying.
+          :param numContracts: number of naked puts.
+          :param contractMultiplier: contract multiplier.
+          :return: Buying power; each price parameter and the result is a value, or an array with one value per naked
+            put.
         """
-        currentPutPrice = self.__putToBuyOrSell.settlementPrice
-        if self.__buyOrSell == optionPrimitive.TransactionType.BUY:
-            buyingPower = currentPutPrice * self.__numContracts * self.__contractMultiplier
-            if buyingPower <= 0:
-                logging.warning('Buying power cannot be less <= 0; check option data.')
-        else:
-            buyingPower1 = decimal.Decimal(-0.8) * self.__putToBuyOrSell.underlyingPrice + (
-                self.__putToBuyOrSell.strikePrice + currentPutPrice)
-            buyingPower2 = decimal.Decimal(0.1) * self.__putToBuyOrSell.strikePrice + currentPutPrice
-            maxBuyingPower = max(buyingPower1, buyingPower2)
-
-            buyingPower = maxBuyingPower * self.__numContracts * self.__contractMultiplier
-            if buyingPower <= 0:
-                logging.warning('Buying power cannot be <= 0; check option data.')
-        return buyingPower
+        if not isSold:
+            return putPrice * numContracts * contractMultiplier
+        buyingPower1 = decimal.Decimal(-0.8) * underlyingPrice + (putStrikePrice + putPrice)
+        buyingPower2 = decimal.Decimal(0.1) * putStrikePrice + putPrice
+        return optionPrimitive.maximum(buyingPower1, buyingPower2) * numContracts * contractMultiplier
 
     def getCommissionsAndFees(self, openOrClose: Text, pricingSource: Text, pricingSourceConfig: Dict[Any, Any]) -> \
             decimal.Decimal:
@@ -199,20 +249,16 @@ class NakedPut(optionPrimitive.OptionPrimitive):
           :param tickData: option chain with price information (puts, calls)
           :return: returns True if we were able to update the options; false otherwise.
         """
+        optionChainData = optionChain.toOptionChain(tickData)
         putToBuyOrSell = self.__putToBuyOrSell
         putStrike = putToBuyOrSell.strikePrice
         putExpiration = putToBuyOrSell.expirationDateTime
 
-        # Go through the tickData to find the PUT option with a strike price that matches the putStrike above.
+        # Find the PUT option with a strike price that matches the putStrike above.
         # Note that this should not return more than one option since we specify the strike price, expiration,
         # and option type (PUT).
-        # TODO: we can speed this up by indexing / keying the options by option symbol.
-        matchingPutToBuyOrSellOption = None
-        for currentOption in tickData:
-            if (currentOption.strikePrice == putStrike and currentOption.expirationDateTime == putExpiration and (
-               currentOption.optionType == option.OptionTypes.PUT)):
-                matchingPutToBuyOrSellOption = currentOption
-                break
+        matchingPutToBuyOrSellOption = optionChainData.findOption(putStrike, putExpiration,
+                                                                  option.OptionTypes.PUT)
 
         if matchingPutToBuyOrSellOption is None:
             logging.warning("No matching PUT was found in the option chain; cannot update naked put.")
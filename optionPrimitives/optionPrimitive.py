@@ -1,8 +1,13 @@
 import abc
 import decimal
 import enum
+import numpy as np
 from base import option
-from typing import Iterable
+from typing import Any, Iterable, List, Tuple, Union
+
+# Values the buying power and profit / loss rules of the primitives are computed from: a value for one position, or an
+# array with one value per position (an object array for decimals, as in portfolioManager.positionBook).
+Values = Union[decimal.Decimal, int, np.ndarray]
 
 
 class TransactionType(enum.Enum):
@@ -45,6 +50,13 @@ class OptionPrimitive(abc.ABC):
         """Used to get the total gamma for the option primitive."""
         pass
 
+    def getLegs(self) -> List[Tuple[option.Option, TransactionType]]:
+        """Used to get the options of the option primitive and whether each option is bought or sold.
+
+        :raises NotImplementedError: the primitive does not expose its legs.
+        """
+        raise NotImplementedError('The option primitive does not implement getLegs().')
+
     @abc.abstractmethod
     def calcProfitLoss(self) -> decimal.Decimal:
         """Calculate the profit and loss for the option primitive based on option values when the trade was placed and
@@ -80,3 +92,16 @@ class OptionPrimitive(abc.ABC):
           :return: Absolute difference;
         """
         return abs(bidPrice - askPrice)
+
+
+def maximum(first: Any, second: Any) -> Any:
+    """max() of two values, elementwise if they are arrays; as for max(), the first value is kept unless the second is
+    greater.
+
+    :param first: value, or array of values.
+    :param second: value, or array of values.
+    :return: greater value, or array of the greater values.
+    """
+    if isinstance(first, np.ndarray) or isinstance(second, np.ndarray):
+        return np.where(second > first, second, first)
+    return max(first, second)
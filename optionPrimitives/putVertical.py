@@ -1,7 +1,8 @@
 from base import option
+from base import optionChain
 from base import put
 from optionPrimitives import optionPrimitive
-from typing import Any, Dict, Iterable, Optional, Text
+from typing import Any, Dict, Iterable, List, Optional, Text, Tuple
 import datetime
 import decimal
 import logging
@@ -97,6 +98,12 @@ class PutVertical(optionPrimitive.OptionPrimitive):
             return self.__numContracts * (self.__putToBuy.gamma + self.__putToSell.gamma)
         return None
 
+    def getLegs(self) -> List[Tuple[option.Option, optionPrimitive.TransactionType]]:
+        """Get the puts of the vertical; the put to buy is bought and the put to sell is sold, whether the vertical is
+        long or short."""
+        return [(self.__putToBuy, optionPrimitive.TransactionType.BUY),
+                (self.__putToSell, optionPrimitive.TransactionType.SELL)]
+
     def getNumContracts(self) -> int:
         """Returns the total number of put verticals."""
         return self.__numContracts
@@ -105,6 +112,10 @@ class PutVertical(optionPrimitive.OptionPrimitive):
         """Returns the contract multiplier."""
         return self.__contractMultiplier
 
+    def getBuyOrSell(self) -> optionPrimitive.TransactionType:
+        """Returns whether the vertical is long (BUY) or short (SELL)."""
+        return self.__buyOrSell
+
     def setNumContracts(self, numContracts: int) -> None:
         """Sets the number of contracts for the put vertical.
 
@@ -120,12 +131,9 @@ class PutVertical(optionPrimitive.OptionPrimitive):
 
         :return: Profit / loss (positive decimal for profit, negative decimal for loss).
         """
-        putToBuyProfitLoss = -self.__putToBuy.calcOptionPriceDiff()
-        putToSellProfitLoss = self.__putToSell.calcOptionPriceDiff()
-
-        # Add the profit / loss of put and call, and multiply by the number of contracts.
-        totProfitLoss = (putToBuyProfitLoss + putToSellProfitLoss) * self.__numContracts * self.__contractMultiplier
-        return totProfitLoss
+        return self.computeProfitLoss(self.__putToBuy.tradePrice, self.__putToSell.tradePrice,
+                                      self.__putToBuy.settlementPrice, self.__putToSell.settlementPrice,
+                                      self.__numContracts, self.__contractMultiplier)
 
     def calcRealizedProfitLoss(self) -> decimal.Decimal:
         """This is the same as calcProfitLoss() except that we include the commissions and fees to close."""
@@ -136,39 +144,114 @@ class PutVertical(optionPrimitive.OptionPrimitive):
 
         :return: Profit / loss as a percentage of the initial option prices. Returns negative percentage for a loss.
         """
-        # Add the profit / loss of put and call.
-        totProfitLoss = self.calcProfitLoss()
+        return self.computeProfitLossPercentage(self.calcProfitLoss(), self.__putToBuy.tradePrice,
+                                                self.__putToSell.tradePrice, self.__numContracts,
+                                                self.__contractMultiplier)
 
-        # Get the initial credit or debit paid for selling or buying the vertical, respectively.
-        putToBuyCreditDebit = -self.__putToBuy.tradePrice
-        putToSellCreditDebit = self.__putToSell.tradePrice
-        totCreditDebit = (putToBuyCreditDebit + putToSellCreditDebit) * self.__contractMultiplier * self.__numContracts
+    def getBuyingPower(self) -> decimal.Decimal:
+        """The formula for calculating buying power is based off of TastyWorks (see computeBuyingPower()).
 
-        # Express totProfitLoss as a percentage.
-        percentProfitLoss = (totProfitLoss / totCreditDebit) * 100
-        return percentProfitLoss
+        :return: Amount of buying power required to put on the trade.
+        """
+        isSold = self.__buyOrSell != optionPrimitive.TransactionType.BUY
+        buyingPower = self.computeBuyingPower(isSold, self.__putToBuy.settlementPrice,
+                                              self.__putToSell.settlementPrice, self.__putToBuy.strikePrice,
+                                              self.__putToSell.strikePrice, self.__numContracts,
+                                              self.__contractMultiplier)
+        if buyingPower <= 0:
+            if isSold:
+                logging.warning('Buying power cannot be <= 0; check strikes for short putVertical')
+            else:
+                logging.warning('Buying power cannot be less <= 0; check strikes in long putVertical')
+        return buyingPower
 
-    def getBuyingPower(self) -> decimal.Decimal:
+    @staticmethod
+    def computeProfitLoss(putToBuyTradePrice: optionPrimitive.Values, putToSellTradePrice: optionPrimitive.Values,
+                          putToBuyPrice: optionPrimitive.Values, putToSellPrice: optionPrimitive.Values,
+                          numContracts: optionPrimitive.Values,
+                          contractMultiplier: optionPrimitive.Values) -> optionPrimitive.Values:
+        """Calculate the profit and loss of verticals from the trade prices and current prices of their puts; the put
+        to buy gains when its price goes up and the put to sell gains when its price goes down.
+
+        :param putToBuyTradePrice: price of the put to buy when the trade was put on.
+        :param putToSellTradePrice: price of the put to sell when the trade was put on.
+        :param putToBuyPrice: current price of the put to buy.
+        :param putToSellPrice: current price of the put to sell.
+        :param numContracts: number of verticals.
+        :param contractMultiplier: contract multiplier.
+        :return: Profit / loss; each parameter and the result is a value, or an array with one value per vertical.
+        """
+        putToBuyProfitLoss = -(putToBuyTradePrice - putToBuyPrice)
+        putToSellProfitLoss = putToSellTradePrice - putToSellPrice
+        return (putToBuyProfitLoss + putToSellProfitLoss) * numContracts * contractMultiplier
+
+    @staticmethod
+    def computeProfitLossPercentage(profitLoss: optionPrimitive.Values, putToBuyTradePrice: optionPrimitive.Values,
+                                    putToSellTradePrice: optionPrimitive.Values, numContracts: optionPrimitive.Values,
+                                    contractMultiplier: optionPrimitive.Values) -> optionPrimitive.Values:
+        """Express the profit and loss of verticals as a percentage of the initial credit or debit paid for selling or
+        buying them, respectively.
+
+        :param profitLoss: profit / loss (see computeProfitLoss()).
+        :param putToBuyTradePrice: price of the put to buy when the trade was put on.
+        :param putToSellTradePrice: price of the put to sell when the trade was put on.
+        :param numContracts: number of verticals.
+        :param contractMultiplier: contract multiplier.
+        :return: Profit / loss percentage; each parameter and the result is a value, or an array with one value per
+          vertical.
+        """
+        totCreditDebit = (-putToBuyTradePrice + putToSellTradePrice) * contractMultiplier * numContracts
+        return (profitLoss / totCreditDebit) * 100
+
+    @staticmethod
+    def computeBuyingPower(isSold: bool, putToBuyPrice: optionPrimitive.Values, putToSellPrice: optionPrimitive.Values,
+                           putToBuyStrikePrice: optionPrimitive.Values, putToSellStrikePrice: optionPrimitive.Values,
+                           numContracts: optionPrimitive.Values,
+                           contractMultiplier: optionPrimitive.Values) -> optionPrimitive.Values:
         """The formula for calculating buying power is based off of TastyWorks.
         buying power short put vertical = distance between strikes * contract multiplier +
                                           (short put option price - long put option price)
         buying power long put vertical = difference between cost of two options * contract multiplier
 
-        :return: Amount of buying power required to put on the trade.
+        :param isSold: whether the verticals are short.
+        :param putToBuyPrice: current price of the put to buy.
+        :param putToSellPrice: current price of the put to sell.
+        :param putToBuyStrikePrice: strike price of the put to buy.
+        :param putToSellStrikePrice: strike price of the put to sell.
+        :param numContracts: number of verticals.
+        :param contractMultiplier: contract multiplier.
+        :return: Buying power; each price parameter and the result is a value, or an array with one value per vertical.
         """
-        currentPutToBuyPrice = self.__putToBuy.settlementPrice
-        currentPutToSellPrice = self.__putToSell.settlementPrice
-        if self.__buyOrSell == optionPrimitive.TransactionType.BUY:
-            buyingPower = (currentPutToBuyPrice - currentPutToSellPrice) * self.__numContracts * (
-                self.__contractMultiplier)
-            if buyingPower <= 0:
-                logging.warning('Buying power cannot be less <= 0; check strikes in long putVertical')
-        else:
-            buyingPower = ((self.__putToSell.strikePrice - self.__putToBuy.strikePrice) - (
-                currentPutToSellPrice - currentPutToBuyPrice)) * self.__numContracts * self.__contractMultiplier
-            if buyingPower <= 0:
-                logging.warning('Buying power cannot be <= 0; check strikes for short putVertical')
-        return buyingPower
+        if not isSold:
+            return (putToBuyPrice - putToSellPrice) * numContracts * contractMultiplier
+        return ((putToSellStrikePrice - putToBuyStrikePrice) - (putToSellPrice - putToBuyPrice)) * numContracts * \
+            contractMultiplier
+
+    @classmethod
+    def checkPrices(cls, isSold: bool, putToBuyTradePrice: optionPrimitive.Values,
+                    putToSellTradePrice: optionPrimitive.Values, putToBuyPrice: optionPrimitive.Values,
+                    putToSellPrice: optionPrimitive.Values, contractMultiplier: optionPrimitive.Values) -> Any:
+        """Check the new prices of the puts of verticals before updating them.  The percent profit / loss of a short
+        vertical cannot be greater than 100 (and that of a long vertical cannot be less than 100); this can happen if
+        the input data is bad.  For example, we have seen that the settlementPrice is 0 with zero greeks and other
+        strange values.  For the short put vertical, we saw the option price go down when the underlying went up, which
+        should never happen.
+
+        :param isSold: whether the verticals are short.
+        :param putToBuyTradePrice: price of the put to buy when the trade was put on.
+        :param putToSellTradePrice: price of the put to sell when the trade was put on.
+        :param putToBuyPrice: new price of the put to buy.
+        :param putToSellPrice: new price of the put to sell.
+        :param contractMultiplier: contract multiplier.
+        :return: whether the new prices can be used; a boolean, or an array with one value per vertical.
+        """
+        profitLoss = cls.computeProfitLoss(putToBuyTradePrice, putToSellTradePrice, putToBuyPrice, putToSellPrice, 1,
+                                           contractMultiplier)
+        percentProfitLoss = cls.computeProfitLossPercentage(profitLoss, putToBuyTradePrice, putToSellTradePrice, 1,
+                                                            contractMultiplier)
+        if isSold:
+            return percentProfitLoss <= 100
+        return percentProfitLoss >= 100
 
     def getCommissionsAndFees(self, openOrClose: Text, pricingSource: Text, pricingSourceConfig: Dict[Any, Any]) -> \
             decimal.Decimal:
@@ -215,22 +298,17 @@ class PutVertical(optionPrimitive.OptionPrimitive):
         :param tickData: option chain with pricing information (puts, calls)
         :return: returns True if we were able to update the options; false otherwise.
         """
+        optionChainData = optionChain.toOptionChain(tickData)
         putToSell = self.__putToSell
         putStrike = putToSell.strikePrice
         putExpiration = putToSell.expirationDateTime
         putTicker = putToSell.underlyingTicker
 
-        # Go through the tickData to find the PUT option with a strike price that matches the putStrike above.
+        # Find the PUT option with a strike price that matches the putStrike above.
         # Note that this should not return more than one option since we specify the strike price, expiration,
         # and option type (PUT).
-        # TODO: we can speed this up by indexing / keying the options by option symbol.
-        matchingPutToSellOption = None
-        for currentOption in tickData:
-            if (putTicker in currentOption.underlyingTicker and currentOption.strikePrice == putStrike and (
-                  currentOption.expirationDateTime == putExpiration) and (
-                  currentOption.optionType == option.OptionTypes.PUT)):
-                matchingPutToSellOption = currentOption
-                break
+        matchingPutToSellOption = optionChainData.findOption(putStrike, putExpiration, option.OptionTypes.PUT,
+                                                             underlyingTicker=putTicker)
 
         if matchingPutToSellOption is None:
             logging.warning(
@@ -247,17 +325,11 @@ class PutVertical(optionPrimitive.OptionPrimitive):
         putExpiration = putToBuy.expirationDateTime
         putTicker = putToBuy.underlyingTicker
 
-        # Go through the tickData to find the PUT option with a strike price that matches the putStrike above
+        # Find the PUT option with a strike price that matches the putStrike above
         # Note that this should not return more than one option since we specify the strike price, expiration,
         # and the option type (PUT).
-        # TODO: we can speed this up by indexing / keying the options by option symbol.
-        matchingPutToBuyOption = None
-        for currentOption in tickData:
-            if (putTicker in currentOption.underlyingTicker and currentOption.strikePrice == putStrike and (
-                  currentOption.expirationDateTime == putExpiration) and (
-                  currentOption.optionType == option.OptionTypes.PUT)):
-                matchingPutToBuyOption = currentOption
-                break
+        matchingPutToBuyOption = optionChainData.findOption(putStrike, putExpiration, option.OptionTypes.PUT,
+                                                            underlyingTicker=putTicker)
 
         if matchingPutToBuyOption is None:
             logging.warning(
@@ -270,24 +342,9 @@ class PutVertical(optionPrimitive.OptionPrimitive):
             logging.warning('Bad option info: %s', matchingPutToBuyOption)
             return False
 
-        putToBuyProfitLoss = -(putToBuy.tradePrice - matchingPutToBuyOption.settlementPrice)
-        putToSellProfitLoss = putToSell.tradePrice - matchingPutToSellOption.settlementPrice
-        totProfitLoss = (putToBuyProfitLoss + putToSellProfitLoss) * self.__contractMultiplier
-
-        # Get the initial credit or debit paid for selling or buying the vertical, respectively.
-        putToBuyCreditDebit = -putToBuy.tradePrice
-        putToSellCreditDebit = putToSell.tradePrice
-        totCreditDebit = (putToBuyCreditDebit + putToSellCreditDebit) * self.__contractMultiplier
-
-        # Express totProfitLoss as a percentage.
-        percentProfitLoss = (totProfitLoss / totCreditDebit) * 100
-
-        # If we are selling the putVertical (short put vertical), the percent profit/loss cannot be greater
-        # than 100. This can happen if the input data is bad. For example, we have seen that the settlementPrice
-        # is 0 with zero greeks and other strange values. For the short put vertical, we saw the option price
-        # go down when the underlying went up, which should never happen.
-        if (self.__buyOrSell == optionPrimitive.TransactionType.SELL and percentProfitLoss > 100) or (
-            self.__buyOrSell == optionPrimitive.TransactionType.BUY and percentProfitLoss < 100):
+        if not self.checkPrices(self.__buyOrSell == optionPrimitive.TransactionType.SELL, putToBuy.tradePrice,
+                                putToSell.tradePrice, matchingPutToBuyOption.settlementPrice,
+                                matchingPutToSellOption.settlementPrice, self.__contractMultiplier):
             logging.warning('Percent profit/loss was greater than 100; cannot update vertical.')
             logging.warning('Put to buy: %s', putToBuy)
             logging.warning('Chosen put to buy: %s', matchingPutToBuyOption)
@@ -5,6 +5,7 @@ from base import put
 import datetime
 import decimal
 import json
+import numpy as np
 
 
 class TestPutVertical(unittest.TestCase):
@@ -230,6 +231,32 @@ class TestPutVertical(unittest.TestCase):
         # (0.6245) * 1 * 100 = 62.45
         self.assertAlmostEqual(self.__longPutVertical.getBuyingPower(), decimal.Decimal(62.45))
 
+    def testRulesOnArrays(self):
+        """Tests that the profit / loss and buying power rules give the values of the verticals for arrays of
+        verticals."""
+        self.__shortPutVertical.updateValues(self.__shortPutVerticalTickData)
+        putToBuyPrices = np.array([decimal.Decimal('0.4375'), decimal.Decimal('0.30')], dtype=object)
+        putToSellPrices = np.array([decimal.Decimal('1.25'), decimal.Decimal('0.90')], dtype=object)
+        tradePrices = np.array([self.__putToBuy.tradePrice] * 2, dtype=object), np.array(
+            [self.__putToSell.tradePrice] * 2, dtype=object)
+        numContracts = np.array([1, 3], dtype=object)
+        contractMultipliers = np.array([self.contractMultiplier] * 2, dtype=object)
+        profitLosses = putVertical.PutVertical.computeProfitLoss(*tradePrices, putToBuyPrices, putToSellPrices,
+                                                                 numContracts, contractMultipliers)
+        self.assertEqual(profitLosses[0], self.__shortPutVertical.calcProfitLoss())
+        self.assertEqual(putVertical.PutVertical.computeProfitLossPercentage(
+            profitLosses, *tradePrices, numContracts, contractMultipliers)[0],
+            self.__shortPutVertical.calcProfitLossPercentage())
+        buyingPowers = putVertical.PutVertical.computeBuyingPower(
+            True, putToBuyPrices, putToSellPrices, self.__putToBuy.strikePrice, self.__putToSell.strikePrice,
+            numContracts, contractMultipliers)
+        self.assertEqual(buyingPowers[0], self.__shortPutVertical.getBuyingPower())
+        self.assertEqual(buyingPowers[1], ((345 - 325) - (decimal.Decimal('0.90') - decimal.Decimal('0.30'))) * 300)
+        self.assertEqual(putVertical.PutVertical.checkPrices(True, *tradePrices, putToBuyPrices,
+                                                             np.array([decimal.Decimal('1.25'), decimal.Decimal(0)],
+                                                                      dtype=object), contractMultipliers).tolist(),
+                         [True, False])
+
     def testVerticalGetCommissionsAndFeesOpen(self):
         """Tests that the commissions and fees are calculated correctly on trade open."""
         indexOptionOpen = self.pricingSourceConfig['stock_options']['index_option']['open']
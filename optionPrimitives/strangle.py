@@ -1,8 +1,9 @@
 from base import call
 from base import option
+from base import optionChain
 from base import put
 from optionPrimitives import optionPrimitive
-from typing import Any, Dict, Iterable, Optional, Text
+from typing import Any, Dict, Iterable, List, Optional, Text, Tuple
 import datetime
 import decimal
 import logging
@@ -94,6 +95,10 @@ class Strangle(optionPrimitive.OptionPrimitive):
             return self.__numContracts * (self.__putOpt.gamma + self.__callOpt.gamma)
         return None
 
+    def getLegs(self) -> List[Tuple[option.Option, optionPrimitive.TransactionType]]:
+        """Get the put and call of the strangle; both are bought or both are sold."""
+        return [(self.__putOpt, self.__buyOrSell), (self.__callOpt, self.__buyOrSell)]
+
     def getNumContracts(self) -> int:
         """Returns the total number of strangles."""
         return self.__numContracts
@@ -113,24 +118,14 @@ class Strangle(optionPrimitive.OptionPrimitive):
 
     def calcProfitLoss(self) -> decimal.Decimal:
         """Calculate the profit and loss for the strangle position using option values when the trade
-        was placed and new option values.  Note that profit and loss are reversed if we buy or sell a put/call;
-        if we buy a put/call, we want the option value to increase; if we sell a put/call, we want the option value
-        to decrease.
+        was placed and new option values.
 
         :return: Profit / loss (positive decimal for profit, negative decimal for loss).
         """
-        # Handle profit / loss for put first.
-        putProfitLoss = self.__putOpt.calcOptionPriceDiff()
-        callProfitLoss = self.__callOpt.calcOptionPriceDiff()
-
-        # If we're buying the strangle, we have the opposite of the selling case.
-        if self.__buyOrSell == optionPrimitive.TransactionType.BUY:
-            putProfitLoss = -putProfitLoss
-            callProfitLoss = -callProfitLoss
-
-        # Add the profit / loss of put and call, and multiply by the number of contracts.
-        totProfitLoss = (putProfitLoss + callProfitLoss) * self.__numContracts * self.__contractMultiplier
-        return totProfitLoss
+        return self.computeProfitLoss(self.__buyOrSell != optionPrimitive.TransactionType.BUY,
+                                      self.__putOpt.tradePrice, self.__callOpt.tradePrice,
+                                      self.__putOpt.settlementPrice, self.__callOpt.settlementPrice,
+                                      self.__numContracts, self.__contractMultiplier)
 
     def calcRealizedProfitLoss(self) -> decimal.Decimal:
         """This is the same as calcProfitLoss() except that we include the commissions and fees to close."""
@@ -141,53 +136,106 @@ class Strangle(optionPrimitive.OptionPrimitive):
 
         :return: Profit / loss as a percentage of the initial option prices. Returns negative percentage for a loss.
         """
-        # Add the profit / loss of put and call.
-        totalProfitLoss = self.calcProfitLoss()
+        return self.computeProfitLossPercentage(self.calcProfitLoss(), self.__putOpt.tradePrice,
+                                                self.__callOpt.tradePrice, self.__numContracts,
+                                                self.__contractMultiplier)
+
+    def getBuyingPower(self) -> decimal.Decimal:
+        """The formula for calculating buying power is based off of TastyWorks (see computeBuyingPower()).
 
-        # Get the initial credit or debit paid for selling or buying the strangle, respectively.
-        callCreditDebit = self.__callOpt.tradePrice
-        putCreditDebit = self.__putOpt.tradePrice
-        totCreditDebit = (callCreditDebit + putCreditDebit) * self.__contractMultiplier * self.__numContracts
+          :return: Amount of buying power required to put on the trade.
+        """
+        # Use any one of the options to get underlying price (call option used here).
+        return self.computeBuyingPower(self.__putOpt.settlementPrice, self.__callOpt.settlementPrice,
+                                       self.__putOpt.strikePrice, self.__callOpt.strikePrice,
+                                       self.__callOpt.underlyingPrice, self.__numContracts, self.__contractMultiplier)
+
+    @staticmethod
+    def computeProfitLoss(isSold: bool, putTradePrice: optionPrimitive.Values, callTradePrice: optionPrimitive.Values,
+                          putPrice: optionPrimitive.Values, callPrice: optionPrimitive.Values,
+                          numContracts: optionPrimitive.Values,
+                          contractMultiplier: optionPrimitive.Values) -> optionPrimitive.Values:
+        """Calculate the profit and loss of strangles from the trade prices and current prices of their options.  Note
+        that profit and loss are reversed if we buy or sell a put/call; if we buy a put/call, we want the option value
+        to increase; if we sell a put/call, we want the option value to decrease.
+
+        :param isSold: whether the strangles are short.
+        :param putTradePrice: price of the put when the trade was put on.
+        :param callTradePrice: price of the call when the trade was put on.
+        :param putPrice: current price of the put.
+        :param callPrice: current price of the call.
+        :param numContracts: number of strangles.
+        :param contractMultiplier: contract multiplier.
+        :return: Profit / loss; each price parameter and the result is a value, or an array with one value per
+          strangle.
+        """
+        # Handle profit / loss for put first.
+        putProfitLoss = putTradePrice - putPrice
+        callProfitLoss = callTradePrice - callPrice
 
-        # Express totProfitLoss as a percentage.
-        percentProfitLoss = (totalProfitLoss / totCreditDebit) * 100
-        return percentProfitLoss
+        # If we're buying the strangle, we have the opposite of the selling case.
+        if not isSold:
+            putProfitLoss = -putProfitLoss
+            callProfitLoss = -callProfitLoss
 
-    def getBuyingPower(self) -> decimal.Decimal:
+        # Add the profit / loss of put and call, and multiply by the number of contracts.
+        return (putProfitLoss + callProfitLoss) * numContracts * contractMultiplier
+
+    @staticmethod
+    def computeProfitLossPercentage(profitLoss: optionPrimitive.Values, putTradePrice: optionPrimitive.Values,
+                                    callTradePrice: optionPrimitive.Values, numContracts: optionPrimitive.Values,
+                                    contractMultiplier: optionPrimitive.Values) -> optionPrimitive.Values:
+        """Express the profit and loss of strangles as a percentage of the initial credit or debit paid for selling or
+        buying them, respectively.
+
+        :param profitLoss: profit / loss (see computeProfitLoss()).
+        :param putTradePrice: price of the put when the trade was put on.
+        :param callTradePrice: price of the call when the trade was put on.
+        :param numContracts: number of strangles.
+        :param contractMultiplier: contract multiplier.
+        :return: Profit / loss percentage; each parameter and the result is a value, or an array with one value per
+          strangle.
+        """
+        totCreditDebit = (callTradePrice + putTradePrice) * contractMultiplier * numContracts
+        return (profitLoss / totCreditDebit) * 100
+
+    @staticmethod
+    def computeBuyingPower(putPrice: optionPrimitive.Values, callPrice: optionPrimitive.Values,
+                           putStrikePrice: optionPrimitive.Values, callStrikePrice: optionPrimitive.Values,
+                           underlyingPrice: optionPrimitive.Values, numContracts: optionPrimitive.Values,
+                           contractMultiplier: optionPrimitive.Values) -> optionPrimitive.Values:
         """The formula for calculating buying power is based off of TastyWorks. This is for cash settled indices!
           There are two possible methods to calculate buying power, and the method which generates the maximum possible
           buying power is the one chosen.
 
-          :return: Amount of buying power required to put on the trade.
+          :param putPrice: current price of the put.
+          :param callPrice: current price of the call.
+          :param putStrikePrice: strike price of the put.
+          :param callStrikePrice: strike price of the call.
+          :param underlyingPrice: current price of the underlying.
+          :param numContracts: number of strangles.
+          :param contractMultiplier: contract multiplier.
+          :return: Buying power; each parameter and the result is a value, or an array with one value per strangle.
         """
-        currentCallPrice = self.__callOpt.settlementPrice
-        currentPutPrice = self.__putOpt.settlementPrice
         # Method 1 - 20% rule -- 20% of the underlying, less the difference between the strike price and the stock
         # price, plus the option value, multiplied by number of contracts.
 
-        # Use any one of the options to get underlying price (call option used here).
-        underlyingPrice = self.__callOpt.underlyingPrice
-
         # Handle call side of strangle.
-        callBuyingPower1 = ((decimal.Decimal(0.20) * underlyingPrice) - (
-            self.__callOpt.strikePrice - underlyingPrice) + currentCallPrice) * self.__numContracts * \
-            self.__contractMultiplier
+        callBuyingPower1 = ((decimal.Decimal(0.20) * underlyingPrice) - (callStrikePrice - underlyingPrice) +
+                            callPrice) * numContracts * contractMultiplier
         # Handle put side of strangle.
-        putBuyingPower1 = ((decimal.Decimal(0.20) * underlyingPrice) - (
-            underlyingPrice - self.__putOpt.strikePrice) + currentPutPrice) * self.__numContracts * \
-            self.__contractMultiplier
-        methodOneBuyingPower = max(callBuyingPower1, putBuyingPower1)
+        putBuyingPower1 = ((decimal.Decimal(0.20) * underlyingPrice) - (underlyingPrice - putStrikePrice) +
+                           putPrice) * numContracts * contractMultiplier
+        methodOneBuyingPower = optionPrimitive.maximum(callBuyingPower1, putBuyingPower1)
 
         # Method 2 - 10% rule -- 10% of the exercise value plus premium value.
         # Handle call side of strangle.
-        callBuyingPower2 = (decimal.Decimal(0.10) * self.__callOpt.strikePrice + currentCallPrice) * (
-            self.__numContracts * self.__contractMultiplier)
+        callBuyingPower2 = (decimal.Decimal(0.10) * callStrikePrice + callPrice) * (numContracts * contractMultiplier)
         # Handle put side of strangle.
-        putBuyingPower2 = (decimal.Decimal(0.10) * self.__putOpt.strikePrice + currentPutPrice) * (
-            self.__numContracts * self.__contractMultiplier)
-        methodTwoBuyingPower = max(callBuyingPower2, putBuyingPower2)
+        putBuyingPower2 = (decimal.Decimal(0.10) * putStrikePrice + putPrice) * (numContracts * contractMultiplier)
+        methodTwoBuyingPower = optionPrimitive.maximum(callBuyingPower2, putBuyingPower2)
 
-        return max(methodOneBuyingPower, methodTwoBuyingPower)
+        return optionPrimitive.maximum(methodOneBuyingPower, methodTwoBuyingPower)
 
     def getCommissionsAndFees(self, openOrClose: Text, pricingSource: Text, pricingSourceConfig: Dict[Any, Any]) -> \
             decimal.Decimal:
@@ -242,21 +290,16 @@ class Strangle(optionPrimitive.OptionPrimitive):
         :param tickData: option chain with pricing information (puts, calls)
         :return: returns True if we were able to update the options; false otherwise.
         """
+        optionChainData = optionChain.toOptionChain(tickData)
         # Work with put option first.
         putOpt = self.__putOpt
         putStrike = putOpt.strikePrice
         putExpiration = putOpt.expirationDateTime
 
-        # Go through the tickData to find the PUT option with a strike price that matches the putStrike above.
+        # Find the PUT option with a strike price that matches the putStrike above.
         # Note that this should not return more than one option since we specify the strike price, expiration,
         # option type (PUT), and option symbol.
-        # TODO: we can speed this up by indexing / keying the options by option symbol.
-        matchingPutOption = None
-        for currentOption in tickData:
-            if (currentOption.strikePrice == putStrike and currentOption.expirationDateTime == putExpiration and (
-                  currentOption.optionType == option.OptionTypes.PUT)):
-                matchingPutOption = currentOption
-                break
+        matchingPutOption = optionChainData.findOption(putStrike, putExpiration, option.OptionTypes.PUT)
 
         if matchingPutOption is None:
             logging.warning("No matching PUT was found in the option chain for the strangle; cannot update strangle.")
@@ -272,16 +315,10 @@ class Strangle(optionPrimitive.OptionPrimitive):
         callStrike = callOpt.strikePrice
         callExpiration = callOpt.expirationDateTime
 
-        # Go through the tickData to find the CALL option with a strike price that matches the callStrike above
+        # Find the CALL option with a strike price that matches the callStrike above
         # Note that this should not return more than one option since we specify the strike price, expiration,
         # the option type (CALL), and option symbol.
-        # TODO: we can speed this up by indexing / keying the options by option symbol.
-        matchingCallOption = None
-        for currentOption in tickData:
-            if (currentOption.strikePrice == callStrike and currentOption.expirationDateTime == callExpiration and (
-                  currentOption.optionType == option.OptionTypes.CALL)):
-                matchingCallOption = currentOption
-                break
+        matchingCallOption = optionChainData.findOption(callStrike, callExpiration, option.OptionTypes.CALL)
 
         if matchingCallOption is None:
             logging.warning("No matching CALL was found in the option chain for the strangle; cannot update strangle.")
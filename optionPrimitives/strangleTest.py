@@ -6,6 +6,7 @@ from base import call
 import datetime
 import decimal
 import json
+import numpy as np
 
 
 class TestStrangle(unittest.TestCase):
@@ -328,6 +329,18 @@ class TestStrangle(unittest.TestCase):
         buyingPower = strangleObj.getBuyingPower()
         self.assertAlmostEqual(buyingPower, decimal.Decimal(3500.0))
 
+    def testComputeBuyingPowerOnArrays(self):
+        """Tests that the buying power rule gives the buying power of each strangle for arrays of strangles."""
+        buyingPowers = strangle.Strangle.computeBuyingPower(
+            np.array([self.__putOpt.settlementPrice, decimal.Decimal(20.0)], dtype=object),
+            np.array([self.__callOpt.settlementPrice, decimal.Decimal(5.0)], dtype=object),
+            np.array([self.__putOpt.strikePrice, decimal.Decimal(50)], dtype=object),
+            np.array([self.__callOpt.strikePrice, decimal.Decimal(150)], dtype=object),
+            np.array([self.__callOpt.underlyingPrice, decimal.Decimal(100)], dtype=object),
+            np.array([1, 1], dtype=object), np.array([self.contractMultiplier] * 2, dtype=object))
+        self.assertEqual(buyingPowers[0], self.__strangleObj.getBuyingPower())
+        self.assertAlmostEqual(buyingPowers[1], decimal.Decimal(2500.0))
+
     def testStrangleGetCommissionsAndFeesOpen(self):
         """Tests that the commissions and fees are calculated correctly on trade open."""
         indexOptionOpen = self.pricingSourceConfig['stock_options']['index_option']['open']
@@ -0,0 +1,272 @@
+import collections.abc
+import csv
+import datetime
+import decimal
+import enum
+import os
+import numpy as np
+from base import money
+from typing import Any, Iterator, List, Optional, Text, Tuple
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow is only needed to write Parquet.
+    pyarrow = None
+
+"""
+This file records the values of a portfolio over time (the position monitoring) as NumPy columns.
+"""
+
+# Columns of the position monitoring and the type of their buffers.  The underlying price and the money values
+# (MONEY) are kept exactly: as int64 ten-thousandths for money.Money values, or as the parts of decimal.Decimal values
+# (DECIMAL_PARTS_TYPE); they are only converted back to numbers when they are read or written.
+MONEY = 'money'
+COLUMN_TYPES = (
+    ('Date', 'datetime64[us]'),
+    ('UnderlyingPrice', MONEY),
+    ('NetLiq', MONEY),
+    ('RealizedCapital', MONEY),
+    ('NumPositions', np.int64),
+    ('TotNumContracts', np.int64),
+    ('BuyingPower', MONEY),
+    ('TotalDelta', np.float64),
+)
+COLUMNS = tuple(name for name, _ in COLUMN_TYPES)
+# A decimal is (-1) ** sign * (high * COEFFICIENT_SPLIT + low) * 10 ** exponent, so that coefficients of up to 36
+# digits (more than the 28 digits of the default decimal context) fit in two int64 values.
+COEFFICIENT_SPLIT = 10 ** 18
+MAX_COEFFICIENT = np.iinfo(np.int64).max * COEFFICIENT_SPLIT
+DECIMAL_PARTS_TYPE = np.dtype([('sign', np.int8), ('exponent', np.int32), ('high', np.int64), ('low', np.int64)])
+
+
+class MonitoringFormats(enum.Enum):
+    """Formats the position monitoring is written in.
+
+    CSV:  one CSV file; the rows of each chunk are appended to it.
+    PARQUET:  a directory with one Parquet file per chunk (part-00000.parquet, ...), which can be read as one table with
+              pandas.read_parquet; the exact money values are written as text.
+    """
+    CSV = 0
+    PARQUET = 1
+
+
+class MonitoringRecorder(collections.abc.Mapping):
+    """This class records one row of portfolio values per tick in pre-allocated NumPy buffers of chunkSize rows.  When a
+    buffer is full, its rows are written to the output (if any) and a new buffer is started, so the rows of a run which
+    stops early are kept up to the last full chunk; without keeping the history (the default when there is an output),
+    the memory used does not grow with the length of the run.
+
+    The recorder is a mapping from column name to the list of values of the column (e.g., positionMonitoring['NetLiq']),
+    like the dictionary of lists which it replaces.
+    """
+
+    def __init__(self, outputPath: Optional[Text] = None, outputFormat: MonitoringFormats = MonitoringFormats.CSV,
+                 chunkSize: int = 1024, keepHistory: Optional[bool] = None,
+                 moneyType: money.MoneyTypes = money.MoneyTypes.DECIMAL) -> None:
+        """Initializes the buffers and creates the output.
+
+        Attributes:
+          outputPath:  path of the CSV file or Parquet directory the rows are written to; None to not write them.
+          outputFormat:  format of the output.
+          chunkSize:  number of rows of each buffer, which are written at once.
+          keepHistory:  keep the rows which were written in memory, so that the columns can be read after the run; None
+                        to keep them only if there is no output.
+          moneyType:  type of the underlying price and money values which are recorded: DECIMAL (decimal.Decimal) or
+                      FIXED_POINT (money.Money).
+        """
+        if chunkSize < 1:
+            raise ValueError('Chunk size must be a positive (> 0) number.')
+        if keepHistory is None:
+            keepHistory = outputPath is None
+        if outputPath is None and not keepHistory:
+            raise ValueError('The history must be kept when the rows are not written to an output.')
+        if outputPath is not None and outputFormat == MonitoringFormats.PARQUET and pyarrow is None:
+            raise ImportError('pyarrow is required to write the position monitoring as Parquet.')
+        self.__outputPath = outputPath
+        self.__outputFormat = outputFormat
+        self.__chunkSize = chunkSize
+        self.__keepHistory = keepHistory
+        self.__moneyType = moneyType
+        if moneyType == money.MoneyTypes.FIXED_POINT:
+            self.__moneyBufferType = np.int64
+            self.__toMoneyParts = _moneyToUnits
+        else:
+            self.__moneyBufferType = DECIMAL_PARTS_TYPE
+            self.__toMoneyParts = _decimalToParts
+        self.__history = []
+        self.__numChunksWritten = 0
+        self.__numRows = 0
+        self.__buffer = self.__createBuffer()
+        self.__bufferLength = 0
+        self.__csvFile = None
+        self.__csvWriter = None
+        self.__closed = False
+        if outputPath is not None:
+            if outputFormat == MonitoringFormats.CSV:
+                self.__csvFile = open(outputPath, 'w', newline='')
+                self.__csvWriter = csv.writer(self.__csvFile)
+                self.__csvWriter.writerow(COLUMNS)
+                self.__csvFile.flush()
+            else:
+                os.makedirs(outputPath, exist_ok=True)
+
+    def __createBuffer(self) -> List[np.ndarray]:
+        return [np.empty(self.__chunkSize, dtype=self.__moneyBufferType if columnType == MONEY else columnType)
+                for _, columnType in COLUMN_TYPES]
+
+    def record(self, dateTime: datetime.datetime, underlyingPrice: Any, netLiquidity: Any, realizedCapital: Any,
+               numPositions: int, numContracts: int, buyingPower: Any, totalDelta: float) -> None:
+        """Record the values of the portfolio at a tick.
+
+        :param dateTime: date / time of the tick.
+        :param underlyingPrice: price of the underlying.
+        :param netLiquidity: net liquidity of the portfolio.
+        :param realizedCapital: realized capital of the portfolio.
+        :param numPositions: number of open positions.
+        :param numContracts: number of contracts of the open positions.
+        :param buyingPower: buying power used by the open positions.
+        :param totalDelta: sum of the deltas of the open positions.
+        :raises ValueError: The recorder is closed, or a decimal value is not finite or has more than 36 digits.
+        """
+        if self.__closed:
+            raise ValueError('The monitoring recorder is closed.')
+        row = self.__bufferLength
+        buffer = self.__buffer
+        toMoneyParts = self.__toMoneyParts
+        buffer[0][row] = dateTime
+        buffer[1][row] = toMoneyParts(underlyingPrice)
+        buffer[2][row] = toMoneyParts(netLiquidity)
+        buffer[3][row] = toMoneyParts(realizedCapital)
+        buffer[4][row] = numPositions
+        buffer[5][row] = numContracts
+        buffer[6][row] = toMoneyParts(buyingPower)
+        buffer[7][row] = totalDelta
+        self.__bufferLength = row + 1
+        self.__numRows += 1
+        if self.__bufferLength == self.__chunkSize:
+            self.__endChunk()
+
+    def __endChunk(self) -> None:
+        """Write the rows of the buffer to the output, keep them if the history is kept, and start a new buffer."""
+        chunk = [column[:self.__bufferLength] for column in self.__buffer]
+        self.__writeChunk(chunk)
+        if self.__keepHistory:
+            self.__history.append(chunk)
+        self.__buffer = self.__createBuffer()
+        self.__bufferLength = 0
+
+    def __writeChunk(self, chunk: List[np.ndarray]) -> None:
+        if self.__outputPath is None or not len(chunk[0]):
+            return
+        if self.__outputFormat == MonitoringFormats.CSV:
+            self.__csvWriter.writerows(zip(*(self.__toList(index, chunk) for index in range(len(COLUMNS)))))
+            self.__csvFile.flush()
+        else:
+            table = pyarrow.table({name: self.__toParquetArray(index, chunk) for index, name in enumerate(COLUMNS)})
+            pyarrow.parquet.write_table(table, os.path.join(self.__outputPath,
+                                                            'part-%05d.parquet' % self.__numChunksWritten))
+        self.__numChunksWritten += 1
+
+    def getNumRows(self) -> int:
+        """Get the number of rows recorded."""
+        return self.__numRows
+
+    def flush(self) -> None:
+        """Write the rows which are in the buffer to the output and start a new buffer."""
+        if self.__bufferLength:
+            self.__endChunk()
+
+    def close(self) -> None:
+        """Write the remaining rows and close the output; no rows can be recorded afterwards."""
+        if self.__closed:
+            return
+        self.flush()
+        self.__closed = True
+        if self.__csvFile is not None:
+            self.__csvFile.close()
+
+    def __enter__(self) -> 'MonitoringRecorder':
+        return self
+
+    def __exit__(self, *exceptionInfo) -> None:
+        self.close()
+
+    def __getitem__(self, name: Text) -> List[Any]:
+        """Get the values of a column, in the order they were recorded.
+
+        :param name: name of the column.
+        :raises KeyError: The column does not exist.
+        :raises ValueError: The history was not kept.
+        :return: list of the values of the column.
+        """
+        if name not in COLUMNS:
+            raise KeyError(name)
+        if not self.__keepHistory:
+            raise ValueError('The history of the position monitoring was not kept; read it from the output.')
+        index = COLUMNS.index(name)
+        values = []
+        for chunk in self.__history:
+            values.extend(self.__toList(index, chunk))
+        values.extend(self.__toList(index, [column[:self.__bufferLength] for column in self.__buffer]))
+        return values
+
+    def __toList(self, index: int, chunk: List[np.ndarray]) -> List[Any]:
+        """Convert a column of a chunk to a list of Python values: datetime.datetime for dates, decimal.Decimal or
+        money.Money for money values, and the int 0 for the total delta of a portfolio without positions (as the
+        portfolio sets it).
+
+        :param index: index of the column in COLUMNS.
+        :param chunk: columns of the chunk.
+        :return: list of the values of the column.
+        """
+        column = chunk[index]
+        columnType = COLUMN_TYPES[index][1]
+        if columnType == MONEY:
+            if self.__moneyType == money.MoneyTypes.FIXED_POINT:
+                return [money.Money(units) for units in column.tolist()]
+            return [_partsToDecimal(*parts) for parts in column.tolist()]
+        if column.dtype.kind == 'M':
+            return column.astype(object).tolist()
+        values = column.tolist()
+        if COLUMNS[index] == 'TotalDelta':
+            for row in np.flatnonzero((chunk[COLUMNS.index('NumPositions')] == 0) & (column == 0)).tolist():
+                values[row] = 0
+        return values
+
+    def __toParquetArray(self, index: int, chunk: List[np.ndarray]) -> 'pyarrow.Array':
+        """Convert a column of a chunk to a Parquet array; the exact money values are written as text."""
+        if COLUMN_TYPES[index][1] == MONEY:
+            return pyarrow.array([str(value) for value in self.__toList(index, chunk)], type=pyarrow.string())
+        return pyarrow.array(chunk[index])
+
+    def __iter__(self) -> Iterator[Text]:
+        return iter(COLUMNS)
+
+    def __len__(self) -> int:
+        return len(COLUMNS)
+
+
+def _moneyToUnits(value: Any) -> int:
+    """Get the ten-thousandths of a money value (or of a number, rounded to a ten-thousandth)."""
+    return money.Money.fromValue(value).units
+
+
+def _decimalToParts(value: decimal.Decimal) -> Tuple[int, int, int, int]:
+    """Split a decimal into its sign, exponent and the high and low parts of its coefficient (see DECIMAL_PARTS_TYPE).
+
+    :param value: finite decimal with at most 36 digits.
+    :raises ValueError: The decimal is not finite or has more than 36 digits.
+    :return: tuple of (sign, exponent, high, low).
+    """
+    sign, digits, exponent = decimal.Decimal(value).as_tuple()
+    coefficient = int(''.join(map(str, digits))) if isinstance(exponent, int) else None
+    if coefficient is None or coefficient > MAX_COEFFICIENT:
+        raise ValueError('The decimal %s cannot be recorded; it must be finite and have at most 36 digits.' % value)
+    high, low = divmod(coefficient, COEFFICIENT_SPLIT)
+    return sign, exponent, high, low
+
+
+def _partsToDecimal(sign: int, exponent: int, high: int, low: int) -> decimal.Decimal:
+    """Rebuild a decimal from the parts returned by _decimalToParts."""
+    return decimal.Decimal((sign, tuple(map(int, str(high * COEFFICIENT_SPLIT + low))), exponent))
@@ -0,0 +1,112 @@
+import csv
+import datetime
+import decimal
+import os
+import tempfile
+import unittest
+from base import money
+from portfolioManager import monitoringRecorder
+
+
+class TestMonitoringRecorder(unittest.TestCase):
+
+    def recordRows(self, recorder, numRows):
+        for i in range(numRows):
+            # The total delta of a portfolio without positions is 0.
+            recorder.record(datetime.datetime(2021, 1, 4 + i), decimal.Decimal('3700.65'),
+                            decimal.Decimal('1000012.5') + i, decimal.Decimal('999990.25'), i, 2 * i,
+                            decimal.Decimal('4000.000'), 0.25 * i if i else 0)
+
+    def testColumns(self):
+        """Tests that the recorded values are returned per column with their Python types, across chunks."""
+        recorder = monitoringRecorder.MonitoringRecorder(chunkSize=2)
+        self.recordRows(recorder, 5)
+        self.assertEqual(recorder.getNumRows(), 5)
+        self.assertEqual(list(recorder), list(monitoringRecorder.COLUMNS))
+        self.assertEqual(recorder['Date'], [datetime.datetime(2021, 1, 4 + i) for i in range(5)])
+        self.assertEqual(recorder['NetLiq'], [decimal.Decimal('1000012.5') + i for i in range(5)])
+        self.assertIsInstance(recorder['NetLiq'][0], decimal.Decimal)
+        self.assertEqual(recorder['TotNumContracts'], [0, 2, 4, 6, 8])
+        self.assertIsInstance(recorder['NumPositions'][0], int)
+        self.assertEqual(recorder['TotalDelta'], [0, 0.25, 0.5, 0.75, 1.0])
+        self.assertIsInstance(recorder['TotalDelta'][0], int)
+        self.assertEqual(recorder.get('Unknown', []), [])
+        self.assertEqual(dict(recorder)['BuyingPower'], [decimal.Decimal('4000.000')] * 5)
+
+    def testCsvOutput(self):
+        """Tests that full chunks are written while recording and the remaining rows when the recorder is closed."""
+        with tempfile.TemporaryDirectory() as tmpDir:
+            csvPath = os.path.join(tmpDir, 'monitoring.csv')
+            # The history is not kept by default when the rows are written.
+            recorder = monitoringRecorder.MonitoringRecorder(csvPath, chunkSize=2)
+            self.recordRows(recorder, 3)
+            with open(csvPath, newline='') as csvFile:
+                rows = list(csv.reader(csvFile))
+            self.assertEqual(rows[0], list(monitoringRecorder.COLUMNS))
+            self.assertEqual(len(rows), 3)
+            self.assertEqual(rows[1], ['2021-01-04 00:00:00', '3700.65', '1000012.5', '999990.25', '0', '0',
+                                       '4000.000', '0'])
+            self.assertEqual(rows[2][-1], '0.25')
+            recorder.close()
+            with open(csvPath, newline='') as csvFile:
+                rows = list(csv.reader(csvFile))
+            self.assertEqual(len(rows), 4)
+            self.assertEqual(rows[3][2], '1000014.5')
+        with self.assertRaisesRegex(ValueError, 'The history of the position monitoring was not kept'):
+            recorder['NetLiq']
+        with self.assertRaisesRegex(ValueError, 'The monitoring recorder is closed.'):
+            self.recordRows(recorder, 1)
+
+    def testExactMoneyValues(self):
+        """Tests that decimals are read and written with all their digits and exponent, and money values with their
+        ten-thousandths, without keeping Python objects in the buffers."""
+        values = [decimal.Decimal('1000822.961120000000001084572'), decimal.Decimal('-0.00'), decimal.Decimal('1E+3'),
+                  decimal.Decimal('-999885.9271359999999972956175')]
+        with tempfile.TemporaryDirectory() as tmpDir:
+            csvPath = os.path.join(tmpDir, 'monitoring.csv')
+            with monitoringRecorder.MonitoringRecorder(csvPath, chunkSize=2, keepHistory=True) as recorder:
+                for value in values:
+                    recorder.record(datetime.datetime(2021, 1, 4), value, value, value, 1, 1, value, 0.0)
+                self.assertEqual([str(value) for value in recorder['NetLiq']], [str(value) for value in values])
+            with open(csvPath, newline='') as csvFile:
+                rows = list(csv.reader(csvFile))[1:]
+        self.assertEqual([row[2] for row in rows], [str(value) for value in values])
+        # The total delta is 0.0 if the portfolio has positions.
+        self.assertEqual({row[-1] for row in rows}, {'0.0'})
+        with self.assertRaisesRegex(ValueError, 'must be finite'):
+            recorder = monitoringRecorder.MonitoringRecorder()
+            recorder.record(datetime.datetime(2021, 1, 4), decimal.Decimal('NaN'), values[0], values[0], 0, 0,
+                            values[0], 0)
+
+        recorder = monitoringRecorder.MonitoringRecorder(moneyType=money.MoneyTypes.FIXED_POINT)
+        recorder.record(datetime.datetime(2021, 1, 4), money.Money.fromValue('3700.65'), money.Money(-12345),
+                        money.Money(0), 0, 0, money.Money.fromValue(4000), 0)
+        self.assertEqual(recorder['NetLiq'], [money.Money(-12345)])
+        self.assertIsInstance(recorder['NetLiq'][0], money.Money)
+        self.assertEqual(str(recorder['BuyingPower'][0]), '4000.0000')
+
+    @unittest.skipIf(monitoringRecorder.pyarrow is None, 'pyarrow is not installed.')
+    def testParquetOutput(self):
+        """Tests that each chunk is written as a Parquet file with the exact money values as text."""
+        import pandas as pd
+        with tempfile.TemporaryDirectory() as tmpDir:
+            parquetPath = os.path.join(tmpDir, 'monitoring')
+            with monitoringRecorder.MonitoringRecorder(parquetPath, monitoringRecorder.MonitoringFormats.PARQUET,
+                                                       chunkSize=2) as recorder:
+                self.recordRows(recorder, 3)
+            self.assertEqual(sorted(os.listdir(parquetPath)), ['part-00000.parquet', 'part-00001.parquet'])
+            monitoring = pd.read_parquet(parquetPath)
+        self.assertEqual(list(monitoring['NetLiq']), ['1000012.5', '1000013.5', '1000014.5'])
+        self.assertEqual(list(monitoring['NumPositions']), [0, 1, 2])
+        self.assertEqual(list(monitoring['TotalDelta']), [0.0, 0.25, 0.5])
+
+    def testInvalidParameters(self):
+        """Tests that invalid recorder parameters raise a ValueError."""
+        with self.assertRaisesRegex(ValueError, 'Chunk size must be a positive'):
+            monitoringRecorder.MonitoringRecorder(chunkSize=0)
+        with self.assertRaisesRegex(ValueError, 'The history must be kept'):
+            monitoringRecorder.MonitoringRecorder(keepHistory=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,92 @@
 import dataclasses
+import datetime
 import decimal
+import enum
+import functools
 import logging
+import math
+import operator
 import typing
+import numpy as np
+from base import money
+from base import optionChain
 from events import signalEvent, tickEvent
 from optionPrimitives import optionPrimitive
+from portfolioManager import monitoringRecorder
+from portfolioManager import positionBook
+
+
+class AggregationModes(enum.Enum):
+    """How the portfolio totals (net liquidity, buying power, greeks) are computed on each tick.
+
+    FULL_RECOMPUTE:  the totals are summed over all active positions.
+    INCREMENTAL:  the values of each position and the partial sums of the totals are kept; the values are only
+                  recomputed for the positions whose legs changed, and the totals are only summed again from the first
+                  position which changed or was closed.
+    POSITION_BOOK:  the open positions are also stored in a positionBook.PositionBook, which updates and manages the
+                    positions, and computes the totals, from its columns for all positions at once.
+    """
+    FULL_RECOMPUTE = 0
+    INCREMENTAL = 1
+    POSITION_BOOK = 2
+
+
+def _toGreek(value: typing.Optional[float]) -> float:
+    """Greek of a position for the totals; a position without the greek (None) makes the total NaN."""
+    return math.nan if value is None else value
+
+
+def _getLegsKey(position: optionPrimitive.OptionPrimitive) -> typing.Optional[tuple]:
+    """Values of the legs of a position which its profit / loss, buying power and greeks depend on (None if the
+    primitive does not implement getLegs())."""
+    try:
+        legs = position.getLegs()
+    except NotImplementedError:
+        return None
+    return position.getNumContracts(), tuple(
+        (legOption.settlementPrice, legOption.underlyingPrice, legOption.delta, legOption.gamma, legOption.theta,
+         legOption.vega) for legOption, _ in legs)
+
+
+def _sumFloats(values: np.ndarray) -> float:
+    """Sum floats one after the other from 0, as the += of a full recompute does (np.sum adds pairwise)."""
+    if not len(values):
+        return 0
+    # Adding 0.0 turns a sum of -0.0 values into the 0.0 which 0 + -0.0 gives.
+    return float(np.cumsum(values)[-1]) + 0.0
+
+
+@dataclasses.dataclass(frozen=True)
+class PositionValues(object):
+    """Values a position contributes to the portfolio totals, or partial sums of these values.
+
+    Attributes:
+      profitLoss:  profit / loss of the position.
+      buyingPower:  buying power used by the position.
+      delta, gamma, theta, vega:  greeks of the position (NaN if the position does not have the greek).
+      numContracts:  number of contracts of the position.
+    """
+    profitLoss: decimal.Decimal = decimal.Decimal(0)
+    buyingPower: decimal.Decimal = decimal.Decimal(0)
+    delta: float = 0
+    gamma: float = 0
+    theta: float = 0
+    vega: float = 0
+    numContracts: int = 0
+
+    @classmethod
+    def fromPosition(cls, position: optionPrimitive.OptionPrimitive) -> 'PositionValues':
+        return cls(profitLoss=position.calcProfitLoss(), buyingPower=position.getBuyingPower(),
+                   delta=_toGreek(position.getDelta()), gamma=_toGreek(position.getGamma()),
+                   theta=_toGreek(position.getTheta()), vega=_toGreek(position.getVega()),
+                   numContracts=position.getNumContracts())
+
+    def add(self, other: 'PositionValues') -> 'PositionValues':
+        """Sum of two sets of values; the decimals are added in the current decimal context."""
+        return PositionValues(profitLoss=self.profitLoss + other.profitLoss,
+                              buyingPower=self.buyingPower + other.buyingPower, delta=self.delta + other.delta,
+                              gamma=self.gamma + other.gamma, theta=self.theta + other.theta,
+                              vega=self.vega + other.vega, numContracts=self.numContracts + other.numContracts)
 
 
 @dataclasses.dataclass()
@@ -16,7 +99,10 @@ class Portfolio(object):
       startingCapital -- How much capital we have when starting.
       maxCapitalToUse -- Max percent of portfolio to use (decimal between 0 and 1).
       maxCapitalToUsePerTrade -- Max percent of portfolio to use on one trade (same underlying), 0 to 1.
-      positionMonitoring -- Used to keep track of portfolio values over time.
+      positionMonitoring -- Used to keep track of portfolio values over time (one row per tick).
+      aggregationMode -- How the portfolio totals are computed on each tick (see AggregationModes).
+      verifyAggregation -- Check on each tick that the INCREMENTAL or POSITION_BOOK totals match a full recompute;
+        raises a ValueError if they do not.
 
 
     Portfolio intrinsics:
@@ -32,7 +118,9 @@ class Portfolio(object):
     startingCapital: decimal.Decimal
     maxCapitalToUse: decimal.Decimal
     maxCapitalToUsePerTrade: decimal.Decimal
-    positionMonitoring: typing.Optional[typing.DefaultDict[typing.Text, list]] = None
+    positionMonitoring: typing.Optional[monitoringRecorder.MonitoringRecorder] = None
+    aggregationMode: AggregationModes = AggregationModes.FULL_RECOMPUTE
+    verifyAggregation: bool = False
     realizedCapital: typing.ClassVar[decimal.Decimal]
     netLiquidity: typing.ClassVar[decimal.Decimal]
     totalBuyingPower: typing.ClassVar[decimal.Decimal] = decimal.Decimal(0.0)
@@ -47,6 +135,12 @@ class Portfolio(object):
         self.realizedCapital = self.startingCapital
         self.netLiquidity = self.startingCapital
         self.activePositions = []
+        # Legs key and values of the active positions on the last tick (positions opened since are not included), and
+        # the partial sums of the values in the order of activePositions; only used by the INCREMENTAL aggregation mode.
+        self.__positionValues = []
+        self.__partialSums = []
+        # Columns of the active positions; only used by the POSITION_BOOK aggregation mode.
+        self.__positionBook = positionBook.PositionBook()
 
     def onSignal(self, event: signalEvent) -> None:
         """Handle a new signal event; indicates that a new position should be added to the portfolio if portfolio risk
@@ -76,25 +170,59 @@ class Portfolio(object):
 
         :param event: Tick event with the option chain which will be used to update the portfolio.
         """
-        # Get the data from the tick event.
-        tickData = event.getData()
-
         # If we did not get any tick data or there are no positions in the portfolio, return.
-        if not tickData or not self.activePositions:
+        if not event.hasData() or not self.activePositions:
             return
 
-        # Go through the positions currently in the portfolio and update the prices.
-        # We first reset the entire portfolio and recalculate the values.
-        self.totalDelta = 0
-        self.totalGamma = 0
-        self.totalVega = 0
-        self.totalTheta = 0
-        self.totalBuyingPower = decimal.Decimal(0)
-        self.netLiquidity = decimal.Decimal(0)
-        self.totalNumberContracts = 0
+        if self.aggregationMode == AggregationModes.POSITION_BOOK:
+            # As in the loop over the positions below, the date / time and underlying price are those of the last
+            # position before it is updated.
+            currentDateTime = self.activePositions[-1][0].getDateTime()
+            underlyingPrice = self.activePositions[-1][0].getUnderlyingPrice()
+            idxsToDelete, valuesSum = self.__updatePositionBook(event)
+        else:
+            idxsToDelete, valuesSum, currentDateTime, underlyingPrice = self.__updatePositions(event)
+        self.__setTotals(valuesSum)
+
+        # Go through and delete any positions which were added to the idxsToDelete array.
+        for idx in reversed(idxsToDelete):
+            logging.info('The %s position was closed.', self.activePositions[idx][0].getUnderlyingTicker())
+            del (self.activePositions[idx])
+
+        if self.aggregationMode != AggregationModes.FULL_RECOMPUTE and self.verifyAggregation:
+            self.__verifyTotals()
+
+        if self.positionMonitoring is not None:
+            # Record the portfolio values of this tick.
+            self.positionMonitoring.record(currentDateTime, underlyingPrice, self.netLiquidity, self.realizedCapital,
+                                           len(self.activePositions), self.totalNumberContracts,
+                                           self.totalBuyingPower, self.totalDelta)
+
+        # The message is only formatted if the record is written.
+        logging.info(
+            'Date: %s UnderlyingPrice: %s NetLiq: %s RealizedCapital: %s NumPositions: %s TotNumContracts: %s'
+            ' BuyingPower: %s TotalDelta: %s', currentDateTime, underlyingPrice, self.netLiquidity,
+            self.realizedCapital, len(self.activePositions), self.totalNumberContracts, self.totalBuyingPower,
+            self.totalDelta)
+
+    def __updatePositions(self, event: tickEvent) -> typing.Tuple[typing.List[int], PositionValues,
+                                                                    typing.Optional[datetime.datetime],
+                                                                    typing.Optional[decimal.Decimal]]:
+        """Update the active positions one at a time, and sum the values of the positions which stay open.
+
+        :param event: Tick event with the option chain which will be used to update the positions.
+        :return: indices in activePositions of the positions to close, sum of the values of the positions which stay
+          open, and date / time and underlying price of the last position before it was updated.
+        """
+        # Each position looks up its options in the option chain of its underlying (the whole tick data unless the
+        # event has one partition per underlying); all positions of an underlying share the chain, so the index of the
+        # chain is only built once per tick.
+        tickChains = {}
 
         # Array / list used to keep track of which positions we should remove.
         idxsToDelete = []
+        # Values of the positions which stay open.
+        openPositionValues = {}
 
         # Go through all positions in portfolio and update the values.
         currentDateTime = None
@@ -105,6 +233,16 @@ class Portfolio(object):
             currentDateTime = positionData.getDateTime()
             underlyingPrice = positionData.getUnderlyingPrice()
 
+            underlyingTicker = positionData.getUnderlyingTicker()
+            if underlyingTicker not in tickChains:
+                tickChains[underlyingTicker] = optionChain.toOptionChain(event.getPartition(underlyingTicker))
+            tickData = tickChains[underlyingTicker]
+            if tickData is None:
+                # There is no option chain for the underlying of the position at this date / time (only with
+                # partitions); the position keeps its values.
+                openPositionValues[idx] = self.__getPositionValues(idx, positionData)
+                continue
+
             if not positionData.updateValues(tickData):
                 self.realizedCapital += positionData.calcRealizedProfitLoss()
 
@@ -119,43 +257,121 @@ class Portfolio(object):
                 # Add position to array to be removed.
                 idxsToDelete.append(idx)
             else:
-                self.netLiquidity += positionData.calcProfitLoss()
-                # Update greeks and total buying power.
-                self.__calcPortfolioValues(positionData)
-                self.totalNumberContracts += positionData.getNumContracts()
+                openPositionValues[idx] = self.__getPositionValues(idx, positionData)
 
-        # Add the realized capital to the profit / loss of all open positions to get final net liq.
-        self.netLiquidity += self.realizedCapital
+        if self.aggregationMode == AggregationModes.INCREMENTAL:
+            valuesSum = self.__updatePartialSums(openPositionValues, idxsToDelete)
+        else:
+            valuesSum = self.__sumValues(openPositionValues.values())
+        return idxsToDelete, valuesSum, currentDateTime, underlyingPrice
 
-        # Go through and delete any positions which were added to the idxsToDelete array.
-        for idx in reversed(idxsToDelete):
-            logging.info('The %s position was closed.', self.activePositions[idx][0].getUnderlyingTicker())
-            del (self.activePositions[idx])
+    @staticmethod
+    def __sumValues(positionValues: typing.Iterable[PositionValues]) -> PositionValues:
+        """Sum the values of positions one after the other, in order."""
+        valuesSum = PositionValues()
+        for values in positionValues:
+            valuesSum = valuesSum.add(values)
+        return valuesSum
 
-        if self.positionMonitoring is not None:
-            # Update the position monitoring dictionary.
-            self.positionMonitoring['Date'].append(currentDateTime)
-            self.positionMonitoring['UnderlyingPrice'].append(underlyingPrice)
-            self.positionMonitoring['NetLiq'].append(self.netLiquidity)
-            self.positionMonitoring['RealizedCapital'].append(self.realizedCapital)
-            self.positionMonitoring['NumPositions'].append(len(self.activePositions))
-            self.positionMonitoring['TotNumContracts'].append(self.totalNumberContracts)
-            self.positionMonitoring['BuyingPower'].append(self.totalBuyingPower)
-            self.positionMonitoring['TotalDelta'].append(self.totalDelta)
+    def __getPositionValues(self, idx: int, position: optionPrimitive.OptionPrimitive) -> \
+            typing.Union[PositionValues, typing.Tuple[tuple, PositionValues]]:
+        """Get the values of an active position.  In the INCREMENTAL aggregation mode, the values of the last tick are
+        kept (with the legs key they were computed for) and reused if the legs of the position did not change.
 
-        logging.info(
-            'Date: {} UnderlyingPrice: {} NetLiq: {} RealizedCapital: {} NumPositions: {} TotNumContracts: {}'
-            ' BuyingPower: {} TotalDelta: {}'.format(currentDateTime, underlyingPrice, self.netLiquidity,
-                                                     self.realizedCapital, len(self.activePositions),
-                                                     self.totalNumberContracts, self.totalBuyingPower, self.totalDelta))
+        :param idx: index of the position in activePositions.
+        :param position: option primitive of the position.
+        :return: values of the position, or the legs key and values of the position in the INCREMENTAL mode.
+        """
+        if self.aggregationMode != AggregationModes.INCREMENTAL:
+            return PositionValues.fromPosition(position)
+        legsKey = _getLegsKey(position)
+        # The values of a position without legs key are computed again on each tick.
+        if legsKey is not None and idx < len(self.__positionValues) and self.__positionValues[idx][0] == legsKey:
+            return self.__positionValues[idx]
+        return legsKey, PositionValues.fromPosition(position)
+
+    def __updatePartialSums(self, openPositionValues: typing.Mapping[int, typing.Tuple[tuple, PositionValues]],
+                            idxsToDelete: typing.List[int]) -> PositionValues:
+        """Sum the values of the positions which stay open again from the first position which changed or is closed.
+
+        :param openPositionValues: dictionary from index in activePositions to legs key and values of the positions
+          which stay open; the entries of the positions which did not change are the ones of the last tick.
+        :param idxsToDelete: indices in activePositions of the positions which are closed on this tick.
+        :return: sum of the values of the positions which stay open.
+        """
+        previousValues = self.__positionValues
+        # The positions before the first changed or closed position keep their index, so their partial sums are the
+        # ones of the last tick; positions opened since the last tick are at the end of activePositions.
+        firstChangedIdx = min([len(previousValues)] + idxsToDelete)
+        for idx, values in openPositionValues.items():
+            if idx >= firstChangedIdx:
+                break
+            if values is not previousValues[idx]:
+                firstChangedIdx = idx
+                break
+        self.__positionValues = list(openPositionValues.values())
+        del self.__partialSums[firstChangedIdx:]
+        valuesSum = self.__partialSums[-1] if self.__partialSums else PositionValues()
+        for _, values in self.__positionValues[firstChangedIdx:]:
+            valuesSum = valuesSum.add(values)
+            self.__partialSums.append(valuesSum)
+        return valuesSum
+
+    def __updatePositionBook(self, event: tickEvent) -> typing.Tuple[typing.List[int], PositionValues]:
+        """Update all positions of the position book at once, and sum the values of the positions which stay open.
+
+        :param event: Tick event with the option chain which will be used to update the positions.
+        :return: indices in activePositions of the positions to close, and sum of the values of the positions which
+          stay open.
+        """
+        book = self.__positionBook
+        # Positions opened since the last tick are at the end of activePositions.
+        newPositions = self.activePositions[len(book):]
+        book.addPositions([position[0] for position in newPositions], [position[1] for position in newPositions])
+        # The positions of an underlying are updated with the option chain of the underlying (the whole tick data
+        # unless the event has one partition per underlying).
+        tickChains = {underlyingTicker: optionChain.toOptionChain(event.getPartition(underlyingTicker))
+                      for underlyingTicker in book.getUnderlyingTickers()}
+        isUpdated, isNotUpdated = book.updateMarks(tickChains)
+        isClosed = book.getPositionsToClose(np.flatnonzero(isUpdated))
+        idxsToDelete = np.flatnonzero(isNotUpdated | isClosed).tolist()
+        for idx in idxsToDelete:
+            self.realizedCapital += self.activePositions[idx][0].calcRealizedProfitLoss()
+            if isNotUpdated[idx]:
+                logging.warning('Could not update option values; removing position.')
+        book.removePositions(idxsToDelete)
+        # The columns are summed in book order, one value after the other, as the other modes do.
+        return idxsToDelete, PositionValues(
+            profitLoss=functools.reduce(operator.add, book.getProfitLosses(), decimal.Decimal(0)),
+            buyingPower=functools.reduce(operator.add, book.getBuyingPowers(), decimal.Decimal(0)),
+            delta=_sumFloats(book.getGreeks('delta')), gamma=_sumFloats(book.getGreeks('gamma')),
+            theta=_sumFloats(book.getGreeks('theta')), vega=_sumFloats(book.getGreeks('vega')),
+            numContracts=int(book.getNumContracts().sum()))
+
+    def __setTotals(self, valuesSum: PositionValues) -> None:
+        """Set the portfolio totals from the sum of the values of the open positions."""
+        self.netLiquidity = valuesSum.profitLoss + self.realizedCapital
+        self.totalBuyingPower = valuesSum.buyingPower
+        if isinstance(self.realizedCapital, money.Money):
+            # The sum of no positions is the decimal 0.
+            self.totalBuyingPower = money.Money.fromValue(self.totalBuyingPower)
+        self.totalNumberContracts = valuesSum.numContracts
+        self.totalDelta = valuesSum.delta
+        self.totalGamma = valuesSum.gamma
+        self.totalTheta = valuesSum.theta
+        self.totalVega = valuesSum.vega
 
-    def __calcPortfolioValues(self, curPosition: optionPrimitive.OptionPrimitive) -> None:
-        """Updates portfolio values for current position.
+    def __verifyTotals(self) -> None:
+        """Check that the INCREMENTAL or POSITION_BOOK totals are the same as the totals of a full recompute.
 
-        :param curPosition: Current position in portfolio being processed.
+        :raises ValueError: Incremental totals do not match the full recompute.
         """
-        self.totalDelta += curPosition.getDelta()
-        self.totalGamma += curPosition.getGamma()
-        self.totalTheta += curPosition.getTheta()
-        self.totalVega += curPosition.getVega()
-        self.totalBuyingPower += curPosition.getBuyingPower()
+        totals = (self.netLiquidity, self.totalBuyingPower, self.totalNumberContracts, self.totalDelta,
+                  self.totalGamma, self.totalTheta, self.totalVega)
+        self.__setTotals(self.__sumValues(PositionValues.fromPosition(position[0])
+                                          for position in self.activePositions))
+        recomputedTotals = (self.netLiquidity, self.totalBuyingPower, self.totalNumberContracts, self.totalDelta,
+                            self.totalGamma, self.totalTheta, self.totalVega)
+        if [str(total) for total in totals] != [str(total) for total in recomputedTotals]:
+            raise ValueError('{} portfolio totals {} do not match the full recompute {}.'.format(
+                self.aggregationMode.name, totals, recomputedTotals))
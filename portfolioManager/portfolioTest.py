@@ -1,7 +1,11 @@
 import unittest
+import dataclasses
 import datetime
 import decimal
 import json
+import math
+import random
+from unittest import mock
 from portfolioManager import portfolio
 from optionPrimitives import optionPrimitive, strangle
 from base import put
@@ -133,6 +137,32 @@ class TestPortfolio(unittest.TestCase):
         self.assertAlmostEqual(portfolioObj.realizedCapital, portfolioObj.startingCapital - (
             self.__strangleObj.getOpeningFees() * self.__strangleObj.getNumContracts()))
 
+    def testUpdatePortfolioWithPartitions(self):
+        """Tests that positions are updated with the partition of their underlying, and keep their values if there is
+        no partition for their underlying."""
+        event = signalEvent.SignalEvent()
+        event.createEvent([self.__strangleObj, self.riskManagement])
+        for aggregationMode in portfolio.AggregationModes:
+            portfolioObj = portfolio.Portfolio(decimal.Decimal(1000000), decimal.Decimal(0.5), decimal.Decimal(0.5),
+                                               aggregationMode=aggregationMode, verifyAggregation=True)
+            portfolioObj.onSignal(event)
+            strangleLegs = [legOption for legOption, _ in self.__strangleObj.getLegs()]
+            otherLegs = [dataclasses.replace(legOption, underlyingTicker='AAPL', settlementPrice=decimal.Decimal(1))
+                         for legOption in strangleLegs]
+            tickObj = tickEvent.TickEvent()
+            tickObj.createEvent(partitions={'AAPL': otherLegs})
+            portfolioObj.updatePortfolio(tickObj)
+            self.assertEqual(len(portfolioObj.activePositions), 1)
+            self.assertEqual(portfolioObj.totalBuyingPower, self.__strangleObj.getBuyingPower())
+
+            newLegs = [dataclasses.replace(legOption, settlementPrice=legOption.tradePrice - 1) for legOption in
+                       strangleLegs]
+            tickObj = tickEvent.TickEvent()
+            tickObj.createEvent(partitions={'AAPL': otherLegs, 'SPX': newLegs})
+            portfolioObj.updatePortfolio(tickObj)
+            self.assertEqual(len(portfolioObj.activePositions), 1)
+            self.assertEqual(self.__strangleObj.calcProfitLoss(), decimal.Decimal(200))
+
     def testUpdatePortfolioNoPositions(self):
         """Tests that the portfolio remains empty if there are no active positions."""
         # Create portfolio onSignal event, which adds the position to the portfolio.
@@ -281,6 +311,157 @@ class TestPortfolio(unittest.TestCase):
         self.assertAlmostEqual(portfolioObj.totalGamma, 0.04)
         self.assertAlmostEqual(portfolioObj.totalTheta, 0.08)
 
+    def createOptions(self, strikeOffset: int, day: int, putPrice: decimal.Decimal, callPrice: decimal.Decimal,
+                      putDelta: float, callDelta: float) -> list:
+        """Create the call and put of a strangle whose strikes are strikeOffset away from the setUp strangle."""
+        dateTime = datetime.datetime(2021, 1, day)
+        expirationDateTime = datetime.datetime(2021, 1, 20)
+        putOpt = put.Put(underlyingTicker='SPX', underlyingPrice=decimal.Decimal('2786.24'),
+                         strikePrice=decimal.Decimal(2690 - strikeOffset), delta=putDelta, gamma=0.01, theta=0.02,
+                         vega=0.03, dateTime=dateTime, expirationDateTime=expirationDateTime,
+                         bidPrice=putPrice - decimal.Decimal('0.05'), askPrice=putPrice + decimal.Decimal('0.05'),
+                         tradePrice=putPrice, settlementPrice=putPrice)
+        callOpt = call.Call(underlyingTicker='SPX', underlyingPrice=decimal.Decimal('2786.24'),
+                            strikePrice=decimal.Decimal(2855 + strikeOffset), delta=callDelta, gamma=0.01,
+                            theta=0.02, vega=0.03, dateTime=dateTime, expirationDateTime=expirationDateTime,
+                            bidPrice=callPrice - decimal.Decimal('0.05'), askPrice=callPrice + decimal.Decimal('0.05'),
+                            tradePrice=callPrice, settlementPrice=callPrice)
+        return [callOpt, putOpt]
+
+    def createStrangle(self, strikeOffset: int, day: int, putPrice: decimal.Decimal,
+                       callPrice: decimal.Decimal) -> strangle.Strangle:
+        """Create a short strangle whose strikes are strikeOffset away from the strikes of the setUp strangle."""
+        callOpt, putOpt = self.createOptions(strikeOffset, day, putPrice, callPrice, -0.16, 0.16)
+        strangleObj = strangle.Strangle(orderQuantity=1, contractMultiplier=100, callOpt=callOpt, putOpt=putOpt,
+                                        buyOrSell=optionPrimitive.TransactionType.SELL)
+        strangleObj.setOpeningFees(strangleObj.getCommissionsAndFees('open', self.pricingSource,
+                                                                     self.pricingSourceConfig))
+        strangleObj.setClosingFees(strangleObj.getCommissionsAndFees('close', self.pricingSource,
+                                                                     self.pricingSourceConfig))
+        return strangleObj
+
+    def testAggregationModesMatchFullRecompute(self):
+        """Tests that the INCREMENTAL and POSITION_BOOK totals are exactly the same as the FULL_RECOMPUTE totals while
+        positions are opened, repriced (some with unchanged prices) and closed."""
+        randomGenerator = random.Random(5)
+        portfolios = [portfolio.Portfolio(decimal.Decimal(1000000), decimal.Decimal(0.5), decimal.Decimal(0.5),
+                                          aggregationMode=aggregationMode, verifyAggregation=True)
+                      for aggregationMode in portfolio.AggregationModes]
+        prices = {}
+        for day in range(2, 12):
+            # Open a position on most days; the positions of the same strikes share their options on each tick.
+            if day < 9:
+                strikeOffset = 5 * randomGenerator.randint(0, 3)
+                for portfolioObj in portfolios:
+                    event = signalEvent.SignalEvent()
+                    event.createEvent([self.createStrangle(strikeOffset, day, decimal.Decimal('7.475'),
+                                                           decimal.Decimal('5.30')),
+                                       self.riskManagement])
+                    portfolioObj.onSignal(event)
+            # Reprice some of the strikes; the other strikes keep the prices of the previous tick.
+            for strikeOffset in range(0, 20, 5):
+                if strikeOffset not in prices or randomGenerator.random() < 0.6:
+                    prices[strikeOffset] = (decimal.Decimal(randomGenerator.randint(100, 900)) / 100,
+                                            decimal.Decimal(randomGenerator.randint(100, 900)) / 100,
+                                            -randomGenerator.random() / 3, randomGenerator.random() / 3)
+            # Drop one strike from the chain on the last days, which closes its positions.
+            optionChain = []
+            for strikeOffset, (putPrice, callPrice, putDelta, callDelta) in prices.items():
+                if day < 10 or strikeOffset != 5:
+                    optionChain.extend(self.createOptions(strikeOffset, day, putPrice, callPrice, putDelta,
+                                                          callDelta))
+            event = tickEvent.TickEvent()
+            event.createEvent(optionChain)
+            for portfolioObj in portfolios:
+                portfolioObj.updatePortfolio(event)
+
+            fullRecompute = portfolios[0]
+            for portfolioObj in portfolios[1:]:
+                self.assertEqual(len(portfolioObj.activePositions), len(fullRecompute.activePositions))
+                for total in ['netLiquidity', 'realizedCapital', 'totalBuyingPower', 'totalNumberContracts',
+                              'totalDelta', 'totalGamma', 'totalTheta', 'totalVega']:
+                    self.assertEqual(str(getattr(portfolioObj, total)), str(getattr(fullRecompute, total)))
+
+    def openStrangles(self, portfolioObj: portfolio.Portfolio, strikeOffsets: list) -> None:
+        """Open a strangle for each of the strike offsets in the portfolio."""
+        for strikeOffset in strikeOffsets:
+            event = signalEvent.SignalEvent()
+            event.createEvent([self.createStrangle(strikeOffset, 2, decimal.Decimal('7.475'), decimal.Decimal('5.30')),
+                               self.riskManagement])
+            portfolioObj.onSignal(event)
+
+    def testTotalsAreSummedInPositionOrder(self):
+        """Tests that the greeks of the positions are added one after the other, as in a loop over the positions."""
+        for aggregationMode in portfolio.AggregationModes:
+            portfolioObj = portfolio.Portfolio(decimal.Decimal(1000000), decimal.Decimal(0.5), decimal.Decimal(0.5),
+                                               aggregationMode=aggregationMode, verifyAggregation=True)
+            self.openStrangles(portfolioObj, [0, 5, 10])
+            optionChain = []
+            for strikeOffset, callDelta in ((0, 0.1), (5, 0.2), (10, 0.3)):
+                optionChain.extend(self.createOptions(strikeOffset, 3, decimal.Decimal('7.475'),
+                                                      decimal.Decimal('5.30'), 0.0, callDelta))
+            event = tickEvent.TickEvent()
+            event.createEvent(optionChain)
+            portfolioObj.updatePortfolio(event)
+            # An exact sum would give 0.6.
+            self.assertEqual(portfolioObj.totalDelta, 0.1 + 0.2 + 0.3)
+            self.assertEqual(str(portfolioObj.totalDelta), '0.6000000000000001')
+
+    def testMissingGreeks(self):
+        """Tests that a position with a missing (None) or NaN greek makes the total of the greek NaN."""
+        for putDelta in (None, math.nan):
+            for aggregationMode in portfolio.AggregationModes:
+                portfolioObj = portfolio.Portfolio(decimal.Decimal(1000000), decimal.Decimal(0.5),
+                                                   decimal.Decimal(0.5), aggregationMode=aggregationMode,
+                                                   verifyAggregation=True)
+                self.openStrangles(portfolioObj, [0, 5])
+                optionChain = self.createOptions(0, 3, decimal.Decimal('6.475'), decimal.Decimal('4.30'), putDelta,
+                                                 0.16)
+                optionChain.extend(self.createOptions(5, 3, decimal.Decimal('6.475'), decimal.Decimal('4.30'), -0.16,
+                                                      0.16))
+                event = tickEvent.TickEvent()
+                event.createEvent(optionChain)
+                portfolioObj.updatePortfolio(event)
+                self.assertEqual(len(portfolioObj.activePositions), 2)
+                self.assertTrue(math.isnan(portfolioObj.totalDelta))
+                self.assertAlmostEqual(portfolioObj.totalVega, 0.12)
+                self.assertEqual(portfolioObj.netLiquidity, portfolioObj.realizedCapital + 2 * 200)
+
+    def testIncrementalOnlyRevaluesChangedPositions(self):
+        """Tests that the INCREMENTAL mode does not compute the values of the positions whose legs did not change."""
+        portfolioObj = portfolio.Portfolio(decimal.Decimal(1000000), decimal.Decimal(0.5), decimal.Decimal(0.5),
+                                           aggregationMode=portfolio.AggregationModes.INCREMENTAL)
+        self.openStrangles(portfolioObj, [0, 5, 10])
+        unchangedOptions = self.createOptions(0, 3, decimal.Decimal('6.475'), decimal.Decimal('4.30'), -0.16, 0.16)
+        unchangedOptions.extend(self.createOptions(5, 3, decimal.Decimal('6.475'), decimal.Decimal('4.30'), -0.16,
+                                                   0.16))
+        with mock.patch.object(strangle.Strangle, 'getBuyingPower', autospec=True,
+                               side_effect=strangle.Strangle.getBuyingPower) as getBuyingPower:
+            for putPrice in ('6.475', '5.475'):
+                event = tickEvent.TickEvent()
+                event.createEvent(unchangedOptions + self.createOptions(
+                    10, 3, decimal.Decimal(putPrice), decimal.Decimal('4.30'), -0.16, 0.16))
+                portfolioObj.updatePortfolio(event)
+        # The three positions are valued on the first tick, and only the repriced position on the second tick.
+        self.assertEqual(getBuyingPower.call_count, 4)
+        self.assertEqual(portfolioObj.netLiquidity, portfolioObj.realizedCapital + 2 * 200 + 300)
+
+    def testVerifyAggregationDetectsMismatch(self):
+        """Tests that the verification mode raises an exception if the INCREMENTAL totals are wrong."""
+        portfolioObj = portfolio.Portfolio(decimal.Decimal(1000000), decimal.Decimal(0.5), decimal.Decimal(0.5),
+                                           aggregationMode=portfolio.AggregationModes.INCREMENTAL,
+                                           verifyAggregation=True)
+        event = signalEvent.SignalEvent()
+        event.createEvent([self.__strangleObj, self.riskManagement])
+        portfolioObj.onSignal(event)
+        tick = tickEvent.TickEvent()
+        tick.createEvent(self.createOptions(0, 2, decimal.Decimal('6.475'), decimal.Decimal('4.30'), -0.16, 0.16))
+        portfolioObj.updatePortfolio(tick)
+        # Corrupt the kept partial sums of the position values.
+        portfolioObj._Portfolio__partialSums[-1] = portfolio.PositionValues(numContracts=5)
+        with self.assertRaisesRegex(ValueError, 'INCREMENTAL portfolio totals .* do not match the full recompute'):
+            portfolioObj.updatePortfolio(tick)
+
 
 if __name__ == '__main__':
     unittest.main()
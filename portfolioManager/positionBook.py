@@ -0,0 +1,509 @@
+import enum
+import logging
+import math
+import numpy as np
+from base import option
+from base import optionChain
+from optionPrimitives import nakedPut, optionPrimitive, putVertical, strangle
+from riskManager import riskManagement
+from typing import Any, Iterator, List, Mapping, Optional, Sequence, Text, Tuple
+
+"""
+This file holds the open positions of a portfolio as NumPy arrays.
+"""
+
+GREEKS = ('delta', 'gamma', 'theta', 'vega')
+
+
+class PositionKinds(enum.Enum):
+    """Kinds of positions whose legs the book holds in its columns, and whose values it computes from the columns with
+    the rules of their primitives; the positions of OTHER primitives are updated by the primitives themselves."""
+    OTHER = 0
+    PUT_VERTICAL = 1
+    STRANGLE = 2
+    NAKED_PUT = 3
+
+
+class _Columns(object):
+    """Columns of equal length held in buffers whose capacity doubles when they are full, so that appending rows is
+    amortized constant time, and removing rows compacts the buffers in place."""
+
+    def __init__(self, dtypes: Mapping[Text, Any]) -> None:
+        self.__buffers = {name: np.empty(0, dtype=dtype) for name, dtype in dtypes.items()}
+        self.__size = 0
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def __getitem__(self, name: Text) -> np.ndarray:
+        """Get a column; the returned array is a view of the buffer which can be written to."""
+        return self.__buffers[name][:self.__size]
+
+    def append(self, values: Mapping[Text, Sequence[Any]], numRows: int) -> None:
+        """Append rows to the columns.
+
+        :param values: values of the new rows for each column.
+        :param numRows: number of new rows.
+        """
+        size = self.__size + numRows
+        for name, buffer in self.__buffers.items():
+            if size > len(buffer):
+                newBuffer = np.empty(max(size, 2 * len(buffer), 8), dtype=buffer.dtype)
+                newBuffer[:self.__size] = buffer[:self.__size]
+                self.__buffers[name] = buffer = newBuffer
+            buffer[self.__size:size] = values[name]
+        self.__size = size
+
+    def keep(self, mask: np.ndarray) -> None:
+        """Keep the rows of the mask, in order, and remove the other rows.
+
+        :param mask: boolean array with one value per row.
+        """
+        size = int(mask.sum())
+        for buffer in self.__buffers.values():
+            buffer[:size] = buffer[:self.__size][mask]
+            if buffer.dtype == object:
+                # Release the values of the removed rows.
+                buffer[size:self.__size] = None
+        self.__size = size
+
+
+def _toObjectArray(values: Sequence[Any]) -> np.ndarray:
+    """Create a one-dimensional object array without NumPy inspecting the values."""
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+
+
+class PositionBook(object):
+    """This class stores the open positions of a portfolio as columns, one row per position and one row per option leg,
+    so that the values of all positions are computed at once.  The legs of a position are in consecutive rows, and the
+    positions are in the order in which they were added.
+
+    On each tick, updateMarks() looks up the legs of the put verticals, strangles and naked puts in the option chain
+    columns, checks their new prices and computes their buying power from the leg columns with the rules of their
+    primitives (e.g., putVertical.PutVertical.computeBuyingPower()); getPositionsToClose() then applies the close
+    conditions of the risk management strategies to all positions at once.  The option primitives remain the views used
+    by the strategy and risk management code: the options of their legs are updated with the values of the chain.  The
+    positions of other primitives (which need not implement getLegs()), or with risk management strategies without
+    close conditions, are updated and managed by calling the primitives and strategies.
+    Prices are kept as decimals (object arrays) so that the profit / loss is exact; greeks are float64 arrays.
+    """
+
+    def __init__(self) -> None:
+        """Initializes an empty book."""
+        self.__positions = []
+        self.__riskManagements = []
+        self.__legOptions = []
+        # Columns with one value per position; the profit / loss and greeks are only used for the OTHER positions, whose
+        # legs are not in the book.
+        self.__positionColumns = _Columns(dict(
+            {'kind': object, 'underlyingTicker': object, 'isSold': bool, 'numLegs': np.int64,
+             'numContracts': np.int64, 'contractMultiplier': np.int64, 'buyingPower': object, 'closeConditions': object,
+             'profitLoss': object}, **{greek: np.float64 for greek in GREEKS}))
+        # Columns with one value per leg.
+        self.__legColumns = _Columns(dict(
+            {'isSold': bool, 'isCall': bool, 'strikePrice': object, 'expirationDateTime': object,
+             'lookupTicker': object, 'entryPrice': object, 'mark': object, 'underlyingPrice': object,
+             'dateTime': object, 'daysLeft': np.int64}, **{greek: np.float64 for greek in GREEKS}))
+
+    def __len__(self) -> int:
+        return len(self.__positions)
+
+    def getPositions(self) -> List[optionPrimitive.OptionPrimitive]:
+        """Get the option primitives of the positions in the book, in book order."""
+        return list(self.__positions)
+
+    def getUnderlyingTickers(self) -> List[Text]:
+        """Get the distinct underlying tickers of the positions in the book, in book order."""
+        return list(dict.fromkeys(self.__positionColumns['underlyingTicker'].tolist()))
+
+    def addPositions(self, positions: Sequence[optionPrimitive.OptionPrimitive],
+                     riskManagements: Optional[Sequence[riskManagement.RiskManagement]] = None) -> None:
+        """Add positions at the end of the book.
+
+        :param positions: option primitives to add; their current values are gathered into the columns.
+        :param riskManagements: risk management strategy of each position; None if the positions are not managed by
+          the book (see getPositionsToClose()).
+        """
+        if not positions:
+            return
+        if riskManagements is None:
+            riskManagements = [None] * len(positions)
+        kinds = [self.__getKind(position) for position in positions]
+        legs = [[] if kind == PositionKinds.OTHER else position.getLegs() for kind, position in zip(kinds, positions)]
+        legOptions = [legOption for positionLegs in legs for legOption, _ in positionLegs]
+        primitiveValues = [self.__getPrimitiveValues(position) if kind == PositionKinds.OTHER else
+                           dict({'profitLoss': None}, **{greek: np.nan for greek in GREEKS})
+                           for kind, position in zip(kinds, positions)]
+        self.__positions.extend(positions)
+        self.__riskManagements.extend(riskManagements)
+        self.__legOptions.extend(legOptions)
+        self.__positionColumns.append(dict({
+            'kind': kinds, 'underlyingTicker': [position.getUnderlyingTicker() for position in positions],
+            'isSold': [self.__isSold(position, positionLegs) for position, positionLegs in zip(positions, legs)],
+            'numLegs': [len(positionLegs) for positionLegs in legs],
+            'numContracts': [position.getNumContracts() for position in positions],
+            'contractMultiplier': [position.getContractMultiplier() for position in positions],
+            'buyingPower': _toObjectArray([position.getBuyingPower() for position in positions]),
+            'closeConditions': [None if management is None else management.getCloseConditions()
+                                for management in riskManagements]},
+            **{name: _toObjectArray([values[name] for values in primitiveValues])
+               for name in ('profitLoss',) + GREEKS}), len(positions))
+        self.__legColumns.append(dict({
+            'isSold': [transactionType == optionPrimitive.TransactionType.SELL for positionLegs in legs
+                       for _, transactionType in positionLegs],
+            'isCall': [legOption.optionType == option.OptionTypes.CALL for legOption in legOptions],
+            'strikePrice': _toObjectArray([legOption.strikePrice for legOption in legOptions]),
+            'expirationDateTime': _toObjectArray([legOption.expirationDateTime for legOption in legOptions]),
+            # Put verticals only match the options of their ticker, as in PutVertical.updateValues().
+            'lookupTicker': _toObjectArray([legOption.underlyingTicker if kind == PositionKinds.PUT_VERTICAL else None
+                                            for kind, positionLegs in zip(kinds, legs) for legOption, _ in
+                                            positionLegs]),
+            'entryPrice': _toObjectArray([legOption.tradePrice for legOption in legOptions]),
+            'mark': _toObjectArray([legOption.settlementPrice for legOption in legOptions]),
+            'underlyingPrice': _toObjectArray([legOption.underlyingPrice for legOption in legOptions]),
+            'dateTime': _toObjectArray([legOption.dateTime for legOption in legOptions]),
+            'daysLeft': [self.__getDaysLeft(legOption) for legOption in legOptions]},
+            **{greek: np.array([getattr(legOption, greek) for legOption in legOptions], dtype=np.float64)
+               for greek in GREEKS}), len(legOptions))
+
+    def removePositions(self, idxs: Sequence[int]) -> None:
+        """Remove positions from the book.
+
+        :param idxs: indices of the positions to remove.
+        """
+        if not len(idxs):
+            return
+        keepPosition = np.ones(len(self.__positions), dtype=bool)
+        keepPosition[list(idxs)] = False
+        keepLeg = np.repeat(keepPosition, self.__positionColumns['numLegs'])
+        self.__positions = [position for position, keep in zip(self.__positions, keepPosition) if keep]
+        self.__riskManagements = [management for management, keep in zip(self.__riskManagements, keepPosition)
+                                  if keep]
+        self.__legOptions = [legOption for legOption, keep in zip(self.__legOptions, keepLeg) if keep]
+        self.__positionColumns.keep(keepPosition)
+        self.__legColumns.keep(keepLeg)
+
+    def updateMarks(self, tickChains: Mapping[Text, Optional[optionChain.OptionChain]]) -> Tuple[np.ndarray,
+                                                                                                   np.ndarray]:
+        """Update the positions with the option chains of their underlyings, as the updateValues() methods of the
+        primitives do, and update the marks, greeks and buying power of the updated positions.
+
+        :param tickChains: dictionary from underlying ticker to the option chain of the underlying (None if there is
+          no chain for the underlying on this tick).
+        :return: masks of the positions which were updated and of the positions which could not be updated; the other
+          positions do not have a chain and keep their values.
+        """
+        positionColumns = self.__positionColumns
+        isUpdated = np.zeros(len(self), dtype=bool)
+        isNotUpdated = np.zeros(len(self), dtype=bool)
+        for underlyingTicker, chain in tickChains.items():
+            if chain is None:
+                continue
+            hasTicker = positionColumns['underlyingTicker'] == underlyingTicker
+            isOther = positionColumns['kind'] == PositionKinds.OTHER
+            self.__updateColumnar(chain, np.flatnonzero(hasTicker & ~isOther), isUpdated, isNotUpdated)
+            for idx in np.flatnonzero(hasTicker & isOther):
+                position = self.__positions[idx]
+                if position.updateValues(chain):
+                    for name, value in self.__getPrimitiveValues(position).items():
+                        positionColumns[name][idx] = value
+                    positionColumns['buyingPower'][idx] = position.getBuyingPower()
+                    isUpdated[idx] = True
+                else:
+                    isNotUpdated[idx] = True
+        return isUpdated, isNotUpdated
+
+    def getPositionsToClose(self, idxs: np.ndarray) -> np.ndarray:
+        """Apply the risk management strategies to positions: the close conditions are checked for all positions at
+        once, and the positions without close conditions are managed by their strategies.
+
+        :param idxs: indices of the positions to manage.
+        :return: mask of the positions which should be closed.
+        """
+        positionColumns = self.__positionColumns
+        isClosed = np.zeros(len(self), dtype=bool)
+        idxs = np.asarray(idxs, dtype=np.int64)
+        closeConditions = positionColumns['closeConditions'][idxs]
+        isManaged = np.equal(closeConditions, None) | (positionColumns['kind'][idxs] == PositionKinds.OTHER)
+        for idx in idxs[isManaged]:
+            isClosed[idx] = self.__riskManagements[idx].managePosition(self.__positions[idx])
+        idxs = idxs[~isManaged]
+        closeConditions = closeConditions[~isManaged]
+        # The positions are checked at once for each of the (few) distinct close conditions.
+        conditionIdxs = {conditions: idxs[closeConditions == conditions]
+                         for conditions in dict.fromkeys(closeConditions.tolist())}
+        for closeConditions, conditionIdx in conditionIdxs.items():
+            daysLeft = self.__legColumns['daysLeft'][self.__getLegStarts(conditionIdx)]
+            profitLossPercentages = self.__getProfitLossPercentages(conditionIdx) if \
+                closeConditions.usesProfitLoss() else None
+            isClosed[conditionIdx] = np.asarray(closeConditions.isMet(daysLeft, profitLossPercentages), dtype=bool)
+        return isClosed
+
+    def getProfitLosses(self) -> np.ndarray:
+        """Get the profit / loss of the positions.
+
+        :return: object array of decimals, one per position.
+        """
+        return self.__getProfitLosses(np.arange(len(self)))
+
+    def getGreeks(self, greek: str) -> np.ndarray:
+        """Get a greek of the positions: the sum of the greeks of the legs times the number of contracts.
+
+        :param greek: one of GREEKS.
+        :raises ValueError: Unknown greek.
+        :return: float64 array, one value per position (NaN if a leg does not have the greek).
+        """
+        if greek not in GREEKS:
+            raise ValueError('Greek must be one of {}.'.format(', '.join(GREEKS)))
+        positionColumns = self.__positionColumns
+        greeks = positionColumns[greek].copy()
+        hasLegs = positionColumns['kind'] != PositionKinds.OTHER
+        if hasLegs.any():
+            # The legs of the book are the legs of these positions, in order.
+            greeks[hasLegs] = np.add.reduceat(self.__legColumns[greek], self.__getLegStarts()[hasLegs]) * \
+                positionColumns['numContracts'][hasLegs]
+        return greeks
+
+    def getNumContracts(self) -> np.ndarray:
+        """Get the number of contracts of the positions (int64 array)."""
+        return self.__positionColumns['numContracts']
+
+    def getBuyingPowers(self) -> np.ndarray:
+        """Get the buying power of the positions as of their last update (object array of decimals)."""
+        return self.__positionColumns['buyingPower']
+
+    @staticmethod
+    def __getKind(position: optionPrimitive.OptionPrimitive) -> PositionKinds:
+        """Get the kind of a position from the type of its primitive."""
+        if isinstance(position, putVertical.PutVertical):
+            return PositionKinds.PUT_VERTICAL
+        if isinstance(position, strangle.Strangle):
+            return PositionKinds.STRANGLE
+        if isinstance(position, nakedPut.NakedPut):
+            return PositionKinds.NAKED_PUT
+        return PositionKinds.OTHER
+
+    @staticmethod
+    def __getPrimitiveValues(position: optionPrimitive.OptionPrimitive) -> Mapping[Text, Any]:
+        """Get the profit / loss and greeks of a position from its primitive (NaN for a greek which is None)."""
+        greeks = {'delta': position.getDelta(), 'gamma': position.getGamma(), 'theta': position.getTheta(),
+                  'vega': position.getVega()}
+        return dict({'profitLoss': position.calcProfitLoss()},
+                    **{greek: math.nan if value is None else value for greek, value in greeks.items()})
+
+    @staticmethod
+    def __getDaysLeft(legOption: option.Option) -> int:
+        """Get the number of days between the dateTime and the expirationDateTime of an option (0 if the option does
+        not have a dateTime, as in OptionChain.getDaysToExpiration())."""
+        if legOption.dateTime is None:
+            return 0
+        return (legOption.expirationDateTime - legOption.dateTime).days
+
+    @staticmethod
+    def __isSold(position: optionPrimitive.OptionPrimitive,
+                 positionLegs: List[Tuple[Any, optionPrimitive.TransactionType]]) -> bool:
+        """Whether a position is short; the legs of a put vertical are bought and sold whether it is long or short."""
+        if isinstance(position, putVertical.PutVertical):
+            return position.getBuyOrSell() == optionPrimitive.TransactionType.SELL
+        return bool(positionLegs) and positionLegs[0][1] == optionPrimitive.TransactionType.SELL
+
+    def __getLegStarts(self, idxs: Optional[np.ndarray] = None) -> np.ndarray:
+        """Get the row of the first leg of the positions (all positions if idxs is None)."""
+        numLegs = self.__positionColumns['numLegs']
+        legStarts = np.cumsum(numLegs) - numLegs
+        return legStarts if idxs is None else legStarts[idxs]
+
+    def __getLegRows(self, idxs: np.ndarray) -> np.ndarray:
+        """Get the rows of the legs of the positions, in order."""
+        return np.flatnonzero(np.repeat(np.isin(np.arange(len(self)), idxs), self.__positionColumns['numLegs']))
+
+    def __getContracts(self, idxs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the number of contracts and the contract multipliers of positions as object arrays of ints, so that the
+        values computed from them and the decimal prices are exact."""
+        return self.__positionColumns['numContracts'][idxs].astype(object), \
+            self.__positionColumns['contractMultiplier'][idxs].astype(object)
+
+    def __getRuleGroups(self, idxs: np.ndarray) -> Iterator[Tuple[PositionKinds, bool, np.ndarray]]:
+        """Split positions into groups of the same kind which are all short or all long, whose values are computed at
+        once with the rules of their primitive.
+
+        :return: kind, whether the positions are short, and mask of the positions in idxs, for each group.
+        """
+        kinds = self.__positionColumns['kind'][idxs]
+        isSold = self.__positionColumns['isSold'][idxs]
+        for kind in PositionKinds:
+            isKind = kinds == kind
+            for sold in (False, True):
+                mask = isKind & (isSold == sold)
+                if mask.any():
+                    yield kind, sold, mask
+
+    def __updateColumnar(self, chain: optionChain.OptionChain, idxs: np.ndarray, isUpdated: np.ndarray,
+                         isNotUpdated: np.ndarray) -> None:
+        """Update the put verticals, strangles and naked puts of an underlying with its option chain.
+
+        :param chain: option chain of the underlying.
+        :param idxs: indices of the positions of the underlying.
+        :param isUpdated: mask of the updated positions; set for the updated positions.
+        :param isNotUpdated: mask of the positions which could not be updated; set for these positions.
+        :raises ValueError: the option found in the chain for a leg has another ticker (see option.updateFields).
+        """
+        if not len(idxs):
+            return
+        positionColumns = self.__positionColumns
+        legColumns = self.__legColumns
+        legRows = self.__getLegRows(idxs)
+        chainPositions = chain.findPositions(legColumns['strikePrice'][legRows],
+                                             legColumns['expirationDateTime'][legRows],
+                                             legColumns['isCall'][legRows], legColumns['lookupTicker'][legRows])
+        isFound = chainPositions >= 0
+        marks = np.full(len(legRows), None, dtype=object)
+        marks[isFound] = chain.getValue(chainPositions[isFound], 'settlementPrice')
+        # A position is updated if all of its legs are in the chain and have a settlement price.
+        legStarts = np.cumsum(positionColumns['numLegs'][idxs]) - positionColumns['numLegs'][idxs]
+        isValid = np.logical_and.reduceat(np.not_equal(marks, None), legStarts)
+        isVertical = isValid & (positionColumns['kind'][idxs] == PositionKinds.PUT_VERTICAL)
+        if isVertical.any():
+            isValid[isVertical] = self.__checkVerticals(idxs[isVertical], marks[legStarts[isVertical]],
+                                                        marks[legStarts[isVertical] + 1])
+        isNotUpdated[idxs[~isValid]] = True
+        if not isValid.any():
+            return
+        isValidLeg = np.repeat(isValid, positionColumns['numLegs'][idxs])
+        idxs = idxs[isValid]
+        legRows = legRows[isValidLeg]
+        chainPositions = chainPositions[isValidLeg]
+        self.__updateLegs(chain, legRows, chainPositions)
+        self.__updateBuyingPowers(idxs)
+        isUpdated[idxs] = True
+
+    def __checkVerticals(self, idxs: np.ndarray, putToBuyMarks: np.ndarray, putToSellMarks: np.ndarray) -> np.ndarray:
+        """Check the new marks of put verticals with PutVertical.checkPrices(), as PutVertical.updateValues() does.
+
+        :return: mask of the verticals which pass the check.
+        """
+        legStarts = self.__getLegStarts(idxs)
+        entryPrices = self.__legColumns['entryPrice']
+        _, contractMultipliers = self.__getContracts(idxs)
+        isChecked = np.empty(len(idxs), dtype=bool)
+        for _, isSold, mask in self.__getRuleGroups(idxs):
+            isChecked[mask] = putVertical.PutVertical.checkPrices(
+                isSold, entryPrices[legStarts[mask]], entryPrices[legStarts[mask] + 1], putToBuyMarks[mask],
+                putToSellMarks[mask], contractMultipliers[mask])
+        if not isChecked.all():
+            logging.warning('Percent profit/loss was greater than 100; cannot update %s verticals.',
+                            np.count_nonzero(~isChecked))
+        return isChecked
+
+    def __updateLegs(self, chain: optionChain.OptionChain, legRows: np.ndarray, chainPositions: np.ndarray) -> None:
+        """Update the leg columns and the options of the legs with the values of the chain.
+
+        :raises ValueError: the option found in the chain for a leg is another option.
+        """
+        legColumns = self.__legColumns
+        fieldValues = {}
+        for fieldName in option.UPDATED_FIELDS:
+            values = chain.getValue(chainPositions, fieldName)
+            if fieldName in optionChain.FLOAT_FIELDS:
+                if fieldName in GREEKS:
+                    legColumns[fieldName][legRows] = values
+                values = np.where(np.isnan(values), None, values)
+            fieldValues[fieldName] = values
+        legColumns['mark'][legRows] = fieldValues['settlementPrice']
+        legColumns['underlyingPrice'][legRows] = fieldValues['underlyingPrice']
+        legColumns['dateTime'][legRows] = fieldValues['dateTime']
+        # The options of the legs remain the views of the primitives, and are updated as by option.updateOption().
+        daysLeft = []
+        for row, underlyingTicker, strikePrice, expirationDateTime, values in zip(
+                legRows, chain.getValue(chainPositions, 'underlyingTicker'),
+                chain.getValue(chainPositions, 'strikePrice'), chain.getValue(chainPositions, 'expirationDateTime'),
+                zip(*[fieldValues[fieldName].tolist() for fieldName in option.UPDATED_FIELDS])):
+            legOption = self.__legOptions[row]
+            legOption.updateFields(underlyingTicker, strikePrice, expirationDateTime, values)
+            daysLeft.append(self.__getDaysLeft(legOption))
+        legColumns['daysLeft'][legRows] = daysLeft
+
+    def __updateBuyingPowers(self, idxs: np.ndarray) -> None:
+        """Compute the buying power of put verticals, strangles and naked puts from the leg columns with the
+        computeBuyingPower() rules of their primitives."""
+        positionColumns = self.__positionColumns
+        marks = self.__legColumns['mark']
+        strikePrices = self.__legColumns['strikePrice']
+        underlyingPrices = self.__legColumns['underlyingPrice']
+        for kind, isSold, mask in self.__getRuleGroups(idxs):
+            groupIdxs = idxs[mask]
+            legStarts = self.__getLegStarts(groupIdxs)
+            numContracts, contractMultipliers = self.__getContracts(groupIdxs)
+            if kind == PositionKinds.PUT_VERTICAL:
+                # Legs: put to buy, put to sell.
+                buyingPowers = putVertical.PutVertical.computeBuyingPower(
+                    isSold, marks[legStarts], marks[legStarts + 1], strikePrices[legStarts],
+                    strikePrices[legStarts + 1], numContracts, contractMultipliers)
+            elif kind == PositionKinds.STRANGLE:
+                # Legs: put, call; the underlying price is the one of the call.
+                buyingPowers = strangle.Strangle.computeBuyingPower(
+                    marks[legStarts], marks[legStarts + 1], strikePrices[legStarts], strikePrices[legStarts + 1],
+                    underlyingPrices[legStarts + 1], numContracts, contractMultipliers)
+            else:
+                buyingPowers = nakedPut.NakedPut.computeBuyingPower(
+                    isSold, marks[legStarts], strikePrices[legStarts], underlyingPrices[legStarts], numContracts,
+                    contractMultipliers)
+            if kind != PositionKinds.STRANGLE and (buyingPowers <= 0).astype(bool).any():
+                logging.warning('Buying power cannot be <= 0; check option data.')
+            positionColumns['buyingPower'][groupIdxs] = buyingPowers
+
+    def __getProfitLossPercentages(self, idxs: np.ndarray) -> np.ndarray:
+        """Get the profit / loss of positions as a percentage of the initial credit or debit, with the
+        computeProfitLossPercentage() rules of their primitives."""
+        profitLosses = self.__getProfitLosses(idxs)
+        entryPrices = self.__legColumns['entryPrice']
+        profitLossPercentages = np.empty(len(idxs), dtype=object)
+        for kind, _, mask in self.__getRuleGroups(idxs):
+            groupIdxs = idxs[mask]
+            legStarts = self.__getLegStarts(groupIdxs)
+            numContracts, contractMultipliers = self.__getContracts(groupIdxs)
+            if kind == PositionKinds.PUT_VERTICAL:
+                profitLossPercentages[mask] = putVertical.PutVertical.computeProfitLossPercentage(
+                    profitLosses[mask], entryPrices[legStarts], entryPrices[legStarts + 1], numContracts,
+                    contractMultipliers)
+            elif kind == PositionKinds.STRANGLE:
+                profitLossPercentages[mask] = strangle.Strangle.computeProfitLossPercentage(
+                    profitLosses[mask], entryPrices[legStarts], entryPrices[legStarts + 1], numContracts,
+                    contractMultipliers)
+            elif kind == PositionKinds.NAKED_PUT:
+                profitLossPercentages[mask] = nakedPut.NakedPut.computeProfitLossPercentage(
+                    profitLosses[mask], entryPrices[legStarts], numContracts, contractMultipliers)
+            else:
+                profitLossPercentages[mask] = _toObjectArray([self.__positions[idx].calcProfitLossPercentage()
+                                                              for idx in groupIdxs])
+        return profitLossPercentages
+
+    def __getProfitLosses(self, idxs: np.ndarray) -> np.ndarray:
+        """Get the profit / loss of positions with the computeProfitLoss() rules of their primitives (object array of
+        decimals)."""
+        positionColumns = self.__positionColumns
+        entryPrices = self.__legColumns['entryPrice']
+        marks = self.__legColumns['mark']
+        profitLosses = np.empty(len(idxs), dtype=object)
+        for kind, isSold, mask in self.__getRuleGroups(idxs):
+            groupIdxs = idxs[mask]
+            legStarts = self.__getLegStarts(groupIdxs)
+            numContracts, contractMultipliers = self.__getContracts(groupIdxs)
+            if kind == PositionKinds.PUT_VERTICAL:
+                profitLosses[mask] = putVertical.PutVertical.computeProfitLoss(
+                    entryPrices[legStarts], entryPrices[legStarts + 1], marks[legStarts], marks[legStarts + 1],
+                    numContracts, contractMultipliers)
+            elif kind == PositionKinds.STRANGLE:
+                profitLosses[mask] = strangle.Strangle.computeProfitLoss(
+                    isSold, entryPrices[legStarts], entryPrices[legStarts + 1], marks[legStarts], marks[legStarts + 1],
+                    numContracts, contractMultipliers)
+            elif kind == PositionKinds.NAKED_PUT:
+                profitLosses[mask] = nakedPut.NakedPut.computeProfitLoss(
+                    isSold, entryPrices[legStarts], marks[legStarts], numContracts, contractMultipliers)
+            else:
+                profitLosses[mask] = positionColumns['profitLoss'][groupIdxs]
+        return profitLosses
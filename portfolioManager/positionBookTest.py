@@ -0,0 +1,232 @@
+import unittest
+import copy
+import dataclasses
+import datetime
+import decimal
+import numpy as np
+from base import call
+from base import optionChain
+from base import put
+from base import slottedOption
+from optionPrimitives import optionPrimitive, nakedPut, putVertical, strangle
+from portfolioManager import positionBook
+from riskManager import putVerticalRiskManagement, strangleRiskManagement
+
+
+class LeglessPosition(optionPrimitive.OptionPrimitive):
+    """Option primitive which does not implement getLegs(); its values are the values of another primitive."""
+
+    def __init__(self, position: optionPrimitive.OptionPrimitive) -> None:
+        self.position = position
+
+    def getBuyingPower(self) -> decimal.Decimal:
+        return self.position.getBuyingPower()
+
+    def getDelta(self) -> float:
+        return self.position.getDelta()
+
+    def getVega(self) -> float:
+        return self.position.getVega()
+
+    def getTheta(self) -> float:
+        return self.position.getTheta()
+
+    def getGamma(self) -> float:
+        return self.position.getGamma()
+
+    def calcProfitLoss(self) -> decimal.Decimal:
+        return self.position.calcProfitLoss()
+
+    def calcProfitLossPercentage(self) -> float:
+        return self.position.calcProfitLossPercentage()
+
+    def updateValues(self, tickData) -> bool:
+        return self.position.updateValues(tickData)
+
+    def getUnderlyingTicker(self) -> str:
+        return self.position.getUnderlyingTicker()
+
+    def getNumContracts(self) -> int:
+        return self.position.getNumContracts()
+
+    def getContractMultiplier(self) -> int:
+        return self.position.getContractMultiplier()
+
+
+class TestPositionBook(unittest.TestCase):
+
+    def createPut(self, strikePrice: int, price: decimal.Decimal, delta: float) -> put.Put:
+        return put.Put(underlyingTicker='SPX', underlyingPrice=decimal.Decimal('2786.24'),
+                       strikePrice=decimal.Decimal(strikePrice), delta=delta, gamma=0.01, theta=0.02, vega=0.03,
+                       dateTime=datetime.datetime(2021, 1, 1), expirationDateTime=datetime.datetime(2021, 1, 20),
+                       tradePrice=price, settlementPrice=price)
+
+    def createCall(self, strikePrice: int, price: decimal.Decimal, delta: float) -> call.Call:
+        return call.Call(underlyingTicker='SPX', underlyingPrice=decimal.Decimal('2786.24'),
+                         strikePrice=decimal.Decimal(strikePrice), delta=delta, gamma=0.01, theta=0.02, vega=0.03,
+                         dateTime=datetime.datetime(2021, 1, 1), expirationDateTime=datetime.datetime(2021, 1, 20),
+                         tradePrice=price, settlementPrice=price)
+
+    def createChain(self, day: int, prices: dict, underlyingPrice: str = '2801.5') -> optionChain.OptionChain:
+        """Create a chain with the options of the positions of setUp, repriced with prices[strikePrice]."""
+        options = []
+        for legOption in [self.createPut(strike, decimal.Decimal(1), -0.1) for strike in (2600, 2650, 2700)] + [
+                self.createCall(2900, decimal.Decimal(1), 0.1)]:
+            price = prices.get(int(legOption.strikePrice))
+            options.append(dataclasses.replace(
+                legOption, underlyingPrice=decimal.Decimal(underlyingPrice), tradePrice=None, settlementPrice=price,
+                bidPrice=price, askPrice=price, dateTime=datetime.datetime(2021, 1, day), delta=legOption.delta * 2,
+                rho=None if legOption.strikePrice == 2600 else 0.5, volume=day))
+        return optionChain.OptionChain.fromOptions(options)
+
+    def setUp(self):
+        self.__putVertical = putVertical.PutVertical(
+            orderQuantity=2, contractMultiplier=100, putToBuy=self.createPut(2600, decimal.Decimal('3.25'), -0.1),
+            putToSell=self.createPut(2650, decimal.Decimal('5.50'), -0.2),
+            buyOrSell=optionPrimitive.TransactionType.SELL)
+        self.__nakedPut = nakedPut.NakedPut(orderQuantity=3, contractMultiplier=100,
+                                            putToBuyOrSell=self.createPut(2700, decimal.Decimal('9.10'), -0.3),
+                                            buyOrSell=optionPrimitive.TransactionType.BUY)
+        self.__shortNakedPut = nakedPut.NakedPut(orderQuantity=1, contractMultiplier=100,
+                                                 putToBuyOrSell=self.createPut(2700, decimal.Decimal('9.10'), -0.3),
+                                                 buyOrSell=optionPrimitive.TransactionType.SELL)
+        self.__strangle = strangle.Strangle(orderQuantity=4, contractMultiplier=100,
+                                            putOpt=self.createPut(2650, decimal.Decimal('5.50'), -0.2),
+                                            callOpt=self.createCall(2900, decimal.Decimal('4.25'), 0.15),
+                                            buyOrSell=optionPrimitive.TransactionType.SELL)
+        self.__positions = [self.__putVertical, self.__nakedPut, self.__shortNakedPut, self.__strangle]
+        self.__book = positionBook.PositionBook()
+        self.__book.addPositions(self.__positions)
+
+    def testValuesMatchPrimitives(self):
+        """Tests that the positions are updated from the chain columns as the primitives update themselves, and that
+        the profit / loss, greeks and buying power of the positions match those of the updated primitives."""
+        chain = self.createChain(4, {2600: decimal.Decimal('2.75'), 2650: decimal.Decimal('4.10'),
+                                     2700: decimal.Decimal('11.30'), 2900: decimal.Decimal('3.15')})
+        primitives = copy.deepcopy(self.__positions)
+        for primitive in primitives:
+            self.assertTrue(primitive.updateValues(chain))
+        isUpdated, isNotUpdated = self.__book.updateMarks({'SPX': chain})
+        self.assertEqual(isUpdated.tolist(), [True] * 4)
+        self.assertEqual(isNotUpdated.tolist(), [False] * 4)
+
+        for position, primitive in zip(self.__positions, primitives):
+            self.assertEqual([legOption for legOption, _ in position.getLegs()],
+                             [legOption for legOption, _ in primitive.getLegs()])
+        self.assertEqual([str(profitLoss) for profitLoss in self.__book.getProfitLosses()],
+                         [str(primitive.calcProfitLoss()) for primitive in primitives])
+        self.assertEqual([str(buyingPower) for buyingPower in self.__book.getBuyingPowers()],
+                         [str(primitive.getBuyingPower()) for primitive in primitives])
+        self.assertEqual(list(self.__book.getGreeks('delta')), [primitive.getDelta() for primitive in primitives])
+        self.assertEqual(list(self.__book.getGreeks('vega')), [primitive.getVega() for primitive in primitives])
+        self.assertEqual(list(self.__book.getNumContracts()), [2, 3, 1, 4])
+
+    def testSlottedOptions(self):
+        """Tests that the legs of positions opened with slotted options are updated."""
+        putToSell = slottedOption.SlottedPut(**dataclasses.asdict(self.createPut(2700, decimal.Decimal('9.10'), -0.3)))
+        position = nakedPut.NakedPut(orderQuantity=1, contractMultiplier=100, putToBuyOrSell=putToSell,
+                                     buyOrSell=optionPrimitive.TransactionType.SELL)
+        book = positionBook.PositionBook()
+        book.addPositions([position])
+        book.updateMarks({'SPX': self.createChain(4, {2700: decimal.Decimal('11.30')})})
+        self.assertEqual(putToSell.settlementPrice, decimal.Decimal('11.30'))
+        self.assertEqual(putToSell.dateTime, datetime.datetime(2021, 1, 4))
+        self.assertEqual(str(book.getProfitLosses()[0]), str(position.calcProfitLoss()))
+
+    def testPositionsWithoutLegs(self):
+        """Tests that positions whose primitive does not implement getLegs() are updated by the primitive."""
+        legless = LeglessPosition(copy.deepcopy(self.__strangle))
+        with self.assertRaises(NotImplementedError):
+            legless.getLegs()
+        positions = [self.__putVertical, legless, self.__nakedPut]
+        book = positionBook.PositionBook()
+        book.addPositions(positions)
+        self.assertEqual(list(book.getProfitLosses()), [0, 0, 0])
+        chain = self.createChain(4, {2600: decimal.Decimal('2.75'), 2650: decimal.Decimal('4.10'),
+                                     2700: decimal.Decimal('11.30'), 2900: decimal.Decimal('3.15')})
+        isUpdated, _ = book.updateMarks({'SPX': chain})
+        self.assertEqual(isUpdated.tolist(), [True] * 3)
+        self.assertEqual(list(book.getProfitLosses()), [position.calcProfitLoss() for position in positions])
+        self.assertEqual(list(book.getBuyingPowers()), [position.getBuyingPower() for position in positions])
+        self.assertEqual(list(book.getGreeks('delta')), [position.getDelta() for position in positions])
+        book.removePositions([0])
+        self.assertEqual(list(book.getGreeks('gamma')), [position.getGamma() for position in positions[1:]])
+
+    def testPositionsNotUpdated(self):
+        """Tests that positions with a leg missing from the chain, or without a settlement price, or a short vertical
+        with a profit of more than 100 percent are not updated, and that positions without a chain keep their
+        values."""
+        chain = self.createChain(4, {2600: decimal.Decimal('2.75'), 2650: decimal.Decimal('4.10'),
+                                     2900: decimal.Decimal('3.15')})
+        isUpdated, isNotUpdated = self.__book.updateMarks({'SPX': chain})
+        self.assertEqual(isUpdated.tolist(), [True, False, False, True])
+        self.assertEqual(isNotUpdated.tolist(), [False, True, True, False])
+        self.assertEqual(self.__nakedPut.getLegs()[0][0].dateTime, datetime.datetime(2021, 1, 1))
+
+        chain = self.createChain(5, {2600: decimal.Decimal('9.75'), 2650: decimal.Decimal('1.10'),
+                                     2700: decimal.Decimal('11.30'), 2900: decimal.Decimal('3.15')})
+        primitive = copy.deepcopy(self.__putVertical)
+        self.assertFalse(primitive.updateValues(chain))
+        isUpdated, isNotUpdated = self.__book.updateMarks({'SPX': chain})
+        self.assertEqual(isNotUpdated.tolist(), [True, False, False, False])
+        self.assertEqual(self.__putVertical.getLegs()[0][0].settlementPrice, decimal.Decimal('2.75'))
+
+        isUpdated, isNotUpdated = self.__book.updateMarks({'SPX': None})
+        self.assertFalse(isUpdated.any() or isNotUpdated.any())
+
+    def testPositionsToClose(self):
+        """Tests that the close conditions of the risk management strategies give the same result as managePosition."""
+        managements = [
+            putVerticalRiskManagement.PutVerticalRiskManagement(
+                putVerticalRiskManagement.PutVerticalManagementStrategyTypes.CLOSE_AT_50_PERCENT_OR_21_DAYS_OR_HALFLOSS,
+                None),
+            putVerticalRiskManagement.PutVerticalRiskManagement(
+                putVerticalRiskManagement.PutVerticalManagementStrategyTypes.HOLD_TO_EXPIRATION, 10),
+            putVerticalRiskManagement.PutVerticalRiskManagement(
+                putVerticalRiskManagement.PutVerticalManagementStrategyTypes.CLOSE_AT_50_PERCENT, None),
+            strangleRiskManagement.StrangleRiskManagement(
+                strangleRiskManagement.StrangleManagementStrategyTypes.CLOSE_AT_50_PERCENT)]
+        for day, prices in ((4, {2600: '2.75', 2650: '4.10', 2700: '11.30', 2900: '3.15'}),
+                            (5, {2600: '1.75', 2650: '2.50', 2700: '4.30', 2900: '1.15'}),
+                            (12, {2600: '2.75', 2650: '4.10', 2700: '11.30', 2900: '3.15'}),
+                            (19, {2600: '2.75', 2650: '4.10', 2700: '11.30', 2900: '3.15'})):
+            positions = copy.deepcopy(self.__positions)
+            book = positionBook.PositionBook()
+            book.addPositions(positions, managements)
+            chain = self.createChain(day, {strike: decimal.Decimal(price) for strike, price in prices.items()})
+            isUpdated, _ = book.updateMarks({'SPX': chain})
+            isClosed = book.getPositionsToClose(np.flatnonzero(isUpdated))
+            self.assertEqual(isClosed.tolist(), [management.managePosition(position) for management, position in
+                                                 zip(managements, positions)])
+
+    def testAddAndRemovePositions(self):
+        """Tests that positions added one at a time and removed keep their values and the values of their legs."""
+        book = positionBook.PositionBook()
+        positions = [copy.deepcopy(self.__positions[idx % 4]) for idx in range(50)]
+        for position in positions:
+            book.addPositions([position])
+        self.assertEqual(len(book), 50)
+        book.removePositions(list(range(0, 50, 3)))
+        positions = [position for idx, position in enumerate(positions) if idx % 3]
+        self.assertEqual(book.getPositions(), positions)
+        chain = self.createChain(4, {2600: decimal.Decimal('2.75'), 2650: decimal.Decimal('4.10'),
+                                     2700: decimal.Decimal('11.30'), 2900: decimal.Decimal('3.15')})
+        book.updateMarks({'SPX': chain})
+        self.assertEqual([str(profitLoss) for profitLoss in book.getProfitLosses()],
+                         [str(position.calcProfitLoss()) for position in positions])
+        self.assertEqual(list(book.getBuyingPowers()), [position.getBuyingPower() for position in positions])
+        self.assertEqual(list(book.getGreeks('theta')), [position.getTheta() for position in positions])
+
+        book.removePositions(list(range(len(book))))
+        self.assertEqual(len(book), 0)
+        self.assertEqual(len(book.getProfitLosses()), 0)
+        self.assertEqual(len(book.getGreeks('gamma')), 0)
+
+    def testUnknownGreek(self):
+        """Tests that an exception is raised for an unknown greek."""
+        with self.assertRaisesRegex(ValueError, 'Greek must be one of delta, gamma, theta, vega.'):
+            self.__book.getGreeks('rho')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,252 @@
+import enum
+import math
+import numpy as np
+import pandas as pd
+from base import optionChain
+from typing import Any, Dict, Mapping, MutableMapping, Optional, Text, Union
+
+"""
+This file prices options and computes their greeks with the Black-Scholes and Black-76 models, for whole option chains
+at once with NumPy.
+"""
+
+# Greeks computed by the models, in the units used by the data providers: delta and gamma per point of the underlying,
+# theta per calendar day, vega per volatility point (1%), and rho per rate point (1%).
+GREEK_FIELDS = ('delta', 'gamma', 'theta', 'vega', 'rho')
+DAYS_PER_YEAR = 365.0
+
+_SQRT_2PI = math.sqrt(2.0 * math.pi)
+
+ArrayLike = Union[float, np.ndarray]
+
+
+class PricingModels(enum.Enum):
+    """Models used to price the options of an underlying.
+
+    BLACK_SCHOLES:  options on a spot underlying (index or equity) with a continuous dividend yield.
+    BLACK_76:  options on a futures contract; the underlying price is the futures price.
+    """
+    BLACK_SCHOLES = 0
+    BLACK_76 = 1
+
+
+class GreeksModes(enum.Enum):
+    """Greeks used for the options of a chain.
+
+    CSV:  the greeks read from the data provider.
+    FILL_MISSING:  the greeks read from the data provider; missing greeks are computed.
+    OVERRIDE:  the computed greeks, for all options.
+    """
+    CSV = 0
+    FILL_MISSING = 1
+    OVERRIDE = 2
+
+
+def normPdf(x: ArrayLike) -> np.ndarray:
+    """Standard normal probability density function."""
+    x = np.asarray(x, dtype=np.float64)
+    return np.exp(-0.5 * x * x) / _SQRT_2PI
+
+
+def normCdf(x: ArrayLike) -> np.ndarray:
+    """Standard normal cumulative distribution function, accurate to double precision (algorithm 5666 of Hart, 1968,
+    as given by West, 2005).
+
+    :param x: values.
+    :return: float64 array of probabilities (NaN for NaN values).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    absX = np.abs(x)
+    exponential = np.exp(-0.5 * absX * absX)
+    # Rational approximation for |x| < 7.07; continued fraction beyond.
+    numerator = 3.52624965998911e-02
+    for coefficient in (0.700383064443688, 6.37396220353165, 33.912866078383, 112.079291497871, 221.213596169931,
+                        220.206867912376):
+        numerator = numerator * absX + coefficient
+    denominator = 8.83883476483184e-02
+    for coefficient in (1.75566716318264, 16.064177579207, 86.7807322029461, 296.564248779674, 637.333633378831,
+                        793.826512519948, 440.413735824752):
+        denominator = denominator * absX + coefficient
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraction = absX + 0.65
+        for term in (4.0, 3.0, 2.0, 1.0):
+            fraction = absX + term / fraction
+        tail = np.where(absX < 7.07106781186547, exponential * numerator / denominator,
+                        exponential / fraction / 2.506628274631)
+    tail = np.where(absX > 37.0, 0.0, tail)
+    return np.where(x > 0, 1.0 - tail, tail)
+
+
+def priceOptions(pricingModel: PricingModels, isCall: ArrayLike, underlyingPrice: ArrayLike, strikePrice: ArrayLike,
+                 yearsToExpiration: ArrayLike, volatility: ArrayLike, riskFreeRate: ArrayLike = 0.0,
+                 dividendYield: ArrayLike = 0.0) -> Dict[Text, np.ndarray]:
+    """Compute the prices and greeks of options; the arguments are broadcast against each other.
+
+    Options at or after expiration are worth their intrinsic value, with a delta of 1 / -1 in the money and 0 out of
+    the money and no other greeks.  The results are NaN for missing (NaN) inputs and non-positive volatilities.
+
+    :param pricingModel: BLACK_SCHOLES or BLACK_76.
+    :param isCall: True for calls and False for puts.
+    :param underlyingPrice: price of the underlying (the futures price for BLACK_76).
+    :param strikePrice: strike price.
+    :param yearsToExpiration: time to expiration in years.
+    :param volatility: annualized volatility (e.g., 0.2 for 20%).
+    :param riskFreeRate: continuously compounded risk-free rate (e.g., 0.05 for 5%).
+    :param dividendYield: continuous dividend yield; only used by BLACK_SCHOLES.
+    :return: dictionary with a float64 array for 'price' and for each of the GREEK_FIELDS.
+    """
+    isCall = np.asarray(isCall, dtype=bool)
+    underlyingPrice = np.asarray(underlyingPrice, dtype=np.float64)
+    strikePrice = np.asarray(strikePrice, dtype=np.float64)
+    yearsToExpiration = np.asarray(yearsToExpiration, dtype=np.float64)
+    volatility = np.asarray(volatility, dtype=np.float64)
+    riskFreeRate = np.asarray(riskFreeRate, dtype=np.float64)
+    # Cost of carry: the underlying of a futures option costs nothing to hold.
+    if pricingModel == PricingModels.BLACK_76:
+        carry = np.zeros_like(riskFreeRate)
+    else:
+        carry = riskFreeRate - np.asarray(dividendYield, dtype=np.float64)
+    sign = np.where(isCall, 1.0, -1.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expired = yearsToExpiration <= 0
+        # The model values of expired options are NaN; they are replaced by the intrinsic values below.
+        years = np.where(expired, np.nan, yearsToExpiration)
+        volatility = np.where(volatility > 0, volatility, np.nan)
+        sqrtYears = np.sqrt(years)
+        volatilitySqrtYears = volatility * sqrtYears
+        d1 = (np.log(underlyingPrice / strikePrice) + (carry + 0.5 * volatility * volatility) * years) / (
+            volatilitySqrtYears)
+        d2 = d1 - volatilitySqrtYears
+        underlyingDiscount = np.exp((carry - riskFreeRate) * years)
+        strikeDiscount = np.exp(-riskFreeRate * years)
+        discountedUnderlying = underlyingPrice * underlyingDiscount
+        discountedStrike = strikePrice * strikeDiscount
+        cdfD1 = normCdf(sign * d1)
+        cdfD2 = normCdf(sign * d2)
+        pdfD1 = normPdf(d1)
+
+        price = sign * (discountedUnderlying * cdfD1 - discountedStrike * cdfD2)
+        delta = sign * underlyingDiscount * cdfD1
+        gamma = underlyingDiscount * pdfD1 / (underlyingPrice * volatilitySqrtYears)
+        vega = discountedUnderlying * pdfD1 * sqrtYears
+        theta = (-discountedUnderlying * pdfD1 * volatility / (2.0 * sqrtYears) - sign * (
+            carry - riskFreeRate) * discountedUnderlying * cdfD1 - sign * riskFreeRate * discountedStrike * cdfD2)
+        if pricingModel == PricingModels.BLACK_76:
+            rho = -years * price
+        else:
+            rho = sign * discountedStrike * years * cdfD2
+
+        intrinsicValue = np.maximum(sign * (underlyingPrice - strikePrice), 0.0)
+        inTheMoney = intrinsicValue > 0
+        hasPrices = ~(np.isnan(underlyingPrice) | np.isnan(strikePrice))
+        expired = expired & hasPrices
+        results = {
+            'price': np.where(expired, intrinsicValue, price),
+            'delta': np.where(expired, np.where(inTheMoney, sign, 0.0), delta),
+            'gamma': np.where(expired, 0.0, gamma),
+            'theta': np.where(expired, 0.0, theta / DAYS_PER_YEAR),
+            'vega': np.where(expired, 0.0, vega / 100.0),
+            'rho': np.where(expired, 0.0, rho / 100.0),
+        }
+    return results
+
+
+def _convertUniqueValues(column: np.ndarray, dtype: Any, missingValue: Any) -> np.ndarray:
+    """Convert an object column to a NumPy type by converting each distinct value only once.
+
+    :param column: object column; None for missing values.
+    :param dtype: NumPy type of the result.
+    :param missingValue: value used for missing values.
+    :return: array of converted values.
+    """
+    codes, uniques = pd.factorize(column)
+    convertedUniques = np.append(np.asarray(uniques).astype(dtype), np.array(missingValue, dtype=dtype))
+    # Missing values have the code -1, which selects the missing value appended at the end.
+    return convertedUniques[codes]
+
+
+def getYearsToExpiration(dateTimes: np.ndarray, expirationDateTimes: np.ndarray) -> np.ndarray:
+    """Get the time to expiration in years (of 365 calendar days).
+
+    :param dateTimes: date / times of the options (datetime objects or datetime64).
+    :param expirationDateTimes: expiration date / times of the options.
+    :return: float64 array (NaN for missing date / times).
+    """
+    timeToExpiration = _toDateTime64(expirationDateTimes) - _toDateTime64(dateTimes)
+    return timeToExpiration / np.timedelta64(1, 'D') / DAYS_PER_YEAR
+
+
+def _toDateTime64(column: np.ndarray) -> np.ndarray:
+    column = np.asarray(column)
+    if column.dtype != object:
+        return column.astype('datetime64[us]')
+    return _convertUniqueValues(column, 'datetime64[us]', np.datetime64('NaT'))
+
+
+def toFloatArray(column: np.ndarray) -> np.ndarray:
+    """Convert a column of numbers (e.g., decimal.Decimal or money.Money objects) to a float64 array.
+
+    :param column: column of numbers; None for missing values.
+    :return: float64 array (NaN for missing values).
+    """
+    column = np.asarray(column)
+    if column.dtype != object:
+        return column.astype(np.float64)
+    return _convertUniqueValues(column, np.float64, np.nan)
+
+
+def getPricingModel(providerConfig: Mapping[Text, Any]) -> PricingModels:
+    """Get the pricing model of a data provider: the pricing_model entry of its dataProviders.json configuration, or
+    BLACK_SCHOLES if there is none.
+
+    :param providerConfig: data provider entry from the dataProviders.json file.
+    :raises ValueError: The pricing model is not supported.
+    :return: pricing model.
+    """
+    modelName = providerConfig.get('pricing_model', PricingModels.BLACK_SCHOLES.name)
+    if modelName not in PricingModels.__members__:
+        raise ValueError('Pricing model %s in dataProviders.json is not supported.' % modelName)
+    return PricingModels[modelName]
+
+
+def computeChainGreeks(columns: Mapping[Text, np.ndarray], pricingModel: PricingModels, riskFreeRate: float = 0.0,
+                       dividendYield: float = 0.0, volatility: Optional[np.ndarray] = None) -> Dict[Text, np.ndarray]:
+    """Compute the prices and greeks of the options of typed option chain columns (see chainColumns.buildColumns).
+
+    :param columns: typed columns of one or more option chains.
+    :param pricingModel: BLACK_SCHOLES or BLACK_76.
+    :param riskFreeRate: continuously compounded risk-free rate.
+    :param dividendYield: continuous dividend yield; only used by BLACK_SCHOLES.
+    :param volatility: volatility of each option; defaults to the impliedVol column.
+    :return: dictionary with a float64 array for 'price' and for each of the GREEK_FIELDS.
+    """
+    if volatility is None:
+        volatility = columns['impliedVol']
+    return priceOptions(pricingModel, columns[optionChain.IS_CALL_COLUMN], toFloatArray(columns['underlyingPrice']),
+                        toFloatArray(columns['strikePrice']),
+                        getYearsToExpiration(columns['dateTime'], columns['expirationDateTime']),
+                        toFloatArray(volatility), riskFreeRate, dividendYield)
+
+
+def applyGreeks(columns: MutableMapping[Text, np.ndarray], greeksMode: GreeksModes, pricingModel: PricingModels,
+                riskFreeRate: float = 0.0, dividendYield: float = 0.0) -> None:
+    """Fill or override the greek columns of typed option chain columns with the computed greeks.
+
+    :param columns: typed columns of one or more option chains; the greek columns are replaced.
+    :param greeksMode: CSV leaves the columns unchanged; FILL_MISSING replaces the missing (NaN) greeks; OVERRIDE
+                       replaces all greeks (with NaN where they cannot be computed, e.g., without implied volatility).
+    :param pricingModel: BLACK_SCHOLES or BLACK_76.
+    :param riskFreeRate: continuously compounded risk-free rate.
+    :param dividendYield: continuous dividend yield; only used by BLACK_SCHOLES.
+    """
+    if greeksMode == GreeksModes.CSV or not len(columns['dateTime']):
+        return
+    if greeksMode == GreeksModes.FILL_MISSING and not any(np.isnan(columns[greek]).any() for greek in GREEK_FIELDS):
+        return
+    greeks = computeChainGreeks(columns, pricingModel, riskFreeRate, dividendYield)
+    for greek in GREEK_FIELDS:
+        if greeksMode == GreeksModes.OVERRIDE:
+            columns[greek] = greeks[greek]
+        else:
+            columns[greek] = np.where(np.isnan(columns[greek]), greeks[greek], columns[greek])
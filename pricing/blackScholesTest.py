@@ -0,0 +1,117 @@
+import datetime
+import decimal
+import math
+import unittest
+import numpy as np
+from pricing import blackScholes
+
+
+class TestBlackScholes(unittest.TestCase):
+
+    def testNormCdf(self):
+        """Tests the normal cumulative distribution function against math.erfc."""
+        x = np.linspace(-10.0, 10.0, 2001)
+        expected = np.array([0.5 * math.erfc(-value / math.sqrt(2.0)) for value in x])
+        np.testing.assert_allclose(blackScholes.normCdf(x), expected, rtol=1e-14, atol=1e-16)
+        self.assertEqual(blackScholes.normCdf(-40.0), 0.0)
+        self.assertEqual(blackScholes.normCdf(40.0), 1.0)
+        self.assertTrue(np.isnan(blackScholes.normCdf(np.nan)))
+
+    def testBlackScholesPrices(self):
+        """Tests the Black-Scholes prices of the call and put of Hull's example 15.6."""
+        results = blackScholes.priceOptions(blackScholes.PricingModels.BLACK_SCHOLES, [True, False], 42.0, 40.0, 0.5,
+                                            0.2, riskFreeRate=0.1)
+        np.testing.assert_allclose(results['price'], [4.7594, 0.8086], atol=1e-4)
+
+    def testGreeksMatchFiniteDifferences(self):
+        """Tests that the greeks of both models match finite differences of the prices, in the provider units."""
+        underlyingPrice, strikePrice, years, volatility, rate = 100.0, 95.0, 0.3, 0.25, 0.03
+        step = 1e-4
+        for pricingModel in blackScholes.PricingModels:
+            def price(isCall, s=underlyingPrice, t=years, v=volatility, r=rate):
+                return blackScholes.priceOptions(pricingModel, isCall, s, strikePrice, t, v, r, 0.01)['price']
+
+            for isCall in (True, False):
+                greeks = blackScholes.priceOptions(pricingModel, isCall, underlyingPrice, strikePrice, years,
+                                                   volatility, rate, 0.01)
+                differences = {
+                    'delta': (price(isCall, s=underlyingPrice + step) - price(isCall, s=underlyingPrice - step)) / (
+                        2 * step),
+                    'gamma': (price(isCall, s=underlyingPrice + step) - 2 * price(isCall) + price(
+                        isCall, s=underlyingPrice - step)) / step ** 2,
+                    'theta': -(price(isCall, t=years + step) - price(isCall, t=years - step)) / (2 * step) / 365,
+                    'vega': (price(isCall, v=volatility + step) - price(isCall, v=volatility - step)) / (
+                        2 * step) / 100,
+                    'rho': (price(isCall, r=rate + step) - price(isCall, r=rate - step)) / (2 * step) / 100,
+                }
+                for greek, difference in differences.items():
+                    self.assertAlmostEqual(float(greeks[greek]), float(difference), places=5,
+                                           msg='%s %s %s' % (pricingModel, isCall, greek))
+
+    def testBlack76PutCallParity(self):
+        """Tests that Black-76 call minus put is the discounted futures price minus the discounted strike."""
+        results = blackScholes.priceOptions(blackScholes.PricingModels.BLACK_76, [True, False], 2786.0, 2690.0,
+                                            0.05, 0.18, riskFreeRate=0.02)
+        self.assertAlmostEqual(float(results['price'][0] - results['price'][1]),
+                               (2786.0 - 2690.0) * math.exp(-0.02 * 0.05), places=9)
+
+    def testExpiredAndMissingInputs(self):
+        """Tests expired options are worth their intrinsic value and missing inputs give NaN."""
+        results = blackScholes.priceOptions(blackScholes.PricingModels.BLACK_SCHOLES, [True, False, True, True],
+                                            [100.0, 100.0, 100.0, 100.0], [90.0, 90.0, 90.0, 90.0],
+                                            [0.0, -0.1, 0.1, 0.1], [0.2, 0.2, np.nan, 0.0])
+        np.testing.assert_array_equal(results['price'][:2], [10.0, 0.0])
+        np.testing.assert_array_equal(results['delta'][:2], [1.0, 0.0])
+        np.testing.assert_array_equal(results['gamma'][:2], [0.0, 0.0])
+        self.assertTrue(np.isnan(results['delta'][2:]).all())
+
+    def createColumns(self):
+        dateTime = datetime.datetime(2011, 1, 3)
+        expirationDateTime = datetime.datetime(2011, 2, 18)
+        return {
+            'isCall': np.array([False, True]),
+            'underlyingPrice': np.array([decimal.Decimal('1271.87'), decimal.Decimal('1271.87')], dtype=object),
+            'strikePrice': np.array([decimal.Decimal('1150'), None], dtype=object),
+            'dateTime': np.array([dateTime, dateTime], dtype=object),
+            'expirationDateTime': np.array([expirationDateTime, expirationDateTime], dtype=object),
+            'impliedVol': np.array([0.22705, 0.19]),
+            'delta': np.array([np.nan, 0.9]),
+            'gamma': np.array([0.001745, 0.002]),
+            'theta': np.array([-0.205449, -0.1]),
+            'vega': np.array([0.802868, 0.7]),
+            'rho': np.array([-0.169491, 1.3]),
+        }
+
+    def testApplyGreeks(self):
+        """Tests that greeks are filled where missing or overridden, and match the provider greeks of a CSV row."""
+        columns = self.createColumns()
+        # The dividend yield is implied by the forward price of the iVolatility sample row (1269.061).
+        blackScholes.applyGreeks(columns, blackScholes.GreeksModes.FILL_MISSING,
+                                 blackScholes.PricingModels.BLACK_SCHOLES, dividendYield=0.0175)
+        self.assertAlmostEqual(columns['delta'][0], -0.102341, delta=0.002)
+        self.assertEqual(columns['delta'][1], 0.9)
+        self.assertEqual(columns['vega'][0], 0.802868)
+
+        columns = self.createColumns()
+        blackScholes.applyGreeks(columns, blackScholes.GreeksModes.OVERRIDE, blackScholes.PricingModels.BLACK_SCHOLES,
+                                 dividendYield=0.0175)
+        self.assertAlmostEqual(columns['vega'][0], 0.802868, delta=0.01)
+        self.assertAlmostEqual(columns['gamma'][0], 0.001745, delta=0.00001)
+        # The strike price of the call is missing.
+        self.assertTrue(np.isnan(columns['delta'][1]))
+
+        columns = self.createColumns()
+        blackScholes.applyGreeks(columns, blackScholes.GreeksModes.CSV, blackScholes.PricingModels.BLACK_SCHOLES)
+        self.assertTrue(np.isnan(columns['delta'][0]))
+
+    def testGetPricingModel(self):
+        """Tests that the pricing model is read from the data provider configuration."""
+        self.assertEqual(blackScholes.getPricingModel({}), blackScholes.PricingModels.BLACK_SCHOLES)
+        self.assertEqual(blackScholes.getPricingModel({'pricing_model': 'BLACK_76'}),
+                         blackScholes.PricingModels.BLACK_76)
+        with self.assertRaisesRegex(ValueError, 'Pricing model SABR in dataProviders.json is not supported.'):
+            blackScholes.getPricingModel({'pricing_model': 'SABR'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import numpy as np
+from base import optionChain
+from pricing import blackScholes
+from typing import Mapping, MutableMapping, Text, Tuple, Union
+
+"""
+This file computes the implied volatilities of whole option chains at once from the option prices.
+"""
+
+ArrayLike = Union[float, bool, np.ndarray, list]
+
+# Columns of the typed option chain columns (see chainColumns.buildColumns) used to solve the implied volatilities.
+# The tradePrice column is the mid of the bid and ask prices, or the settlementPrice for futures options.
+INPUT_FIELDS = (optionChain.IS_CALL_COLUMN, 'tradePrice', 'underlyingPrice', 'strikePrice', 'dateTime',
+                'expirationDateTime')
+
+
+def _getPriceBounds(pricingModel: blackScholes.PricingModels, isCall: np.ndarray, underlyingPrice: np.ndarray,
+                    strikePrice: np.ndarray, yearsToExpiration: np.ndarray, riskFreeRate: float,
+                    dividendYield: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the no-arbitrage lower and upper bounds of the option prices (the prices at zero and infinite volatility)."""
+    if pricingModel == blackScholes.PricingModels.BLACK_76:
+        dividendYield = riskFreeRate
+    discountedUnderlying = underlyingPrice * np.exp(-dividendYield * yearsToExpiration)
+    discountedStrike = strikePrice * np.exp(-riskFreeRate * yearsToExpiration)
+    lowerBound = np.maximum(np.where(isCall, discountedUnderlying - discountedStrike,
+                                     discountedStrike - discountedUnderlying), 0.0)
+    upperBound = np.where(isCall, discountedUnderlying, discountedStrike)
+    return lowerBound, upperBound
+
+
+def solveImpliedVolatility(pricingModel: blackScholes.PricingModels, isCall: ArrayLike, targetPrice: ArrayLike,
+                           underlyingPrice: ArrayLike, strikePrice: ArrayLike, yearsToExpiration: ArrayLike,
+                           riskFreeRate: float = 0.0, dividendYield: float = 0.0, tolerance: float = 1e-8,
+                           maxIterations: int = 100, lowerVolatility: float = 1e-4,
+                           upperVolatility: float = 5.0) -> np.ndarray:
+    """Compute the implied volatilities of options from their prices; the arguments are broadcast against each other.
+
+    All options are solved together with a safeguarded Newton iteration: each option keeps a bracket of volatilities
+    around its solution, and a bisection step is taken instead of the Newton step when the Newton step leaves the
+    bracket.  Only the options which have not converged are priced on each iteration.
+
+    The result is NaN for missing (NaN) inputs, options at or after expiration, prices outside the no-arbitrage bounds
+    and options whose implied volatility is not between lowerVolatility and upperVolatility.
+
+    :param pricingModel: BLACK_SCHOLES or BLACK_76.
+    :param isCall: True for calls and False for puts.
+    :param targetPrice: price of the options (e.g., the mid of the bid and ask prices).
+    :param underlyingPrice: price of the underlying (the futures price for BLACK_76).
+    :param strikePrice: strike price.
+    :param yearsToExpiration: time to expiration in years.
+    :param riskFreeRate: continuously compounded risk-free rate.
+    :param dividendYield: continuous dividend yield; only used by BLACK_SCHOLES.
+    :param tolerance: an option has converged when its model price is within this amount of the target price.
+    :param maxIterations: maximum number of iterations; options which have not converged by then are NaN.
+    :param lowerVolatility: lowest implied volatility searched.
+    :param upperVolatility: highest implied volatility searched.
+    :raises ValueError: The volatility bounds or the number of iterations are not valid.
+    :return: float64 array of the implied volatilities.
+    """
+    if not 0 < lowerVolatility < upperVolatility:
+        raise ValueError('The volatility bounds must satisfy 0 < lowerVolatility < upperVolatility.')
+    if maxIterations < 1:
+        raise ValueError('Max iterations must be a positive (> 0) number.')
+    isCall, targetPrice, underlyingPrice, strikePrice, yearsToExpiration = np.broadcast_arrays(
+        np.asarray(isCall, dtype=bool), np.asarray(targetPrice, dtype=np.float64),
+        np.asarray(underlyingPrice, dtype=np.float64), np.asarray(strikePrice, dtype=np.float64),
+        np.asarray(yearsToExpiration, dtype=np.float64))
+    shape = targetPrice.shape
+    isCall, targetPrice, underlyingPrice, strikePrice, yearsToExpiration = (
+        array.ravel() for array in (isCall, targetPrice, underlyingPrice, strikePrice, yearsToExpiration))
+    impliedVolatility = np.full(targetPrice.shape, np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lowerBound, upperBound = _getPriceBounds(pricingModel, isCall, underlyingPrice, strikePrice,
+                                                 yearsToExpiration, riskFreeRate, dividendYield)
+        # NaN inputs fail these comparisons, so they are excluded with the expired and mispriced options.
+        active = np.flatnonzero((yearsToExpiration > 0) & (underlyingPrice > 0) & (strikePrice > 0) & (
+            targetPrice > lowerBound) & (targetPrice < upperBound))
+        if not len(active):
+            return impliedVolatility.reshape(shape)
+        isCall, targetPrice, underlyingPrice, strikePrice, yearsToExpiration = (
+            array[active] for array in (isCall, targetPrice, underlyingPrice, strikePrice, yearsToExpiration))
+
+        def price(rows, volatility):
+            return blackScholes.priceOptions(pricingModel, isCall[rows], underlyingPrice[rows], strikePrice[rows],
+                                             yearsToExpiration[rows], volatility, riskFreeRate, dividendYield)
+
+        # Options whose price is not reached within the volatility bounds have no solution in the bounds.
+        everyRow = slice(None)
+        inBounds = (price(everyRow, lowerVolatility)['price'] <= targetPrice) & (
+            price(everyRow, upperVolatility)['price'] >= targetPrice)
+        active = active[inBounds]
+        isCall, targetPrice, underlyingPrice, strikePrice, yearsToExpiration = (
+            array[inBounds] for array in (isCall, targetPrice, underlyingPrice, strikePrice, yearsToExpiration))
+
+        # Initial guess of Manaster and Koehler, which is the volatility where the vega of the option is largest;
+        # Newton's method converges from there without overshooting.  Options at the money start from the
+        # Brenner-Subrahmanyam approximation instead.
+        carry = 0.0 if pricingModel == blackScholes.PricingModels.BLACK_76 else riskFreeRate - dividendYield
+        logMoneyness = np.log(underlyingPrice / strikePrice) + carry * yearsToExpiration
+        volatility = np.sqrt(2.0 * np.abs(logMoneyness) / yearsToExpiration)
+        atTheMoney = volatility < lowerVolatility
+        volatility[atTheMoney] = (np.sqrt(2.0 * np.pi / yearsToExpiration[atTheMoney]) * targetPrice[atTheMoney] /
+                                  underlyingPrice[atTheMoney])
+        volatility = np.clip(volatility, lowerVolatility, upperVolatility)
+        lowerVolatilities = np.full(volatility.shape, lowerVolatility)
+        upperVolatilities = np.full(volatility.shape, upperVolatility)
+
+        # Indices (into the in-bounds options) of the options which have not converged.
+        rows = np.arange(len(volatility))
+        for _ in range(maxIterations):
+            results = price(rows, volatility[rows])
+            difference = results['price'] - targetPrice[rows]
+            converged = np.abs(difference) <= tolerance
+            # Narrow the bracket: the price increases with the volatility.
+            tooHigh = difference > 0
+            upperVolatilities[rows[tooHigh]] = volatility[rows[tooHigh]]
+            lowerVolatilities[rows[~tooHigh]] = volatility[rows[~tooHigh]]
+            converged |= upperVolatilities[rows] - lowerVolatilities[rows] <= tolerance * volatility[rows]
+            rows = rows[~converged]
+            if not len(rows):
+                break
+            difference = difference[~converged]
+            # The vega of priceOptions is per volatility point.
+            vega = results['vega'][~converged] * 100.0
+            newtonVolatility = volatility[rows] - difference / vega
+            lowerRows = lowerVolatilities[rows]
+            upperRows = upperVolatilities[rows]
+            useBisection = ~((newtonVolatility > lowerRows) & (newtonVolatility < upperRows))
+            volatility[rows] = np.where(useBisection, 0.5 * (lowerRows + upperRows), newtonVolatility)
+        # Options which did not converge have no implied volatility.
+        volatility[rows] = np.nan
+
+    impliedVolatility[active] = volatility
+    return impliedVolatility.reshape(shape)
+
+
+def solveChainImpliedVolatility(columns: Mapping[Text, np.ndarray], pricingModel: blackScholes.PricingModels,
+                                riskFreeRate: float = 0.0, dividendYield: float = 0.0) -> np.ndarray:
+    """Compute the implied volatilities of the options of typed option chain columns from their tradePrice column.
+
+    :param columns: typed columns of one or more option chains (at least the INPUT_FIELDS).
+    :param pricingModel: BLACK_SCHOLES or BLACK_76.
+    :param riskFreeRate: continuously compounded risk-free rate.
+    :param dividendYield: continuous dividend yield; only used by BLACK_SCHOLES.
+    :return: float64 array of the implied volatilities (NaN where they cannot be solved).
+    """
+    return solveImpliedVolatility(
+        pricingModel, columns[optionChain.IS_CALL_COLUMN], blackScholes.toFloatArray(columns['tradePrice']),
+        blackScholes.toFloatArray(columns['underlyingPrice']), blackScholes.toFloatArray(columns['strikePrice']),
+        blackScholes.getYearsToExpiration(columns['dateTime'], columns['expirationDateTime']), riskFreeRate,
+        dividendYield)
+
+
+def fillImpliedVolatility(columns: MutableMapping[Text, np.ndarray], pricingModel: blackScholes.PricingModels,
+                          riskFreeRate: float = 0.0, dividendYield: float = 0.0) -> None:
+    """Fill the missing (NaN) or zero implied volatilities of typed option chain columns with the implied volatilities
+    solved from the tradePrice column; those which cannot be solved are left unchanged.
+
+    :param columns: typed columns of one or more option chains; the impliedVol column is replaced.
+    :param pricingModel: BLACK_SCHOLES or BLACK_76.
+    :param riskFreeRate: continuously compounded risk-free rate.
+    :param dividendYield: continuous dividend yield; only used by BLACK_SCHOLES.
+    """
+    impliedVol = columns['impliedVol']
+    with np.errstate(invalid='ignore'):
+        missing = np.flatnonzero(~(impliedVol > 0))
+    if not len(missing):
+        return
+    solved = solveChainImpliedVolatility({name: columns[name][missing] for name in INPUT_FIELDS}, pricingModel,
+                                         riskFreeRate, dividendYield)
+    impliedVol = impliedVol.copy()
+    impliedVol[missing] = np.where(np.isnan(solved), impliedVol[missing], solved)
+    columns['impliedVol'] = impliedVol
@@ -0,0 +1,67 @@
+import datetime
+import decimal
+import unittest
+import numpy as np
+from pricing import blackScholes
+from pricing import impliedVolatility
+
+
+class TestImpliedVolatility(unittest.TestCase):
+
+    def testRoundTrip(self):
+        """Tests that the implied volatilities of model prices are the volatilities of both models."""
+        randomGenerator = np.random.default_rng(0)
+        numOptions = 2000
+        isCall = randomGenerator.random(numOptions) < 0.5
+        strikePrice = randomGenerator.uniform(60.0, 140.0, numOptions)
+        years = randomGenerator.uniform(0.01, 2.0, numOptions)
+        volatility = randomGenerator.uniform(0.05, 1.5, numOptions)
+        for pricingModel in blackScholes.PricingModels:
+            results = blackScholes.priceOptions(pricingModel, isCall, 100.0, strikePrice, years, volatility, 0.03,
+                                                0.01)
+            solved = impliedVolatility.solveImpliedVolatility(pricingModel, isCall, results['price'], 100.0,
+                                                              strikePrice, years, 0.03, 0.01)
+            # The volatility is only determined by the price where the price changes with the volatility.
+            hasVega = results['vega'] > 1e-4
+            self.assertFalse(np.isnan(solved[hasVega]).any())
+            np.testing.assert_allclose(solved[hasVega], volatility[hasVega], atol=1e-5)
+
+    def testNoSolution(self):
+        """Tests that prices outside the no-arbitrage bounds, expired options and missing inputs give NaN."""
+        solved = impliedVolatility.solveImpliedVolatility(
+            blackScholes.PricingModels.BLACK_SCHOLES, [True, True, False, True, True, True],
+            [9.0, 101.0, 91.0, 5.0, np.nan, 5.0], 100.0, [90.0, 90.0, 90.0, 100.0, 100.0, np.nan],
+            [0.5, 0.5, 0.5, 0.0, 0.5, 0.5])
+        self.assertTrue(np.isnan(solved).all())
+        self.assertEqual(impliedVolatility.solveImpliedVolatility(
+            blackScholes.PricingModels.BLACK_SCHOLES, True, 5.0, 100.0, 100.0, 0.5).shape, ())
+        with self.assertRaisesRegex(ValueError, 'The volatility bounds must satisfy'):
+            impliedVolatility.solveImpliedVolatility(blackScholes.PricingModels.BLACK_SCHOLES, True, 5.0, 100.0,
+                                                     100.0, 0.5, upperVolatility=0.0)
+
+    def testFillImpliedVolatility(self):
+        """Tests that only the missing or zero implied volatilities are solved from the trade prices."""
+        dateTime = datetime.datetime(2011, 1, 3)
+        expirationDateTime = datetime.datetime(2011, 2, 18)
+        years = blackScholes.getYearsToExpiration(np.array([dateTime]), np.array([expirationDateTime]))[0]
+        price = blackScholes.priceOptions(blackScholes.PricingModels.BLACK_SCHOLES, False, 1271.87, 1150.0, years,
+                                          0.22705)['price']
+        columns = {
+            'isCall': np.array([False, False, False, False]),
+            'tradePrice': np.array([decimal.Decimal(str(round(float(price), 2)))] * 3 + [decimal.Decimal('0')],
+                                   dtype=object),
+            'underlyingPrice': np.array([decimal.Decimal('1271.87')] * 4, dtype=object),
+            'strikePrice': np.array([decimal.Decimal('1150')] * 4, dtype=object),
+            'dateTime': np.array([dateTime] * 4, dtype=object),
+            'expirationDateTime': np.array([expirationDateTime] * 4, dtype=object),
+            'impliedVol': np.array([0.3, np.nan, 0.0, np.nan]),
+        }
+        impliedVolatility.fillImpliedVolatility(columns, blackScholes.PricingModels.BLACK_SCHOLES)
+        self.assertEqual(columns['impliedVol'][0], 0.3)
+        np.testing.assert_allclose(columns['impliedVol'][1:3], 0.22705, atol=1e-3)
+        # A price of zero has no implied volatility.
+        self.assertTrue(np.isnan(columns['impliedVol'][3]))
+
+
+if __name__ == '__main__':
+    unittest.main()
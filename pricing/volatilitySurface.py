@@ -0,0 +1,286 @@
+import numpy as np
+from base import optionChain
+from pricing import blackScholes
+from typing import Any, Dict, Optional, Text, Union
+
+"""
+This file fits a volatility surface to the implied volatilities of an option chain, so that the volatility, strike and
+greeks of options which are not listed (e.g., the 25-delta put at 45 days to expiration) can be looked up.
+"""
+
+ArrayLike = Union[float, bool, np.ndarray, list]
+
+# Number of bisection steps used to find the strike of a delta; the strike is found to within 2**-60 of the
+# log-moneyness range searched.
+DELTA_SEARCH_STEPS = 60
+
+
+def _toFloatArray(values: Any) -> np.ndarray:
+    """Convert numbers (e.g., decimal.Decimal objects or arrays of them) to a float64 array of the same shape."""
+    values = np.asarray(values)
+    return blackScholes.toFloatArray(values.ravel()).reshape(values.shape)
+
+
+def _getPchipDerivatives(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Get the derivatives at the nodes of the monotone piecewise cubic (PCHIP) interpolant of Fritsch and Carlson,
+    which does not overshoot the values at the nodes.
+
+    :param x: increasing node positions (at least 2).
+    :param y: values at the nodes.
+    :return: derivative at each node.
+    """
+    widths = np.diff(x)
+    slopes = np.diff(y) / widths
+    if len(x) == 2:
+        return np.full(2, slopes[0])
+    derivatives = np.zeros(len(x))
+    # Interior nodes: weighted harmonic mean of the slopes on both sides, zero at local extrema.
+    leftWeights = 2.0 * widths[1:] + widths[:-1]
+    rightWeights = widths[1:] + 2.0 * widths[:-1]
+    sameSign = slopes[:-1] * slopes[1:] > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        harmonicMeans = (leftWeights + rightWeights) / (leftWeights / slopes[:-1] + rightWeights / slopes[1:])
+    derivatives[1:-1] = np.where(sameSign, harmonicMeans, 0.0)
+    # End nodes: three-point estimate, limited so that the interpolant stays monotone.
+    for end, (width, nextWidth, slope, nextSlope) in ((0, (widths[0], widths[1], slopes[0], slopes[1])),
+                                                       (-1, (widths[-1], widths[-2], slopes[-1], slopes[-2]))):
+        derivative = ((2.0 * width + nextWidth) * slope - width * nextSlope) / (width + nextWidth)
+        if np.sign(derivative) != np.sign(slope):
+            derivative = 0.0
+        elif np.sign(slope) != np.sign(nextSlope) and abs(derivative) > abs(3.0 * slope):
+            derivative = 3.0 * slope
+        derivatives[end] = derivative
+    return derivatives
+
+
+def _evaluatePchip(x: np.ndarray, y: np.ndarray, derivatives: np.ndarray, points: np.ndarray,
+                   interval: np.ndarray) -> np.ndarray:
+    """Evaluate a piecewise cubic Hermite interpolant at points within [x[interval], x[interval + 1]]."""
+    width = x[interval + 1] - x[interval]
+    t = (points - x[interval]) / width
+    t2 = t * t
+    t3 = t2 * t
+    return ((2.0 * t3 - 3.0 * t2 + 1.0) * y[interval] + (t3 - 2.0 * t2 + t) * width * derivatives[interval] +
+            (-2.0 * t3 + 3.0 * t2) * y[interval + 1] + (t3 - t2) * width * derivatives[interval + 1])
+
+
+class VolatilitySurface(object):
+    """This class fits the implied volatilities of an option chain once, so that they can be queried by strike or delta
+    and by days to expiration with vectorized lookups whose cost does not depend on the size of the chain.
+
+    For each expiration, the implied volatilities of the out-of-the-money options (puts below the forward price and
+    calls above it) are interpolated in log-moneyness (log(strike / forward)) with a monotone cubic spline (PCHIP),
+    whose coefficients are computed once and evaluated between the listed strikes of the expiration, so the surface
+    goes through the quoted volatilities; the volatility is flat beyond the listed strikes.  Between expirations, the
+    total variance (volatility ** 2 * years) is interpolated linearly at the same log-moneyness, and the volatility is
+    flat before the first and after the last expiration.
+    """
+
+    def __init__(self, options: optionChain.OptionChain,
+                 pricingModel: blackScholes.PricingModels = blackScholes.PricingModels.BLACK_SCHOLES,
+                 riskFreeRate: float = 0.0, dividendYield: float = 0.0, underlyingTicker: Optional[Text] = None) -> None:
+        """Fits the volatility surface.
+
+        Attributes:
+          options:  option chain of one date / time.
+          pricingModel:  BLACK_SCHOLES (the underlyingPrice is the spot price) or BLACK_76 (the underlyingPrice is the
+                         futures price of each expiration).
+          riskFreeRate:  continuously compounded risk-free rate.
+          dividendYield:  continuous dividend yield; only used by BLACK_SCHOLES.
+          underlyingTicker:  if not None, only the options whose underlyingTicker contains this ticker are fitted.
+        """
+        if underlyingTicker is not None:
+            options = options.filter(options.getTickerMask(underlyingTicker))
+        self.__pricingModel = pricingModel
+        self.__riskFreeRate = riskFreeRate
+        self.__dividendYield = dividendYield
+
+        impliedVol = options.getColumn('impliedVol')
+        strikePrice = blackScholes.toFloatArray(options.getColumn('strikePrice'))
+        underlyingPrice = blackScholes.toFloatArray(options.getColumn('underlyingPrice'))
+        years = blackScholes.getYearsToExpiration(options.getColumn('dateTime'),
+                                                  options.getColumn('expirationDateTime'))
+        with np.errstate(invalid='ignore'):
+            usable = np.flatnonzero((impliedVol > 0) & (strikePrice > 0) & (underlyingPrice > 0) & (years > 0))
+        if not len(usable):
+            raise ValueError('The option chain has no implied volatilities to fit a volatility surface.')
+        impliedVol, strikePrice, underlyingPrice, years = (
+            column[usable] for column in (impliedVol, strikePrice, underlyingPrice, years))
+        isCall = options.getColumn(optionChain.IS_CALL_COLUMN)[usable]
+
+        self.__expirationYears, expirations = np.unique(years, return_inverse=True)
+        self.__spotPrice = float(np.median(underlyingPrice))
+        if pricingModel == blackScholes.PricingModels.BLACK_76:
+            self.__logForwards = np.array([np.log(np.median(underlyingPrice[expirations == expiration]))
+                                           for expiration in range(len(self.__expirationYears))])
+        else:
+            self.__logForwards = np.log(self.__spotPrice) + (riskFreeRate - dividendYield) * self.__expirationYears
+        logMoneyness = np.log(strikePrice) - self.__logForwards[expirations]
+
+        # Fit each expiration to the unique log-moneyness values of its out-of-the-money options.
+        fits = []
+        for expiration in range(len(self.__expirationYears)):
+            rows = expirations == expiration
+            outOfTheMoney = rows & (isCall == (logMoneyness >= 0))
+            if outOfTheMoney.any():
+                rows = outOfTheMoney
+            nodes, nodeRows = np.unique(logMoneyness[rows], return_inverse=True)
+            nodeVolatilities = np.bincount(nodeRows, weights=impliedVol[rows]) / np.bincount(nodeRows)
+            if len(nodes) == 1:
+                # An expiration with a single strike is flat.
+                nodes = np.append(nodes, nodes[0] + 1.0)
+                nodeVolatilities = np.append(nodeVolatilities, nodeVolatilities[0])
+            fits.append((nodes, nodeVolatilities, _getPchipDerivatives(nodes, nodeVolatilities)))
+        self.__nodes, self.__nodeVolatilities, self.__nodeDerivatives = (
+            np.concatenate([fit[field] for fit in fits]) for field in range(3))
+        numNodes = np.array([len(fit[0]) for fit in fits])
+        self.__lastNodes = np.cumsum(numNodes) - 1
+        self.__firstNodes = self.__lastNodes - numNodes + 1
+        self.__minLogMoneyness = float(self.__nodes.min())
+        self.__maxLogMoneyness = float(self.__nodes.max())
+        # The nodes of each expiration are shifted past those of the previous expiration, so that the interval of a
+        # point is found with one search over the nodes of all expirations.
+        self.__expirationShift = self.__maxLogMoneyness - self.__minLogMoneyness + 1.0
+        self.__nodeKeys = self.__nodes + np.repeat(np.arange(len(fits)), numNodes) * self.__expirationShift
+        # The interpolant does not overshoot, so the highest volatility of the surface is at a node.
+        self.__maxVolatility = float(self.__nodeVolatilities.max())
+
+    def getExpirationDays(self) -> np.ndarray:
+        """Get the days to expiration of the expirations which were fitted.
+
+        :return: float64 array of days, in increasing order.
+        """
+        return self.__expirationYears * blackScholes.DAYS_PER_YEAR
+
+    def __getLogForward(self, years: np.ndarray) -> np.ndarray:
+        """Get the log of the forward price of the underlying for times to expiration in years."""
+        if self.__pricingModel == blackScholes.PricingModels.BLACK_76:
+            # The futures prices of the listed expirations are interpolated, and flat outside of them.
+            return np.interp(years, self.__expirationYears, self.__logForwards)
+        return np.log(self.__spotPrice) + (self.__riskFreeRate - self.__dividendYield) * years
+
+    def __getTotalVariance(self, logMoneyness: np.ndarray, years: np.ndarray) -> np.ndarray:
+        """Get the total variance (volatility ** 2 * years) of the surface; NaN for missing inputs and non-positive
+        times to expiration."""
+        with np.errstate(invalid='ignore'):
+            valid = ~np.isnan(logMoneyness) & (years > 0)
+        safeLogMoneyness = np.where(valid, logMoneyness, 0.0)
+
+        def getExpirationVariance(expiration):
+            firstNode = self.__firstNodes[expiration]
+            lastNode = self.__lastNodes[expiration]
+            points = np.clip(safeLogMoneyness, self.__nodes[firstNode], self.__nodes[lastNode])
+            interval = np.searchsorted(self.__nodeKeys, points + expiration * self.__expirationShift, side='right') - 1
+            interval = np.clip(interval, firstNode, lastNode - 1)
+            volatility = _evaluatePchip(self.__nodes, self.__nodeVolatilities, self.__nodeDerivatives, points,
+                                        interval)
+            return volatility * volatility * self.__expirationYears[expiration]
+
+        numExpirations = len(self.__expirationYears)
+        safeYears = np.where(valid, years, 1.0)
+        upperExpiration = np.minimum(np.searchsorted(self.__expirationYears, safeYears), numExpirations - 1)
+        lowerExpiration = np.maximum(upperExpiration - 1, 0)
+        # Before the first and after the last expiration, the volatility is flat.
+        outside = (safeYears <= self.__expirationYears[0]) | (safeYears >= self.__expirationYears[-1])
+        lowerExpiration = np.where(outside, upperExpiration, lowerExpiration)
+        lowerYears = self.__expirationYears[lowerExpiration]
+        upperYears = self.__expirationYears[upperExpiration]
+        lowerVariance = getExpirationVariance(lowerExpiration)
+        upperVariance = getExpirationVariance(upperExpiration)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = (safeYears - lowerYears) / (upperYears - lowerYears)
+            totalVariance = np.where(outside, lowerVariance * safeYears / lowerYears,
+                                     lowerVariance + (upperVariance - lowerVariance) * weight)
+        return np.where(valid, totalVariance, np.nan)
+
+    def __getYears(self, daysToExpiration: ArrayLike) -> np.ndarray:
+        return np.asarray(daysToExpiration, dtype=np.float64) / blackScholes.DAYS_PER_YEAR
+
+    def getVolatility(self, strikePrice: ArrayLike, daysToExpiration: ArrayLike) -> np.ndarray:
+        """Get the volatilities of the surface; the arguments are broadcast against each other.
+
+        :param strikePrice: strike prices (numbers, decimal.Decimal or money.Money).
+        :param daysToExpiration: days to expiration (may be fractional).
+        :return: float64 array of volatilities (NaN for missing inputs and non-positive days to expiration).
+        """
+        strikePrice, years = np.broadcast_arrays(_toFloatArray(strikePrice), self.__getYears(daysToExpiration))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            logMoneyness = np.log(strikePrice) - self.__getLogForward(years)
+            return np.sqrt(self.__getTotalVariance(logMoneyness, years) / years)
+
+    def getStrikeForDelta(self, isCall: ArrayLike, delta: ArrayLike, daysToExpiration: ArrayLike) -> np.ndarray:
+        """Get the strike prices whose delta on the surface is the requested delta (e.g., -0.25 for the 25-delta put);
+        the arguments are broadcast against each other.  The strike is not rounded to a listed strike.
+
+        :param isCall: True for calls and False for puts.
+        :param delta: requested delta, in the convention of the data providers (negative for puts).
+        :param daysToExpiration: days to expiration (may be fractional).
+        :return: float64 array of strike prices (NaN where no strike has the delta).
+        """
+        isCall, delta, years = np.broadcast_arrays(np.asarray(isCall, dtype=bool),
+                                                   np.asarray(delta, dtype=np.float64),
+                                                   self.__getYears(daysToExpiration))
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            if self.__pricingModel == blackScholes.PricingModels.BLACK_76:
+                discount = np.exp(-self.__riskFreeRate * years)
+            else:
+                discount = np.exp(-self.__dividendYield * years)
+            # The delta of a put is the delta of the call with the same strike minus the discount.
+            callDelta = np.where(isCall, delta, delta + discount)
+            valid = (callDelta > 0) & (callDelta < discount) & (years > 0)
+            safeYears = np.where(valid, years, 1.0)
+            # The call delta decreases with the log-moneyness; the search range extends far enough beyond the fitted
+            # strikes for the flat wings of the surface to reach any delta.
+            deviation = self.__maxVolatility * np.sqrt(safeYears)
+            lowerLogMoneyness = self.__minLogMoneyness - 10.0 * deviation
+            upperLogMoneyness = self.__maxLogMoneyness + 10.0 * deviation + deviation * deviation
+            for _ in range(DELTA_SEARCH_STEPS):
+                logMoneyness = 0.5 * (lowerLogMoneyness + upperLogMoneyness)
+                totalVariance = self.__getTotalVariance(logMoneyness, safeYears)
+                sqrtVariance = np.sqrt(totalVariance)
+                middleDelta = discount * blackScholes.normCdf((-logMoneyness + 0.5 * totalVariance) / sqrtVariance)
+                aboveTarget = middleDelta > callDelta
+                lowerLogMoneyness = np.where(aboveTarget, logMoneyness, lowerLogMoneyness)
+                upperLogMoneyness = np.where(aboveTarget, upperLogMoneyness, logMoneyness)
+            logMoneyness = 0.5 * (lowerLogMoneyness + upperLogMoneyness)
+            return np.where(valid, np.exp(self.__getLogForward(safeYears) + logMoneyness), np.nan)
+
+    def priceOptions(self, isCall: ArrayLike, strikePrice: ArrayLike,
+                     daysToExpiration: ArrayLike) -> Dict[Text, np.ndarray]:
+        """Compute the prices and greeks of options (listed or not) with the volatilities of the surface; the arguments
+        are broadcast against each other.
+
+        :param isCall: True for calls and False for puts.
+        :param strikePrice: strike prices.
+        :param daysToExpiration: days to expiration (may be fractional).
+        :return: dictionary with a float64 array for 'price' and for each of the blackScholes.GREEK_FIELDS.
+        """
+        strikePrice = _toFloatArray(strikePrice)
+        years = self.__getYears(daysToExpiration)
+        if self.__pricingModel == blackScholes.PricingModels.BLACK_76:
+            underlyingPrice = np.exp(self.__getLogForward(years))
+        else:
+            underlyingPrice = self.__spotPrice
+        return blackScholes.priceOptions(self.__pricingModel, isCall, underlyingPrice, strikePrice, years,
+                                         self.getVolatility(strikePrice, daysToExpiration), self.__riskFreeRate,
+                                         self.__dividendYield)
+
+
+def getVolatilitySurface(options: optionChain.OptionChain,
+                         pricingModel: blackScholes.PricingModels = blackScholes.PricingModels.BLACK_SCHOLES,
+                         riskFreeRate: float = 0.0, dividendYield: float = 0.0,
+                         underlyingTicker: Optional[Text] = None) -> VolatilitySurface:
+    """Get the volatility surface of an option chain.  The surface is fitted the first time it is requested for the
+    chain (i.e., once per tick) and then shared by all strategies which request it with the same parameters.
+
+    :param options: option chain of one date / time.
+    :param pricingModel: BLACK_SCHOLES or BLACK_76.
+    :param riskFreeRate: continuously compounded risk-free rate.
+    :param dividendYield: continuous dividend yield; only used by BLACK_SCHOLES.
+    :param underlyingTicker: if not None, only the options whose underlyingTicker contains this ticker are fitted.
+    :raises ValueError: The option chain has no implied volatilities.
+    :return: volatility surface.
+    """
+    key = ('volatilitySurface', pricingModel, riskFreeRate, dividendYield, underlyingTicker)
+    return options.getDerivedValue(key, lambda chain: VolatilitySurface(chain, pricingModel, riskFreeRate,
+                                                                       dividendYield, underlyingTicker))
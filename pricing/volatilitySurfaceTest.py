@@ -0,0 +1,112 @@
+import datetime
+import decimal
+import unittest
+import numpy as np
+from base import call
+from base import optionChain
+from base import put
+from pricing import blackScholes
+from pricing import volatilitySurface
+
+
+class TestVolatilitySurface(unittest.TestCase):
+
+    def createChain(self, volatilityOfStrike, expirationDays=(30, 90), underlyingTicker='SPX',
+                    strikePrices=range(80, 121, 5)):
+        """Create a chain with a put and a call for each strike (80 to 120 by default) of each expiration; the implied
+        volatility of a strike is given by volatilityOfStrike(strike, days)."""
+        dateTime = datetime.datetime(2021, 1, 4)
+        options = []
+        for days in expirationDays:
+            for strike in strikePrices:
+                for optionType in (put.Put, call.Call):
+                    options.append(optionType(
+                        underlyingTicker=underlyingTicker, strikePrice=decimal.Decimal(strike),
+                        underlyingPrice=decimal.Decimal(100), dateTime=dateTime,
+                        expirationDateTime=dateTime + datetime.timedelta(days=days),
+                        impliedVol=volatilityOfStrike(strike, days)))
+        return optionChain.OptionChain.fromOptions(options)
+
+    def testFlatSurface(self):
+        """Tests that a flat surface has the same volatility everywhere, and that the strike of a delta has the delta."""
+        surface = volatilitySurface.VolatilitySurface(self.createChain(lambda strike, days: 0.2), riskFreeRate=0.02)
+        np.testing.assert_array_equal(surface.getExpirationDays(), [30.0, 90.0])
+        np.testing.assert_allclose(surface.getVolatility([50, 100, 200], [1, 45, 400]), 0.2, rtol=1e-12)
+        strikePrices = surface.getStrikeForDelta([False, True], [-0.25, 0.25], 45)
+        greeks = blackScholes.priceOptions(blackScholes.PricingModels.BLACK_SCHOLES, [False, True], 100.0,
+                                           strikePrices, 45 / 365, 0.2, 0.02)
+        np.testing.assert_allclose(greeks['delta'], [-0.25, 0.25], atol=1e-9)
+        self.assertTrue(np.isnan(surface.getStrikeForDelta([False, True, True], [0.25, 1.5, 0.25],
+                                                           [45, 45, 0])).all())
+
+    def testSmile(self):
+        """Tests that the listed out-of-the-money volatilities are fitted without overshooting between them."""
+        def volatilityOfStrike(strike, days):
+            # The in-the-money options have a different volatility, which is not fitted.
+            return 0.2 + 0.002 * abs(strike - 100)
+
+        surface = volatilitySurface.VolatilitySurface(self.createChain(volatilityOfStrike))
+        strikes = np.arange(80, 121, 5)
+        np.testing.assert_allclose(surface.getVolatility(strikes, 30), [volatilityOfStrike(strike, 30) for strike in
+                                                                          strikes], rtol=1e-12)
+        volatilities = surface.getVolatility(np.linspace(80, 100, 50), 30)
+        self.assertTrue((np.diff(volatilities) <= 1e-12).all())
+        self.assertTrue((volatilities >= 0.2 - 1e-12).all())
+        # The volatility is flat beyond the listed strikes.
+        self.assertAlmostEqual(float(surface.getVolatility(50, 30)), float(surface.getVolatility(80, 30)))
+
+    def testQuotedVolatilities(self):
+        """Tests that the surface goes through the quoted volatilities of every expiration, including the far
+        out-of-the-money strikes of the short expirations."""
+        strikePrices = [decimal.Decimal(strike) for strike in ('40', '62.5', '75', '81', '90', '97.5', '100', '102.5',
+                                                               '110', '135', '160')]
+
+        def volatilityOfStrike(strike, days):
+            logMoneyness = np.log(float(strike) / 100)
+            return 0.15 + 0.3 * logMoneyness ** 2 * 30 / days - 0.05 * logMoneyness
+
+        expirationDays = (4, 18, 46, 200)
+        surface = volatilitySurface.VolatilitySurface(
+            self.createChain(volatilityOfStrike, expirationDays, strikePrices=strikePrices))
+        for days in expirationDays:
+            np.testing.assert_allclose(surface.getVolatility(strikePrices, days),
+                                       [volatilityOfStrike(strike, days) for strike in strikePrices], rtol=1e-12)
+
+    def testTermStructure(self):
+        """Tests that the total variance is interpolated linearly between expirations, and that the volatility is flat
+        outside of them."""
+        surface = volatilitySurface.VolatilitySurface(
+            self.createChain(lambda strike, days: 0.2 if days == 30 else 0.3))
+        expectedVariance = (0.2 ** 2 * 30 + 0.3 ** 2 * 90) / 2
+        self.assertAlmostEqual(float(surface.getVolatility(100, 60)), np.sqrt(expectedVariance / 60), places=12)
+        self.assertAlmostEqual(float(surface.getVolatility(100, 10)), 0.2, places=12)
+        self.assertAlmostEqual(float(surface.getVolatility(100, 200)), 0.3, places=12)
+        self.assertTrue(np.isnan(surface.getVolatility([100, np.nan], [0, 60])).all())
+
+    def testPriceOptions(self):
+        """Tests that options which are not listed are priced with the volatility of the surface."""
+        surface = volatilitySurface.VolatilitySurface(self.createChain(lambda strike, days: 0.2))
+        results = surface.priceOptions(True, decimal.Decimal('102.5'), 45)
+        expected = blackScholes.priceOptions(blackScholes.PricingModels.BLACK_SCHOLES, True, 100.0, 102.5, 45 / 365,
+                                             0.2)
+        for field, values in expected.items():
+            self.assertAlmostEqual(float(results[field]), float(values), places=12)
+
+    def testCachedPerChain(self):
+        """Tests that the surface of a chain is fitted once per set of parameters."""
+        chain = optionChain.OptionChain.concat([self.createChain(lambda strike, days: 0.2),
+                                                self.createChain(lambda strike, days: 0.4, underlyingTicker='RUT')])
+        surface = volatilitySurface.getVolatilitySurface(chain, underlyingTicker='SPX')
+        self.assertIs(volatilitySurface.getVolatilitySurface(chain, underlyingTicker='SPX'), surface)
+        rutSurface = volatilitySurface.getVolatilitySurface(chain, underlyingTicker='RUT')
+        self.assertAlmostEqual(float(rutSurface.getVolatility(100, 30)), 0.4)
+        self.assertAlmostEqual(float(surface.getVolatility(100, 30)), 0.2)
+
+    def testNoImpliedVolatility(self):
+        """Tests that an exception is raised if the chain has no implied volatilities."""
+        with self.assertRaisesRegex(ValueError, 'The option chain has no implied volatilities'):
+            volatilitySurface.VolatilitySurface(self.createChain(lambda strike, days: None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,51 @@
 import abc
+import dataclasses
 from optionPrimitives import optionPrimitive
+from typing import Any, Optional
+
+
+@dataclasses.dataclass(frozen=True)
+class CloseConditions(object):
+    """Conditions under which a risk management strategy closes a position, so that the positions of a portfolio can
+    be checked all at once (see portfolioManager.positionBook.PositionBook).
+
+    Attributes:
+      maxDaysLeft:  the position is closed when it has this number of days left to expiration, or fewer.
+      profitPercentage:  if not None, the position is closed when its profit / loss percentage is at least this value.
+      lossPercentage:  if not None, the position is closed when its profit / loss percentage is at most minus this
+        value.
+    """
+    maxDaysLeft: int
+    profitPercentage: Optional[int] = None
+    lossPercentage: Optional[int] = None
+
+    def usesProfitLoss(self) -> bool:
+        """Whether the conditions depend on the profit / loss percentage of the position."""
+        return self.profitPercentage is not None or self.lossPercentage is not None
+
+    def isMet(self, daysLeft: Any, profitLossPercentage: Any = None) -> Any:
+        """Check the conditions for positions.
+
+        :param daysLeft: number of days left to expiration.
+        :param profitLossPercentage: profit / loss percentage; only used if usesProfitLoss().
+        :return: whether the positions should be closed; each parameter and the result is a value, or an array with one
+          value per position.
+        """
+        isMet = daysLeft <= self.maxDaysLeft
+        if self.profitPercentage is not None:
+            isMet = isMet | (profitLossPercentage >= self.profitPercentage)
+        if self.lossPercentage is not None:
+            isMet = isMet | (profitLossPercentage <= -self.lossPercentage)
+        return isMet
+
+    def isMetByPosition(self, currentPosition: optionPrimitive) -> bool:
+        """Check the conditions for a position.
+
+        :param currentPosition: Current position in the portfolio.
+        :return: whether the position should be closed.
+        """
+        profitLossPercentage = currentPosition.calcProfitLossPercentage() if self.usesProfitLoss() else None
+        return bool(self.isMet(currentPosition.getNumberOfDaysLeft(), profitLossPercentage))
 
 
 class RiskManagement(abc.ABC):
@@ -19,3 +65,8 @@ class RiskManagement(abc.ABC):
     def getRiskManagementType(self) -> int:
         """Returns the risk management type being used."""
         pass
+
+    def getCloseConditions(self) -> Optional[CloseConditions]:
+        """Returns the conditions under which managePosition closes a position, or None if managePosition does not only
+        close positions under such conditions."""
+        return None
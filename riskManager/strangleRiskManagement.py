@@ -22,27 +22,22 @@ class StrangleRiskManagement(riskManagement.RiskManagement):
 
         :param currentPosition: Current position in the portfolio.
         """
+        return self.getCloseConditions().isMetByPosition(currentPosition)
+
+    def getCloseConditions(self) -> riskManagement.CloseConditions:
+        """Returns the conditions under which managePosition closes a position.
+
+        :raises NotImplementedError: unknown management strategy.
+        """
         if self.__managementType == StrangleManagementStrategyTypes.HOLD_TO_EXPIRATION:
             # Setting this to '1' since I've been using SPX data, which has European style options where trading ends
             # the day before expiration.
-            if currentPosition.getNumberOfDaysLeft() <= 1:
-                # Indicates that the options are expiring on (or near) this date.
-                return True
-            # This is a backup if an option is chosen where numberofdaysleft <= 1.
-            if currentPosition.getNumberOfDaysLeft() <= 1:
-                # Indicates that the options are expiring on (or near) this date.
-                return True
+            return riskManagement.CloseConditions(maxDaysLeft=1)
         elif self.__managementType == StrangleManagementStrategyTypes.CLOSE_AT_50_PERCENT:
-            if currentPosition.calcProfitLossPercentage() >= 50:
-                return True
-            if currentPosition.getNumberOfDaysLeft() <= 1:
-                return True
+            return riskManagement.CloseConditions(maxDaysLeft=1, profitPercentage=50)
         elif self.__managementType == StrangleManagementStrategyTypes.CLOSE_AT_50_PERCENT_OR_21_DAYS:
-            if currentPosition.calcProfitLossPercentage() >= 50 or currentPosition.getNumberOfDaysLeft() <= 21:
-                return True
-        else:
-            raise NotImplementedError('No management strategy was specified or has not yet been implemented.')
-        return False
+            return riskManagement.CloseConditions(maxDaysLeft=21, profitPercentage=50)
+        raise NotImplementedError('No management strategy was specified or has not yet been implemented.')
 
     def getRiskManagementType(self) -> StrangleManagementStrategyTypes:
         """Returns the risk management type being used."""
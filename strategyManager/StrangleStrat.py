@@ -1,7 +1,9 @@
 from strategyManager import strategy
+from events import eventBus
 from events import tickEvent, signalEvent
 from optionPrimitives import optionPrimitive, strangle
 from base import option
+from base import optionChain
 from riskManager import riskManagement
 from typing import Optional, Text, Tuple, Mapping
 import datetime
@@ -9,7 +11,6 @@ import decimal
 import enum
 import json
 import logging
-import queue
 
 
 # Used to keep track of reasons why options could not be found for the strategy.
@@ -55,7 +56,7 @@ class StrangleStrat(strategy.Strategy):
         minCreditDebit: Minimum credit / debit to receive upon trade entry.
     """
 
-    def __init__(self, eventQueue: queue.Queue, optCallDelta: float, maxCallDelta: float, minCallDelta,
+    def __init__(self, eventQueue: eventBus.EventQueue, optCallDelta: float, maxCallDelta: float, minCallDelta,
                  optPutDelta: float, maxPutDelta: float, minPutDelta: float, buyOrSell: optionPrimitive.TransactionType,
                  underlyingTicker: Text, orderQuantity: int, contractMultiplier: int,
                  riskManagement: riskManagement.RiskManagement, pricingSource: Text, pricingSourceConfigFile: Text,
@@ -93,79 +94,68 @@ class StrangleStrat(strategy.Strategy):
                 fullConfig = json.load(config)
                 self.pricingSourceConfig = fullConfig[self.pricingSource]
 
-    def __updateWithOptimalOption(self, currentOption: option.Option,
-                                  optimalOption: option.Option) -> Tuple[bool, option.Option, enum.Enum]:
-        """Find the option that is closest to the requested parameters (delta, expiration).
+    def __getNoUpdateReason(self, currentOption: option.Option) -> NoUpdateReason:
+        """Find the reason why an option cannot be used for the strategy.
 
         :param currentOption: current option from the option chain.
-        :param optimalOption: current optimal option based on expiration and delta.
-        :return: tuple of (updateOption: bool, optimalOpt: option.Option, noUpdateReason: enum.Enum ).
-                updateOption bool is used to indicate if we should update the optimal option with the current option.
-    """
+        :return: reason why the option cannot be used; NoUpdateReason.OK if the option meets all criteria.
+        """
         # TODO: Add support for expiration cycles other than monthly.
 
         # Check that we are using the right ticker symbol.
         if self.underlyingTicker not in currentOption.underlyingTicker:
-            return (False, optimalOption, NoUpdateReason.WRONG_TICKER)
+            return NoUpdateReason.WRONG_TICKER
 
         # Check that delta is present in the data (could have bad data).
         if currentOption.delta is None:
-            return (False, optimalOption, NoUpdateReason.NO_DELTA)
+            return NoUpdateReason.NO_DELTA
 
         # There is an error case in the input data where the options may have zero credit / debit when put on.
         if currentOption.settlementPrice is None:
-            return (False, optimalOption, NoUpdateReason.NO_SETTLEMENT_PRICE)
+            return NoUpdateReason.NO_SETTLEMENT_PRICE
 
         # Check that DTE is greater than the minimum.
         if self.minimumDTE:
             if not self.hasMinimumDTE(currentOption.dateTime, currentOption.expirationDateTime):
-                return (False, optimalOption, NoUpdateReason.MIN_DTE)
+                return NoUpdateReason.MIN_DTE
 
         # Check that DTE is less than the maximum.
         if self.maximumDTE:
             if not self.hasMaximumDTE(currentOption.dateTime, currentOption.expirationDateTime):
-                return (False, optimalOption, NoUpdateReason.MAX_DTE)
+                return NoUpdateReason.MAX_DTE
 
         # Check that delta is between the minimum and maximum delta.
         if currentOption.optionType == option.OptionTypes.CALL:
             if currentOption.delta > self.__maxCallDelta or currentOption.delta < self.__minCallDelta:
-                return (False, optimalOption, NoUpdateReason.MIN_MAX_DELTA)
+                return NoUpdateReason.MIN_MAX_DELTA
         else:
             # PUT option.
             if currentOption.delta < self.__maxPutDelta or currentOption.delta > self.__minPutDelta:
-                return (False, optimalOption, NoUpdateReason.MIN_MAX_DELTA)
+                return NoUpdateReason.MIN_MAX_DELTA
 
         # Check if bid / ask of option < maxBidAsk specific in strangle strategy.
         if self.maxBidAsk:
             if self.calcBidAskDiff(currentOption.bidPrice, currentOption.askPrice) > self.maxBidAsk:
-                return (False, optimalOption, NoUpdateReason.MAX_BID_ASK)
-
-        # Get current DTE in days.
-        currentDTE = self.getNumDays(currentOption.dateTime, currentOption.expirationDateTime)
-        optimalDTE = self.getNumDays(optimalOption.dateTime,
-                                     optimalOption.expirationDateTime) if optimalOption else None
-        requestedDTE = self.optimalDTE
-
-        # Check if there is no current optimal DTE or an expiration closer to the requested expiration.
-        newOptimalOption = optimalOption
-        if optimalDTE is None or (abs(currentDTE - requestedDTE) < abs(optimalDTE - requestedDTE)):
-            newOptimalOption = currentOption
-        # Option has same DTE as optimalOpt; check deltas to choose best option.
-        elif currentDTE == optimalDTE:
-            currentDelta = currentOption.delta
-            optimalDelta = optimalOption.delta
-            if currentOption.optionType == option.OptionTypes.CALL:
-                requestedDelta = self.__optCallDelta
-            else:
-                requestedDelta = self.__optPutDelta
+                return NoUpdateReason.MAX_BID_ASK
 
-            if abs(currentDelta - requestedDelta) < abs(optimalDelta - requestedDelta):
-                newOptimalOption = currentOption
-        # We should not be able to enter this else.
-        # else:
-        #     return (False, newOptimalOption, NoUpdateReason.OK)
+        return NoUpdateReason.OK
 
-        return (True, newOptimalOption, NoUpdateReason.OK)
+    def __findOptimalOption(self, options: optionChain.OptionChain, optionType: option.OptionTypes,
+                            lowerDelta: float, optDelta: float,
+                            upperDelta: float) -> Tuple[Optional[option.Option], NoUpdateReason]:
+        """Find the option that is closest to the requested parameters (delta, expiration).
+
+        :param options: option chain with at least one option of the option type.
+        :param optionType: option type (CALL or PUT).
+        :param lowerDelta: lowest delta allowed.
+        :param optDelta: optimal delta.
+        :param upperDelta: highest delta allowed.
+        :return: tuple of (optimalOption: option.Option, noUpdateReason: NoUpdateReason). optimalOption is None if no
+                 option meets the criteria; noUpdateReason is the reason for the last option of the option type.
+        """
+        lastOption = options[options.getExpirationDeltaIndex(optionType).lastPosition]
+        return (self.findOptimalOption(options, optionType, lowerDelta, optDelta, upperDelta),
+                self.__getNoUpdateReason(lastOption))
 
     def checkForSignal(self, event: tickEvent, portfolioNetLiquidity: decimal.Decimal,
                        availableBuyingPower: decimal.Decimal) -> Mapping[Text, NoUpdateReason]:
@@ -184,8 +174,8 @@ class StrangleStrat(strategy.Strategy):
         optimalCallOpt = None
         optimalPutOpt = None
 
-        # Get the data from the tick event.
-        eventData = event.getData()
+        # Get the data of the underlying of the strategy from the tick event.
+        eventData = event.getPartition(self.underlyingTicker)
 
         if not eventData:
             return
@@ -196,19 +186,15 @@ class StrangleStrat(strategy.Strategy):
 
         # Dictionary to keep track of the reasons we couldn't find acceptable options for the strategy.
         noUpdateReasonDict = {}
-        # Process one option at a time from the option chain (objects of option class).
-        for currentOption in eventData:
-            if currentOption.optionType == option.OptionTypes.CALL:
-                updateOption, callOpt, noUpdateReason = self.__updateWithOptimalOption(currentOption, optimalCallOpt)
-                if updateOption:
-                    optimalCallOpt = callOpt
-                noUpdateReasonDict['callOption'] = noUpdateReason
-            else:
-                # PUT option
-                updateOption, putOpt, noUpdateReason = self.__updateWithOptimalOption(currentOption, optimalPutOpt)
-                if updateOption:
-                    optimalPutOpt = putOpt
-                noUpdateReasonDict['putOption'] = noUpdateReason
+        # Select the calls and puts from the expiration / delta indexes of the option chain.
+        optionChainData = optionChain.toOptionChain(eventData)
+        if optionChainData.getExpirationDeltaIndex(option.OptionTypes.CALL).lastPosition is not None:
+            optimalCallOpt, noUpdateReasonDict['callOption'] = self.__findOptimalOption(
+                optionChainData, option.OptionTypes.CALL, self.__minCallDelta, self.__optCallDelta,
+                self.__maxCallDelta)
+        if optionChainData.getExpirationDeltaIndex(option.OptionTypes.PUT).lastPosition is not None:
+            optimalPutOpt, noUpdateReasonDict['putOption'] = self.__findOptimalOption(
+                optionChainData, option.OptionTypes.PUT, self.__maxPutDelta, self.__optPutDelta, self.__minPutDelta)
 
         if not optimalPutOpt or not optimalCallOpt:
             logging.warning('Could not find both an optimal put and call.')
@@ -1,7 +1,9 @@
 from strategyManager import strategy
+from events import eventBus
 from events import tickEvent, signalEvent
 from optionPrimitives import optionPrimitive, putVertical
 from base import option
+from base import optionChain
 from riskManager import riskManagement
 from typing import Optional, Text, Tuple, Mapping
 import datetime
@@ -9,7 +11,6 @@ import decimal
 import enum
 import json
 import logging
-import queue
 
 
 # Used to keep track of reasons why options could not be found for the strategy.
@@ -54,7 +55,7 @@ class PutVerticalStrat(strategy.Strategy):
         minCreditDebit: Minimum credit / debit to receive upon trade entry.
     """
 
-    def __init__(self, eventQueue: queue.Queue, optPutToBuyDelta: float, maxPutToBuyDelta: float,
+    def __init__(self, eventQueue: eventBus.EventQueue, optPutToBuyDelta: float, maxPutToBuyDelta: float,
                  minPutToBuyDelta: float, optPutToSellDelta: float, maxPutToSellDelta: float, minPutToSellDelta: float,
                  underlyingTicker: Text, orderQuantity: int, contractMultiplier: int,
                  riskManagement: riskManagement.RiskManagement, pricingSource: Text, pricingSourceConfigFile: Text,
@@ -93,74 +94,69 @@ class PutVerticalStrat(strategy.Strategy):
                 fullConfig = json.load(config)
                 self.pricingSourceConfig = fullConfig[self.pricingSource]
 
-    def __updateWithOptimalOption(self, currentOption: option.Option, optimalOption: option.Option, maxPutDelta: float,
-                                  optPutDelta: float, minPutDelta: float) -> Tuple[bool, option.Option, enum.Enum]:
-        """Find the option that is closest to the requested parameters (delta, expiration).
+    def __getNoUpdateReason(self, currentOption: option.Option, maxPutDelta: float,
+                            minPutDelta: float) -> NoUpdateReason:
+        """Find the reason why an option cannot be used for the strategy.
 
         :param currentOption: current option from the option chain.
-        :param optimalOption: current optimal option based on expiration and delta.
         :param maxPutDelta: maximum delta of the put option.
-        :param optPutDelta: optimal delta of the put option.
         :param minPutDelta: minimum delta of the put option.
-        :return: tuple of (updateOption: bool, optimalOpt: option.Option, noUpdateReason: enum.Enum ). updateOption bool
-                 is used to indicate if we should update the optimal option with the current option.
+        :return: reason why the option cannot be used; NoUpdateReason.OK if the option meets all criteria.
         """
         # TODO: Add support for selecting specific expiration cycles (e.g., quarterly, monthly).
 
         # Check that we are using the right ticker symbol. This will match any substring; e.g., SPXPM will be matched
         # if underlyingTicker = SPX.
         if self.underlyingTicker not in currentOption.underlyingTicker:
-            return (False, optimalOption, NoUpdateReason.WRONG_TICKER)
+            return NoUpdateReason.WRONG_TICKER
 
         # Check that delta is present in the data (could have bad data).
         if currentOption.delta is None:
-            return (False, optimalOption, NoUpdateReason.NO_DELTA)
+            return NoUpdateReason.NO_DELTA
 
         # There is an error case in the input data where the options may have zero credit / debit when put on.
         if currentOption.settlementPrice is None:
-            return (False, optimalOption, NoUpdateReason.NO_SETTLEMENT_PRICE)
+            return NoUpdateReason.NO_SETTLEMENT_PRICE
 
         # Check that DTE is greater than the minimum.
         if self.minimumDTE:
             if not self.hasMinimumDTE(currentOption.dateTime, currentOption.expirationDateTime):
-                return (False, optimalOption, NoUpdateReason.MIN_DTE)
+                return NoUpdateReason.MIN_DTE
 
         # Check that DTE is less than the maximum.
         if self.maximumDTE:
             if not self.hasMaximumDTE(currentOption.dateTime, currentOption.expirationDateTime):
-                return (False, optimalOption, NoUpdateReason.MAX_DTE)
+                return NoUpdateReason.MAX_DTE
 
         # Check that delta is between the minimum and maximum delta.
         if currentOption.delta < maxPutDelta or currentOption.delta > minPutDelta:
-            return (False, optimalOption, NoUpdateReason.MIN_MAX_DELTA)
+            return NoUpdateReason.MIN_MAX_DELTA
 
         # Check if bid / ask of option < maxBidAsk specific in put vertical strategy.
         # This can't be used for futures option data since bid and ask price are not reliable / zero / etc.
         if self.maxBidAsk:
             if self.calcBidAskDiff(currentOption.bidPrice, currentOption.askPrice) > self.maxBidAsk:
-                return (False, optimalOption, NoUpdateReason.MAX_BID_ASK)
-
-        # Get current DTE in days.
-        currentDTE = self.getNumDays(currentOption.dateTime, currentOption.expirationDateTime)
-        optimalDTE = self.getNumDays(optimalOption.dateTime,
-                                     optimalOption.expirationDateTime) if optimalOption else None
-        requestedDTE = self.optimalDTE
-
-        # Check if there is no current optimal DTE or an expiration closer to the requested expiration.
-        newOptimalOption = optimalOption
-        if optimalDTE is None or (abs(currentDTE - requestedDTE) < abs(optimalDTE - requestedDTE)):
-            newOptimalOption = currentOption
-        # Option has same DTE as optimalOpt; check deltas to choose best option.
-        elif currentDTE == optimalDTE:
-            currentDelta = currentOption.delta
-            optimalDelta = optimalOption.delta
-            if abs(currentDelta - optPutDelta) < abs(optimalDelta - optPutDelta):
-                newOptimalOption = currentOption
-        # We should not be able to enter this else.
-        # else:
-        #     return (False, newOptimalOption, NoUpdateReason.OK)
-
-        return (True, newOptimalOption, NoUpdateReason.OK)
+                return NoUpdateReason.MAX_BID_ASK
+
+        return NoUpdateReason.OK
+
+    def __findOptimalOption(self, options: optionChain.OptionChain, maxPutDelta: float, optPutDelta: float,
+                            minPutDelta: float) -> Tuple[Optional[option.Option], NoUpdateReason]:
+        """Find the put that is closest to the requested parameters (delta, expiration).
+
+        :param options: option chain with at least one put.
+        :param maxPutDelta: maximum delta of the put option.
+        :param optPutDelta: optimal delta of the put option.
+        :param minPutDelta: minimum delta of the put option.
+        :return: tuple of (optimalOption: option.Option, noUpdateReason: NoUpdateReason). optimalOption is None if no
+                 put meets the criteria; noUpdateReason is OK if a put was found, and otherwise the reason why the last
+                 put in the chain could not be used.
+        """
+        optimalOption = self.findOptimalOption(options, option.OptionTypes.PUT, maxPutDelta, optPutDelta, minPutDelta)
+        if optimalOption is not None:
+            return optimalOption, NoUpdateReason.OK
+        lastPut = options[options.getExpirationDeltaIndex(option.OptionTypes.PUT).lastPosition]
+        return None, self.__getNoUpdateReason(lastPut, maxPutDelta, minPutDelta)
 
     def checkForSignal(self, event: tickEvent, portfolioNetLiquidity: decimal.Decimal,
                        availableBuyingPower: decimal.Decimal) -> Mapping[Text, NoUpdateReason]:
@@ -179,8 +175,8 @@ class PutVerticalStrat(strategy.Strategy):
         optimalPutOptionToSell = None
         optimalPutOptionToBuy = None
 
-        # Get the data from the tick event.
-        eventData = event.getData()
+        # Get the data of the underlying of the strategy from the tick event.
+        eventData = event.getPartition(self.underlyingTicker)
 
         if not eventData:
             return
@@ -191,28 +187,15 @@ class PutVerticalStrat(strategy.Strategy):
 
         # Dictionary to keep track of the reasons we couldn't find acceptable options for the strategy.
         noUpdateReasonDict = {}
-        # Process one option at a time from the option chain (objects of option class).
-        for currentOption in eventData:
-            if currentOption.optionType == option.OptionTypes.PUT:
-                # Handle put to buy first.
-                updateOption, putOptToBuy, noUpdateReason = self.__updateWithOptimalOption(
-                    currentOption, optimalPutOptionToBuy, self.__maxPutToBuyDelta, self.__optPutToBuyDelta,
-                    self.__minPutToBuyDelta)
-                if updateOption:
-                    optimalPutOptionToBuy = putOptToBuy
-                if noUpdateReasonDict.get('putToBuy', None) is None or (
-                    noUpdateReasonDict['putToBuy'] != NoUpdateReason.OK):
-                  noUpdateReasonDict['putToBuy'] = noUpdateReason
-
-                # Handle put to sell.
-                updateOption, putOptToSell, noUpdateReason = self.__updateWithOptimalOption(
-                    currentOption, optimalPutOptionToSell, self.__maxPutToSellDelta, self.__optPutToSellDelta,
-                    self.__minPutToSellDelta)
-                if updateOption:
-                    optimalPutOptionToSell = putOptToSell
-                if noUpdateReasonDict.get('putToSell', None) is None or (
-                    noUpdateReasonDict['putToSell'] != NoUpdateReason.OK):
-                    noUpdateReasonDict['putToSell'] = noUpdateReason
+        # Select the puts from the expiration / delta index of the option chain.
+        optionChainData = optionChain.toOptionChain(eventData)
+        if optionChainData.getExpirationDeltaIndex(option.OptionTypes.PUT).lastPosition is not None:
+            # Handle put to buy first.
+            optimalPutOptionToBuy, noUpdateReasonDict['putToBuy'] = self.__findOptimalOption(
+                optionChainData, self.__maxPutToBuyDelta, self.__optPutToBuyDelta, self.__minPutToBuyDelta)
+            # Handle put to sell.
+            optimalPutOptionToSell, noUpdateReasonDict['putToSell'] = self.__findOptimalOption(
+                optionChainData, self.__maxPutToSellDelta, self.__optPutToSellDelta, self.__minPutToSellDelta)
 
         if not optimalPutOptionToBuy or not optimalPutOptionToSell:
             logging.warning('Could not find both an optimal put to buy and optimal put to sell.')
@@ -2,6 +2,8 @@ import dataclasses
 import datetime
 import decimal
 import enum
+from base import option
+from base import optionChain
 from optionPrimitives import optionPrimitive
 from typing import Optional, Text
 
@@ -96,3 +98,41 @@ class Strategy:
         :return: Number of days between curDateTime and expDateTime.
         """
         return (expDateTime - curDateTime).days
+
+    def isCandidate(self, options: optionChain.OptionChain, position: int) -> bool:
+        """Check the strategy criteria for an option which are not part of the expiration / delta index (ticker,
+        settlement price and bid / ask).
+
+        :param options: option chain.
+        :param position: position of the option in the chain.
+        :return: True if the option meets the criteria.
+        """
+        # This will match any substring; e.g., SPXPM will be matched if underlyingTicker = SPX.
+        if self.underlyingTicker not in options.getValue(position, 'underlyingTicker'):
+            return False
+        if options.getValue(position, 'settlementPrice') is None:
+            return False
+        if self.maxBidAsk:
+            if self.calcBidAskDiff(options.getValue(position, 'bidPrice'),
+                                   options.getValue(position, 'askPrice')) > self.maxBidAsk:
+                return False
+        return True
+
+    def findOptimalOption(self, options: optionChain.OptionChain, optionType: option.OptionTypes,
+                          lowerDelta: float, optimalDelta: float, upperDelta: float) -> Optional[option.Option]:
+        """Select the option closest to the requested parameters (expiration, then delta) using the expiration / delta
+        index of the chain. As when going through the options in chain order, the expiration is the first one closest
+        to optimalDTE, and the first option is kept when several options have the same delta distance.
+
+        :param options: option chain.
+        :param optionType: option type (PUT or CALL).
+        :param lowerDelta: lowest delta allowed.
+        :param optimalDelta: requested delta.
+        :param upperDelta: highest delta allowed.
+        :return: optimal option, or None if no option meets the criteria.
+        """
+        position = options.getExpirationDeltaIndex(optionType).findOptimalPosition(
+            self.minimumDTE if self.minimumDTE else None, self.maximumDTE if self.maximumDTE else None,
+            self.optimalDTE, lowerDelta, optimalDelta, upperDelta,
+            lambda candidatePosition: self.isCandidate(options, candidatePosition))
+        return None if position is None else options[position]
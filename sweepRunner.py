@@ -0,0 +1,202 @@
+import concurrent.futures
+import contextlib
+import dataclasses
+import datetime
+import decimal
+import enum
+import itertools
+import pandas as pd
+import backTester
+from dataHandler import chainCache
+from dataHandler import csvSource
+from dataHandler import sharedChainData
+from pricing import blackScholes
+from utils import sessionLogging
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Text, Tuple
+
+"""
+This file runs a parameter sweep of backtesting sessions across a process pool.
+"""
+
+# Parameters which select the market data of a session; each distinct combination is compiled into one chain cache.
+DATA_PARAMETERS = ('filename', 'dataProviderPath', 'dataProvider')
+
+
+class SharedDataTypes(enum.Enum):
+    """How the parsed market data is shared with the worker processes.
+
+    MEMORY_MAPPED_FILE:  every worker memory-maps the chain cache file.
+    SHARED_MEMORY:  the chain cache is copied once into a multiprocessing.shared_memory block which the workers attach
+                    to; nothing is read from disk while the sessions run.
+    """
+    MEMORY_MAPPED_FILE = 0
+    SHARED_MEMORY = 1
+
+
+@dataclasses.dataclass
+class SweepResult(object):
+    """Results of a parameter sweep.
+
+    Attributes:
+      summary:  one row per run with the runId, the swept parameters and the summary stats of the run.
+      positionMonitoring:  the positionMonitoring of all runs, with a runId column identifying the run.
+    """
+    summary: pd.DataFrame
+    positionMonitoring: pd.DataFrame
+
+
+def expandParameterGrid(parameterGrid: Mapping[Text, Sequence[Any]],
+                        baseParameters: Optional[backTester.BackTestParameters] = None) -> List[
+                            backTester.BackTestParameters]:
+    """Create the session parameters for every combination of the values in the parameter grid.
+
+    :param parameterGrid: dictionary from BackTestParameters field name to the values to try for that field.
+    :param baseParameters: parameters used for the fields which are not in the grid; defaults to BackTestParameters().
+    :raises ValueError: Parameter grid contains unknown parameters.
+    :raises ValueError: Parameter grid has no values for a parameter.
+    :return: list of session parameters, in the order of itertools.product over the grid values.
+    """
+    if baseParameters is None:
+        baseParameters = backTester.BackTestParameters()
+    fieldNames = {field.name for field in dataclasses.fields(backTester.BackTestParameters)}
+    unknownNames = [name for name in parameterGrid if name not in fieldNames]
+    if unknownNames:
+        raise ValueError('Parameter grid contains unknown parameters: {}.'.format(', '.join(unknownNames)))
+    if any(len(values) == 0 for values in parameterGrid.values()):
+        raise ValueError('Parameter grid must have at least one value for each parameter.')
+    names = list(parameterGrid.keys())
+    return [dataclasses.replace(baseParameters, **dict(zip(names, values)))
+            for values in itertools.product(*parameterGrid.values())]
+
+
+def getSummaryStats(positionMonitoring: Mapping[Text, Sequence[Any]], startingCapital: decimal.Decimal) -> Dict[
+        Text, Any]:
+    """Compute the summary stats of a run from its position monitoring.
+
+    :param positionMonitoring: position monitoring written by the portfolio during the run.
+    :param startingCapital: capital when starting the run.
+    :return: dictionary with the number of ticks, the final net liquidity, the total return, the maximum drawdown
+             (as a decimal of the peak net liquidity), the final realized capital and the maximum buying power used.
+    """
+    netLiquidity = [float(value) for value in positionMonitoring.get('NetLiq', [])]
+    startingCapital = float(startingCapital)
+    peak, maxDrawdown = startingCapital, 0.0
+    for value in netLiquidity:
+        peak = max(peak, value)
+        if peak > 0:
+            maxDrawdown = max(maxDrawdown, (peak - value) / peak)
+    finalNetLiquidity = netLiquidity[-1] if netLiquidity else startingCapital
+    realizedCapital = positionMonitoring.get('RealizedCapital', [])
+    buyingPower = positionMonitoring.get('BuyingPower', [])
+    return {
+        'numTicks': len(netLiquidity),
+        'finalNetLiq': finalNetLiquidity,
+        'totalReturn': finalNetLiquidity / startingCapital - 1 if startingCapital else 0.0,
+        'maxDrawdown': maxDrawdown,
+        'finalRealizedCapital': float(realizedCapital[-1]) if realizedCapital else startingCapital,
+        'maxBuyingPower': float(max(buyingPower)) if buyingPower else 0.0,
+    }
+
+
+def _runSession(runId: int, parameters: backTester.BackTestParameters, sharedDataType: SharedDataTypes,
+                dataLocation: Text) -> Tuple[int, Dict[Text, List[Any]]]:
+    """Run one session of the sweep in a worker process; the option chains are served from the shared market data.
+
+    :param runId: index of the run in the sweep.
+    :param parameters: parameters of the session.
+    :param sharedDataType: how the market data is shared with the worker.
+    :param dataLocation: path to the chain cache compiled from parameters.filename, or the name of the shared memory
+                         block holding it.
+    :return: the runId and the position monitoring of the session.
+    """
+    startDateTime = datetime.datetime.strptime(parameters.startDateTime, '%m/%d/%Y')
+    pricingModel = blackScholes.getPricingModel(chainCache.loadProviderConfig(parameters.dataProviderPath,
+                                                                              parameters.dataProvider))
+    if sharedDataType == SharedDataTypes.SHARED_MEMORY:
+        dataHandlerType = sharedChainData.SharedChainData
+    else:
+        dataHandlerType = chainCache.ChainCacheData
+    with backTester.BackTestSession(
+            parameters, createDataHandler=lambda eventQueue: dataHandlerType(
+                dataLocation, eventQueue, startDateTime=startDateTime, slottedOptions=True,
+                moneyType=parameters.moneyType, greeksMode=parameters.greeksMode,
+                riskFreeRate=parameters.riskFreeRate, dividendYield=parameters.dividendYield,
+                fillImpliedVol=parameters.fillImpliedVol, pricingModel=pricingModel)) as session:
+        backTester.run(session)
+    return runId, dict(session.positionMonitoring)
+
+
+def runSweep(parameterGrid: Mapping[Text, Sequence[Any]],
+             baseParameters: Optional[backTester.BackTestParameters] = None, maxWorkers: Optional[int] = None,
+             cachePath: Optional[Text] = None,
+             sharedDataType: SharedDataTypes = SharedDataTypes.MEMORY_MAPPED_FILE) -> SweepResult:
+    """Run a backtesting session for every combination of the values in the parameter grid across a process pool.
+
+    The market data is parsed once: each CSV is compiled into a chain cache before the runs start, and the workers
+    either memory-map the cache file or attach to a shared memory copy of it, so they share one copy of the parsed
+    data.
+
+    :param parameterGrid: dictionary from BackTestParameters field name to the values to try for that field.
+    :param baseParameters: parameters used for the fields which are not in the grid; defaults to BackTestParameters()
+                           with logging disabled (LoggingModes.SILENT).
+    :param maxWorkers: maximum number of worker processes; defaults to the number of processors.
+    :param cachePath: path of the cache file; defaults to chainCache.getCachePath(filename).  Only supported when the
+                      sweep uses a single data source.
+    :param sharedDataType: how the market data is shared with the worker processes.
+    :raises ValueError: A filename is a list of paths or a glob pattern, or cache path is given when the sweep uses
+                        several data sources.
+    :return: summary stats and position monitoring of all runs.
+    """
+    if baseParameters is None:
+        baseParameters = backTester.BackTestParameters(loggingMode=sessionLogging.LoggingModes.SILENT)
+    runParameters = expandParameterGrid(parameterGrid, baseParameters)
+    for parameters in runParameters:
+        # The chain cache is compiled from a single CSV.
+        if not isinstance(parameters.filename, str) or any(
+                character in parameters.filename for character in csvSource.GLOB_CHARACTERS):
+            raise ValueError('Sweep filename must be the path of a single CSV, not a list of paths or a glob pattern: '
+                             '%s.' % (parameters.filename,))
+    dataSources = list(dict.fromkeys(
+        tuple(getattr(parameters, name) for name in DATA_PARAMETERS) for parameters in runParameters))
+    if cachePath is not None and len(dataSources) > 1:
+        raise ValueError('Cache path can only be given when the sweep uses a single data source.')
+    cachePaths = {dataSource: chainCache.ensureChainCache(*dataSource, cachePath=cachePath)
+                  for dataSource in dataSources}
+
+    monitoringByRun = {}
+    with contextlib.ExitStack() as exitStack:
+        if sharedDataType == SharedDataTypes.SHARED_MEMORY:
+            dataLocations = {dataSource: exitStack.enter_context(sharedChainData.SharedChainCache(path)).name
+                             for dataSource, path in cachePaths.items()}
+        else:
+            dataLocations = cachePaths
+        executor = exitStack.enter_context(concurrent.futures.ProcessPoolExecutor(max_workers=maxWorkers))
+        futures = [executor.submit(_runSession, runId, parameters, sharedDataType,
+                                   dataLocations[tuple(getattr(parameters, name) for name in DATA_PARAMETERS)])
+                   for runId, parameters in enumerate(runParameters)]
+        for future in concurrent.futures.as_completed(futures):
+            runId, positionMonitoring = future.result()
+            monitoringByRun[runId] = positionMonitoring
+
+    summaryRows = []
+    monitoringFrames = []
+    for runId, parameters in enumerate(runParameters):
+        positionMonitoring = monitoringByRun[runId]
+        row = {'runId': runId}
+        row.update({name: getattr(parameters, name) for name in parameterGrid})
+        row.update(getSummaryStats(positionMonitoring, parameters.startingCapital))
+        summaryRows.append(row)
+        monitoringFrame = pd.DataFrame(positionMonitoring)
+        monitoringFrame.insert(0, 'runId', runId)
+        monitoringFrames.append(monitoringFrame)
+    positionMonitoring = pd.concat(monitoringFrames, ignore_index=True) if monitoringFrames else pd.DataFrame()
+    return SweepResult(summary=pd.DataFrame(summaryRows), positionMonitoring=positionMonitoring)
+
+
+if __name__ == "__main__":
+    # Sweep the deltas of the short put and the risk management of the put vertical strategy.
+    result = runSweep({'optPutToSellDelta': [-0.20, -0.25, -0.30],
+                       'riskManagement': ['HOLD_TO_EXPIRATION', 'CLOSE_AT_50_PERCENT']})
+    result.summary.to_csv('sweepSummary.csv', index=False)
+    result.positionMonitoring.to_csv('sweepMonitoring.csv', index=False)
+    print(result.summary.to_string(index=False))
@@ -0,0 +1,132 @@
+import dataclasses
+import decimal
+import os
+import tempfile
+import unittest
+from unittest import mock
+import backTester
+import sweepRunner
+from dataHandler import chainCache
+from pricing import blackScholes
+from pricing import impliedVolatility
+
+
+class TestSweepRunner(unittest.TestCase):
+
+    def setUp(self):
+        self._baseParameters = backTester.BackTestParameters(
+            filename='sampleData/spx_sample_ivolatility.csv', dataProviderPath='dataHandler/dataProviders.json',
+            pricingSourceConfigFile='dataHandler/pricingConfig.json', logFile=None)
+
+    def testExpandParameterGrid(self):
+        """Tests that every combination of the grid values is created on top of the base parameters."""
+        runParameters = sweepRunner.expandParameterGrid(
+            {'optPutToSellDelta': [-0.2, -0.3], 'optimalDTE': [25, 30, 35]}, self._baseParameters)
+        self.assertEqual(len(runParameters), 6)
+        self.assertEqual([(parameters.optPutToSellDelta, parameters.optimalDTE) for parameters in runParameters],
+                         [(-0.2, 25), (-0.2, 30), (-0.2, 35), (-0.3, 25), (-0.3, 30), (-0.3, 35)])
+        self.assertTrue(all(parameters.filename == self._baseParameters.filename for parameters in runParameters))
+
+    def testExpandParameterGridUnknownParameter(self):
+        """Tests that an exception is raised for a parameter which is not a BackTestParameters field."""
+        with self.assertRaisesRegex(ValueError, 'Parameter grid contains unknown parameters: putDelta.'):
+            sweepRunner.expandParameterGrid({'putDelta': [-0.2]}, self._baseParameters)
+
+    def testExpandParameterGridNoValues(self):
+        """Tests that an exception is raised for a parameter without values."""
+        with self.assertRaisesRegex(ValueError, 'Parameter grid must have at least one value for each parameter.'):
+            sweepRunner.expandParameterGrid({'optimalDTE': []}, self._baseParameters)
+
+    def testGetSummaryStats(self):
+        """Tests the final net liquidity, total return and maximum drawdown of a run."""
+        positionMonitoring = {'NetLiq': [decimal.Decimal(110), decimal.Decimal(99), decimal.Decimal(120)],
+                              'RealizedCapital': [decimal.Decimal(100), decimal.Decimal(100), decimal.Decimal(105)],
+                              'BuyingPower': [decimal.Decimal(10), decimal.Decimal(30), decimal.Decimal(20)]}
+        summaryStats = sweepRunner.getSummaryStats(positionMonitoring, decimal.Decimal(100))
+        self.assertEqual(summaryStats['numTicks'], 3)
+        self.assertAlmostEqual(summaryStats['finalNetLiq'], 120)
+        self.assertAlmostEqual(summaryStats['totalReturn'], 0.2)
+        self.assertAlmostEqual(summaryStats['maxDrawdown'], 0.1)
+        self.assertAlmostEqual(summaryStats['finalRealizedCapital'], 105)
+        self.assertAlmostEqual(summaryStats['maxBuyingPower'], 30)
+
+    def testRunSweep(self):
+        """Tests that the sweep runs every combination and matches a session run on its own."""
+        session = backTester.BackTestSession(self._baseParameters)
+        backTester.run(session)
+
+        with tempfile.TemporaryDirectory() as directory:
+            result = sweepRunner.runSweep(
+                {'optPutToSellDelta': [self._baseParameters.optPutToSellDelta, -0.20]}, self._baseParameters,
+                maxWorkers=2, cachePath=os.path.join(directory, 'sample.chaincache'))
+
+        self.assertEqual(list(result.summary['runId']), [0, 1])
+        self.assertEqual(list(result.summary['optPutToSellDelta']), [-0.25, -0.20])
+        self.assertEqual(set(result.positionMonitoring['runId']), {0, 1})
+        firstRun = result.positionMonitoring[result.positionMonitoring['runId'] == 0]
+        self.assertEqual(list(firstRun['NetLiq']), session.positionMonitoring['NetLiq'])
+        self.assertEqual(result.summary['numTicks'][0], len(session.positionMonitoring['NetLiq']))
+        self.assertAlmostEqual(result.summary['finalNetLiq'][0], float(session.positionMonitoring['NetLiq'][-1]))
+
+    def testRunSweepSharedMemory(self):
+        """Tests that the runs are the same when the market data is shared through a shared memory block."""
+        with tempfile.TemporaryDirectory() as directory:
+            cachePath = os.path.join(directory, 'sample.chaincache')
+            parameterGrid = {'optPutToSellDelta': [-0.25, -0.20]}
+            memoryMapped = sweepRunner.runSweep(parameterGrid, self._baseParameters, maxWorkers=2, cachePath=cachePath)
+            sharedMemory = sweepRunner.runSweep(parameterGrid, self._baseParameters, maxWorkers=2, cachePath=cachePath,
+                                                sharedDataType=sweepRunner.SharedDataTypes.SHARED_MEMORY)
+        self.assertTrue(sharedMemory.summary.equals(memoryMapped.summary))
+        self.assertTrue(sharedMemory.positionMonitoring.equals(memoryMapped.positionMonitoring))
+
+    def testRunSweepComputedGreeks(self):
+        """Tests that the greeks of the sweep runs are computed as in a session run on its own."""
+        parameters = dataclasses.replace(self._baseParameters, greeksMode=blackScholes.GreeksModes.OVERRIDE,
+                                         riskFreeRate=0.02)
+        session = backTester.BackTestSession(parameters)
+        backTester.run(session)
+        with tempfile.TemporaryDirectory() as directory:
+            for sharedDataType in sweepRunner.SharedDataTypes:
+                result = sweepRunner.runSweep({'greeksMode': [blackScholes.GreeksModes.CSV, parameters.greeksMode]},
+                                              parameters, maxWorkers=2,
+                                              cachePath=os.path.join(directory, 'sample.chaincache'),
+                                              sharedDataType=sharedDataType)
+                overrideRun = result.positionMonitoring[result.positionMonitoring['runId'] == 1]
+                self.assertEqual(list(overrideRun['TotalDelta']), session.positionMonitoring['TotalDelta'])
+                csvRun = result.positionMonitoring[result.positionMonitoring['runId'] == 0]
+                self.assertNotEqual(list(csvRun['TotalDelta']), list(overrideRun['TotalDelta']))
+
+    def testRunSessionFillImpliedVol(self):
+        """Tests that the implied volatilities of the chains of a sweep session are solved, and that the session is the
+        same as a session run on its own."""
+        parameters = dataclasses.replace(self._baseParameters, fillImpliedVol=True,
+                                         greeksMode=blackScholes.GreeksModes.FILL_MISSING)
+        session = backTester.BackTestSession(parameters)
+        backTester.run(session)
+        with tempfile.TemporaryDirectory() as directory:
+            cachePath = chainCache.ensureChainCache(parameters.filename, parameters.dataProviderPath,
+                                                    parameters.dataProvider, os.path.join(directory, 'sample.cache'))
+            with mock.patch.object(impliedVolatility, 'fillImpliedVolatility',
+                                   wraps=impliedVolatility.fillImpliedVolatility) as fillImpliedVolatility:
+                runId, positionMonitoring = sweepRunner._runSession(3, parameters,
+                                                                    sweepRunner.SharedDataTypes.MEMORY_MAPPED_FILE,
+                                                                    cachePath)
+            numChains = len(chainCache.ChainCache(cachePath).dates)
+        self.assertEqual(runId, 3)
+        self.assertEqual(fillImpliedVolatility.call_count, numChains)
+        self.assertEqual(positionMonitoring, dict(session.positionMonitoring))
+
+    def testRunSweepCachePathWithSeveralDataSources(self):
+        """Tests that a single cache path cannot be used for several data sources."""
+        with self.assertRaisesRegex(ValueError, 'Cache path can only be given when the sweep uses a single data'):
+            sweepRunner.runSweep({'filename': ['a.csv', 'b.csv']}, self._baseParameters, cachePath='sample.chaincache')
+
+    def testRunSweepSeveralCsvs(self):
+        """Tests that a list of paths or a glob pattern is rejected before the chain caches are compiled."""
+        for filename in [['a.csv', 'b.csv'], 'sampleData/*.csv']:
+            with self.assertRaisesRegex(ValueError, 'Sweep filename must be the path of a single CSV'):
+                sweepRunner.runSweep({'filename': [filename]}, self._baseParameters)
+
+
+if __name__ == '__main__':
+    unittest.main()
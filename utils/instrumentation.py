@@ -0,0 +1,290 @@
+import bisect
+import enum
+import functools
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Text, Tuple
+
+"""
+This file records the time spent in each stage of a backtesting session.
+"""
+
+# Upper bounds (in seconds) of the latency histogram buckets: four buckets per decade from 1 microsecond to 10 seconds.
+# The last bucket holds the calls which took longer than 10 seconds.
+BUCKET_BOUNDS = tuple(10.0 ** (exponent / 4.0) for exponent in range(-24, 5))
+
+# Methods replaced by patchMethod(), by class and method name; they are shared by all instrumentations which patch the
+# same method, so that overlapping sessions do not restore each other's originals.
+_methodPatches = {}
+_methodPatchesLock = threading.Lock()
+
+
+class Stages(enum.Enum):
+    """Stages of a backtesting session. Stages nest: e.g., the time spent logging is also part of the time of the
+    stage which logged, and creating option objects is part of the strategy or portfolio call which requested them.
+
+    RUN:  the whole run loop.
+    GET_NEXT_TICK:  DataHandler.getNextTick (CSV parsing; only waiting for the worker thread with PrefetchData).
+    READ_TICK:  getNextTick of the data handler wrapped by PrefetchData, on its worker thread (CSV parsing).
+    UPDATE_PORTFOLIO:  Portfolio.updatePortfolio (position updates).
+    CHECK_FOR_SIGNAL:  Strategy.checkForSignal (signal search).
+    ON_SIGNAL:  Portfolio.onSignal (opening positions).
+    OPTIONS:  requesting option objects from option chains, including creating them (Option construction).
+    LOGGING:  handling log records.
+    """
+    RUN = 'run'
+    GET_NEXT_TICK = 'dataHandler.getNextTick'
+    READ_TICK = 'dataHandler.readTick'
+    UPDATE_PORTFOLIO = 'portfolio.updatePortfolio'
+    CHECK_FOR_SIGNAL = 'strategy.checkForSignal'
+    ON_SIGNAL = 'portfolio.onSignal'
+    OPTIONS = 'optionChain.options'
+    LOGGING = 'logging'
+
+
+class StageStats(object):
+    """Cumulative wall time, call count and latency histogram of one stage."""
+
+    def __init__(self) -> None:
+        self.numCalls = 0
+        self.totalSeconds = 0.0
+        self.maxSeconds = 0.0
+        self.bucketCounts = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def record(self, seconds: float) -> None:
+        """Record one call of the stage.
+
+        :param seconds: wall time of the call.
+        """
+        self.numCalls += 1
+        self.totalSeconds += seconds
+        if seconds > self.maxSeconds:
+            self.maxSeconds = seconds
+        self.bucketCounts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+
+    @property
+    def meanSeconds(self) -> float:
+        return self.totalSeconds / self.numCalls if self.numCalls else 0.0
+
+    def getPercentile(self, percentile: float) -> float:
+        """Estimate a latency percentile from the histogram.
+
+        :param percentile: percentile between 0 and 100.
+        :raises ValueError: Percentile must be between 0 and 100.
+        :return: upper bound of the bucket holding the percentile (the maximum latency for the last bucket).
+        """
+        if not 0 <= percentile <= 100:
+            raise ValueError('Percentile must be between 0 and 100.')
+        if not self.numCalls:
+            return 0.0
+        rank = percentile / 100.0 * self.numCalls
+        numCalls = 0
+        for bucket, count in enumerate(self.bucketCounts):
+            numCalls += count
+            if count and numCalls >= rank:
+                return min(BUCKET_BOUNDS[bucket], self.maxSeconds) if bucket < len(BUCKET_BOUNDS) else \
+                    self.maxSeconds
+        return self.maxSeconds
+
+    def toDict(self) -> Dict[Text, Any]:
+        return {'numCalls': self.numCalls, 'totalSeconds': self.totalSeconds, 'maxSeconds': self.maxSeconds,
+                'bucketBounds': list(BUCKET_BOUNDS), 'bucketCounts': list(self.bucketCounts)}
+
+
+class Instrumentation(object):
+    """Records the time spent in each stage of a backtesting session; pass it to backTester.run().  When run() is
+    called without an Instrumentation, none of the call sites are wrapped, so there is no cost."""
+
+    def __init__(self, recordTrace: bool = False) -> None:
+        """Initializes empty stage statistics.
+
+        Attributes:
+          recordTrace:  keep every call as a trace event so that writeTrace() can be used; this uses memory for each
+                        call.
+        """
+        self.stageStats = {stage: StageStats() for stage in Stages}
+        self.__recordTrace = recordTrace
+        self.__traceEvents = []
+        self.__patches = []
+        # Threads of the session; only their calls of the patched methods are recorded.  The threads are kept rather than
+        # their identifiers, which are reused once a thread exits.
+        self.__threads = set()
+        self.__startTime = time.perf_counter()
+        # Calls are recorded from several threads: the session thread and the worker thread of PrefetchData.
+        self.__lock = threading.Lock()
+
+    def record(self, stage: Stages, startTime: float, endTime: float) -> None:
+        """Record one call of a stage.
+
+        :param stage: stage of the call.
+        :param startTime: time.perf_counter() at the start of the call.
+        :param endTime: time.perf_counter() at the end of the call.
+        """
+        with self.__lock:
+            self.stageStats[stage].record(endTime - startTime)
+            if self.__recordTrace:
+                self.__traceEvents.append((stage, startTime, endTime, threading.get_ident()))
+
+    def wrap(self, stage: Stages, function: Callable) -> Callable:
+        """Wrap a function so that its calls are recorded for a stage.
+
+        :param stage: stage of the function.
+        :param function: function to wrap.
+        :return: function with the same arguments and return value which records its calls.
+        """
+        record = self.record
+        perfCounter = time.perf_counter
+
+        @functools.wraps(function)
+        def timedFunction(*args, **kwargs):
+            startTime = perfCounter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(stage, startTime, perfCounter())
+        return timedFunction
+
+    def addThread(self, thread: Optional[threading.Thread] = None) -> None:
+        """Record the calls of the patched methods made on a thread of the session.
+
+        :param thread: thread of the session; defaults to the calling thread.
+        """
+        self.__threads.add(threading.current_thread() if thread is None else thread)
+
+    def wrapThread(self, stage: Stages, function: Callable) -> Callable:
+        """Wrap a function like wrap(), and add the threads which call it to the session (e.g., the worker thread of
+        PrefetchData), so that their calls of the patched methods are also recorded.
+
+        :param stage: stage of the function.
+        :param function: function to wrap.
+        :return: function with the same arguments and return value which records its calls.
+        """
+        timedFunction = self.wrap(stage, function)
+        addThread = self.addThread
+
+        @functools.wraps(function)
+        def threadFunction(*args, **kwargs):
+            addThread()
+            return timedFunction(*args, **kwargs)
+        return threadFunction
+
+    def patchMethod(self, owner: type, name: Text, stage: Stages) -> None:
+        """Replace a method of a class with a wrapped method until restore() is called.  The method is replaced for
+        the whole process, but only the calls made on the threads of the session (see addThread()) are recorded;
+        several instrumentations can patch the same method at once.
+
+        :param owner: class which defines the method.
+        :param name: name of the method.
+        :param stage: stage of the method.
+        """
+        with _methodPatchesLock:
+            methodPatch = _methodPatches.get((owner, name))
+            if methodPatch is None:
+                methodPatch = _methodPatches[(owner, name)] = _MethodPatch(owner, name)
+            methodPatch.addRecorder((self.__threads, self.record, stage))
+        self.__patches.append(methodPatch)
+
+    def restore(self) -> None:
+        """Stop recording the methods patched by patchMethod(); a method is restored once no instrumentation records
+        it."""
+        with _methodPatchesLock:
+            while self.__patches:
+                methodPatch = self.__patches.pop()
+                if not methodPatch.removeRecorders(self.__threads):
+                    methodPatch.restore()
+                    del _methodPatches[(methodPatch.owner, methodPatch.name)]
+        self.__threads.clear()
+
+    def formatSummary(self) -> Text:
+        """Format the statistics of the stages which were called as a table.
+
+        :return: one line per stage with the call count, cumulative and mean time, and latency percentiles.
+        """
+        lines = ['{:<28}{:>10}{:>12}{:>12}{:>12}{:>12}{:>12}'.format('stage', 'calls', 'total(s)', 'mean(ms)',
+                                                                     'p50(ms)', 'p99(ms)', 'max(ms)')]
+        for stage, stats in self.stageStats.items():
+            if not stats.numCalls:
+                continue
+            lines.append('{:<28}{:>10}{:>12.4f}{:>12.4f}{:>12.4f}{:>12.4f}{:>12.4f}'.format(
+                stage.value, stats.numCalls, stats.totalSeconds, stats.meanSeconds * 1e3,
+                stats.getPercentile(50) * 1e3, stats.getPercentile(99) * 1e3, stats.maxSeconds * 1e3))
+        return '\n'.join(lines)
+
+    def writeSummary(self, summaryPath: Text) -> None:
+        """Write the statistics of all stages, including the histogram buckets, as JSON."""
+        with open(summaryPath, 'w') as summaryFile:
+            json.dump({stage.value: stats.toDict() for stage, stats in self.stageStats.items()}, summaryFile,
+                      indent=2)
+
+    def writeTrace(self, tracePath: Text) -> None:
+        """Write the recorded calls in the Chrome trace event format (open with chrome://tracing or Perfetto).
+
+        :param tracePath: path of the trace file.
+        :raises ValueError: The instrumentation was created without recordTrace.
+        """
+        if not self.__recordTrace:
+            raise ValueError('Trace events were not recorded; create the Instrumentation with recordTrace=True.')
+        processId = os.getpid()
+        traceEvents = [{'name': stage.value, 'ph': 'X', 'pid': processId, 'tid': threadId,
+                        'ts': (startTime - self.__startTime) * 1e6, 'dur': (endTime - startTime) * 1e6}
+                       for stage, startTime, endTime, threadId in self.__traceEvents]
+        with open(tracePath, 'w') as traceFile:
+            json.dump({'traceEvents': traceEvents, 'displayTimeUnit': 'ms'}, traceFile)
+
+
+class _MethodPatch(object):
+    """A method of a class replaced by a wrapper which records each call for the instrumentations whose session made
+    the call."""
+
+    def __init__(self, owner: type, name: Text) -> None:
+        """Replaces the method.
+
+        Attributes:
+          owner:  class which defines the method.
+          name:  name of the method.
+        """
+        self.owner = owner
+        self.name = name
+        self.original = owner.__dict__[name]
+        # Tuple of (threads, record function, stage) per instrumentation; the tuple is replaced rather than
+        # changed, so that the wrapper can read it without a lock.
+        self.recorders = ()
+        setattr(owner, name, self.__createWrapper())
+
+    def __createWrapper(self) -> Callable:
+        original = self.original
+        methodPatch = self
+        currentThread = threading.current_thread
+        perfCounter = time.perf_counter
+
+        @functools.wraps(original)
+        def patchedMethod(*args, **kwargs):
+            thread = currentThread()
+            recorders = [(record, stage) for threads, record, stage in methodPatch.recorders if thread in threads]
+            if not recorders:
+                return original(*args, **kwargs)
+            startTime = perfCounter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                endTime = perfCounter()
+                for record, stage in recorders:
+                    record(stage, startTime, endTime)
+        return patchedMethod
+
+    def addRecorder(self, recorder: Tuple[set, Callable, Stages]) -> None:
+        self.recorders = self.recorders + (recorder,)
+
+    def removeRecorders(self, threads: set) -> bool:
+        """Remove the recorders of an instrumentation.
+
+        :param threads: threads of the session of the instrumentation.
+        :return: True if other instrumentations still record the method.
+        """
+        self.recorders = tuple(recorder for recorder in self.recorders if recorder[0] is not threads)
+        return bool(self.recorders)
+
+    def restore(self) -> None:
+        setattr(self.owner, self.name, self.original)
@@ -0,0 +1,154 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import unittest
+import backTester
+from base import optionChain
+from utils import instrumentation
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def testStageStats(self):
+        """Tests the call count, cumulative time and percentiles of a stage."""
+        stats = instrumentation.StageStats()
+        for seconds in [0.001] * 98 + [0.5, 20.0]:
+            stats.record(seconds)
+        self.assertEqual(stats.numCalls, 100)
+        self.assertAlmostEqual(stats.totalSeconds, 20.598)
+        self.assertEqual(stats.maxSeconds, 20.0)
+        self.assertEqual(sum(stats.bucketCounts), 100)
+        self.assertEqual(stats.bucketCounts[-1], 1)
+        self.assertAlmostEqual(stats.getPercentile(50), 0.001)
+        self.assertAlmostEqual(stats.getPercentile(100), 20.0)
+        with self.assertRaisesRegex(ValueError, 'Percentile must be between 0 and 100.'):
+            stats.getPercentile(101)
+
+    def testWrap(self):
+        """Tests that a wrapped function returns the same value and that its calls are recorded."""
+        sessionInstrumentation = instrumentation.Instrumentation()
+        add = sessionInstrumentation.wrap(instrumentation.Stages.CHECK_FOR_SIGNAL, lambda a, b: a + b)
+        self.assertEqual(add(1, b=2), 3)
+        self.assertEqual(add(3, 4), 7)
+        self.assertEqual(sessionInstrumentation.stageStats[instrumentation.Stages.CHECK_FOR_SIGNAL].numCalls, 2)
+        self.assertEqual(sessionInstrumentation.stageStats[instrumentation.Stages.RUN].numCalls, 0)
+
+    def testPatchMethodAndRestore(self):
+        """Tests that a patched method records its calls until it is restored."""
+
+        class Counter(object):
+            def increment(self, value):
+                return value + 1
+
+        sessionInstrumentation = instrumentation.Instrumentation()
+        sessionInstrumentation.addThread()
+        sessionInstrumentation.patchMethod(Counter, 'increment', instrumentation.Stages.OPTIONS)
+        self.assertEqual(Counter().increment(1), 2)
+        sessionInstrumentation.restore()
+        self.assertEqual(Counter().increment(2), 3)
+        self.assertEqual(sessionInstrumentation.stageStats[instrumentation.Stages.OPTIONS].numCalls, 1)
+
+    def testPatchMethodPerSession(self):
+        """Tests that only the calls made on the threads of a session are recorded, and that overlapping
+        instrumentations of the same method do not restore each other's originals."""
+
+        class Counter(object):
+            def increment(self, value):
+                return value + 1
+
+        original = Counter.__dict__['increment']
+        first = instrumentation.Instrumentation()
+        second = instrumentation.Instrumentation()
+        first.addThread()
+        first.patchMethod(Counter, 'increment', instrumentation.Stages.OPTIONS)
+        second.patchMethod(Counter, 'increment', instrumentation.Stages.OPTIONS)
+        self.assertEqual(Counter().increment(1), 2)
+
+        def incrementOnThread():
+            second.addThread()
+            Counter().increment(1)
+            Counter().increment(2)
+
+        thread = threading.Thread(target=incrementOnThread)
+        thread.start()
+        thread.join()
+        # A thread which is not part of any session is not recorded.
+        thread = threading.Thread(target=Counter().increment, args=(3,))
+        thread.start()
+        thread.join()
+        first.restore()
+        self.assertIsNot(Counter.__dict__['increment'], original)
+        self.assertEqual(Counter().increment(4), 5)
+        second.restore()
+        self.assertIs(Counter.__dict__['increment'], original)
+        self.assertEqual(first.stageStats[instrumentation.Stages.OPTIONS].numCalls, 1)
+        self.assertEqual(second.stageStats[instrumentation.Stages.OPTIONS].numCalls, 2)
+
+    def testInstrumentedRun(self):
+        """Tests that an instrumented run records the stages, produces the same results, and restores the patches."""
+        parameters = backTester.BackTestParameters(logFile=None)
+        session = backTester.BackTestSession(parameters)
+        backTester.run(session)
+
+        instrumentedSession = backTester.BackTestSession(parameters)
+        sessionInstrumentation = instrumentation.Instrumentation(recordTrace=True)
+        backTester.run(instrumentedSession, sessionInstrumentation)
+        self.assertEqual(instrumentedSession.positionMonitoring, session.positionMonitoring)
+
+        stageStats = sessionInstrumentation.stageStats
+        numTicks = len(session.positionMonitoring['Date']) + 1
+        self.assertEqual(stageStats[instrumentation.Stages.RUN].numCalls, 1)
+        self.assertEqual(stageStats[instrumentation.Stages.CHECK_FOR_SIGNAL].numCalls, numTicks)
+        self.assertEqual(stageStats[instrumentation.Stages.UPDATE_PORTFOLIO].numCalls, numTicks)
+        self.assertEqual(stageStats[instrumentation.Stages.GET_NEXT_TICK].numCalls, numTicks + 1)
+        # The data handler reads and parses the option chains on the worker thread of PrefetchData.
+        self.assertEqual(stageStats[instrumentation.Stages.READ_TICK].numCalls, numTicks + 1)
+        self.assertGreater(stageStats[instrumentation.Stages.OPTIONS].numCalls, 0)
+        self.assertGreaterEqual(stageStats[instrumentation.Stages.RUN].totalSeconds,
+                                stageStats[instrumentation.Stages.CHECK_FOR_SIGNAL].totalSeconds)
+        self.assertNotIn('__wrapped__', optionChain._ChainStore.__dict__['getOption'].__dict__)
+        self.assertNotIn('__wrapped__', logging.Logger.__dict__['handle'].__dict__)
+
+        with tempfile.TemporaryDirectory() as directory:
+            tracePath = os.path.join(directory, 'trace.json')
+            sessionInstrumentation.writeTrace(tracePath)
+            with open(tracePath) as traceFile:
+                traceEvents = json.load(traceFile)['traceEvents']
+            summaryPath = os.path.join(directory, 'summary.json')
+            sessionInstrumentation.writeSummary(summaryPath)
+            with open(summaryPath) as summaryFile:
+                summary = json.load(summaryFile)
+        self.assertEqual(len(traceEvents), sum(stats.numCalls for stats in stageStats.values()))
+        threadIds = {traceEvent['name']: traceEvent['tid'] for traceEvent in traceEvents}
+        self.assertNotEqual(threadIds['dataHandler.readTick'], threadIds['run'])
+        self.assertEqual(summary['run']['numCalls'], 1)
+        self.assertIn('strategy.checkForSignal', sessionInstrumentation.formatSummary())
+
+    def testRecordFromThreads(self):
+        """Tests that the calls recorded from several threads at once are all counted."""
+        sessionInstrumentation = instrumentation.Instrumentation(recordTrace=True)
+        numCalls = 20000
+
+        def recordCalls():
+            for _ in range(numCalls):
+                sessionInstrumentation.record(instrumentation.Stages.LOGGING, 0.0, 0.001)
+
+        threads = [threading.Thread(target=recordCalls) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = sessionInstrumentation.stageStats[instrumentation.Stages.LOGGING]
+        self.assertEqual(stats.numCalls, 4 * numCalls)
+        self.assertEqual(sum(stats.bucketCounts), 4 * numCalls)
+
+    def testWriteTraceWithoutRecording(self):
+        """Tests that a trace cannot be written when the calls were not recorded."""
+        with self.assertRaisesRegex(ValueError, 'Trace events were not recorded'):
+            instrumentation.Instrumentation().writeTrace('trace.json')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+import atexit
+import collections.abc
+import datetime
+import enum
+import json
+import logging
+import logging.handlers
+import numbers
+import queue
+import threading
+import time
+from base import money
+from typing import Callable, Optional, Text
+
+"""
+This file configures the logging of a backtesting session.
+"""
+
+# Types of log record arguments which cannot change after the record is created.  Other arguments are converted to
+# text when the record is queued, since they could be modified before the background thread formats the record.
+_IMMUTABLE_ARG_TYPES = (str, bytes, numbers.Number, money.Money, datetime.date, datetime.time, datetime.timedelta,
+                        enum.Enum, type(None))
+
+
+class LoggingModes(enum.Enum):
+    """Ways the log records of a session are written.
+
+    TEXT:  records are formatted as text and written to the log file on the thread which logged them.
+    JSON_LINES:  records are queued without formatting; a background thread formats them as one JSON object per line
+                 and writes them to the log file.
+    SILENT:  logging is disabled, so logging calls return before a record is created or a message is formatted (e.g.,
+             for parameter sweeps).
+    """
+    TEXT = 0
+    JSON_LINES = 1
+    SILENT = 2
+
+
+class RateLimitFilter(logging.Filter):
+    """Drops the log records of a category (logger, level and message template) beyond a maximum number per period.
+    The number of dropped records is set as the `suppressed` attribute of the next record of the category which is
+    kept."""
+
+    def __init__(self, maxRecordsPerPeriod: int, periodSeconds: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """Initializes the rate limiter.
+
+        Attributes:
+          maxRecordsPerPeriod:  maximum number of records of each category kept per period.
+          periodSeconds:  length of the period in seconds.
+          clock:  function returning the current time in seconds.
+        """
+        if maxRecordsPerPeriod < 1:
+            raise ValueError('Max records per period must be a positive (> 0) number.')
+        if periodSeconds <= 0:
+            raise ValueError('Period must be a positive (> 0) number of seconds.')
+        super().__init__()
+        self.__maxRecordsPerPeriod = maxRecordsPerPeriod
+        self.__periodSeconds = periodSeconds
+        self.__clock = clock
+        # Start time of the current period, number of records kept and number of records dropped for each category.
+        self.__periods = {}
+        self.__lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Used to check if a record should be kept.
+
+        :param record: record to check.
+        :return: True if the record is kept; False if it is dropped.
+        """
+        template = record.msg if isinstance(record.msg, str) else type(record.msg)
+        category = (record.name, record.levelno, template)
+        now = self.__clock()
+        with self.__lock:
+            period = self.__periods.get(category)
+            if period is None or now - period[0] >= self.__periodSeconds:
+                self.__periods[category] = [now, 1, 0]
+                if period is not None and period[2]:
+                    record.suppressed = period[2]
+                return True
+            if period[1] < self.__maxRecordsPerPeriod:
+                period[1] += 1
+                return True
+            period[2] += 1
+            return False
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats a log record as a JSON object on one line: the time, level, logger and message of the record, and the
+    number of records dropped by a RateLimitFilter before it (if any)."""
+
+    def format(self, record: logging.LogRecord) -> Text:
+        entry = {'time': record.created, 'level': record.levelname, 'logger': record.name,
+                 'message': record.getMessage()}
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            entry['suppressed'] = suppressed
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Queues log records without formatting their messages; they are formatted by the handler of the queue listener.
+    Arguments which could change before the record is formatted are converted to text when the record is queued."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if isinstance(args, tuple):
+            if not all(isinstance(arg, _IMMUTABLE_ARG_TYPES) for arg in args):
+                record.args = tuple(arg if isinstance(arg, _IMMUTABLE_ARG_TYPES) else str(arg) for arg in args)
+        elif isinstance(args, collections.abc.Mapping):
+            record.args = {key: value if isinstance(value, _IMMUTABLE_ARG_TYPES) else str(value) for key, value in
+                           args.items()}
+        return record
+
+
+class _LoggingConfiguration(object):
+    """Handlers, filter and listener added to the root logger for a session."""
+
+    def __init__(self) -> None:
+        self.handlers = []
+        self.rateLimitFilter = None
+        self.listener = None
+        self.disabled = False
+
+
+_activeConfiguration = None
+_configurationLock = threading.Lock()
+
+
+def configureLogging(loggingMode: LoggingModes, logFile: Optional[Text],
+                     maxRecordsPerSecond: Optional[int] = None) -> None:
+    """Configure the root logger for a session, replacing the configuration of the previous session.
+
+    With TEXT, the root logger is configured with logging.basicConfig as before (which does nothing if the root logger
+    already has handlers).  Nothing is written by TEXT and JSON_LINES if logFile is None.
+
+    :param loggingMode: how the log records are written.
+    :param logFile: file the log records are written to.
+    :param maxRecordsPerSecond: maximum number of records of each category (logger, level and message template) logged
+                                to the root logger per second; None for no limit.
+    """
+    global _activeConfiguration
+    closeLogging()
+    configuration = _LoggingConfiguration()
+    rootLogger = logging.getLogger()
+    if loggingMode == LoggingModes.SILENT:
+        logging.disable(logging.CRITICAL)
+        configuration.disabled = True
+    elif logFile is not None:
+        if loggingMode == LoggingModes.JSON_LINES:
+            fileHandler = logging.FileHandler(logFile)
+            fileHandler.setFormatter(JsonLinesFormatter())
+            recordQueue = queue.SimpleQueue()
+            configuration.listener = logging.handlers.QueueListener(recordQueue, fileHandler)
+            configuration.listener.start()
+            queueHandler = LazyQueueHandler(recordQueue)
+            rootLogger.addHandler(queueHandler)
+            rootLogger.setLevel(logging.DEBUG)
+            configuration.handlers = [queueHandler, fileHandler]
+        else:
+            logging.basicConfig(filename=logFile, level=logging.DEBUG)
+    if maxRecordsPerSecond is not None and not configuration.disabled:
+        configuration.rateLimitFilter = RateLimitFilter(maxRecordsPerSecond)
+        rootLogger.addFilter(configuration.rateLimitFilter)
+    with _configurationLock:
+        _activeConfiguration = configuration
+
+
+def closeLogging() -> None:
+    """Write the queued log records and remove the configuration added by configureLogging; called at exit."""
+    global _activeConfiguration
+    with _configurationLock:
+        configuration, _activeConfiguration = _activeConfiguration, None
+    if configuration is None:
+        return
+    rootLogger = logging.getLogger()
+    if configuration.listener is not None:
+        # Stopping the listener writes the records which are still queued.
+        configuration.listener.stop()
+    for handler in configuration.handlers:
+        rootLogger.removeHandler(handler)
+        handler.close()
+    if configuration.rateLimitFilter is not None:
+        rootLogger.removeFilter(configuration.rateLimitFilter)
+    if configuration.disabled:
+        logging.disable(logging.NOTSET)
+
+
+atexit.register(closeLogging)
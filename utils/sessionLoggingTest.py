@@ -0,0 +1,76 @@
+import json
+import logging
+import os
+import tempfile
+import unittest
+import backTester
+from utils import sessionLogging
+
+
+class TestSessionLogging(unittest.TestCase):
+
+    def tearDown(self):
+        sessionLogging.closeLogging()
+
+    def createRecord(self, msg, args=()):
+        return logging.LogRecord('root', logging.WARNING, __file__, 1, msg, args, None)
+
+    def testRateLimitFilter(self):
+        """Tests that records beyond the limit of their category are dropped and counted on the next kept record."""
+        now = [0.0]
+        rateLimitFilter = sessionLogging.RateLimitFilter(2, periodSeconds=1.0, clock=lambda: now[0])
+        kept = [rateLimitFilter.filter(self.createRecord('No signal: %s', (i,))) for i in range(5)]
+        self.assertEqual(kept, [True, True, False, False, False])
+        # Other categories have their own limit.
+        self.assertTrue(rateLimitFilter.filter(self.createRecord('Position closed.')))
+        now[0] = 1.0
+        record = self.createRecord('No signal: %s', (5,))
+        self.assertTrue(rateLimitFilter.filter(record))
+        self.assertEqual(record.suppressed, 3)
+        with self.assertRaisesRegex(ValueError, 'Max records per period must be a positive'):
+            sessionLogging.RateLimitFilter(0)
+
+    def testLazyQueueHandlerConvertsMutableArgs(self):
+        """Tests that arguments which could change before the record is formatted are converted to text."""
+        handler = sessionLogging.LazyQueueHandler(None)
+        reasons = {'putToBuy': 'NO_DELTA'}
+        record = handler.prepare(self.createRecord('Reason: %s %s', (reasons, 3)))
+        reasons['putToSell'] = 'NO_DTE'
+        self.assertEqual(record.getMessage(), "Reason: {'putToBuy': 'NO_DELTA'} 3")
+
+    def testJsonLines(self):
+        """Tests that records are written as JSON lines by the background thread, including the suppressed count."""
+        with tempfile.TemporaryDirectory() as tmpDir:
+            logFile = os.path.join(tmpDir, 'log.jsonl')
+            sessionLogging.configureLogging(sessionLogging.LoggingModes.JSON_LINES, logFile, maxRecordsPerSecond=1)
+            for i in range(3):
+                logging.warning('Could not execute strategy: %s', i)
+            logging.info('Date: %s', '01/04/2011')
+            sessionLogging.closeLogging()
+            with open(logFile) as jsonFile:
+                entries = [json.loads(line) for line in jsonFile]
+        self.assertEqual([entry['message'] for entry in entries],
+                         ['Could not execute strategy: 0', 'Date: 01/04/2011'])
+        self.assertEqual(entries[0]['level'], 'WARNING')
+        self.assertEqual(entries[0]['logger'], 'root')
+
+    def testSilent(self):
+        """Tests that logging is disabled in SILENT mode until the logging is closed."""
+        sessionLogging.configureLogging(sessionLogging.LoggingModes.SILENT, 'unused.log')
+        self.assertFalse(logging.getLogger().isEnabledFor(logging.CRITICAL))
+        self.assertFalse(os.path.exists('unused.log'))
+        sessionLogging.closeLogging()
+        self.assertTrue(logging.getLogger().isEnabledFor(logging.CRITICAL))
+
+    def testSilentSessionResults(self):
+        """Tests that a session produces the same results with logging disabled."""
+        session = backTester.BackTestSession(backTester.BackTestParameters(logFile=None))
+        backTester.run(session)
+        silentSession = backTester.BackTestSession(
+            backTester.BackTestParameters(loggingMode=sessionLogging.LoggingModes.SILENT))
+        backTester.run(silentSession)
+        self.assertEqual(silentSession.positionMonitoring, session.positionMonitoring)
+
+
+if __name__ == '__main__':
+    unittest.main()